@@ -0,0 +1,183 @@
+"""
+Benchmark for joining tables from asynchronous adapters.
+
+Starts a local HTTP server that responds after a fixed latency, and joins two
+tables served by it, using an adapter that implements ``get_data`` with
+``requests`` and one that implements ``get_data_async`` with ``asyncio``. With the
+synchronous adapter the latency of the query is the sum of the latencies of the
+tables; with the asynchronous adapter both scans start when the cursors are opened,
+and the latency is close to the maximum::
+
+    $ python benchmarks/async_join.py --latency 0.2 --rows 100 --repeat 5
+
+A scan cache is used in both cases, since SQLite scans the inner table of the join
+once for each row of the outer table.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from shillelagh.adapters.base import Adapter
+from shillelagh.adapters.registry import registry
+from shillelagh.backends.apsw.cache import ScanCache
+from shillelagh.backends.apsw.db import connect
+from shillelagh.fields import Field, Integer, String
+from shillelagh.filters import Filter
+from shillelagh.typing import RequestedOrder, Row
+
+
+def make_handler(latency: float, num_rows: int) -> type:
+    """
+    Build a request handler that returns rows after a delay.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Return ``num_rows`` rows as JSON.
+        """
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """
+            Handle a GET request.
+            """
+            time.sleep(latency)
+            body = json.dumps(
+                [{"id": i, "name": f"{self.path}-{i}"} for i in range(num_rows)],
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+            pass
+
+    return Handler
+
+
+class SyncHTTPAdapter(Adapter):
+    """
+    An adapter that reads rows with a blocking HTTP client.
+    """
+
+    prefix = "/sync/"
+
+    id = Integer()
+    name = String()
+
+    @classmethod
+    def supports(cls, uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
+        return urllib.parse.urlparse(uri).path.startswith(cls.prefix)
+
+    @staticmethod
+    def parse_uri(uri: str) -> Tuple[str]:
+        return (uri,)
+
+    def __init__(self, uri: str):
+        super().__init__()
+        self.uri = uri
+
+    def get_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Row]:
+        response = requests.get(self.uri, timeout=60)
+        for i, row in enumerate(response.json()):
+            yield {"rowid": i, **row}
+
+    def get_columns(self) -> Dict[str, Field]:
+        return {"id": self.id, "name": self.name}
+
+
+class AsyncHTTPAdapter(SyncHTTPAdapter):
+    """
+    An adapter that reads rows with an asynchronous HTTP client.
+    """
+
+    prefix = "/async/"
+
+    async def get_data_async(  # type: ignore
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> AsyncIterator[Row]:
+        parsed = urllib.parse.urlparse(self.uri)
+        reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port)
+        writer.write(f"GET {parsed.path} HTTP/1.0\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+
+        _, body = response.split(b"\r\n\r\n", 1)
+        for i, row in enumerate(json.loads(body)):
+            yield {"rowid": i, **row}
+
+
+def run_join(server_url: str, prefix: str, repeat: int) -> float:
+    """
+    Return the average time to join two tables.
+    """
+    sql = f"""
+        SELECT COUNT(*)
+        FROM "{server_url}{prefix}a" AS a
+        JOIN "{server_url}{prefix}b" AS b ON a.id = b.id
+    """
+    elapsed = 0.0
+    for _ in range(repeat):
+        # a new cache each time, so that every query reads the tables
+        connection = connect(
+            ":memory:",
+            ["synchttp", "asynchttp"],
+            scan_cache=ScanCache(),
+        )
+        cursor = connection.cursor()
+        start = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        elapsed += time.perf_counter() - start
+        connection.close()
+
+    return elapsed / repeat
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0),
+        make_handler(args.latency, args.rows),
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    registry.add("synchttp", SyncHTTPAdapter)
+    registry.add("asynchttp", AsyncHTTPAdapter)
+
+    try:
+        for name, prefix in [("sync", "/sync/"), ("async", "/async/")]:
+            elapsed = run_join(server_url, prefix, args.repeat)
+            print(f"{name:>6}: {1e3 * elapsed:.1f} ms per query")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
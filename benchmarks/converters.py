@@ -0,0 +1,119 @@
+"""
+Microbenchmark for the row conversion pipeline in the APSW backend.
+
+Compares the legacy per-row conversion (instantiating fields and building a
+dictionary for each row) with the compiled per-column converters used by
+``VTCursor``, on a wide table::
+
+    $ python benchmarks/converters.py --rows 100000 --columns 50
+
+"""
+import argparse
+import json
+import time
+import urllib.parse
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from shillelagh.adapters.base import Adapter
+from shillelagh.backends.apsw.vt import VTTable, type_map
+from shillelagh.fields import Field, Float, Integer, RowID, String
+from shillelagh.filters import Filter
+from shillelagh.typing import RequestedOrder, Row
+
+
+class WideAdapter(Adapter):
+    """
+    An in-memory adapter with many columns, for URIs like ``wide://1000/50``.
+    """
+
+    scheme = "wide"
+    safe = True
+
+    @classmethod
+    def supports(cls, uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
+        return urllib.parse.urlparse(uri).scheme == cls.scheme
+
+    @staticmethod
+    def parse_uri(uri: str) -> Tuple[int, int]:
+        parsed = urllib.parse.urlparse(uri)
+        return int(parsed.netloc), int(parsed.path.strip("/"))
+
+    def __init__(
+        self, num_rows: int, num_columns: int
+    ):  # pylint: disable=super-init-not-called
+        fields = [Integer, Float, String]
+        self.columns: Dict[str, Field] = {
+            f"col{i}": fields[i % len(fields)]() for i in range(num_columns)
+        }
+        values = {Integer: 1, Float: 1.0, String: "a"}
+        template = {name: values[type(field)] for name, field in self.columns.items()}
+        self.data = [{"rowid": i, **template} for i in range(num_rows)]
+
+    def get_columns(self) -> Dict[str, Field]:
+        return self.columns
+
+    def get_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Row]:
+        return iter(self.data)
+
+
+def legacy_scan(adapter: WideAdapter) -> int:
+    """
+    Scan the table the way ``VTCursor`` did before compiled converters.
+    """
+    columns = adapter.get_columns()
+    column_names = list(columns)
+    parsers = {name: field.parse for name, field in columns.items()}
+    parsers["rowid"] = RowID().parse
+    rows = (
+        {name: parsers[name](value) for name, value in row.items() if name in parsers}
+        for row in adapter.get_data({}, [])
+    )
+    converters = {
+        name: type_map[field.type]().format for name, field in columns.items()
+    }
+    converters["rowid"] = RowID().format
+    sqlite_rows = (
+        {name: converters[name](value) for name, value in row.items()} for row in rows
+    )
+    data = (
+        tuple(row.get(name) for name in ["rowid", *column_names]) for row in sqlite_rows
+    )
+    return sum(1 for _ in data)
+
+
+def compiled_scan(adapter: WideAdapter) -> int:
+    """
+    Scan the table using ``VTCursor``.
+    """
+    cursor = VTTable(adapter).Open()
+    cursor.Filter(42, json.dumps({"indexes": [], "orderbys_to_process": []}), [])
+    return sum(1 for _ in cursor.data) + 1
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=50)
+    args = parser.parse_args()
+
+    adapter = WideAdapter(args.rows, args.columns)
+    for name, scan in [("legacy", legacy_scan), ("compiled", compiled_scan)]:
+        start = time.perf_counter()
+        count = scan(adapter)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>10}: {count} rows in {elapsed:.3f}s "
+            f"({1e6 * elapsed / count:.2f} µs/row)",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Microbenchmark for finding the adapter for a Pandas dataframe.
+
+Measures the latency of ``find_adapter`` for a dataframe queried from deep in the
+call stack (like in a web server or a task worker), comparing the previous
+implementation based on ``inspect.stack``, the ``sys._getframe`` fallback, and the
+registry::
+
+    $ python benchmarks/dataframe_discovery.py --depth 50 --repeat 100
+
+"""
+import argparse
+import inspect
+import time
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from shillelagh.adapters.memory.pandas import (
+    PandasMemory,
+    register_dataframe,
+    unregister_dataframe,
+)
+from shillelagh.adapters.registry import registry
+from shillelagh.lib import find_adapter
+
+
+def legacy_find_dataframe(uri: str) -> Optional[pd.DataFrame]:
+    """
+    Find the dataframe the way ``PandasMemory`` did before the registry.
+    """
+    for level in inspect.stack():
+        context_locals = dict(inspect.getmembers(level[0]))["f_locals"]
+        if uri in context_locals and isinstance(context_locals[uri], pd.DataFrame):
+            return context_locals[uri]
+
+        context_globals = dict(inspect.getmembers(level[0]))["f_globals"]
+        if uri in context_globals and isinstance(context_globals[uri], pd.DataFrame):
+            return context_globals[uri]
+
+    return None
+
+
+def legacy_supports(  # pylint: disable=unused-argument
+    uri: str,
+    fast: bool = True,
+    **kwargs: Any,
+) -> Optional[bool]:
+    """
+    The previous ``PandasMemory.supports``.
+    """
+    return legacy_find_dataframe(uri) is not None
+
+
+def at_depth(depth: int, function: Callable[[], float]) -> float:
+    """
+    Call a function with ``depth`` extra frames in the stack.
+    """
+    if depth == 0:
+        return function()
+    return at_depth(depth - 1, function)
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    adapters = list(registry.load_all(safe=False).values())
+    mydf = pd.DataFrame({"a": [1, 2, 3]})  # pylint: disable=unused-variable
+
+    def measure() -> float:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            adapter, _, _ = find_adapter("mydf", {}, adapters)
+            assert adapter is PandasMemory
+        return (time.perf_counter() - start) / args.repeat
+
+    original_supports = PandasMemory.supports
+    PandasMemory.supports = staticmethod(legacy_supports)  # type: ignore
+    try:
+        legacy = at_depth(args.depth, measure)
+    finally:
+        PandasMemory.supports = original_supports  # type: ignore
+
+    fallback = at_depth(args.depth, measure)
+
+    # the local variable is no longer needed
+    register_dataframe("mydf", mydf)
+    del mydf
+    try:
+        registered = at_depth(args.depth, measure)
+    finally:
+        unregister_dataframe("mydf")
+
+    for name, elapsed in [
+        ("legacy", legacy),
+        ("fallback", fallback),
+        ("registry", registered),
+    ]:
+        print(f"{name:>10}: {1e3 * elapsed:.3f} ms per lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark for inserting rows into a CSV file with ``executemany``.
+
+Compares inserting rows with one ``execute`` per row, where each statement runs in
+its own transaction and the file is opened for every row, with a single call to
+``executemany``, where the rows are buffered and appended to the file in batches::
+
+    $ python benchmarks/executemany.py --rows 10000
+
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, List, Tuple
+
+from shillelagh.backends.apsw.db import connect
+
+
+def run(path: str, rows: List[Tuple[Any, ...]], bulk: bool) -> float:
+    """
+    Insert rows into an empty CSV file, returning the elapsed time.
+    """
+    with open(path, "w", encoding="utf-8") as csvfile:
+        csvfile.write('"id","name"\n1,"first"\n')
+
+    connection = connect(":memory:", ["csvfile"])
+    cursor = connection.cursor()
+    sql = f'INSERT INTO "{path}" (id, name) VALUES (?, ?)'
+
+    start = time.perf_counter()
+    if bulk:
+        cursor.executemany(sql, rows)
+    else:
+        for row in rows:
+            cursor.execute(sql, row)
+    connection.close()
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = [(i, f"row {i}") for i in range(args.rows)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "test.csv")
+        execute = run(path, rows, bulk=False)
+        executemany = run(path, rows, bulk=True)
+
+    print(f"execute     {1e3 * execute:>9.1f} ms")
+    print(f"executemany {1e3 * executemany:>9.1f} ms")
+    print(f"speedup     {execute / executemany:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
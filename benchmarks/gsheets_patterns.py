@@ -0,0 +1,95 @@
+"""
+Benchmark for parsing Google Sheets values with ICU patterns.
+
+Parses a column of values for each pattern used in the parsing tests, comparing the
+time when the pattern is tokenized for every value (clearing the cache before each
+call, which is how values used to be parsed) with the time when it's tokenized once
+and reused. The default timestamp pattern also uses a regular expression::
+
+    $ python benchmarks/gsheets_patterns.py --rows 10000
+
+"""
+import argparse
+import time
+from datetime import date, datetime
+from datetime import time as time_
+from datetime import timedelta
+from typing import Any, Callable, List, Tuple
+
+from shillelagh.adapters.api.gsheets.parsing.date import (
+    get_date_time_pattern,
+    parse_date_time_pattern,
+)
+from shillelagh.adapters.api.gsheets.parsing.number import (
+    get_tokens,
+    parse_number_pattern,
+)
+
+DATE_TIME_PATTERNS: List[Tuple[str, str, type]] = [
+    ("9/1/2018 0:00:00", "m/d/yyyy h:mm:ss", datetime),
+    ("9/1/2018", "m/d/yyyy", date),
+    ("4:08:53.53 p", "h:mm:ss.00 a/p", time_),
+    ("04:08 P.M.", 'hh:mm A/P".M."', time_),
+    ("2016-04-05", "yyyy-mm-dd", date),
+    ("03:13:41.255", "[hh]:[mm]:[ss].000", timedelta),
+    ("2021/11/12 01:14:15.167 PM", "yyyy/mm/dd hh:mm:ss.000 am/pm", datetime),
+]
+
+NUMBER_PATTERNS: List[Tuple[str, str]] = [
+    ("1,234.56", "#,##0.00"),
+    ("12.30%", "0.00%"),
+    ("1.23E+03", "0.00E+00"),
+    ("($1,234.00)", '"$"#,##0.00_);("$"#,##0.00)'),
+]
+
+
+def run(function: Callable[[], Any], rows: int, clear: Callable[[], None]) -> float:
+    """
+    Return the time to call a function ``rows`` times, clearing the cache each time.
+    """
+    start = time.perf_counter()
+    for _ in range(rows):
+        clear()
+        function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'pattern':<32} {'tokenized':>12} {'cached':>12} {'speedup':>8}")
+
+    cases: List[Tuple[str, Callable[[], Any], Callable[[], None]]] = []
+    for value, pattern, class_ in DATE_TIME_PATTERNS:
+        cases.append(
+            (
+                pattern,
+                lambda v=value, p=pattern, c=class_: parse_date_time_pattern(v, p, c),
+                get_date_time_pattern.cache_clear,
+            ),
+        )
+    for value, pattern in NUMBER_PATTERNS:
+        cases.append(
+            (
+                pattern,
+                lambda v=value, p=pattern: parse_number_pattern(v, p),
+                get_tokens.cache_clear,
+            ),
+        )
+
+    for pattern, function, clear in cases:
+        uncached = run(function, args.rows, clear)
+        cached = run(function, args.rows, lambda: None)
+        print(
+            f"{pattern:<32} {1e3 * uncached:>9.1f} ms {1e3 * cached:>9.1f} ms "
+            f"{uncached / cached:>7.1f}x",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark for buffering the inner table of nested-loop joins.
+
+Starts a local HTTP server with two JSON APIs, each returning ``N`` rows and
+supporting a filter on the ``id`` column, and joins them with the generic JSON
+adapter. SQLite filters the inner table once for each row of the outer table; without
+the buffer each call results in a request to the API, while with the buffer the
+inner table is read once, and the remaining calls are answered from memory::
+
+    $ python benchmarks/join_buffer.py --rows 1000
+
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, Optional, Tuple
+from unittest import mock
+
+from shillelagh.backends.apsw.db import connect
+from shillelagh.backends.apsw.vt import VTCursor
+
+
+def make_handler(num_rows: int, counter: Iterator[int]) -> type:
+    """
+    Build a request handler that returns rows, optionally filtered by ``id``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Return ``num_rows`` rows as JSON.
+        """
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """
+            Handle a GET request.
+            """
+            next(counter)
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            ids = [int(query["id"][0])] if "id" in query else range(num_rows)
+            body = json.dumps(
+                [{"id": i, "name": f"row {i}"} for i in ids if 0 <= i < num_rows],
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+            """
+            Handle a HEAD request, used to detect the content type.
+            """
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+
+        def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+            pass
+
+    return Handler
+
+
+class Counter:
+    """
+    A thread-safe counter of requests.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[int]:
+        return self
+
+    def __next__(self) -> int:
+        with self._lock:
+            self.count += 1
+            return self.count
+
+
+def run(port: int, counter: Counter, buffered: bool) -> Tuple[float, int]:
+    """
+    Run the join, returning the time and number of requests.
+    """
+    connection = connect(
+        ":memory:",
+        ["genericjsonapi"],
+        adapter_kwargs={
+            "genericjsonapi": {
+                "cache_expiration": -1,
+                "pushdown": {"filters": {"id": {"==": "id"}}},
+            },
+        },
+    )
+    cursor = connection.cursor()
+    sql = f"""
+        SELECT COUNT(*)
+        FROM "http://localhost:{port}/a" AS a
+        JOIN "http://localhost:{port}/b" AS b ON a.id = b.id
+    """
+    # discover the columns before measuring
+    cursor.execute(f'SELECT * FROM "http://localhost:{port}/a" LIMIT 0').fetchall()
+    cursor.execute(f'SELECT * FROM "http://localhost:{port}/b" LIMIT 0').fetchall()
+
+    patch: Optional[Any] = None
+    if not buffered:
+        patch = mock.patch.object(VTCursor, "_get_buffered_rows", return_value=None)
+        patch.start()
+
+    counter.count = 0
+    start = time.perf_counter()
+    cursor.execute(sql).fetchall()
+    elapsed = time.perf_counter() - start
+
+    if patch is not None:
+        patch.stop()
+
+    return elapsed, counter.count
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    counter = Counter()
+    server = ThreadingHTTPServer(("localhost", 0), make_handler(args.rows, counter))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+
+    try:
+        for name, buffered in [("streaming", False), ("buffered", True)]:
+            elapsed, requests = run(port, counter, buffered)
+            print(f"{name:<10} {1e3 * elapsed:>9.1f} ms {requests:>6} requests")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark for join plans chosen with table statistics.
+
+Joins a small table with a large one, where each scan has a fixed latency, like an
+API call, and reading each row also takes time. Without statistics both tables have
+the same estimated cost, and SQLite might scan the large table once for each row of
+the small one, or do a full scan of the large table in the outer loop. Once both
+tables have been scanned the observed number of rows and scan times are used to
+estimate the cost of each plan::
+
+    $ python benchmarks/join_statistics.py --rows 1000 --latency 0.05
+
+"""
+import argparse
+import time
+import urllib.parse
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from shillelagh.adapters.base import Adapter
+from shillelagh.adapters.registry import registry
+from shillelagh.backends.apsw.db import connect
+from shillelagh.fields import Integer, Order, String
+from shillelagh.filters import Equal, Filter
+from shillelagh.typing import RequestedOrder, Row
+
+LATENCY = 0.05
+ROW_LATENCY = 1e-5
+
+
+class SlowAdapter(Adapter):
+    """
+    An adapter with ``N`` rows, where each scan has a fixed latency.
+    """
+
+    scheme = "slow"
+    safe = True
+
+    id = Integer(filters=[Equal], order=Order.NONE, exact=True)
+    name = String()
+
+    scans = 0
+
+    @classmethod
+    def supports(cls, uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
+        return urllib.parse.urlparse(uri).scheme == cls.scheme
+
+    @staticmethod
+    def parse_uri(uri: str) -> Tuple[int]:
+        return (int(urllib.parse.urlparse(uri).netloc),)
+
+    def __init__(self, rows: int):
+        super().__init__()
+        self.rows = rows
+
+    def get_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Row]:
+        SlowAdapter.scans += 1
+        time.sleep(LATENCY)
+
+        ids = (
+            [bounds["id"].value] if "id" in bounds else range(self.rows)  # type: ignore
+        )
+        for id_ in ids:
+            if 0 <= id_ < self.rows:
+                time.sleep(ROW_LATENCY)
+                yield {"rowid": id_, "id": id_, "name": f"row {id_}"}
+
+
+def run(sql: str) -> Tuple[float, int, List[str]]:
+    """
+    Run a query, returning the time, number of scans, and plan.
+    """
+    cursor = connect(
+        ":memory:",
+        ["slow"],
+        isolation_level="IMMEDIATE",
+        statistics=True,
+    ).cursor()
+    plan = [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+    SlowAdapter.scans = 0
+    start = time.perf_counter()
+    cursor.execute(sql).fetchall()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, SlowAdapter.scans, plan
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    global LATENCY  # pylint: disable=global-statement
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--small", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=LATENCY)
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    registry.add("slow", SlowAdapter)
+    sql = f"""
+        SELECT small.name, large.name
+        FROM "slow://{args.small}" AS small
+        JOIN "slow://{args.rows}" AS large ON large.id = small.id
+    """
+
+    results = {"cold": run(sql)}
+
+    # full scans of both tables collect the statistics
+    cursor = connect(":memory:", ["slow"], statistics=True).cursor()
+    cursor.execute(f'SELECT * FROM "slow://{args.small}"').fetchall()
+    cursor.execute(f'SELECT * FROM "slow://{args.rows}"').fetchall()
+
+    results["warm"] = run(sql)
+
+    for name, (elapsed, scans, plan) in results.items():
+        print(f"{name}: {1e3 * elapsed:.1f} ms, {scans} scans")
+        for line in plan:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark for inserting and deleting rows in dataframes.
+
+Inserts ``N`` rows into a dataframe with a single ``INSERT ... SELECT``, and then
+deletes half of them. Rows are buffered by the adapter and applied to the dataframe
+in bulk at the end of each statement, instead of reallocating the dataframe for
+every row. For comparison, the same changes are also applied one row at a time,
+with ``loc`` and ``drop``::
+
+    $ python benchmarks/pandas_dml.py --rows 10000
+
+"""
+import argparse
+import time
+from typing import Tuple
+
+import pandas as pd
+
+from shillelagh.backends.apsw.db import connect
+
+
+def run_sql(num_rows: int) -> Tuple[float, float]:
+    """
+    Insert and delete rows via SQL, returning the time of each statement.
+    """
+    df = pd.DataFrame({"a": [0], "b": ["row 0"]})
+    connection = connect(":memory:", dataframes={"df": df})
+    cursor = connection.cursor()
+
+    start = time.perf_counter()
+    cursor.execute(
+        f"""
+        WITH RECURSIVE numbers(n) AS (
+            SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < {num_rows}
+        )
+        INSERT INTO df (a, b) SELECT n, 'row ' || n FROM numbers
+        """,
+    )
+    inserted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cursor.execute("DELETE FROM df WHERE a % 2 = 0")
+    deleted = time.perf_counter() - start
+
+    assert len(df) == (num_rows + 1) // 2
+    connection.close()
+
+    return inserted, deleted
+
+
+def run_rows(num_rows: int) -> Tuple[float, float]:
+    """
+    Insert and delete rows one at a time, returning the time of each operation.
+    """
+    df = pd.DataFrame({"a": [0], "b": ["row 0"]})
+
+    start = time.perf_counter()
+    for i in range(1, num_rows + 1):
+        df.loc[max(df.index) + 1] = {"a": i, "b": f"row {i}"}
+    inserted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row_id in df.index[df["a"] % 2 == 0]:
+        df.drop([row_id], inplace=True)
+    deleted = time.perf_counter() - start
+
+    assert len(df) == (num_rows + 1) // 2
+
+    return inserted, deleted
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    for name, function in [("row by row", run_rows), ("buffered", run_sql)]:
+        inserted, deleted = function(args.rows)
+        print(
+            f"{name:<11} insert {1e3 * inserted:>9.1f} ms, "
+            f"delete {1e3 * deleted:>9.1f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark for the row ID manager used by append-only adapters, like the CSV one.
+
+Deletes ``K`` random rows from tables of increasing size, inserts the same number of
+rows, and iterates over all the row IDs. Row IDs are found with a binary search, and
+the maximum row ID is known without a scan, so the time per operation should not
+grow with the size of the table::
+
+    $ python benchmarks/row_id_manager.py --changes 10000
+
+"""
+import argparse
+import random
+import time
+
+from shillelagh.lib import RowIDManager
+
+
+def main() -> None:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--changes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for num_rows in [10**5, 10**6, 10**7]:
+        manager = RowIDManager([range(0, num_rows)])
+        row_ids = rng.sample(range(num_rows), args.changes)
+
+        start = time.perf_counter()
+        for row_id in row_ids:
+            manager.delete(row_id)
+        deleted = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.changes):
+            manager.insert()
+        inserted = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in manager:
+            pass
+        iterated = time.perf_counter() - start
+
+        print(
+            f"{num_rows:>10} rows: "
+            f"delete {1e6 * deleted / args.changes:>6.2f} us, "
+            f"insert {1e6 * inserted / args.changes:>6.2f} us, "
+            f"iterate {1e3 * iterated:>8.1f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
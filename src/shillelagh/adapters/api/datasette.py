@@ -15,7 +15,7 @@ from shillelagh.adapters.base import Adapter
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Field, Float, Integer, ISODate, ISODateTime, Order, String
 from shillelagh.filters import Equal, Filter, IsNotNull, IsNull, Like, NotEqual, Range
-from shillelagh.lib import SimpleCostModel, build_sql, get_session
+from shillelagh.lib import SimpleCostModel, build_sql, get_session, prefetch
 from shillelagh.typing import RequestedOrder, Row
 
 _logger = logging.getLogger(__name__)
@@ -99,6 +99,9 @@ class DatasetteAPI(Adapter):
     supports_limit = True
     supports_offset = True
 
+    # maximum number of pages fetched concurrently
+    prefetch_workers = 4
+
     @staticmethod
     def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
         parsed = urllib.parse.urlparse(uri)
@@ -174,14 +177,55 @@ class DatasetteAPI(Adapter):
         **kwargs: Any,
     ) -> Iterator[Row]:
         offset = offset or 0
+        workers = self.prefetch_workers
         while True:
-            if limit is None:
-                # request 1 more, so we know if there are more pages to be fetched
-                end = DEFAULT_LIMIT + 1
-            else:
-                end = min(limit, DEFAULT_LIMIT + 1)
+            payload: Dict[str, Any] = {}
+            rows: List[List[Any]] = []
+            for payload in prefetch(
+                self._run_query,
+                self._get_queries(bounds, order, limit, offset),
+                workers,
+                # pages are full when they have the extra row
+                is_last=lambda payload: len(payload.get("rows", [])) <= DEFAULT_LIMIT,
+            ):
+                if payload.get("error"):
+                    raise ProgrammingError(
+                        f'Error ({payload["title"]}): {payload["error"]}',
+                    )
+
+                columns = payload["columns"]
+                rows = payload["rows"][:DEFAULT_LIMIT]
+                for i, values in enumerate(rows):
+                    row = dict(zip(columns, values))
+                    row["rowid"] = i
+                    _logger.debug(row)
+                    yield row
+
+                offset += len(rows)
+                if limit is not None:
+                    limit -= len(rows)
+
+            # the server truncates results when it has a lower limit than ours, in
+            # which case we continue from the last row returned; since the page size
+            # is not known the remaining pages are fetched sequentially
+            if not payload.get("truncated") or not rows or limit == 0:
+                break
+            workers = 1
 
-            sql = build_sql(
+    def _get_queries(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int],
+        offset: int,
+    ) -> Iterator[str]:
+        """
+        Build the queries for consecutive pages, assuming they are full.
+        """
+        while limit is None or limit > 0:
+            # request 1 more, so we know if there are more pages to be fetched
+            end = DEFAULT_LIMIT + 1 if limit is None else min(limit, DEFAULT_LIMIT + 1)
+            yield build_sql(
                 self.columns,
                 bounds,
                 order,
@@ -189,26 +233,7 @@ class DatasetteAPI(Adapter):
                 limit=end,
                 offset=offset,
             )
-            payload = self._run_query(sql)
-
-            if payload.get("error"):
-                raise ProgrammingError(
-                    f'Error ({payload["title"]}): {payload["error"]}',
-                )
-
-            columns = payload["columns"]
-            rows = payload["rows"]
-
-            i = -1
-            for i, values in enumerate(rows[:DEFAULT_LIMIT]):
-                row = dict(zip(columns, values))
-                row["rowid"] = i
-                _logger.debug(row)
-                yield row
-
-            if not payload["truncated"] and len(rows) <= DEFAULT_LIMIT:
-                break
 
-            offset += i + 1
+            offset += DEFAULT_LIMIT
             if limit is not None:
-                limit -= i + 1
+                limit -= DEFAULT_LIMIT
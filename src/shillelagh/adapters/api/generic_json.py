@@ -4,19 +4,36 @@ An adapter for fetching JSON data.
 
 # pylint: disable=invalid-name
 
+import itertools
 import logging
-from datetime import timedelta
-from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+import re
+from datetime import date, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type, Union, cast
 
+import ijson
 import jsonpath
 import prison
+import requests
+from typing_extensions import Literal, TypedDict
 from yarl import URL
 
 from shillelagh.adapters.base import Adapter
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Field, Order
-from shillelagh.filters import Filter
-from shillelagh.lib import SimpleCostModel, analyze, flatten, get_session
+from shillelagh.filters import Equal, Filter, Impossible, NotEqual, Operator, Range
+from shillelagh.lib import (
+    ChunkReader,
+    NetworkAPICostModel,
+    Sampling,
+    SimpleCostModel,
+    analyze,
+    analyze_sample,
+    apply_limit_and_offset,
+    filter_data,
+    flatten,
+    get_session,
+    widen_types,
+)
 from shillelagh.typing import Maybe, RequestedOrder, Row
 
 _logger = logging.getLogger(__name__)
@@ -26,8 +43,179 @@ AVERAGE_NUMBER_OF_ROWS = 100
 REQUEST_HEADERS_KEY = "_s_headers"
 CACHE_EXPIRATION = timedelta(minutes=3)
 
+# size of the chunks read when streaming responses
+CHUNK_SIZE = 64 * 1024
 
-class GenericJSONAPI(Adapter):
+# operators that can be mapped to query parameters, and the corresponding filters
+FILTER_OPERATORS: Dict[str, Type[Filter]] = {
+    "==": Equal,
+    "!=": NotEqual,
+    ">": Range,
+    ">=": Range,
+    "<": Range,
+    "<=": Range,
+}
+
+PAGINATION_TYPES = {"link", "cursor", "page", "offset"}
+
+
+class Pagination(TypedDict, total=False):
+    """
+    How to fetch the pages of a paginated API.
+
+    The ``type`` can be:
+
+    - ``link``: the URL of the next page is in the ``Link`` header;
+    - ``cursor``: a token for the next page is in the payload, at the JSONPath
+      ``path``, and is passed in the ``param`` query parameter;
+    - ``page``: pages are numbered, starting from ``start`` (1 by default), and the
+      number is passed in the ``param`` query parameter;
+    - ``offset``: the offset of the first row is passed in the ``param`` query
+      parameter.
+
+    The number of rows per page is passed in ``size_param``, if present. For ``page``
+    the ``size`` is required, in order to compute the first page to fetch.
+    """
+
+    type: Literal["link", "cursor", "page", "offset"]
+    param: str
+    path: str
+    size: int
+    size_param: str
+    start: int
+
+
+class OrderParameters(TypedDict, total=False):
+    """
+    Query parameters used to sort a column.
+    """
+
+    ascending: Dict[str, str]
+    descending: Dict[str, str]
+
+
+class Pushdown(TypedDict, total=False):
+    """
+    How to map filters, sorting, limit, and offset to query parameters.
+
+    Filters are a mapping from column names to operators (``==``, ``!=``, ``>``,
+    ``>=``, ``<``, and ``<=``) and the query parameter where the value is passed.
+    """
+
+    filters: Dict[str, Dict[str, str]]
+    order: Dict[str, OrderParameters]
+    limit: str
+    offset: str
+    columns: str
+    pagination: Pagination
+
+
+def get_items_prefix(path: str) -> Optional[str]:
+    """
+    Convert a JSONPath selecting the elements of an array to an ``ijson`` prefix.
+
+    Only paths like ``$.a.b[*]`` can be streamed; for other paths ``None`` is returned,
+    and the whole document is parsed:
+
+        >>> get_items_prefix("$[*]")
+        'item'
+        >>> get_items_prefix("$.a.b[*]")
+        'a.b.item'
+        >>> get_items_prefix("$..a[*]") is None
+        True
+
+    """
+    match = re.fullmatch(r"\$((?:\.[A-Za-z_][\w-]*)*)\[\*\]", path)
+    if not match:
+        return None
+    return ".".join([*match.group(1).split(".")[1:], "item"])
+
+
+def format_query_value(value: Any) -> str:
+    """
+    Format a filter value as a query parameter.
+
+        >>> format_query_value(True)
+        'true'
+        >>> format_query_value(date(2024, 1, 1))
+        '2024-01-01'
+        >>> format_query_value(42)
+        '42'
+
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def get_filters(operators: Dict[str, str]) -> List[Type[Filter]]:
+    """
+    Return the filters for a column, given the operators it supports.
+
+    ``Equal`` comes before ``Range``, since both handle ``=``.
+    """
+    classes = {FILTER_OPERATORS[operator] for operator in operators}
+    return [class_ for class_ in (Equal, NotEqual, Range) if class_ in classes]
+
+
+def get_range_parameters(filter_: Range, operators: Dict[str, str]) -> Dict[str, str]:
+    """
+    Return the query parameters for a range.
+
+    Since SQLite filters the rows again an inclusive operator can be used when an
+    exclusive one is not supported, but not the other way around:
+
+        >>> get_range_parameters(Range(1, 10, False, True), {">=": "min", "<": "max"})
+        {'min': '1'}
+
+    """
+    parameters: Dict[str, str] = {}
+    endpoints = [
+        (filter_.start, filter_.include_start, ">"),
+        (filter_.end, filter_.include_end, "<"),
+    ]
+    for value, include, operator in endpoints:
+        if value is None:
+            continue
+        candidates = [operator + "="] if include else [operator, operator + "="]
+        for candidate in candidates:
+            if candidate in operators:
+                parameters[operators[candidate]] = format_query_value(value)
+                break
+
+    return parameters
+
+
+def validate_pushdown(pushdown: Pushdown) -> None:
+    """
+    Check that the pushdown configuration is valid.
+    """
+    for operators in pushdown.get("filters", {}).values():
+        for operator in operators:
+            if operator not in FILTER_OPERATORS:
+                raise ProgrammingError(f"Invalid operator: {operator}")
+
+    if "pagination" not in pushdown:
+        return
+
+    pagination = pushdown["pagination"]
+    type_ = pagination.get("type")
+    if type_ not in PAGINATION_TYPES:
+        raise ProgrammingError(f"Invalid pagination type: {type_}")
+    required = {
+        "link": [],
+        "cursor": ["param", "path"],
+        "page": ["param", "size"],
+        "offset": ["param"],
+    }[type_]
+    for key in required:
+        if key not in pagination:
+            raise ProgrammingError(f"Pagination of type {type_} requires {key}")
+
+
+class GenericJSONAPI(Adapter):  # pylint: disable=too-many-instance-attributes
 
     """
     An adapter for fetching JSON data.
@@ -35,8 +223,8 @@ class GenericJSONAPI(Adapter):
 
     safe = True
 
-    supports_limit = False
-    supports_offset = False
+    supports_limit = True
+    supports_offset = True
     supports_requested_columns = True
 
     content_type = "application/json"
@@ -90,36 +278,79 @@ class GenericJSONAPI(Adapter):
 
         return str(parsed), path
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         uri: str,
         path: Optional[str] = None,
         request_headers: Optional[Dict[str, str]] = None,
         cache_expiration: float = CACHE_EXPIRATION.total_seconds(),
+        sample_size: Optional[int] = None,
+        sampling: str = Sampling.HEAD.value,
+        pushdown: Optional[Pushdown] = None,
     ):
         super().__init__()
 
         self.uri = uri
         self.path = path or self.default_path
 
+        # how filters, sorting, limit, offset, and pagination are passed to the API
+        self.pushdown: Pushdown = pushdown or {}
+        validate_pushdown(self.pushdown)
+
         self._session = get_session(
             request_headers or {},
             self.cache_name,
             timedelta(seconds=cache_expiration),
         )
 
+        # types are inferred from all the rows unless a sample size is given, in
+        # which case they might need to be widened later
+        self.sample_size = sample_size
+        self.sampling = Sampling(sampling)
+        self.confident = True
+        self.num_rows = 0
+        self.columns: Dict[str, Field] = {}
+
         self._set_columns()
 
     def _set_columns(self) -> None:
-        rows = list(self.get_data({}, []))
-        column_names = list(rows[0].keys()) if rows else []
+        # for paginated APIs only the first page is used, unless a sample is requested
+        max_pages = (
+            1 if "pagination" in self.pushdown and self.sample_size is None else None
+        )
+        if self.sample_size is None:
+            rows = list(self._get_data({}, None, None, None, max_pages))
+            self.num_rows, order, types = analyze(iter(rows))
 
-        _, order, types = analyze(iter(rows))
+            # unless the first page is the only one, the types of the other pages
+            # might need to be widened later
+            pagination = self.pushdown.get("pagination", {})
+            if max_pages and not (
+                "size" in pagination and self.num_rows < pagination["size"]
+            ):
+                self.confident = False
+        else:
+            # keep only the first row, to determine the column names
+            data = self._get_data({}, None, None, None, max_pages)
+            first_row = next(data, None)
+            rows = [first_row] if first_row else []
+            self.num_rows, order, types, self.confident = analyze_sample(
+                itertools.chain(rows, data),
+                self.sample_size,
+                self.sampling,
+            )
+        column_names = list(rows[0].keys()) if rows else []
 
+        filters = self.pushdown.get("filters", {})
+        sortable = self.pushdown.get("order", {})
         self.columns = {
             column_name: types[column_name](
-                filters=[],
-                order=order.get(column_name, Order.NONE),
+                filters=get_filters(filters.get(column_name, {})),
+                order=(
+                    Order.ANY
+                    if column_name in sortable
+                    else order.get(column_name, Order.NONE)
+                ),
                 exact=False,
             )
             for column_name in column_names
@@ -129,7 +360,18 @@ class GenericJSONAPI(Adapter):
     def get_columns(self) -> Dict[str, Field]:
         return self.columns
 
-    get_cost = SimpleCostModel(AVERAGE_NUMBER_OF_ROWS)
+    def get_cost(
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        order: List[Tuple[str, RequestedOrder]],
+    ) -> float:
+        # use the number of rows seen when inferring the schema; when filters are
+        # passed to the API they reduce the number of rows downloaded
+        rows = self.num_rows or AVERAGE_NUMBER_OF_ROWS
+        if "filters" in self.pushdown:
+            return NetworkAPICostModel(rows)(self, filtered_columns, order)
+        model = SimpleCostModel(rows)
+        return model(self, filtered_columns, order)
 
     def get_data(  # pylint: disable=unused-argument, too-many-arguments
         self,
@@ -140,17 +382,213 @@ class GenericJSONAPI(Adapter):
         requested_columns: Optional[Set[str]] = None,
         **kwargs: Any,
     ) -> Iterator[Row]:
-        response = self._session.get(self.uri)
-        payload = response.json()
-        if not response.ok:
-            raise ProgrammingError(f'Error: {payload["message"]}')
+        if any(isinstance(filter_, Impossible) for filter_ in bounds.values()):
+            return
+
+        parameters = self._get_filter_parameters(bounds)
+        if requested_columns is not None and "columns" in self.pushdown:
+            parameters[self.pushdown["columns"]] = ",".join(sorted(requested_columns))
+
+        order_parameters = self._get_order_parameters(order)
+        if order_parameters is None:
+            # the API can't sort the data, so all the rows need to be fetched
+            rows = self._get_data(parameters, None, None, requested_columns)
+            yield from filter_data(rows, {}, order, limit, offset)
+            return
+
+        parameters.update(order_parameters)
+        yield from self._get_data(parameters, limit, offset, requested_columns)
 
-        for i, row in enumerate(jsonpath.findall(self.path, payload)):
+    def _get_filter_parameters(self, bounds: Dict[str, Filter]) -> Dict[str, str]:
+        """
+        Return the query parameters used to filter the data.
+        """
+        filters = self.pushdown.get("filters", {})
+        parameters: Dict[str, str] = {}
+        for column_name, filter_ in bounds.items():
+            operators = filters[column_name]
+            if isinstance(filter_, Equal):
+                parameters[operators["=="]] = format_query_value(filter_.value)
+            elif isinstance(filter_, NotEqual):
+                parameters[operators["!="]] = format_query_value(filter_.value)
+            else:
+                range_ = cast(Range, filter_)
+                parameters.update(get_range_parameters(range_, operators))
+
+        return parameters
+
+    def _get_order_parameters(
+        self,
+        order: List[Tuple[str, RequestedOrder]],
+    ) -> Optional[Dict[str, str]]:
+        """
+        Return the query parameters used to sort the data.
+
+        Returns ``None`` if the API can't sort the data in the requested order.
+        """
+        if not order:
+            return {}
+        if len(order) > 1:
+            return None
+
+        column_name, requested_order = order[0]
+        direction = "ascending" if requested_order == Order.ASCENDING else "descending"
+        return self.pushdown.get("order", {}).get(column_name, {}).get(direction)
+
+    def _get_data(  # pylint: disable=too-many-arguments
+        self,
+        parameters: Dict[str, str],
+        limit: Optional[int],
+        offset: Optional[int],
+        requested_columns: Optional[Set[str]],
+        max_pages: Optional[int] = None,
+    ) -> Iterator[Row]:
+        """
+        Fetch the data with the given query parameters, returning rows.
+        """
+        if "pagination" in self.pushdown:
+            payload_rows = apply_limit_and_offset(
+                self._get_paginated_rows(parameters, offset, max_pages),
+                limit,
+            )
+        else:
+            payload_rows = self._get_unpaginated_rows(parameters, limit, offset)
+
+        for i, row in enumerate(payload_rows, start=offset or 0):
             row = {
                 k: v
                 for k, v in (row or {}).items()
                 if requested_columns is None or k in requested_columns
             }
             row["rowid"] = i
+            row = flatten(row)
+            if not self.confident:
+                widen_types(self.columns, row)
             _logger.debug(row)
-            yield flatten(row)
+            yield row
+
+    def _get_unpaginated_rows(
+        self,
+        parameters: Dict[str, str],
+        limit: Optional[int],
+        offset: Optional[int],
+    ) -> Iterator[Any]:
+        """
+        Yield the elements selected by the path from a single response.
+        """
+        parameters = dict(parameters)
+        if offset and "offset" in self.pushdown:
+            parameters[self.pushdown["offset"]] = str(offset)
+            offset = None
+        if limit is not None and "limit" in self.pushdown:
+            parameters[self.pushdown["limit"]] = str(limit + (offset or 0))
+
+        url = URL(self.uri).update_query(parameters) if parameters else self.uri
+        with self._session.get(str(url), stream=True) as response:
+            yield from apply_limit_and_offset(
+                self._get_payload_rows(response),
+                limit,
+                offset,
+            )
+
+    def _get_paginated_rows(
+        self,
+        parameters: Dict[str, str],
+        offset: Optional[int],
+        max_pages: Optional[int],
+    ) -> Iterator[Any]:
+        """
+        Yield the elements selected by the path, fetching pages as needed.
+
+        Pages are only fetched when the rows from the previous one have been consumed,
+        so no more pages than needed are fetched when there's a limit.
+        """
+        pagination = self.pushdown["pagination"]
+        type_ = pagination["type"]
+        skip = offset or 0
+
+        parameters = dict(parameters)
+        if "size_param" in pagination and "size" in pagination:
+            parameters[pagination["size_param"]] = str(pagination["size"])
+        if type_ == "page":
+            # skip the pages before the offset
+            page, skip = divmod(skip, pagination["size"])
+            parameters[pagination["param"]] = str(pagination.get("start", 1) + page)
+        elif type_ == "offset":
+            parameters[pagination["param"]] = str(skip)
+            skip = 0
+
+        url: Optional[URL] = URL(self.uri).update_query(parameters)
+        pages = 0
+        while url is not None and (max_pages is None or pages < max_pages):
+            with self._session.get(str(url), stream=True) as response:
+                if type_ == "cursor":
+                    # the whole payload is needed to read the cursor
+                    _ = response.content
+
+                count = 0
+                for row in self._get_payload_rows(response):
+                    count += 1
+                    if count > skip:
+                        yield row
+                skip = max(skip - count, 0)
+
+                pages += 1
+                url = self._get_next_url(url, response, count)
+
+    def _get_next_url(
+        self,
+        url: URL,
+        response: requests.Response,
+        count: int,
+    ) -> Optional[URL]:
+        """
+        Return the URL of the next page, or ``None`` if there are no more pages.
+        """
+        if count == 0:
+            return None
+
+        pagination = self.pushdown["pagination"]
+        type_ = pagination["type"]
+        if type_ == "link":
+            next_url = response.links.get("next", {}).get("url")
+            return URL(next_url) if next_url else None
+        if type_ == "cursor":
+            cursor = self._get_cursor(response, pagination["path"])
+            if cursor is None or cursor == "":
+                return None
+            return url.update_query({pagination["param"]: str(cursor)})
+
+        # if the page is not full there are no more rows
+        if "size" in pagination and count < pagination["size"]:
+            return None
+        param = pagination["param"]
+        increment = 1 if type_ == "page" else count
+        return url.update_query({param: str(int(url.query[param]) + increment)})
+
+    def _get_cursor(self, response: requests.Response, path: str) -> Any:
+        """
+        Return the cursor for the next page from the payload.
+        """
+        values = jsonpath.findall(path, response.json())
+        return values[0] if values else None
+
+    def _get_payload_rows(self, response: requests.Response) -> Iterator[Any]:
+        """
+        Yield the elements selected by the path from the response.
+
+        When possible the response is parsed incrementally, so that elements are
+        yielded as soon as they're read, and the download stops when the iterator
+        is closed.
+        """
+        if not response.ok:
+            payload = response.json()
+            raise ProgrammingError(f'Error: {payload["message"]}')
+
+        prefix = get_items_prefix(self.path)
+        if prefix is None:
+            yield from jsonpath.findall(self.path, response.json())
+            return
+
+        reader = ChunkReader(response.iter_content(CHUNK_SIZE))
+        yield from ijson.items(reader, prefix, use_float=True)
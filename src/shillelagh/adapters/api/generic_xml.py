@@ -3,19 +3,22 @@ An adapter for fetching XML data.
 """
 
 import logging
+import re
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+import requests
 from defusedxml import ElementTree as DET
 
-from shillelagh.adapters.api.generic_json import GenericJSONAPI
+from shillelagh.adapters.api.generic_json import CHUNK_SIZE, GenericJSONAPI
 from shillelagh.exceptions import ProgrammingError
-from shillelagh.filters import Filter
-from shillelagh.lib import flatten
-from shillelagh.typing import RequestedOrder, Row
+from shillelagh.lib import ChunkReader
 
 _logger = logging.getLogger(__name__)
 
+# a step in a path that can be matched while parsing
+STEP_PATTERN = re.compile(r"[A-Za-z_][\w.:-]*|\*")
+
 
 def element_to_dict(element: ET.Element) -> Any:
     """
@@ -41,6 +44,84 @@ def element_to_dict(element: ET.Element) -> Any:
     return result
 
 
+def get_path_matcher(path: str) -> Optional[Callable[[List[str]], bool]]:
+    """
+    Build a function that checks if an element matches a path, given its tags.
+
+    The function receives the tags of the element and its ancestors, excluding the
+    root. Only paths with tags or ``*`` as steps, optionally starting with ``.//``,
+    can be matched while the document is parsed; for other paths ``None`` is
+    returned, and the whole document is parsed:
+
+        >>> match = get_path_matcher(".//bill")
+        >>> match(["bills", "bill"]), match(["bills"])
+        (True, False)
+        >>> match = get_path_matcher("bills/*")
+        >>> match(["bills", "bill"]), match(["bill"])
+        (True, False)
+        >>> get_path_matcher("bill[@id='1']") is None
+        True
+
+    """
+    descendant = path.startswith(".//")
+    if descendant:
+        path = path[3:]
+    elif path.startswith("./"):
+        path = path[2:]
+
+    steps = path.split("/")
+    if not all(STEP_PATTERN.fullmatch(step) for step in steps):
+        return None
+
+    def match(tags: List[str]) -> bool:
+        if len(tags) < len(steps) or (not descendant and len(tags) > len(steps)):
+            return False
+        return all(step in ("*", tag) for step, tag in zip(steps, tags[-len(steps) :]))
+
+    return match
+
+
+def iter_elements(
+    source: IO[bytes],
+    match: Callable[[List[str]], bool],
+) -> Iterator[ET.Element]:
+    """
+    Parse a document incrementally, yielding the elements that match a path.
+
+    Elements are yielded in document order, as soon as they (and any matching
+    elements containing them) have been completely parsed. Elements outside of
+    matches are discarded once parsed, so that memory usage doesn't grow with the
+    size of the document.
+    """
+    stack: List[Tuple[ET.Element, bool]] = []
+    pending: List[ET.Element] = []
+    open_matches = 0
+
+    for event, element in DET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            # the path is relative to the root, so the root itself is never matched
+            matched = bool(stack) and match(
+                [ancestor.tag for ancestor, _ in stack[1:]] + [element.tag],
+            )
+            if matched:
+                pending.append(element)
+                open_matches += 1
+            stack.append((element, matched))
+            continue
+
+        _, matched = stack.pop()
+        if matched:
+            open_matches -= 1
+        if open_matches:
+            continue
+
+        yield from pending
+        pending.clear()
+        if stack:
+            element.clear()
+            stack[-1][0].remove(element)
+
+
 class GenericXMLAPI(GenericJSONAPI):
 
     """
@@ -49,37 +130,34 @@ class GenericXMLAPI(GenericJSONAPI):
 
     safe = True
 
-    supports_limit = False
-    supports_offset = False
+    supports_limit = True
+    supports_offset = True
     supports_requested_columns = True
 
     content_type = "xml"  # works with text/xml and application/xml
     default_path = "*"
     cache_name = "generic_xml_cache"
 
-    def get_data(  # pylint: disable=unused-argument, too-many-arguments
-        self,
-        bounds: Dict[str, Filter],
-        order: List[Tuple[str, RequestedOrder]],
-        limit: Optional[int] = None,
-        offset: Optional[int] = None,
-        requested_columns: Optional[Set[str]] = None,
-        **kwargs: Any,
-    ) -> Iterator[Row]:
-        response = self._session.get(self.uri)
-        payload = response.content.decode("utf-8")
+    def _get_payload_rows(self, response: requests.Response) -> Iterator[Any]:
         if not response.ok:
+            payload = response.content.decode("utf-8")
             raise ProgrammingError(f"Error: {payload}")
 
-        root = DET.fromstring(payload)
-        result = root.findall(self.path)
-        for i, element in enumerate(result):
-            row = element_to_dict(element)
-            row = {
-                k: v
-                for k, v in row.items()
-                if requested_columns is None or k in requested_columns
-            }
-            row["rowid"] = i
-            _logger.debug(row)
-            yield flatten(row)
+        match = get_path_matcher(self.path)
+        if match is None:
+            root = DET.fromstring(response.content.decode("utf-8"))
+            elements: Iterator[ET.Element] = iter(root.findall(self.path))
+        else:
+            reader = ChunkReader(response.iter_content(CHUNK_SIZE))
+            elements = iter_elements(reader, match)
+
+        for element in elements:
+            yield element_to_dict(element)
+
+    def _get_cursor(self, response: requests.Response, path: str) -> Any:
+        """
+        Return the cursor for the next page from the payload, using XPath.
+        """
+        root = DET.fromstring(response.content.decode("utf-8"))
+        element = root.find(path)
+        return None if element is None else element.text
@@ -1,11 +1,12 @@
 """
 An adapter for GitHub.
 """
+import itertools
 import json
 import logging
 import urllib.parse
 from dataclasses import dataclass
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import jsonpath
 import requests_cache
@@ -14,6 +15,7 @@ from shillelagh.adapters.base import Adapter
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Boolean, Field, Integer, String, StringDateTime
 from shillelagh.filters import Equal, Filter
+from shillelagh.lib import prefetch
 from shillelagh.typing import RequestedOrder, Row
 
 _logger = logging.getLogger(__name__)
@@ -64,7 +66,7 @@ TABLES: Dict[str, Dict[str, List[Column]]] = {
         "pulls": [
             Column("url", "html_url", String()),
             Column("id", "id", Integer()),
-            Column("number", "number", Integer(filters=[Equal])),
+            Column("number", "number", Integer(filters=[Equal], exact=True)),
             Column("state", "state", String(filters=[Equal]), Equal("all")),
             Column("title", "title", String()),
             Column("userid", "user.id", Integer()),
@@ -79,7 +81,7 @@ TABLES: Dict[str, Dict[str, List[Column]]] = {
         "issues": [
             Column("url", "html_url", String()),
             Column("id", "id", Integer()),
-            Column("number", "number", Integer(filters=[Equal])),
+            Column("number", "number", Integer(filters=[Equal], exact=True)),
             Column("state", "state", String(filters=[Equal]), Equal("all")),
             Column("title", "title", String()),
             Column("userid", "user.id", Integer()),
@@ -111,6 +113,10 @@ class GitHubAPI(Adapter):
     supports_limit = True
     supports_offset = True
 
+    # maximum number of pages fetched concurrently; kept low because GitHub
+    # discourages concurrent requests with secondary rate limits
+    prefetch_workers = 2
+
     @staticmethod
     def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
         parsed = urllib.parse.urlparse(uri)
@@ -240,28 +246,39 @@ class GitHubAPI(Adapter):
         page = (offset // PAGE_SIZE) + 1
         offset %= PAGE_SIZE
 
-        rowid = 0
-        while limit is None or rowid < limit:
+        # with a limit we know exactly which pages are needed
+        pages: Iterator[int] = (
+            itertools.count(page)
+            if limit is None
+            else iter(range(page, (offset + limit - 1) // PAGE_SIZE + page + 1))
+        )
+
+        def fetch(page: int) -> List[Dict[str, Any]]:
             _logger.info("GET %s (page %d)", url, page)
-            params["page"] = page
-            response = self._session.get(url, headers=headers, params=params)
+            response = self._session.get(
+                url,
+                headers=headers,
+                params={**params, "page": page},
+            )
 
             payload = response.json()
-            if not payload:
-                break
-
-            if not response.ok:
+            if payload and not response.ok:
                 raise ProgrammingError(payload["message"])
 
-            if offset is not None:
-                payload = payload[offset:]
-                offset = None
+            return cast(List[Dict[str, Any]], payload)
 
-            for resource in payload:
+        rowid = 0
+        for payload in prefetch(
+            fetch,
+            pages,
+            self.prefetch_workers,
+            is_last=lambda payload: len(payload) < PAGE_SIZE,
+        ):
+            for resource in payload[offset:]:
                 if limit is not None and rowid == limit:
                     # this never happens because SQLite stops consuming from the generator
                     # as soon as the limit is hit
-                    break
+                    return
 
                 row = {
                     column.name: get_value(column, resource)
@@ -272,7 +289,7 @@ class GitHubAPI(Adapter):
                 yield row
                 rowid += 1
 
-            page += 1
+            offset = 0
 
 
 def get_value(column: Column, resource: Dict[str, Any]) -> Any:
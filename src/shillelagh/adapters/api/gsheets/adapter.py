@@ -2,27 +2,37 @@
 """
 Google Sheets adapter.
 """
+import bisect
 import datetime
 import json
 import logging
 import urllib.parse
-from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, cast
 
 import dateutil.tz
-from google.auth.transport.requests import AuthorizedSession
 from requests import Session
 
 from shillelagh.adapters.api.gsheets.lib import (
+    ChangeTracker,
     format_error_message,
     gen_letters,
     get_credentials,
+    get_delete_ranges,
     get_field,
     get_index_from_letters,
+    get_original_index,
+    get_row_ranges,
     get_sync_mode,
     get_url,
     get_value_from_cell,
     get_values_from_row,
 )
+from shillelagh.adapters.api.gsheets.session import (
+    DEFAULT_POOL_SIZE,
+    get_pooled_session,
+    get_session_key,
+)
 from shillelagh.adapters.api.gsheets.types import SyncMode
 from shillelagh.adapters.api.gsheets.typing import QueryResults
 from shillelagh.adapters.base import Adapter
@@ -48,6 +58,13 @@ AVERAGE_NUMBER_OF_ROWS = 1000
 FIXED_COST = 2882
 DOWNLOAD_COST = int(AVERAGE_NUMBER_OF_ROWS * 0.4212)
 
+# maximum number of buffered changes before they are pushed to the sheet
+MAX_PENDING_CHANGES = 1000
+
+# in ``BATCH`` mode the whole sheet is rewritten when the number of changed rows
+# and deleted ranges is above this fraction of the rows
+FULL_SYNC_THRESHOLD = 0.5
+
 
 class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
     r"""
@@ -65,18 +82,19 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
 
     DML supports 3 different modes of synchronization. In ``BIDIRECTIONAL``
     mode the sheet is downloaded before every DML query, and changes are
-    pushed immediately. This is very inneficient, since it requires
-    downloading all the values before every modification, and should be
-    used for small updates or when interactivity is required.
+    pushed at the end of each transaction. This is very inneficient, since it
+    requires downloading all the values before every modification, and should
+    be used for small updates or when interactivity is required.
 
-    In ``UNIDIRECTIONAL`` mode changes are still pushed immediately, but the
-    sheet is downloaded only once. This mode is a good compromise, since
+    In ``UNIDIRECTIONAL`` mode changes are also pushed at the end of each
+    transaction, but the sheet is downloaded only once. This mode is a good compromise, since
     the uploads are frequent but small, and the download that can be big
     (depending on the size of the sheet) happens only once.
 
     Finally, there's a ``BATCH`` mode, where the sheet is downloaded once,
     before the first DML operation, and all changes are uploaded at once
-    when the adapter is closed. In this mode and in ``UNIDIRECTIONAL`` the
+    when the adapter is closed. Only the rows that changed are uploaded,
+    unless most of the sheet was modified. In this mode and in ``UNIDIRECTIONAL`` the
     data is stored locally, and filtered/sorted by the Shillelagh backend.
     """
 
@@ -108,6 +126,7 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         subject: Optional[str] = None,
         catalog: Optional[Dict[str, str]] = None,
         app_default_credentials: bool = False,
+        pool_size: int = DEFAULT_POOL_SIZE,
     ):
         super().__init__()
         if catalog and uri in catalog:
@@ -122,6 +141,17 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
             app_default_credentials,
         )
 
+        # sessions are shared by all adapters with the same credentials
+        self._pool_size = int(pool_size)
+        self._session_key = get_session_key(
+            access_token,
+            service_account_file,
+            service_account_info,
+            subject,
+            app_default_credentials,
+            self._pool_size,
+        )
+
         # Local data. When using DML we switch to the Google Sheets API,
         # keeping a local copy of the spreadsheets data so that we can
         # (1) find rows being updated/delete and (2) work on a local
@@ -129,8 +159,22 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         self._sync_mode = get_sync_mode(uri) or SyncMode.BIDIRECTIONAL
         self._values: Optional[List[List[Any]]] = None
         self._original_rows = 0
+        self._changes = ChangeTracker([])
         self.modified = False
 
+        # Changes waiting to be pushed in ``BIDIRECTIONAL`` and ``UNIDIRECTIONAL``
+        # modes. Only one kind of change is buffered at a time, so they can be
+        # merged into a single request without being reordered. Deleted rows are
+        # stored with their original indexes, sorted.
+        self._pending_appends: List[List[Any]] = []
+        self._pending_deletes: List[int] = []
+        self._pending_updates: Dict[int, List[Any]] = {}
+
+        # Functions undoing the changes to the local copy during the transaction,
+        # and whether changes were pushed during the transaction.
+        self._undo: Optional[List[Callable[[], None]]] = None
+        self._pushed = False
+
         # Extra metadata. Some of this metadata (sheet name and timezone)
         # can only be fetched if the user is authenticated -- that's OK,
         # since they're only used for DML, which requires authentication.
@@ -198,9 +242,10 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
             _logger.warning("Could not determine sheet name!")
 
     def _get_session(self) -> Session:
-        return cast(
-            Session,
-            AuthorizedSession(self.credentials) if self.credentials else Session(),
+        return get_pooled_session(
+            self._session_key,
+            self.credentials,
+            self._pool_size,
         )
 
     def get_metadata(self) -> Dict[str, Any]:
@@ -403,6 +448,9 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         other modes, once the sheet has been modified we read from a local copy
         of the data.
         """
+        # push buffered changes, so they can be read back
+        self._flush()
+
         # build a reverse map so we know which columns are defined
         reverse_map = {v: k for k, v in self._column_map.items()}
 
@@ -466,6 +514,7 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         row_id: Optional[int] = row.pop("rowid")
         if row_id is None:
             row_id = max(self._row_ids.keys()) + 1 if self._row_ids else 0
+        self._record(partial(self._restore_row, row_id, self._row_ids.get(row_id)))
         self._row_ids[row_id] = row
 
         row_values = get_values_from_row(row, self._column_map)
@@ -475,31 +524,19 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         if self._sync_mode in {SyncMode.UNIDIRECTIONAL, SyncMode.BATCH}:
             values = self._get_values()
             values.append(row_values)
+            self._changes.append()
+            self._record(values.pop)
+            self._record(self._changes.origins.pop)
             self._clear_columns()
 
-        # In these modes we push all changes immediately to the sheet.
+        # In these modes changes are buffered, and pushed to the sheet at the end
+        # of the transaction.
         if self._sync_mode in {SyncMode.BIDIRECTIONAL, SyncMode.UNIDIRECTIONAL}:
-            session = self._get_session()
-            body = {
-                "range": self._sheet_name,
-                "majorDimension": "ROWS",
-                "values": [row_values],
-            }
-            url = (
-                "https://sheets.googleapis.com/v4/spreadsheets/"
-                f"{self._spreadsheet_id}/values/{self._sheet_name}:append"
-            )
-            _logger.info("POST %s", url)
-            _logger.debug(body)
-            response = session.post(
-                url,
-                json=body,
-                params={"valueInputOption": "USER_ENTERED"},
-            )
-            payload = response.json()
-            _logger.debug(payload)
-            if "error" in payload:
-                raise ProgrammingError(payload["error"]["message"])
+            if self._pending_deletes or self._pending_updates:
+                self._flush()
+            self._pending_appends.append(row_values)
+            if len(self._pending_appends) >= MAX_PENDING_CHANGES:
+                self._flush()
 
         self.modified = True
 
@@ -509,10 +546,13 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         """
         Download all values from the spreadsheet.
         """
-        if self._values is not None and self._sync_mode in {
-            SyncMode.UNIDIRECTIONAL,
-            SyncMode.BATCH,
-        }:
+        # in ``BIDIRECTIONAL`` mode the local copy is reused while there are
+        # buffered changes, since they haven't been pushed to the sheet yet
+        if self._values is not None and (
+            self._sync_mode in {SyncMode.UNIDIRECTIONAL, SyncMode.BATCH}
+            or self._pending_deletes
+            or self._pending_updates
+        ):
             return self._values
 
         session = self._get_session()
@@ -539,15 +579,16 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         # values later we can clear the bottom rows in case the number of rows is
         # reduced.
         self._original_rows = len(self._values)
+        self._changes = ChangeTracker(self._values)
 
         return self._values
 
-    def _find_row_number(self, row: Row) -> int:
+    def _find_row_number(self, row: Row, values: List[List[Any]]) -> int:
         """
         Return the 0-indexed number of a given row, defined by its values.
         """
         target_row_values = get_values_from_row(row, self._column_map)
-        for i, row_values in enumerate(self._get_values()):
+        for i, row_values in enumerate(values):
             # pad with empty strings to match size
             padding = [""] * (len(target_row_values) - len(row_values))
             if [*row_values, *padding] == target_row_values:
@@ -562,54 +603,42 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         if row_id not in self._row_ids:
             raise ProgrammingError(f"Invalid row to delete: {row_id}")
 
-        row = self._row_ids[row_id]
-        row_number = self._find_row_number(row)
+        if self._pending_appends or self._pending_updates:
+            self._flush()
 
-        # In these modes we keep a local copy of the data, so we only have to
-        # download the full sheet once.
+        # The local copy is always modified, so that rows can be found while
+        # changes are buffered. In ``UNIDIRECTIONAL`` and ``BATCH`` modes it's also
+        # used for reading, so we only have to download the full sheet once.
+        values = self._get_values()
+        row_number = self._find_row_number(self._row_ids[row_id], values)
+        self._record(partial(values.insert, row_number, values[row_number]))
+        self._record(
+            partial(
+                self._changes.origins.insert,
+                row_number,
+                self._changes.origins[row_number],
+            ),
+        )
+        values.pop(row_number)
+        self._changes.delete(row_number)
         if self._sync_mode in {SyncMode.UNIDIRECTIONAL, SyncMode.BATCH}:
-            values = self._get_values()
-            values.pop(row_number)
             self._clear_columns()
 
-        # In these modes we push all changes immediately to the sheet.
+        # In these modes changes are buffered, and pushed to the sheet at the end
+        # of the transaction.
         if self._sync_mode in {SyncMode.BIDIRECTIONAL, SyncMode.UNIDIRECTIONAL}:
-            session = self._get_session()
-            body = {
-                "requests": [
-                    {
-                        "deleteDimension": {
-                            "range": {
-                                "sheetId": self._sheet_id,
-                                "dimension": "ROWS",
-                                "startIndex": row_number,
-                                "endIndex": row_number + 1,
-                            },
-                        },
-                    },
-                ],
-            }
-            url = (
-                "https://sheets.googleapis.com/v4/spreadsheets/"
-                f"{self._spreadsheet_id}:batchUpdate"
-            )
-            _logger.info("POST %s", url)
-            _logger.debug(body)
-            response = session.post(
-                url,
-                json=body,
+            bisect.insort(
+                self._pending_deletes,
+                get_original_index(row_number, self._pending_deletes),
             )
-            payload = response.json()
-            _logger.debug(payload)
-            if "error" in payload:
-                raise ProgrammingError(payload["error"]["message"])
+            if len(self._pending_deletes) >= MAX_PENDING_CHANGES:
+                self._flush()
 
-        # only delete row_id on a successful request
-        del self._row_ids[row_id]
+        self._record(partial(self._restore_row, row_id, self._row_ids.pop(row_id)))
 
         self.modified = True
 
-    def update_data(  # pylint: disable=too-many-locals
+    def update_data(
         self,
         row_id: int,
         row: Row,
@@ -620,60 +649,233 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         if row_id not in self._row_ids:
             raise ProgrammingError(f"Invalid row to update: {row_id}")
 
-        current_row = self._row_ids[row_id]
-        row_number = self._find_row_number(current_row)
+        if self._pending_appends or self._pending_deletes:
+            self._flush()
 
+        # The local copy is always modified, so that rows can be found while
+        # changes are buffered. In ``UNIDIRECTIONAL`` and ``BATCH`` modes it's also
+        # used for reading, so we only have to download the full sheet once.
+        values = self._get_values()
+        row_number = self._find_row_number(self._row_ids[row_id], values)
         row_values = get_values_from_row(row, self._column_map)
-
-        # In these modes we keep a local copy of the data, so we only have to
-        # download the full sheet once.
+        self._record(partial(values.__setitem__, row_number, values[row_number]))
+        origin = self._changes.origins[row_number]
+        if origin is not None and origin not in self._changes.updated:
+            self._record(partial(self._changes.updated.discard, origin))
+        values[row_number] = row_values
+        self._changes.update(row_number)
         if self._sync_mode in {SyncMode.UNIDIRECTIONAL, SyncMode.BATCH}:
-            values = self._get_values()
-            values[row_number] = row_values
             self._clear_columns()
 
-        # In these modes we push all changes immediately to the sheet.
+        # In these modes changes are buffered, and pushed to the sheet at the end
+        # of the transaction.
         if self._sync_mode in {SyncMode.BIDIRECTIONAL, SyncMode.UNIDIRECTIONAL}:
-            session = self._get_session()
-            range_ = f"{self._sheet_name}!A{row_number + 1}"
-            body = {
-                "range": range_,
-                "majorDimension": "ROWS",
-                "values": [row_values],
-            }
-            url = (
-                "https://sheets.googleapis.com/v4/spreadsheets/"
-                f"{self._spreadsheet_id}/values/{range_}"
-            )
-            params = {"valueInputOption": "USER_ENTERED"}
-
-            # Log the URL. We can't use a prepared request here to extract the URL because
-            # it doesn't work with ``AuthorizedSession``.
-            query_string = urllib.parse.urlencode(params)
-            _logger.info("PUT %s?%s", url, query_string)
-            _logger.debug(body)
-
-            response = session.put(url, json=body, params=params)
-            payload = response.json()
-            _logger.debug(payload)
-            if "error" in payload:
-                raise ProgrammingError(payload["error"]["message"])
+            self._pending_updates[row_number] = row_values
+            if len(self._pending_updates) >= MAX_PENDING_CHANGES:
+                self._flush()
 
         # the row_id might change on an update
         new_row_id = row.pop("rowid")
-        if new_row_id != row_id:
-            del self._row_ids[row_id]
+        self._record(partial(self._restore_row, row_id, self._row_ids.pop(row_id)))
+        self._record(
+            partial(self._restore_row, new_row_id, self._row_ids.get(new_row_id)),
+        )
         self._row_ids[new_row_id] = row
 
         self.modified = True
 
+    def _flush(self) -> None:
+        """
+        Push buffered changes to the sheet.
+
+        Appended rows are sent in a single request, deleted rows are merged into
+        ranges deleted from the bottom up, and updated rows are sent in a single
+        ``values:batchUpdate`` request.
+        """
+        if self._pending_appends or self._pending_deletes or self._pending_updates:
+            self._pushed = True
+
+        try:
+            if self._pending_appends:
+                self._append_rows(self._pending_appends)
+            elif self._pending_deletes:
+                self._delete_rows(self._pending_deletes)
+            elif self._pending_updates:
+                self._write_rows(
+                    [
+                        (row_number, [row_values])
+                        for row_number, row_values in sorted(
+                            self._pending_updates.items(),
+                        )
+                    ],
+                )
+        finally:
+            self._pending_appends = []
+            self._pending_deletes = []
+            self._pending_updates = {}
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        body: Dict[str, Any],
+        params: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Send a request to the Sheets API, raising on errors.
+        """
+        session = self._get_session()
+
+        # Log the URL. We can't use a prepared request here to extract the URL because
+        # it doesn't work with ``AuthorizedSession``.
+        if params:
+            query_string = urllib.parse.urlencode(params)
+            _logger.info("%s %s?%s", method, url, query_string)
+        else:
+            _logger.info("%s %s", method, url)
+        _logger.debug(body)
+
+        response = session.request(method, url, json=body, params=params)
+        payload = response.json()
+        _logger.debug(payload)
+        if "error" in payload:
+            raise ProgrammingError(payload["error"]["message"])
+
+    def _append_rows(self, rows: List[List[Any]]) -> None:
+        """
+        Append rows to the sheet.
+        """
+        body = {
+            "range": self._sheet_name,
+            "majorDimension": "ROWS",
+            "values": rows,
+        }
+        url = (
+            "https://sheets.googleapis.com/v4/spreadsheets/"
+            f"{self._spreadsheet_id}/values/{self._sheet_name}:append"
+        )
+        self._send("POST", url, body, {"valueInputOption": "USER_ENTERED"})
+
+    def _delete_rows(self, row_numbers: List[int]) -> None:
+        """
+        Delete rows from the sheet, given their 0-indexed numbers.
+        """
+        body = {
+            "requests": [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": self._sheet_id,
+                            "dimension": "ROWS",
+                            "startIndex": start,
+                            "endIndex": end,
+                        },
+                    },
+                }
+                for start, end in get_delete_ranges(row_numbers)
+            ],
+        }
+        url = (
+            "https://sheets.googleapis.com/v4/spreadsheets/"
+            f"{self._spreadsheet_id}:batchUpdate"
+        )
+        self._send("POST", url, body)
+
+    def _write_rows(self, blocks: List[Tuple[int, List[List[Any]]]]) -> None:
+        """
+        Write blocks of consecutive rows, each starting at a 0-indexed row number.
+        """
+        body = {
+            "valueInputOption": "USER_ENTERED",
+            "data": [
+                {
+                    "range": f"{self._sheet_name}!A{start + 1}",
+                    "majorDimension": "ROWS",
+                    "values": rows,
+                }
+                for start, rows in blocks
+            ],
+        }
+        url = (
+            "https://sheets.googleapis.com/v4/spreadsheets/"
+            f"{self._spreadsheet_id}/values:batchUpdate"
+        )
+        self._send("POST", url, body)
+
+    def begin(self) -> None:
+        """
+        Start recording changes to the local copy, so they can be rolled back.
+
+        Each change records how to undo itself, instead of copying the local copy
+        at the start of every transaction.
+        """
+        self._undo = [partial(setattr, self, "modified", self.modified)]
+        self._pushed = False
+
+    def _record(self, undo: Callable[[], Any]) -> None:
+        """
+        Record how to undo a change, if in a transaction.
+        """
+        if self._undo is not None:
+            self._undo.append(undo)
+
+    def _restore_row(self, row_id: int, row: Optional[Row]) -> None:
+        """
+        Restore the row with a given ID, removing it if it didn't exist.
+        """
+        if row is None:
+            self._row_ids.pop(row_id, None)
+        else:
+            self._row_ids[row_id] = row
+
+    def sync(self) -> None:
+        """
+        Push changes buffered during the transaction.
+        """
+        self._flush()
+
+    def commit(self) -> None:
+        """
+        Push changes buffered during the transaction.
+        """
+        self._flush()
+        self._undo = None
+
+    def rollback(self) -> None:
+        """
+        Discard buffered changes, and restore the local copy.
+
+        Changes pushed during the transaction, because too many were buffered, can't
+        be rolled back.
+        """
+        self._pending_appends = []
+        self._pending_deletes = []
+        self._pending_updates = {}
+
+        if self._undo is not None:
+            for undo in reversed(self._undo):
+                undo()
+            self._undo = None
+
+        if self._pushed:
+            _logger.warning(
+                "Some changes were already pushed to the sheet and can't be rolled back",
+            )
+            self._pushed = False
+
+        # in ``BIDIRECTIONAL`` mode the local copy is downloaded again when needed
+        if self._sync_mode == SyncMode.BIDIRECTIONAL:
+            self._values = None
+
     def close(self) -> None:
         """
         Push pending changes.
 
-        This method is used only in ``BATCH`` mode to push pending modifications
-        to the sheet.
+        In ``BATCH`` mode all the modifications are pushed to the sheet when the
+        adapter is closed; in other modes only changes still buffered are pushed.
         """
+        self._flush()
+
         if not self.modified or self._sync_mode != SyncMode.BATCH:
             return
 
@@ -681,6 +883,67 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         if not values:
             raise InternalError("An unexpected error happened")
 
+        _logger.info("Pushing pending changes to the spreadsheet")
+        try:
+            if not self._push_changes(values):
+                self._push_values(values)
+        except ProgrammingError as ex:
+            _logger.warning("Unable to commit batch changes: %s", str(ex))
+            raise
+
+        self._original_rows = len(values)
+        self._changes = ChangeTracker(values)
+        self.modified = False
+        _logger.info("Success!")
+
+    def _push_changes(self, values: List[List[Any]]) -> bool:
+        """
+        Push only the rows that changed since the sheet was downloaded.
+
+        Deleted rows are removed first, so that the remaining rows are in their
+        final positions; then updated and appended rows are written. Returns false
+        without pushing anything if the changes are not known, or if rewriting the
+        whole sheet is cheaper.
+        """
+        if len(self._changes.origins) != len(values):
+            return False
+
+        deleted = self._changes.get_deleted_rows(self._original_rows)
+        changed = get_row_ranges(self._changes.get_changed_rows())
+        cost = len(get_delete_ranges(deleted)) + sum(
+            end - start for start, end in changed
+        )
+        if cost > FULL_SYNC_THRESHOLD * max(len(values), self._original_rows):
+            return False
+
+        if deleted:
+            self._delete_rows(deleted)
+
+        if changed:
+            # pad rows so they override any underlying cells
+            number_of_columns = max(
+                self._changes.number_of_columns,
+                *(len(values[i]) for start, end in changed for i in range(start, end)),
+            )
+            self._write_rows(
+                [
+                    (
+                        start,
+                        [
+                            [*row, *([""] * (number_of_columns - len(row)))]
+                            for row in values[start:end]
+                        ],
+                    )
+                    for start, end in changed
+                ],
+            )
+
+        return True
+
+    def _push_values(self, values: List[List[Any]]) -> None:
+        """
+        Rewrite the whole sheet.
+        """
         # Pad values. This ensures that rows are padded to the right with
         # empty strings, so they override any underlying cells when the
         # updated sheet is pushed. Similarly, append dummy rows so that if
@@ -691,36 +954,16 @@ class GSheetsAPI(Adapter):  # pylint: disable=too-many-instance-attributes
         values = [[*row, *([""] * (number_of_columns - len(row)))] for row in values]
         values.extend([dummy_row] * (self._original_rows - len(values)))
 
-        _logger.info("Pushing pending changes to the spreadsheet")
-        session = self._get_session()
-        range_ = f"{self._sheet_name}"
         body = {
-            "range": range_,
+            "range": self._sheet_name,
             "majorDimension": "ROWS",
             "values": values,
         }
         url = (
             "https://sheets.googleapis.com/v4/spreadsheets/"
-            f"{self._spreadsheet_id}/values/{range_}"
+            f"{self._spreadsheet_id}/values/{self._sheet_name}"
         )
-        params = {"valueInputOption": "USER_ENTERED"}
-
-        # Log the URL. We can't use a prepared request here to extract the URL because
-        # it doesn't work with ``AuthorizedSession``.
-        query_string = urllib.parse.urlencode(params)
-        _logger.info("PUT %s?%s", url, query_string)
-        _logger.debug(body)
-
-        response = session.put(url, json=body, params=params)
-        payload = response.json()
-        _logger.debug(payload)
-        if "error" in payload:
-            message = payload["error"]["message"]
-            _logger.warning("Unable to commit batch changes: %s", message)
-            raise ProgrammingError(message)
-
-        self.modified = False
-        _logger.info("Success!")
+        self._send("PUT", url, body, {"valueInputOption": "USER_ENTERED"})
 
     def drop_table(self) -> None:
         """
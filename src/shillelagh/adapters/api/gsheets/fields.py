@@ -2,11 +2,11 @@
 Custom fields for the GSheets adapter.
 """
 import datetime
-from typing import Any, List, Optional, Type, Union
+from typing import Any, List, Optional, Type, Union, cast
 
 from shillelagh.adapters.api.gsheets.parsing.date import (
-    format_date_time_pattern,
-    parse_date_time_pattern,
+    DateTimePattern,
+    get_date_time_pattern,
 )
 from shillelagh.adapters.api.gsheets.parsing.number import (
     format_number_pattern,
@@ -53,6 +53,20 @@ class GSheetsField(Field[Internal, External]):
         )
         self.timezone = timezone
 
+        # the tokenized pattern, used for all the values of the column
+        self._date_time_pattern: Optional[DateTimePattern] = None
+
+    def _get_date_time_pattern(self) -> DateTimePattern:
+        """
+        Return the tokenized date/time pattern.
+        """
+        if (
+            self._date_time_pattern is None
+            or self._date_time_pattern.pattern != self.pattern
+        ):
+            self._date_time_pattern = get_date_time_pattern(cast(str, self.pattern))
+        return self._date_time_pattern
+
     def __eq__(self, other: Any) -> bool:
         if other.__class__ != self.__class__:
             return NotImplemented
@@ -94,7 +108,7 @@ class GSheetsDateTime(GSheetsField[str, datetime.datetime]):
         if self.pattern is None or value is None or value == "":
             return None
 
-        timestamp = parse_date_time_pattern(value, self.pattern, datetime.datetime)
+        timestamp = self._get_date_time_pattern().parse(value, datetime.datetime)
 
         # Set the timestamp to the spreadsheet timezone, if any.
         timestamp = timestamp.replace(tzinfo=self.timezone)
@@ -112,18 +126,18 @@ class GSheetsDateTime(GSheetsField[str, datetime.datetime]):
         if self.timezone:
             value = value.astimezone(self.timezone)
 
-        return format_date_time_pattern(value, self.pattern)
+        return self._get_date_time_pattern().format(value)
 
     def quote(self, value: Optional[str]) -> str:
         if self.pattern is None or value == "" or value is None:
             return "null"
 
         # On SQL queries the timestamp should be prefix by "datetime"
-        value = parse_date_time_pattern(
-            value,
-            self.pattern,
-            datetime.datetime,
-        ).strftime(DATETIME_SQL_QUOTE)
+        value = (
+            self._get_date_time_pattern()
+            .parse(value, datetime.datetime)
+            .strftime(DATETIME_SQL_QUOTE)
+        )
         return f"datetime '{value}'"
 
 
@@ -148,21 +162,25 @@ class GSheetsDate(GSheetsField[str, datetime.date]):
         if self.pattern is None or value is None or value == "":
             return None
 
-        return parse_date_time_pattern(value, self.pattern, datetime.date)
+        return self._get_date_time_pattern().parse(value, datetime.date)
 
     def format(self, value: Optional[datetime.date]) -> str:
         if self.pattern is None or value is None:
             return ""
 
-        return format_date_time_pattern(value, self.pattern)
+        return self._get_date_time_pattern().format(value)
 
     def quote(self, value: Optional[str]) -> str:
         if self.pattern is None or value == "" or value is None:
             return "null"
 
         # On SQL queries the timestamp should be prefix by "date"
-        value = parse_date_time_pattern(value, self.pattern, datetime.date).strftime(
-            DATE_SQL_QUOTE,
+        value = (
+            self._get_date_time_pattern()
+            .parse(value, datetime.date)
+            .strftime(
+                DATE_SQL_QUOTE,
+            )
         )
         return f"date '{value}'"
 
@@ -191,21 +209,25 @@ class GSheetsTime(GSheetsField[str, datetime.time]):
         if self.pattern is None or value is None or value == "":
             return None
 
-        return parse_date_time_pattern(value, self.pattern, datetime.time)
+        return self._get_date_time_pattern().parse(value, datetime.time)
 
     def format(self, value: Optional[datetime.time]) -> str:
         if self.pattern is None or value is None:
             return ""
 
-        return format_date_time_pattern(value, self.pattern)
+        return self._get_date_time_pattern().format(value)
 
     def quote(self, value: Optional[str]) -> str:
         if self.pattern is None or value == "" or value is None:
             return "null"
 
         # On SQL queries the timestamp should be prefix by "timeofday"
-        value = parse_date_time_pattern(value, self.pattern, datetime.time).strftime(
-            TIME_SQL_QUOTE,
+        value = (
+            self._get_date_time_pattern()
+            .parse(value, datetime.time)
+            .strftime(
+                TIME_SQL_QUOTE,
+            )
         )
         return f"timeofday '{value}'"
 
@@ -222,7 +244,7 @@ class GSheetsDuration(GSheetsField[str, datetime.timedelta]):
         if self.pattern is None or value is None or value == "":
             return None
 
-        return parse_date_time_pattern(value, self.pattern, datetime.timedelta)
+        return self._get_date_time_pattern().parse(value, datetime.timedelta)
 
     def format(self, value: Optional[datetime.timedelta]) -> str:
         # This method is used only when inserting or updating rows, so we
@@ -230,16 +252,14 @@ class GSheetsDuration(GSheetsField[str, datetime.timedelta]):
         if self.pattern is None or value is None:
             return ""
 
-        return format_date_time_pattern(value, self.pattern)
+        return self._get_date_time_pattern().format(value)
 
     def quote(self, value: Optional[str]) -> str:
         if self.pattern is None or value == "" or value is None:
             return "null"
 
-        timestamp = DURATION_OFFSET + parse_date_time_pattern(
-            value,
-            self.pattern,
-            datetime.timedelta,
+        timestamp = DURATION_OFFSET + self._get_date_time_pattern().parse(
+            value, datetime.timedelta
         )
         return f"datetime '{timestamp}'"
 
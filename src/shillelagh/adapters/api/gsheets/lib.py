@@ -3,7 +3,7 @@ import datetime
 import itertools
 import string
 import urllib.parse
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 
 import google.auth
 import google.oauth2.credentials
@@ -211,6 +211,105 @@ def get_values_from_row(row: Row, column_map: Dict[str, str]) -> List[Any]:
     return [row.get(column, "") for column in itertools.islice(gen_letters(), n_cols)]
 
 
+def get_original_index(index: int, deleted: List[int]) -> int:
+    """
+    Return the index a row had before other rows were deleted.
+
+    The original indexes of the deleted rows should be sorted. For example, after
+    deleting rows 0 and 3 the row at index 2 was originally at index 4:
+
+        >>> get_original_index(2, [0, 3])
+        4
+    """
+    for row_number in deleted:
+        if row_number > index:
+            break
+        index += 1
+    return index
+
+
+def get_row_ranges(row_numbers: List[int]) -> List[Tuple[int, int]]:
+    """
+    Merge sorted row indexes into ``[start, end)`` ranges.
+
+        >>> get_row_ranges([1, 2, 3, 5, 6])
+        [(1, 4), (5, 7)]
+    """
+    ranges: List[Tuple[int, int]] = []
+    for row_number in row_numbers:
+        if ranges and ranges[-1][1] == row_number:
+            ranges[-1] = (ranges[-1][0], row_number + 1)
+        else:
+            ranges.append((row_number, row_number + 1))
+    return ranges
+
+
+def get_delete_ranges(row_numbers: List[int]) -> List[Tuple[int, int]]:
+    """
+    Merge row indexes into ``[start, end)`` ranges, in descending order.
+
+    Deleting ranges from the bottom up ensures that the indexes of the remaining
+    ranges don't change:
+
+        >>> get_delete_ranges([1, 2, 3, 7, 5, 6])
+        [(5, 8), (1, 4)]
+    """
+    return get_row_ranges(sorted(row_numbers))[::-1]
+
+
+class ChangeTracker:
+    """
+    Track changes to a local copy of the values in a sheet.
+
+    Each row is identified by its index when the sheet was downloaded, so that
+    the changes can be pushed without rewriting the whole sheet. Rows can only be
+    appended at the end, so the original indexes are always sorted, followed by
+    the appended rows.
+    """
+
+    def __init__(self, values: List[List[Any]]):
+        self.origins: List[Optional[int]] = list(range(len(values)))
+        self.updated: Set[int] = set()
+        self.number_of_columns = max((len(row) for row in values), default=0)
+
+    def append(self) -> None:
+        """
+        Track a row appended to the values.
+        """
+        self.origins.append(None)
+
+    def delete(self, row_number: int) -> None:
+        """
+        Track a row deleted from the values.
+        """
+        self.origins.pop(row_number)
+
+    def update(self, row_number: int) -> None:
+        """
+        Track a row modified in the values.
+        """
+        origin = self.origins[row_number]
+        if origin is not None:
+            self.updated.add(origin)
+
+    def get_deleted_rows(self, number_of_rows: int) -> List[int]:
+        """
+        Return the original indexes of the deleted rows.
+        """
+        remaining = {origin for origin in self.origins if origin is not None}
+        return [i for i in range(number_of_rows) if i not in remaining]
+
+    def get_changed_rows(self) -> List[int]:
+        """
+        Return the current indexes of the updated and appended rows.
+        """
+        return [
+            i
+            for i, origin in enumerate(self.origins)
+            if origin is None or origin in self.updated
+        ]
+
+
 def get_credentials(
     access_token: Optional[str] = None,
     service_account_file: Optional[str] = None,
@@ -11,6 +11,7 @@ import re
 from collections import defaultdict
 from datetime import date, datetime, time, timedelta
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple, Type, TypeVar, Union
 
 from shillelagh.adapters.api.gsheets.parsing.base import LITERAL, Token, tokenize
@@ -532,6 +533,110 @@ class AMPM(AP):
         return {"meridiem": meridiem}, value[2:]
 
 
+# token classes, in the order they should be tried
+CLASSES: List[Type[Token]] = [
+    # durations should come first because they need to be modified
+    # after the first capture
+    HPlusDuration,
+    MPlusDuration,
+    SPlusDuration,
+    # then the rest
+    H,
+    HHPlus,
+    M,
+    MM,
+    MMM,
+    MMMM,
+    MMMMM,
+    S,
+    SS,
+    D,
+    DD,
+    DDD,
+    DDDDPlus,
+    YY,
+    YYYY,
+    AP,
+    AMPM,
+    ZERO,
+    LITERAL,
+]
+
+# Regular expressions for the default patterns, which are used by most sheets. Values
+# that don't match them (or that are not valid) are parsed with the tokens, so they
+# produce the same results and errors.
+FAST_PATHS = {
+    "m/d/yyyy h:mm:ss": re.compile(
+        r"(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}) "
+        r"(?P<hour>\d{1,2}):(?P<minute>\d{2}):(?P<second>\d{2})",
+    ),
+    "m/d/yyyy": re.compile(r"(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})"),
+}
+
+
+class DateTimePattern:
+    """
+    A date/time pattern, tokenized once and used to parse and format many values.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.tokens = list(tokenize(pattern, CLASSES))
+        self.regex = FAST_PATHS.get(pattern)
+
+    def parse(self, value: str, class_: Type[DateTime]) -> DateTime:
+        """
+        Parse a value.
+        """
+        if self.regex is not None and (match := self.regex.fullmatch(value)):
+            try:
+                return class_(**{k: int(v) for k, v in match.groupdict().items()})
+            except (TypeError, ValueError):
+                pass
+
+        kwargs: Dict[str, Any] = {}
+        for token in self.tokens:
+            consumed, value = token.parse(value, self.tokens)
+            kwargs.update(**consumed)
+
+        # add PM offset
+        if "hour" in kwargs:
+            meridiem = kwargs.pop("meridiem", None)
+            if meridiem == Meridiem.PM and kwargs["hour"] != 12:
+                kwargs["hour"] += 12
+            elif meridiem == Meridiem.AM and kwargs["hour"] == 12:
+                kwargs["hour"] -= 12
+
+        # we can't really do anything with ``weekday``
+        if "weekday" in kwargs:
+            del kwargs["weekday"]
+
+        if "microsecond" in kwargs and class_ is timedelta:
+            kwargs["microseconds"] = kwargs.pop("microsecond")
+
+        try:
+            return class_(**kwargs)
+        except TypeError as ex:
+            raise Exception("Unsupported format") from ex
+
+    def format(self, value: DateTime) -> str:
+        """
+        Format a value.
+        """
+        return "".join(token.format(value, self.tokens) for token in self.tokens)
+
+    def __repr__(self) -> str:
+        return f"DateTimePattern({self.pattern!r})"
+
+
+@lru_cache(maxsize=128)
+def get_date_time_pattern(pattern: str) -> DateTimePattern:
+    """
+    Return a tokenized pattern, reusing it across calls.
+    """
+    return DateTimePattern(pattern)
+
+
 def infer_column_type(pattern: str) -> str:
     """
     Infer the correct date-related type.
@@ -539,35 +644,7 @@ def infer_column_type(pattern: str) -> str:
     GSheets returns ``datetime`` as the type for timestamps, but also for time of day and
     durations. We need to parse the pattern to figure out the exact type.
     """
-    classes = [
-        # durations should come first because they need to be modified
-        # after the first capture
-        HPlusDuration,
-        MPlusDuration,
-        SPlusDuration,
-        # then the rest
-        H,
-        HHPlus,
-        M,
-        MM,
-        MMM,
-        MMMM,
-        MMMMM,
-        S,
-        SS,
-        D,
-        DD,
-        DDD,
-        DDDDPlus,
-        YY,
-        YYYY,
-        AP,
-        AMPM,
-        ZERO,
-        LITERAL,
-    ]
-
-    tokens = list(tokenize(pattern, classes))
+    tokens = get_date_time_pattern(pattern).tokens
 
     if any(isinstance(token, DurationToken) for token in tokens):
         return "duration"
@@ -589,59 +666,7 @@ def parse_date_time_pattern(
 
     See https://developers.google.com/sheets/api/guides/formats?hl=en.
     """
-    classes = [
-        # durations should come first because they need to be modified
-        # after the first capture
-        HPlusDuration,
-        MPlusDuration,
-        SPlusDuration,
-        # then the rest
-        H,
-        HHPlus,
-        M,
-        MM,
-        MMM,
-        MMMM,
-        MMMMM,
-        S,
-        SS,
-        D,
-        DD,
-        DDD,
-        DDDDPlus,
-        YY,
-        YYYY,
-        AP,
-        AMPM,
-        ZERO,
-        LITERAL,
-    ]
-
-    kwargs: Dict[str, Any] = {}
-    tokens = list(tokenize(pattern, classes))
-    for token in tokens:
-        consumed, value = token.parse(value, tokens)
-        kwargs.update(**consumed)
-
-    # add PM offset
-    if "hour" in kwargs:
-        meridiem = kwargs.pop("meridiem", None)
-        if meridiem == Meridiem.PM and kwargs["hour"] != 12:
-            kwargs["hour"] += 12
-        elif meridiem == Meridiem.AM and kwargs["hour"] == 12:
-            kwargs["hour"] -= 12
-
-    # we can't really do anything with ``weekday``
-    if "weekday" in kwargs:
-        del kwargs["weekday"]
-
-    if "microsecond" in kwargs and class_ is timedelta:
-        kwargs["microseconds"] = kwargs.pop("microsecond")
-
-    try:
-        return class_(**kwargs)
-    except TypeError as ex:
-        raise Exception("Unsupported format") from ex
+    return get_date_time_pattern(pattern).parse(value, class_)
 
 
 def format_date_time_pattern(value: DateTime, pattern: str) -> str:
@@ -650,37 +675,4 @@ def format_date_time_pattern(value: DateTime, pattern: str) -> str:
 
     See https://developers.google.com/sheets/api/guides/formats?hl=en.
     """
-    classes = [
-        # durations should come first because they need to be modified
-        # after the first capture
-        HPlusDuration,
-        MPlusDuration,
-        SPlusDuration,
-        # then the rest
-        H,
-        HHPlus,
-        M,
-        MM,
-        MMM,
-        MMMM,
-        MMMMM,
-        S,
-        SS,
-        D,
-        DD,
-        DDD,
-        DDDDPlus,
-        YY,
-        YYYY,
-        AP,
-        AMPM,
-        ZERO,
-        LITERAL,
-    ]
-
-    parts = []
-    tokens = list(tokenize(pattern, classes))
-    for token in tokens:
-        parts.append(token.format(value, tokens))
-
-    return "".join(parts)
+    return get_date_time_pattern(pattern).format(value)
@@ -7,6 +7,7 @@ https://developers.google.com/sheets/api/guides/formats#number_format_tokens
 import math
 import operator
 import re
+from functools import lru_cache
 from itertools import zip_longest
 from typing import Any, Dict, Iterator, List, Tuple, Union, cast
 
@@ -474,9 +475,13 @@ def fix_periods(tokens: Iterator[Token]) -> Iterator[Token]:
             yield token
 
 
-def parse_number_format(value: str, format_: str) -> float:
+@lru_cache(maxsize=128)
+def get_tokens(format_: str) -> List[Token]:
     """
-    Parse a value using a given format pattern.
+    Tokenize a format pattern, reusing the tokens across calls.
+
+    Tokens are stateless, so the same list can be used for all the values in a
+    column; it should not be modified.
     """
     classes = [
         FRACTION,  # should come first
@@ -493,9 +498,16 @@ def parse_number_format(value: str, format_: str) -> float:
         LITERAL,
     ]
 
+    return list(fix_periods(tokenize(format_, classes)))
+
+
+def parse_number_format(value: str, format_: str) -> float:
+    """
+    Parse a value using a given format pattern.
+    """
     number = 0
 
-    tokens = list(fix_periods(tokenize(format_, classes)))
+    tokens = get_tokens(format_)
     for token in tokens:
         consumed, value = token.parse(value, tokens)
         if "operation" in consumed:
@@ -572,24 +584,9 @@ def format_number_pattern(  # pylint: disable=too-many-branches
             else:
                 format_ = formats[0]
 
-    classes = [
-        FRACTION,  # should come first
-        DIGITS,
-        COMMA,
-        PERIOD,
-        PERCENT,
-        E,
-        STAR,
-        UNDERSCORE,
-        AT,
-        COLOR,
-        CONDITION,
-        LITERAL,
-    ]
-
     parts = []
 
-    tokens = list(fix_periods(tokenize(format_, classes)))
+    tokens = get_tokens(format_)
     for token in tokens:
         parts.append(token.format(value, tokens))
 
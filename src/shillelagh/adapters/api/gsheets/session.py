@@ -0,0 +1,152 @@
+"""
+Pooled HTTP sessions for the Google Sheets adapter.
+
+Creating a new session for every request means paying for a new TLS handshake, and
+possibly a token refresh, each time. Instead, a single session is shared by all the
+adapters in the process that use the same credentials, keeping connections alive in
+a pool. Credentials are refreshed before they expire, so that requests don't block
+on a refresh.
+
+Sessions are identified by a hash of the credentials, and only the most recently
+used ones are kept.
+
+Note that ``requests`` doesn't support HTTP/2, so connections use HTTP/1.1.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, cast
+
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import AuthorizedSession, Request
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# maximum number of connections kept alive per host
+DEFAULT_POOL_SIZE = 10
+
+# credentials are refreshed when they expire in less than this
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+# maximum number of pooled sessions
+MAX_SESSIONS = 32
+
+SessionKey = str
+
+
+class PooledSession(NamedTuple):
+    """
+    A shared session, and a lock to refresh its credentials.
+    """
+
+    session: Session
+    lock: threading.Lock
+
+
+_sessions: "OrderedDict[SessionKey, PooledSession]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_session_key(  # pylint: disable=too-many-arguments
+    access_token: Optional[str] = None,
+    service_account_file: Optional[str] = None,
+    service_account_info: Optional[Dict[str, Any]] = None,
+    subject: Optional[str] = None,
+    app_default_credentials: bool = False,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> SessionKey:
+    """
+    Return a key identifying a set of credentials, used to share sessions.
+
+    The key is a hash, so that credentials are not kept in memory after the session
+    is gone.
+    """
+    payload = json.dumps(
+        [
+            access_token,
+            service_account_file,
+            service_account_info,
+            subject,
+            app_default_credentials,
+            pool_size,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def create_session(credentials: Optional[Credentials], pool_size: int) -> Session:
+    """
+    Create a session with a pool of persistent connections.
+    """
+    session = cast(
+        Session,
+        AuthorizedSession(credentials) if credentials else Session(),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def refresh_credentials(credentials: Optional[Credentials]) -> None:
+    """
+    Refresh credentials that are about to expire.
+
+    Credentials without an expiration (eg, access tokens, or service accounts that
+    haven't been used yet) are refreshed by the session when needed.
+    """
+    expiry = getattr(credentials, "expiry", None)
+    if not isinstance(expiry, datetime.datetime):
+        return
+
+    # ``google-auth`` uses naive datetimes in UTC
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    if expiry - REFRESH_MARGIN <= now:
+        _logger.info("Refreshing credentials")
+        credentials.refresh(Request())  # type: ignore
+
+
+def get_pooled_session(
+    key: SessionKey,
+    credentials: Optional[Credentials],
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> Session:
+    """
+    Return the session shared by all adapters using a given set of credentials.
+
+    The credentials are only used when the session is first created. When there are
+    too many sessions the least recently used one is removed; it's closed once no
+    longer referenced.
+    """
+    with _lock:
+        if key in _sessions:
+            _sessions.move_to_end(key)
+        else:
+            _sessions[key] = PooledSession(
+                create_session(credentials, pool_size),
+                threading.Lock(),
+            )
+            if len(_sessions) > MAX_SESSIONS:
+                _sessions.popitem(last=False)
+        pooled = _sessions[key]
+
+    with pooled.lock:
+        refresh_credentials(getattr(pooled.session, "credentials", None))
+
+    return pooled.session
+
+
+def clear_sessions() -> None:
+    """
+    Close and remove all the pooled sessions.
+    """
+    with _lock:
+        for pooled in _sessions.values():
+            pooled.session.close()
+        _sessions.clear()
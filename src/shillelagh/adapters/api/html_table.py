@@ -5,16 +5,20 @@ An adapter that scrapes HTML tables.
 # pylint: disable=invalid-name
 
 import urllib.parse
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 
 from shillelagh.adapters.base import Adapter
-from shillelagh.adapters.memory.pandas import get_columns_from_df, get_df_data
+from shillelagh.adapters.memory.pandas import (
+    get_columns_from_df,
+    get_df_batches,
+    get_df_data,
+)
 from shillelagh.fields import Field
 from shillelagh.filters import Filter
 from shillelagh.lib import SimpleCostModel
-from shillelagh.typing import RequestedOrder, Row
+from shillelagh.typing import Batch, RequestedOrder, Row
 
 SUPPORTED_PROTOCOLS = {"http", "https", "ftp", "file"}
 AVERAGE_NUMBER_OF_ROWS = 100
@@ -30,6 +34,7 @@ class HTMLTableAPI(Adapter):
 
     supports_limit = True
     supports_offset = True
+    supports_requested_columns = True
 
     @staticmethod
     def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
@@ -78,6 +83,23 @@ class HTMLTableAPI(Adapter):
         order: List[Tuple[str, RequestedOrder]],
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        requested_columns: Optional[Set[str]] = None,
         **kwargs: Any,
     ) -> Iterator[Row]:
-        yield from get_df_data(self.df, self.columns, bounds, order, limit, offset)
+        yield from get_df_data(
+            self.df,
+            self.columns,
+            bounds,
+            order,
+            limit,
+            offset,
+            requested_columns,
+        )
+
+    def get_batches(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Batch]:
+        yield from get_df_batches(self.df, self.columns, bounds, order, **kwargs)
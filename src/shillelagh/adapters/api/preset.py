@@ -17,7 +17,7 @@ from shillelagh.adapters.api.generic_json import CACHE_EXPIRATION, GenericJSONAP
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Order
 from shillelagh.filters import Filter
-from shillelagh.lib import analyze, flatten
+from shillelagh.lib import analyze, flatten, prefetch
 from shillelagh.typing import RequestedOrder, Row
 
 _logger = logging.getLogger(__name__)
@@ -130,6 +130,9 @@ class PresetWorkspaceAPI(PresetAPI):
     supports_limit = True
     supports_offset = True
 
+    # maximum number of pages fetched concurrently
+    prefetch_workers = 4
+
     default_path = "$.result[*]"
     cache_name = "preset_cache"
 
@@ -168,17 +171,13 @@ class PresetWorkspaceAPI(PresetAPI):
         requested_columns: Optional[Set[str]] = None,
         **kwargs: Any,
     ) -> Iterator[Row]:
-        for url, slice_ in get_urls(self.uri, offset, limit, MAX_PAGE_SIZE):
-            response = self._session.get(str(url))
-            payload = response.json()
-            if not response.ok:
-                messages = "\n".join(
-                    error.get("message", str(error))
-                    for error in payload.get("errors", [])
-                )
-                raise ProgrammingError(f"Error: {messages}")
-
-            rows = jsonpath.findall(self.path, payload)[slice_]
+        for rows, slice_ in prefetch(
+            self._fetch_page,
+            get_urls(self.uri, offset, limit, MAX_PAGE_SIZE),
+            self.prefetch_workers,
+            is_last=lambda page: len(page[0]) < MAX_PAGE_SIZE,
+        ):
+            rows = rows[slice_]
             if not rows:
                 break
 
@@ -191,3 +190,18 @@ class PresetWorkspaceAPI(PresetAPI):
                 row["rowid"] = i
                 _logger.debug(row)
                 yield flatten(row)
+
+    def _fetch_page(self, page: Tuple[str, slice]) -> Tuple[List[Any], slice]:
+        """
+        Fetch all the rows in a page.
+        """
+        url, slice_ = page
+        response = self._session.get(str(url))
+        payload = response.json()
+        if not response.ok:
+            messages = "\n".join(
+                error.get("message", str(error)) for error in payload.get("errors", [])
+            )
+            raise ProgrammingError(f"Error: {messages}")
+
+        return jsonpath.findall(self.path, payload), slice_
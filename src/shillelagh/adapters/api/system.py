@@ -111,6 +111,7 @@ class SystemAPI(Adapter):
     supports_limit = True
     supports_offset = True
     supports_requested_columns = True
+    cacheable = False
 
     @staticmethod
     def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
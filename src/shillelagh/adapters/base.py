@@ -1,17 +1,43 @@
 """Base class for adapters."""
 import atexit
 import inspect
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+import itertools
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from shillelagh.exceptions import NotSupportedError
 from shillelagh.fields import Field, RowID
 from shillelagh.filters import Filter, Operator
-from shillelagh.typing import RequestedOrder, Row
+from shillelagh.typing import Batch, RequestedOrder, Row
 
 FIXED_COST = 666
 
+# number of rows in each batch, when adapters don't implement ``get_batches``
+BATCH_SIZE = 1000
 
-class Adapter:
+
+def rows_to_batches(
+    rows: Iterator[Row],
+    column_names: List[str],
+    size: Optional[int] = None,
+) -> Iterator[Batch]:
+    """
+    Group a stream of rows into columnar batches.
+
+    Columns missing from a row are filled with ``None``, and columns not present
+    in ``column_names`` are dropped.
+    """
+    size = size or BATCH_SIZE
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            break
+        yield {
+            column_name: [row.get(column_name) for row in chunk]
+            for column_name in column_names
+        }
+
+
+class Adapter:  # pylint: disable=too-many-public-methods
 
     """
     An adapter to a table.
@@ -51,6 +77,10 @@ class Adapter:
     # if true, the requested columns will be passed to ``get_rows`` and ``get_data``
     supports_requested_columns = False
 
+    # if true, scans can be stored in the connection scan cache and reused by
+    # identical queries; adapters reading volatile or local data should disable it
+    cacheable = True
+
     def __init__(self, *args: Any, **kwargs: Any):  # pylint: disable=unused-argument
         # ensure ``self.close`` gets called before GC
         atexit.register(self.close)
@@ -143,6 +173,26 @@ class Adapter:
         """
         raise NotImplementedError("Subclasses must implement ``get_data``")
 
+    async def get_data_async(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> AsyncIterator[Row]:
+        """
+        Yield rows as adapter-specific types, asynchronously.
+
+        This is an optional alternative to ``get_data``, for adapters using an
+        asynchronous HTTP client. When implemented it's used instead of ``get_data``,
+        and it runs in a background event loop, so that scans of different tables
+        in a query can wait on the network concurrently.
+
+        The default implementation simply yields the rows from ``get_data``, and is
+        not used by the backend.
+        """
+        for row in self.get_data(bounds, order, **kwargs):
+            yield row
+
     def get_rows(
         self,
         bounds: Dict[str, Filter],
@@ -163,6 +213,28 @@ class Adapter:
                 if column_name in parsers
             }
 
+    def get_batches(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Batch]:
+        """
+        Yield batches of rows in columnar format, as native Python types.
+
+        Each batch is a dictionary mapping column names to a sequence of values,
+        with all sequences having the same length. The ``rowid`` column must always
+        be present; other missing columns will be filled with ``None`` by the backend.
+
+        Adapters that can produce data in columns (from a dataframe or a columnar file
+        format, eg) should implement this method, since it avoids building a
+        dictionary for each row. The default implementation groups the rows returned
+        by ``get_rows`` into batches.
+        """
+        column_names = ["rowid", *self.get_columns().keys()]
+        rows = self.get_rows(bounds, order, **kwargs)
+        yield from rows_to_batches(rows, column_names)
+
     def insert_data(self, row: Row) -> int:
         """
         Insert a single row with adapter-specific types.
@@ -187,6 +259,35 @@ class Adapter:
         }
         return self.insert_data(row)
 
+    def insert_data_many(self, rows: List[Row]) -> List[int]:
+        """
+        Insert multiple rows with adapter-specific types.
+
+        Returns the IDs of the inserted rows. The default implementation calls
+        ``insert_data`` for each row; adapters that can write multiple rows more
+        efficiently than one at a time should implement this method, and the backend
+        will buffer inserted rows and pass them in batches.
+        """
+        return [self.insert_data(row) for row in rows]
+
+    def insert_rows(self, rows: List[Row]) -> List[int]:
+        """
+        Insert multiple rows with native Python types.
+
+        The row types will be converted to the native adapter types, and passed to
+        ``insert_data_many``.
+        """
+        columns = self.get_columns().copy()
+        columns["rowid"] = RowID()
+        rows = [
+            {
+                column_name: columns[column_name].format(value)
+                for column_name, value in row.items()
+            }
+            for row in rows
+        ]
+        return self.insert_data_many(rows)
+
     def delete_data(self, row_id: int) -> None:
         """Delete a row from the table."""
         raise NotSupportedError("Adapter does not support ``DELETE`` statements")
@@ -226,6 +327,41 @@ class Adapter:
         }
         self.update_data(row_id, row)
 
+    def begin(self) -> None:
+        """
+        Start a transaction.
+
+        Called before the first change to the table in a transaction. Note that each
+        statement runs in its own transaction, unless the connection was created
+        with an isolation level. Adapters can use this method to record the state
+        needed to roll back the changes.
+        """
+
+    def sync(self) -> None:
+        """
+        Prepare to commit the current transaction.
+
+        Adapters that buffer changes should push them to the underlying storage
+        here. If an exception is raised the transaction is rolled back, while
+        exceptions raised by ``commit`` are ignored by SQLite.
+        """
+
+    def commit(self) -> None:
+        """
+        Commit the current transaction.
+
+        Called after ``sync``. Adapters can use this method to discard the state
+        recorded in ``begin``.
+        """
+
+    def rollback(self) -> None:
+        """
+        Roll back the current transaction.
+
+        Adapters should discard any buffered changes, and undo the changes already
+        applied since ``begin`` was called, if possible.
+        """
+
     def close(self) -> None:
         """
         Close the adapter.
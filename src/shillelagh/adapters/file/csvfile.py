@@ -14,15 +14,28 @@ import logging
 import os
 import tempfile
 import urllib.parse
+from contextlib import closing
 from datetime import timedelta
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, cast
 
 import requests
 
 from shillelagh.adapters.base import Adapter
+from shillelagh.adapters.file.csvindex import CSVIndex
+from shillelagh.adapters.file.csvparallel import (
+    count_records,
+    get_data_offset,
+    iter_chunks,
+    iter_rows,
+    map_chunks,
+    open_mapped,
+    sample_records,
+    scan_chunk,
+    summarize_chunk,
+)
 from shillelagh.exceptions import ProgrammingError
-from shillelagh.fields import Field
+from shillelagh.fields import Field, Order, String
 from shillelagh.filters import (
     Equal,
     Filter,
@@ -32,17 +45,33 @@ from shillelagh.filters import (
     Operator,
     Range,
 )
-from shillelagh.lib import RowIDManager, analyze, filter_data, update_order
+from shillelagh.lib import (
+    RowIDManager,
+    Sampling,
+    Summary,
+    analyze,
+    filter_data,
+    sample_rows,
+    update_order,
+    widen_types,
+)
 from shillelagh.typing import Maybe, MaybeType, RequestedOrder, Row
 
 _logger = logging.getLogger(__name__)
 
 INITIAL_COST = 0
 FILTERING_COST = 1000
+INDEX_LOOKUP_COST = 10
 SORTING_COST = 10000
 
+# operators that can be answered by a column index
+INDEXED_OPERATORS = {Operator.EQ, Operator.GE, Operator.GT, Operator.LE, Operator.LT}
+
 DEFAULT_TIMEOUT = timedelta(minutes=3)
 
+# size of the blocks written to disk when downloading remote files
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 SUPPORTED_PROTOCOLS = {"http", "https"}
 
 
@@ -62,7 +91,7 @@ class RowTracker:
         return self.iterable.__next__()
 
 
-class CSVFile(Adapter):
+class CSVFile(Adapter):  # pylint: disable=too-many-instance-attributes
     r"""
     An adapter for CSV files.
 
@@ -78,10 +107,32 @@ class CSVFile(Adapter):
     The adapter will first scan the whole file to determine number of rows, as
     well as the type and order of each column.
 
-    The adapter has no index. When data is ``SELECT``\ed the adapter will stream
-    over all the rows in the file, filtering them on the fly. If a specific
-    order is requests the resulting rows will be loaded into memory so they
-    can be sorted.
+    When data is ``SELECT``\ed the adapter will stream over all the rows in the
+    file, filtering them on the fly. If a specific order is requests the resulting
+    rows will be loaded into memory so they can be sorted.
+
+    Optionally, an index can be built by passing the ``index_columns`` argument::
+
+        >>> from shillelagh.backends.apsw.db import connect
+        >>> connection = connect(
+        ...     ":memory:",
+        ...     adapter_kwargs={"csvfile": {"index_columns": ["index"]}},
+        ... )
+
+    The index is stored in a sidecar file (``file.csv.idx``), and has the byte offset
+    of each row, sorted keys for the requested columns, and min/max statistics for
+    blocks of rows. Equality and range predicates on indexed columns will then read
+    only the matching rows, and predicates on other columns will skip blocks that
+    can't match. The index is rebuilt whenever the CSV file is modified externally.
+
+    Large files can be scanned in parallel by passing the number of ``workers``. The
+    file is split in chunks aligned on record boundaries, which are analyzed and
+    filtered by a pool of processes; results are merged in file order, so row IDs
+    are the same as in a sequential scan.
+
+    For large files types can be inferred from a sample of ``sample_size`` rows,
+    chosen according to ``sampling`` (``head``, ``reservoir`` or ``stratified``).
+    Column types are then widened if needed as the data is read.
 
     Inserted rows are appended to the end of the file. Deleted rows simply
     have their row ID marked as deleted (-1), and are ignored when the data is
@@ -97,6 +148,7 @@ class CSVFile(Adapter):
 
     supports_limit = True
     supports_offset = True
+    cacheable = False
 
     @staticmethod
     def supports(uri: str, fast: bool = True, **kwargs: Any) -> MaybeType:
@@ -125,7 +177,14 @@ class CSVFile(Adapter):
     def parse_uri(uri: str) -> Tuple[str]:
         return (uri,)
 
-    def __init__(self, path_or_uri: str):
+    def __init__(  # pylint: disable=too-many-arguments, too-many-locals
+        self,
+        path_or_uri: str,
+        index_columns: Optional[List[str]] = None,
+        workers: int = 1,
+        sample_size: Optional[int] = None,
+        sampling: str = Sampling.HEAD.value,
+    ):
         super().__init__()
 
         path = Path(path_or_uri)
@@ -134,38 +193,41 @@ class CSVFile(Adapter):
         else:
             self.local = False
 
-            # download CSV file
+            # stream the CSV file to disk, instead of loading it in memory
             with tempfile.NamedTemporaryFile(delete=False) as output:
-                response = requests.get(
+                with requests.get(
                     path_or_uri,
                     timeout=DEFAULT_TIMEOUT.total_seconds(),
-                )
-                output.write(response.content)
+                    stream=True,
+                ) as response:
+                    for block in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        output.write(block)
             path = Path(output.name)
 
         self.path = path
         self.modified = False
+        self.workers = workers
 
         _logger.info("Opening file CSV file %s to load metadata", self.path)
-        with open(self.path, encoding="utf-8") as csvfile:
-            reader = csv.reader(csvfile, quoting=csv.QUOTE_NONNUMERIC)
+        with closing(iter_rows(self.path)) as reader:
             try:
                 column_names = next(reader)
             except StopIteration as ex:
                 raise ProgrammingError("The file has no rows") from ex
-            data = (dict(zip(column_names, row)) for row in reader)
 
-            # put data in a ``RowTracker``, so we can monitor the last row
-            # and keep track of the column order
-            row_tracker = RowTracker(data)
+            # types are exact, unless inferred from a sample
+            self.confident = True
 
-            # analyze data to determine number of rows, as well as the order
-            # and type of each column
-            num_rows, order, types = analyze(row_tracker)
-            _logger.debug("Read %d rows", num_rows)
+            num_rows, order, types, last_row = self._analyze(
+                column_names,
+                reader,
+                sample_size,
+                Sampling(sampling),
+            )
+        _logger.debug("Read %d rows", num_rows)
 
         self.columns = {
-            column_name: types[column_name](
+            column_name: types.get(column_name, String)(
                 filters=[Range, Equal, NotEqual, IsNull, IsNotNull],
                 order=order[column_name],
                 exact=True,
@@ -176,9 +238,96 @@ class CSVFile(Adapter):
         # the row ID manager is used to keep track of insertions and deletions
         self.row_id_manager = RowIDManager([range(0, num_rows + 1)])
 
-        self.last_row = row_tracker.last_row
+        self.last_row = last_row
         self.num_rows = num_rows
 
+        # the index is only used for local files
+        self.index: Optional[CSVIndex] = None
+        if self.local and index_columns is not None:
+            self.index = CSVIndex.open(self.path, column_names, index_columns)
+
+        # state of the file when the transaction started, used to roll back changes
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def _analyze(
+        self,
+        column_names: List[str],
+        reader: Iterator[List[Any]],
+        sample_size: Optional[int],
+        sampling: Sampling,
+    ) -> Tuple[int, Dict[str, Order], Dict[str, Type[Field]], Optional[Row]]:
+        """
+        Determine the number of rows, as well as the order and type of each column.
+
+        Returns also the last row, used to keep track of the order on inserts.
+        """
+        if sample_size is not None:
+            # rows are counted without parsing them, since row IDs depend on it
+            with open_mapped(self.path) as buffer:
+                num_rows = count_records(buffer, get_data_offset(buffer))
+            if num_rows > sample_size:
+                _logger.info("Inferring types from a sample of %d rows", sample_size)
+                self.confident = False
+                _, _, types = analyze(
+                    iter(self._sample(column_names, reader, sample_size, sampling)),
+                )
+                order = {column_name: Order.NONE for column_name in column_names}
+                return num_rows, order, types, None
+
+        if self.workers > 1:
+            summary = self._summarize(column_names)
+            return (
+                summary.num_rows,
+                summary.get_order(),
+                summary.get_types(),
+                summary.last_row or None,
+            )
+
+        data = (dict(zip(column_names, row)) for row in reader)
+
+        # put data in a ``RowTracker``, so we can monitor the last row
+        # and keep track of the column order
+        row_tracker = RowTracker(data)
+
+        # analyze data to determine number of rows, as well as the order
+        # and type of each column
+        num_rows, order, types = analyze(row_tracker)
+        return num_rows, order, types, row_tracker.last_row
+
+    def _sample(
+        self,
+        column_names: List[str],
+        reader: Iterator[List[Any]],
+        sample_size: int,
+        sampling: Sampling,
+    ) -> List[Row]:
+        """
+        Read a sample of the rows.
+        """
+        if sampling == Sampling.STRATIFIED:
+            with open_mapped(self.path) as buffer:
+                records = sample_records(buffer, get_data_offset(buffer), sample_size)
+            return [dict(zip(column_names, record)) for record in records]
+
+        data = (dict(zip(column_names, row)) for row in reader)
+        return sample_rows(data, sample_size, sampling)[0]
+
+    def _summarize(self, column_names: List[str]) -> Summary:
+        """
+        Analyze the file in parallel, merging the summaries of each chunk in order.
+        """
+        summary = Summary()
+        with open_mapped(self.path) as buffer:
+            for chunk_summary in map_chunks(
+                summarize_chunk,
+                iter_chunks(buffer, get_data_offset(buffer)),
+                self.workers,
+                self.path,
+                column_names,
+            ):
+                summary = summary.merge(chunk_summary)
+        return summary
+
     def get_columns(self) -> Dict[str, Field]:
         return self.columns
 
@@ -189,14 +338,20 @@ class CSVFile(Adapter):
     ) -> float:
         cost = INITIAL_COST
 
-        # filtering the data has linear cost, since ``filter_data`` builds a
-        # single filter function applied as the data is streamed
-        if filtered_columns:
+        # filtering indexed columns requires reading only the matching rows; other
+        # filters have linear cost, since ``filter_data`` builds a single filter
+        # function applied as the data is streamed
+        if self.index and any(
+            column_name in self.index.index_columns and operator in INDEXED_OPERATORS
+            for column_name, operator in filtered_columns
+        ):
+            cost += INDEX_LOOKUP_COST
+        elif filtered_columns:
             cost += FILTERING_COST
 
-        # sorting, on the other hand, is costy, requiring loading all the data
-        # in memory and calling ``.sort()`` for each column that needs to be
-        # ordered
+        # sorting, on the other hand, is costy, requiring reading all the data
+        # before the first row can be returned, and spilling it to disk if it
+        # doesn't fit in memory; comparisons get more expensive with each column
         cost += SORTING_COST * len(order)
 
         return cost
@@ -209,10 +364,34 @@ class CSVFile(Adapter):
         offset: Optional[int] = None,
         **kwargs: Any,
     ) -> Iterator[Row]:
-        _logger.info("Opening file CSV file %s to load data", self.path)
-        with open(self.path, encoding="utf-8") as csvfile:
-            reader = csv.reader(csvfile, quoting=csv.QUOTE_NONNUMERIC)
+        if self.index:
+            rows = self._get_indexed_data(bounds, order, limit, offset)
+        elif self.workers > 1:
+            rows = self._get_parallel_data(bounds, order, limit, offset)
+        else:
+            rows = self._get_sequential_data(bounds, order, limit, offset)
 
+        if self.confident:
+            yield from rows
+            return
+
+        # types were inferred from a sample, and might need to be widened
+        for row in rows:
+            widen_types(self.columns, row)
+            yield row
+
+    def _get_sequential_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Iterator[Row]:
+        """
+        Stream over all the rows in the file, filtering them on the fly.
+        """
+        _logger.info("Opening file CSV file %s to load data", self.path)
+        with closing(iter_rows(self.path)) as reader:
             try:
                 header = next(reader)
             except StopIteration as ex:
@@ -229,34 +408,121 @@ class CSVFile(Adapter):
                 _logger.debug(row)
                 yield row
 
+    def _get_indexed_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Iterator[Row]:
+        """
+        Read data using the index, fetching only rows that might match the bounds.
+        """
+        index = cast(CSVIndex, self.index)
+        if not index.is_valid():
+            index.build()
+            index.save()
+
+        _logger.info("Reading CSV file %s using index", self.path)
+        column_names = ["rowid", *index.column_names]
+        rows = (
+            [row_id, *values]
+            for row_id, values in (
+                (self.row_id_manager.get_row_id(position), values)
+                for position, values in index.read(index.get_ranges(bounds))
+            )
+            if row_id != -1
+        )
+        data = (dict(zip(column_names, row)) for row in rows)
+
+        # the index returns candidate rows, so they still need to be filtered
+        for row in filter_data(data, bounds, order, limit, offset):
+            _logger.debug(row)
+            yield row
+
+    def _get_parallel_data(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Iterator[Row]:
+        """
+        Read data in parallel, with worker processes filtering chunks of the file.
+        """
+        _logger.info("Reading CSV file %s with %d workers", self.path, self.workers)
+        # rows have already been filtered, but still need to be sorted and limited
+        with closing(self._scan_chunks(bounds)) as data:
+            for row in filter_data(data, {}, order, limit, offset):
+                _logger.debug(row)
+                yield row
+
+    def _scan_chunks(self, bounds: Dict[str, Filter]) -> Iterator[Row]:
+        """
+        Scan chunks in parallel, mapping row positions to row IDs.
+
+        The file stays mapped until the iterator is exhausted or closed.
+        """
+        start = 0
+        with open_mapped(self.path) as buffer:
+            for num_rows, rows in map_chunks(
+                scan_chunk,
+                iter_chunks(buffer, get_data_offset(buffer)),
+                self.workers,
+                self.path,
+                list(self.columns),
+                bounds,
+            ):
+                for row in rows:
+                    row["rowid"] = self.row_id_manager.get_row_id(
+                        start + row["rowid"],
+                    )
+                    if row["rowid"] != -1:
+                        yield row
+                start += num_rows
+
     def insert_data(self, row: Row) -> int:
+        return self.insert_data_many([row])[0]
+
+    def insert_data_many(self, rows: List[Row]) -> List[int]:
         if not self.local:
             raise ProgrammingError("Cannot apply DML to a remote file")
 
-        row_id: Optional[int] = row.pop("rowid")
-        row_id = cast(int, self.row_id_manager.insert(row_id))
-
-        # append row
+        # append rows, opening the file only once
         column_names = list(self.get_columns().keys())
-        _logger.info("Appending row with ID %d to CSV file %s", row_id, self.path)
-        _logger.debug(row)
+        _logger.info("Appending %d rows to CSV file %s", len(rows), self.path)
+        row_ids: List[int] = []
         with open(self.path, "a", encoding="utf-8") as csvfile:
             writer = csv.writer(csvfile, quoting=csv.QUOTE_NONNUMERIC)
-            writer.writerow([row[column_name] for column_name in column_names])
-        self.num_rows += 1
-
-        # update order, in case it has changed
-        for column_name, column_type in self.columns.items():
-            column_type.order = update_order(
-                current_order=column_type.order,
-                previous=self.last_row[column_name] if self.last_row else None,
-                current=row[column_name],
-                num_rows=self.num_rows,
-            )
-        self.last_row = row
+            for row in rows:
+                row_id: Optional[int] = row.pop("rowid")
+                row_id = cast(int, self.row_id_manager.insert(row_id))
+                row_ids.append(row_id)
+
+                _logger.debug(row)
+                end_of_file = csvfile.tell() if self.index else 0
+                writer.writerow([row[column_name] for column_name in column_names])
+                self.num_rows += 1
+                if self.index:
+                    self.index.add_row(end_of_file, row)
+
+                # update order, in case it has changed
+                for column_name, column_type in self.columns.items():
+                    column_type.order = update_order(
+                        current_order=column_type.order,
+                        previous=self.last_row[column_name] if self.last_row else None,
+                        current=row[column_name],
+                        num_rows=self.num_rows,
+                    )
+                self.last_row = row
+
+        # the file needs to be closed before its size is known
+        if self.index:
+            self.index.sync()
+
         self.modified = True
 
-        return row_id
+        return row_ids
 
     def delete_data(self, row_id: int) -> None:
         if not self.local:
@@ -265,10 +531,66 @@ class CSVFile(Adapter):
         _logger.info("Deleting row with ID %d from CSV file %s", row_id, self.path)
         # on ``DELETE``\s we simply mark the row as deleted, so that it will be ignored
         # on ``SELECT``\s
+        if self.index:
+            position = self.row_id_manager.get_position(row_id)
+            self.index.remove_row(position)
         self.row_id_manager.delete(row_id)
         self.num_rows -= 1
         self.modified = True
 
+    def begin(self) -> None:
+        """
+        Store the state of the file, so that changes can be rolled back.
+
+        Rows are only appended to the file, and deleted rows are only marked as
+        deleted, so the changes can be undone by truncating the file and undoing
+        the changes to the row IDs.
+        """
+        if not self.local:
+            return
+
+        self._snapshot = {
+            "size": self.path.stat().st_size,
+            "num_rows": self.num_rows,
+            "last_row": self.last_row,
+            "order": {
+                column_name: column_type.order
+                for column_name, column_type in self.columns.items()
+            },
+            "modified": self.modified,
+        }
+        self.row_id_manager.begin()
+
+    def commit(self) -> None:
+        self._snapshot = None
+        self.row_id_manager.commit()
+
+    def rollback(self) -> None:
+        """
+        Restore the file to its state when the transaction started.
+        """
+        if self._snapshot is None:
+            return
+
+        snapshot, self._snapshot = self._snapshot, None
+        self.row_id_manager.rollback()
+        if (
+            snapshot["num_rows"] == self.num_rows
+            and snapshot["size"] == self.path.stat().st_size
+        ):
+            return
+
+        _logger.info("Rolling back changes to CSV file %s", self.path)
+        os.truncate(self.path, snapshot["size"])
+        self.num_rows = snapshot["num_rows"]
+        self.last_row = snapshot["last_row"]
+        for column_name, order in snapshot["order"].items():
+            self.columns[column_name].order = order
+        self.modified = snapshot["modified"]
+
+        if self.index:
+            self.index.build()
+
     def close(self) -> None:
         """
         Garbage collect the file.
@@ -300,5 +622,12 @@ class CSVFile(Adapter):
         os.replace(self.path.with_suffix(".csv.bak"), self.path)
         self.modified = False
 
+        # row positions changed, so the index needs to be rebuilt
+        if self.index:
+            self.index.build()
+            self.index.save()
+
     def drop_table(self) -> None:
         self.path.unlink()
+        if self.index:
+            self.index.delete()
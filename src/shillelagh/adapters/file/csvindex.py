@@ -0,0 +1,445 @@
+"""
+A persistent index for CSV files.
+
+The index is stored in a sidecar file next to the CSV file (``file.csv.idx``), and
+has 3 parts:
+
+1. The byte offset where each record starts, so that individual rows can be read
+   without parsing the whole file.
+2. Sorted key-offset arrays for columns explicitly requested, so that equality and
+   range predicates can seek straight to the matching rows.
+3. The minimum and maximum values of every column in blocks of rows, so that blocks
+   which can't match a predicate can be skipped entirely.
+
+The index stores the modification time and size of the CSV file, and is rebuilt
+when they change.
+"""
+import bisect
+import csv
+import io
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from shillelagh.filters import Equal, Filter, Impossible, Range
+
+_logger = logging.getLogger(__name__)
+
+# number of rows in each block of statistics
+BLOCK_SIZE = 1000
+
+INDEX_VERSION = 1
+
+# statistics for a given column in a block
+Stats = Optional[Tuple[Any, Any]]
+
+
+def read_record(fp: BinaryIO) -> bytes:
+    """
+    Read a full CSV record from a binary file, handling quoted newlines.
+
+    Since quotes are escaped by doubling them, a record ends at a newline only when
+    an even number of quotes has been read so far.
+    """
+    record = b""
+    quotes = 0
+    for line in iter(fp.readline, b""):
+        record += line
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            break
+    return record
+
+
+def parse_record(record: bytes) -> List[Any]:
+    """
+    Parse a single CSV record.
+    """
+    reader = csv.reader(
+        io.StringIO(record.decode("utf-8")), quoting=csv.QUOTE_NONNUMERIC
+    )
+    return next(reader, [])
+
+
+def merge_stats(stats: Stats, value: Any) -> Stats:
+    """
+    Update the min/max statistics of a column with a new value.
+
+    Statistics are dropped (set to ``None``) if values can't be compared, since
+    they can't be used for pruning.
+    """
+    if stats is None:
+        return None
+    try:
+        return (min(stats[0], value), max(stats[1], value))
+    except TypeError:
+        return None
+
+
+def overlaps(stats: Stats, filter_: Filter) -> bool:
+    """
+    Check if a block with the given statistics can have rows matching a filter.
+    """
+    if stats is None:
+        return True
+
+    minimum, maximum = stats
+    try:
+        if isinstance(filter_, Equal):
+            return bool(minimum <= filter_.value <= maximum)
+        if isinstance(filter_, Range):
+            if filter_.start is not None and (
+                maximum < filter_.start
+                or (maximum == filter_.start and not filter_.include_start)
+            ):
+                return False
+            if filter_.end is not None and (
+                minimum > filter_.end
+                or (minimum == filter_.end and not filter_.include_end)
+            ):
+                return False
+    except TypeError:
+        pass
+
+    return True
+
+
+class CSVIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    An index for a CSV file, persisted to a sidecar file.
+
+    Row positions are the physical position of the record in the file, starting
+    from 0 for the first row after the header.
+    """
+
+    def __init__(self, path: Path, column_names: List[str], index_columns: List[str]):
+        self.path = path
+        self.index_path = path.with_suffix(".csv.idx")
+        self.column_names = column_names
+        self.index_columns = [
+            column_name for column_name in index_columns if column_name in column_names
+        ]
+
+        # byte offset of each row, plus the end of the data
+        self.offsets: List[int] = []
+
+        # sorted values and the corresponding row positions for each indexed column
+        self.keys: Dict[str, List[Any]] = {}
+        self.positions: Dict[str, List[int]] = {}
+
+        # min/max for each column, for each block of ``BLOCK_SIZE`` rows
+        self.blocks: List[Dict[str, Stats]] = []
+
+        self.mtime = 0
+        self.size = 0
+
+    @classmethod
+    def open(
+        cls,
+        path: Path,
+        column_names: List[str],
+        index_columns: List[str],
+    ) -> "CSVIndex":
+        """
+        Load the index from its sidecar file, rebuilding it if it's stale.
+        """
+        index = cls(path, column_names, index_columns)
+        if not index.load():
+            index.build()
+            index.save()
+        return index
+
+    @property
+    def num_rows(self) -> int:
+        """
+        Number of rows in the index.
+        """
+        return len(self.offsets) - 1
+
+    def get_signature(self) -> Tuple[int, int]:
+        """
+        Return the modification time and size of the CSV file.
+        """
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_valid(self) -> bool:
+        """
+        Check if the index still corresponds to the CSV file.
+        """
+        return self.get_signature() == (self.mtime, self.size)
+
+    def load(self) -> bool:
+        """
+        Load the index from disk, returning true if it's valid.
+        """
+        try:
+            with open(self.index_path, encoding="utf-8") as fp:
+                payload = json.load(fp)
+        except (OSError, ValueError):
+            return False
+
+        if (
+            payload.get("version") != INDEX_VERSION
+            or payload["column_names"] != self.column_names
+            or not set(self.index_columns) <= set(payload["keys"])
+        ):
+            return False
+
+        self.mtime = payload["mtime"]
+        self.size = payload["size"]
+        if not self.is_valid():
+            _logger.info("Index for CSV file %s is stale", self.path)
+            return False
+
+        self.offsets = payload["offsets"]
+        self.keys = {column: payload["keys"][column] for column in self.index_columns}
+        self.positions = {
+            column: payload["positions"][column] for column in self.index_columns
+        }
+        self.blocks = [
+            {
+                column_name: tuple(stats) if stats is not None else None
+                for column_name, stats in block.items()
+            }
+            for block in payload["blocks"]
+        ]
+        return True
+
+    def save(self) -> None:
+        """
+        Persist the index to disk.
+        """
+        payload = {
+            "version": INDEX_VERSION,
+            "mtime": self.mtime,
+            "size": self.size,
+            "column_names": self.column_names,
+            "offsets": self.offsets,
+            "keys": self.keys,
+            "positions": self.positions,
+            "blocks": self.blocks,
+        }
+        with open(self.index_path, "w", encoding="utf-8") as fp:
+            json.dump(payload, fp)
+
+    def delete(self) -> None:
+        """
+        Delete the sidecar file.
+        """
+        try:
+            self.index_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def build(self) -> None:
+        """
+        Build the index by scanning the CSV file.
+        """
+        _logger.info("Building index for CSV file %s", self.path)
+        self.offsets = []
+        self.blocks = []
+        entries: Dict[str, List[Tuple[Any, int]]] = {
+            column_name: [] for column_name in self.index_columns
+        }
+
+        with open(self.path, "rb") as fp:
+            read_record(fp)  # header
+            while True:
+                offset = fp.tell()
+                record = read_record(fp)
+                if not record.strip():
+                    break
+                position = len(self.offsets)
+                self.offsets.append(offset)
+                row = dict(zip(self.column_names, parse_record(record)))
+                self._update_blocks(position, row)
+                for column_name, column_entries in entries.items():
+                    column_entries.append((row.get(column_name), position))
+            self.offsets.append(offset)
+
+        for column_name, column_entries in entries.items():
+            try:
+                column_entries.sort()
+            except TypeError:
+                _logger.warning(
+                    "Column %s has values of mixed types, not indexing",
+                    column_name,
+                )
+                self.index_columns.remove(column_name)
+                continue
+            self.keys[column_name] = [entry[0] for entry in column_entries]
+            self.positions[column_name] = [entry[1] for entry in column_entries]
+
+        self.mtime, self.size = self.get_signature()
+
+    def _update_blocks(self, position: int, row: Dict[str, Any]) -> None:
+        """
+        Update block statistics with a new row.
+        """
+        block_number = position // BLOCK_SIZE
+        if block_number == len(self.blocks):
+            self.blocks.append({})
+            block = self.blocks[-1]
+            for column_name in self.column_names:
+                value = row.get(column_name)
+                block[column_name] = (value, value)
+            return
+
+        block = self.blocks[block_number]
+        for column_name in self.column_names:
+            block[column_name] = merge_stats(block[column_name], row.get(column_name))
+
+    def add_row(self, offset: int, row: Dict[str, Any]) -> None:
+        """
+        Update the index after a row has been appended to the file at ``offset``.
+
+        The end of the data is only known once the file has been written to, so
+        ``sync`` should be called after the rows are appended.
+        """
+        position = self.num_rows
+        self._update_blocks(position, row)
+        for column_name in list(self.index_columns):
+            keys = self.keys[column_name]
+            value = row[column_name]
+            try:
+                i = bisect.bisect_right(keys, value)
+            except TypeError:
+                # the new value can't be compared to the existing ones
+                self.index_columns.remove(column_name)
+                del self.keys[column_name]
+                del self.positions[column_name]
+                continue
+            keys.insert(i, value)
+            self.positions[column_name].insert(i, position)
+
+        self.offsets[-1] = offset
+        self.offsets.append(offset)
+
+    def sync(self) -> None:
+        """
+        Record the state of the file after rows were appended, and save the index.
+        """
+        self.mtime, self.size = self.get_signature()
+        self.offsets[-1] = self.size
+        self.save()
+
+    def remove_row(self, position: int) -> None:
+        """
+        Remove a row from the column indexes after it's been deleted.
+
+        The row is still present in the file until it's garbage collected, so the
+        offsets and block statistics are kept, and its values are read from the
+        file to find it in the column indexes. Rows with the same key are sorted by
+        position, so the row can be found with a binary search.
+        """
+        if not self.index_columns:
+            return
+
+        _, values = next(self.read([range(position, position + 1)]))
+        row = dict(zip(self.column_names, values))
+        for column_name in self.index_columns:
+            keys = self.keys[column_name]
+            positions = self.positions[column_name]
+            value = row[column_name]
+            start = bisect.bisect_left(keys, value)
+            end = bisect.bisect_right(keys, value, start)
+            i = bisect.bisect_left(positions, position, start, end)
+            del positions[i]
+            del keys[i]
+
+    def _lookup(self, column_name: str, filter_: Filter) -> Optional[List[int]]:
+        """
+        Find row positions matching a filter using a column index.
+        """
+        keys = self.keys[column_name]
+        try:
+            if isinstance(filter_, Equal):
+                start = bisect.bisect_left(keys, filter_.value)
+                end = bisect.bisect_right(keys, filter_.value)
+            elif isinstance(filter_, Range):
+                start = 0
+                end = len(keys)
+                if filter_.start is not None:
+                    function = (
+                        bisect.bisect_left
+                        if filter_.include_start
+                        else bisect.bisect_right
+                    )
+                    start = function(keys, filter_.start)
+                if filter_.end is not None:
+                    function = (
+                        bisect.bisect_right
+                        if filter_.include_end
+                        else bisect.bisect_left
+                    )
+                    end = function(keys, filter_.end)
+            else:
+                return None
+        except TypeError:
+            return None
+
+        return self.positions[column_name][start:end]
+
+    def get_ranges(self, bounds: Dict[str, Filter]) -> List[range]:
+        """
+        Return ranges of row positions that might match the bounds.
+
+        Column indexes are used when available; otherwise blocks are pruned based on
+        their statistics.
+        """
+        if any(isinstance(filter_, Impossible) for filter_ in bounds.values()):
+            return []
+
+        candidates: Optional[set] = None
+        for column_name, filter_ in bounds.items():
+            if column_name not in self.index_columns:
+                continue
+            positions = self._lookup(column_name, filter_)
+            if positions is None:
+                continue
+            candidates = (
+                set(positions) if candidates is None else candidates & set(positions)
+            )
+
+        if candidates is not None:
+            ranges: List[range] = []
+            for position in sorted(candidates):
+                if ranges and ranges[-1].stop == position:
+                    ranges[-1] = range(ranges[-1].start, position + 1)
+                else:
+                    ranges.append(range(position, position + 1))
+            return ranges
+
+        ranges = []
+        for block_number, block in enumerate(self.blocks):
+            if not all(
+                overlaps(block.get(column_name), filter_)
+                for column_name, filter_ in bounds.items()
+            ):
+                continue
+            start = block_number * BLOCK_SIZE
+            end = min(start + BLOCK_SIZE, self.num_rows)
+            if ranges and ranges[-1].stop == start:
+                ranges[-1] = range(ranges[-1].start, end)
+            else:
+                ranges.append(range(start, end))
+        return ranges
+
+    def read(self, ranges: List[range]) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        Read the rows in the given ranges, yielding their positions and values.
+        """
+        with open(self.path, "rb") as fp:
+            for range_ in ranges:
+                for start in range(range_.start, range_.stop, BLOCK_SIZE):
+                    end = min(start + BLOCK_SIZE, range_.stop)
+                    fp.seek(self.offsets[start])
+                    contents = fp.read(self.offsets[end] - self.offsets[start])
+                    reader = csv.reader(
+                        io.StringIO(contents.decode("utf-8")),
+                        quoting=csv.QUOTE_NONNUMERIC,
+                    )
+                    yield from zip(range(start, end), reader)
@@ -0,0 +1,284 @@
+"""
+Chunked scanning of CSV files, optionally in parallel.
+
+Files are memory-mapped and split into chunks of bytes aligned on record boundaries.
+Since quotes are escaped by doubling them, a newline ends a record only when an even
+number of quotes precedes it, so boundaries can be found by counting quotes without
+parsing the file. Each chunk is then decoded and parsed in one go, either in the
+current process or by a pool of worker processes.
+
+Pages of the mapping are released once a chunk has been consumed, so that memory
+usage stays flat regardless of the size of the file.
+
+Results are always returned in file order, so that row positions (and their row
+IDs) are the same regardless of the number of workers.
+"""
+import csv
+import io
+import itertools
+import logging
+import math
+import mmap
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from shillelagh.filters import Filter
+from shillelagh.lib import Summary, filter_data, summarize
+from shillelagh.typing import Row
+
+_logger = logging.getLogger(__name__)
+
+# approximate size of each chunk processed by a worker, in bytes
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# approximate size of each chunk when streaming rows in the current process
+BLOCK_SIZE = 1024 * 1024
+
+# maximum number of regions of the file read for stratified sampling
+NUMBER_OF_STRATA = 10
+
+Buffer = Union[mmap.mmap, bytes]
+Chunk = Tuple[int, int]
+T = TypeVar("T")
+
+
+@contextmanager
+def open_mapped(path: Path) -> Iterator[Buffer]:
+    """
+    Memory-map a file for reading.
+
+    Empty files and files in some filesystems can't be mapped, in which case their
+    contents are read into memory.
+    """
+    with open(path, "rb") as fp:
+        buffer: Buffer
+        try:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            buffer = fp.read()
+
+        try:
+            yield buffer
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+
+
+def release(buffer: Buffer, start: int, end: int) -> None:
+    """
+    Release the pages of a consumed byte range from resident memory.
+
+    The pages are backed by the file, so they're simply read again if needed. This
+    is a no-op on platforms without ``madvise``, like Windows.
+    """
+    if isinstance(buffer, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED") and end > start:
+        start -= start % mmap.PAGESIZE
+        buffer.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def find_boundary(buffer: Buffer, start: int, position: int) -> int:
+    """
+    Find the first record boundary after ``position``.
+
+    The ``start`` offset must be a record boundary, and is used to count quotes.
+    """
+    quotes = buffer[start:position].count(b'"')
+    while True:
+        i = buffer.find(b"\n", position)
+        if i == -1:
+            return len(buffer)
+        quotes += buffer[position:i].count(b'"')
+        position = i + 1
+        if quotes % 2 == 0:
+            return position
+
+
+def get_data_offset(buffer: Buffer) -> int:
+    """
+    Return the byte offset where the data starts, right after the header.
+    """
+    return find_boundary(buffer, 0, 0)
+
+
+def iter_chunks(
+    buffer: Buffer,
+    start: int,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Chunk]:
+    """
+    Split a file in byte ranges of roughly ``chunk_size``, on record boundaries.
+
+    Chunks are computed lazily, and their pages are released once the next chunk is
+    requested, after the chunk has been read. The ``start`` offset must be a record
+    boundary, eg, the end of the header.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    while start < len(buffer):
+        end = find_boundary(buffer, start, start + chunk_size)
+        yield start, end
+        release(buffer, start, end)
+        start = end
+
+
+def read_chunk(buffer: Buffer, start: int, end: int) -> Iterator[List[Any]]:
+    """
+    Parse the records in a byte range of the file.
+    """
+    reader = csv.reader(
+        io.StringIO(buffer[start:end].decode("utf-8")),
+        quoting=csv.QUOTE_NONNUMERIC,
+    )
+    release(buffer, start, end)
+    return iter(reader)
+
+
+def iter_rows(path: Path) -> Iterator[List[Any]]:
+    """
+    Stream the records of a file, including the header, like ``csv.reader``.
+
+    The file stays open until the iterator is exhausted or closed, so callers that
+    might stop early should close it.
+    """
+    with open_mapped(path) as buffer:
+        offset = get_data_offset(buffer)
+        yield from read_chunk(buffer, 0, offset)
+        for chunk in iter_chunks(buffer, offset, BLOCK_SIZE):
+            yield from read_chunk(buffer, *chunk)
+
+
+def count_records(buffer: Buffer, start: int) -> int:
+    """
+    Count the records in a file without parsing it.
+
+    Records are separated by newlines outside of quotes. Since chunks start on
+    record boundaries, splitting a chunk on quotes gives alternating segments
+    outside and inside quotes.
+    """
+    count = 0
+    for chunk_start, chunk_end in iter_chunks(buffer, start):
+        segments = buffer[chunk_start:chunk_end].split(b'"')
+        count += sum(segment.count(b"\n") for segment in segments[::2])
+
+    # last record without a trailing newline
+    if len(buffer) > start and buffer[-1:] != b"\n":
+        count += 1
+
+    return count
+
+
+def iter_lines(buffer: Buffer, start: int, end: int) -> Iterator[str]:
+    """
+    Stream the decoded lines in a byte range, without reading all of it.
+    """
+    while start < end:
+        i = buffer.find(b"\n", start, end)
+        stop = end if i == -1 else i + 1
+        yield buffer[start:stop].decode("utf-8")
+        start = stop
+
+
+def sample_records(buffer: Buffer, start: int, sample_size: int) -> List[List[Any]]:
+    """
+    Read records spread evenly across the file, for stratified sampling.
+
+    The file is split into regions aligned on record boundaries, and the first
+    records of each region are parsed.
+    """
+    strata = min(sample_size, NUMBER_OF_STRATA)
+    per_stratum = math.ceil(sample_size / strata)
+    chunk_size = math.ceil((len(buffer) - start) / strata)
+
+    records: List[List[Any]] = []
+    for chunk in iter_chunks(buffer, start, chunk_size):
+        reader = csv.reader(iter_lines(buffer, *chunk), quoting=csv.QUOTE_NONNUMERIC)
+        records.extend(itertools.islice(reader, per_stratum))
+        release(buffer, *chunk)
+
+    return records[:sample_size]
+
+
+def summarize_chunk(chunk: Chunk, path: Path, column_names: List[str]) -> Summary:
+    """
+    Compute the summary of a chunk, used to determine types and order.
+    """
+    with open_mapped(path) as buffer:
+        return summarize(
+            dict(zip(column_names, row)) for row in read_chunk(buffer, *chunk)
+        )
+
+
+def scan_chunk(
+    chunk: Chunk,
+    path: Path,
+    column_names: List[str],
+    bounds: Dict[str, Filter],
+) -> Tuple[int, List[Row]]:
+    """
+    Read and filter the rows in a chunk.
+
+    Returns the number of rows in the chunk, and the rows matching the bounds, with
+    their position in the chunk stored as the ``rowid``.
+    """
+    with open_mapped(path) as buffer:
+        positions = itertools.count()
+        data = (
+            {"rowid": position, **dict(zip(column_names, row))}
+            for row, position in zip(read_chunk(buffer, *chunk), positions)
+        )
+        rows = list(filter_data(data, bounds, []))
+    return next(positions), rows
+
+
+def map_chunks(
+    function: Callable[..., T],
+    chunks: Iterable[Chunk],
+    workers: int,
+    *args: Any,
+) -> Iterator[T]:
+    """
+    Apply a function to each chunk in worker processes, yielding results in order.
+
+    The function is called as ``function(chunk, *args)``.
+
+    At most ``workers`` chunks are in flight at any time, bounding memory usage. If
+    there's a single worker or chunk they're processed in the current process.
+    Pending work is cancelled if the iterator is closed early, eg, when a ``LIMIT``
+    is reached.
+    """
+    remaining = iter(chunks)
+    head = list(itertools.islice(remaining, 2))
+    if len(head) < 2 or workers < 2:
+        for chunk in itertools.chain(head, remaining):
+            yield function(chunk, *args)
+        return
+
+    _logger.info("Processing chunks with %d workers", workers)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending: List[Future] = []
+    remaining = itertools.chain(head, remaining)
+    try:
+        for chunk in itertools.islice(remaining, workers):
+            pending.append(executor.submit(function, chunk, *args))
+        while pending:
+            result = pending.pop(0).result()
+            chunk = next(remaining, None)
+            if chunk is not None:
+                pending.append(executor.submit(function, chunk, *args))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
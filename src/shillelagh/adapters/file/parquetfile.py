@@ -0,0 +1,386 @@
+"""
+An adapter for Parquet and Arrow IPC (Feather) files.
+
+Both formats are columnar, so only the columns needed by a query are read. Parquet
+files are split in row groups with min/max statistics for each column, which are
+used to skip row groups that can't match the predicates of a query. Arrow IPC files
+are memory-mapped, so that record batches are read without copying the file.
+"""
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from shillelagh.adapters.base import BATCH_SIZE, Adapter
+from shillelagh.exceptions import ProgrammingError
+from shillelagh.fields import (
+    Blob,
+    Boolean,
+    Date,
+    DateTime,
+    Field,
+    Float,
+    Integer,
+    Order,
+    String,
+    Time,
+)
+from shillelagh.filters import (
+    Equal,
+    Filter,
+    Impossible,
+    IsNotNull,
+    IsNull,
+    NotEqual,
+    Operator,
+    Range,
+)
+from shillelagh.typing import Batch, RequestedOrder, Row
+
+_logger = logging.getLogger(__name__)
+
+PARQUET_SUFFIXES = {".parquet", ".parq"}
+IPC_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+# Arrow types supported, in order of precedence; other columns are ignored
+type_map: List[
+    Tuple[Callable[[pa.DataType], bool], Type[Field], List[Type[Filter]]]
+] = [
+    (pa.types.is_boolean, Boolean, [Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_integer, Integer, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_floating, Float, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_string, String, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_large_string, String, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_binary, Blob, [Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_large_binary, Blob, [Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_timestamp, DateTime, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_date, Date, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+    (pa.types.is_time, Time, [Range, Equal, NotEqual, IsNull, IsNotNull]),
+]
+
+
+def get_field(type_: pa.DataType) -> Optional[Field]:
+    """
+    Return a Shillelagh ``Field`` from an Arrow type, if supported.
+    """
+    # dictionary encoded columns (eg, categories) are read as their values
+    if pa.types.is_dictionary(type_):
+        type_ = type_.value_type
+
+    for predicate, class_, filters in type_map:
+        if predicate(type_):
+            return class_(filters=filters, order=Order.NONE, exact=True)
+
+    return None
+
+
+def may_match(  # pylint: disable=too-many-return-statements
+    statistics: Optional[pq.Statistics],
+    num_rows: int,
+    filter_: Filter,
+) -> bool:
+    """
+    Return false if the statistics of a column show that no rows can match a filter.
+
+    Comparisons that can't be done (eg, between timestamps with and without a
+    timezone) are assumed to match.
+    """
+    if isinstance(filter_, Impossible):
+        return False
+    if statistics is None:
+        return True
+
+    if isinstance(filter_, IsNull):
+        return not statistics.has_null_count or statistics.null_count > 0
+    if isinstance(filter_, IsNotNull):
+        return not statistics.has_null_count or statistics.null_count < num_rows
+
+    if not statistics.has_min_max:
+        return True
+
+    try:
+        if isinstance(filter_, Equal):
+            return bool(statistics.min <= filter_.value <= statistics.max)
+        if isinstance(filter_, Range):
+            if filter_.start is not None and (
+                statistics.max < filter_.start
+                or (statistics.max == filter_.start and not filter_.include_start)
+            ):
+                return False
+            if filter_.end is not None and (
+                statistics.min > filter_.end
+                or (statistics.min == filter_.end and not filter_.include_end)
+            ):
+                return False
+    except TypeError:
+        pass
+
+    return True
+
+
+def get_expression(bounds: Dict[str, Filter]) -> Optional[pc.Expression]:
+    """
+    Combine all the bounds into a single Arrow expression.
+
+    Returns ``None`` when there are no bounds. Comparisons with nulls evaluate to
+    null, and those rows are dropped when filtering, like in SQL.
+    """
+    expression: Optional[pc.Expression] = None
+
+    def combine(condition: pc.Expression) -> None:
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    for column_name, filter_ in bounds.items():
+        field = pc.field(column_name)
+        if isinstance(filter_, Impossible):
+            combine(pc.scalar(False))
+        elif isinstance(filter_, Equal):
+            combine(field == filter_.value)
+        elif isinstance(filter_, NotEqual):
+            combine(field != filter_.value)
+        elif isinstance(filter_, Range):
+            if filter_.start is not None:
+                combine(
+                    field >= filter_.start
+                    if filter_.include_start
+                    else field > filter_.start,
+                )
+            if filter_.end is not None:
+                combine(
+                    field <= filter_.end
+                    if filter_.include_end
+                    else field < filter_.end,
+                )
+        elif isinstance(filter_, IsNull):
+            combine(field.is_null())
+        elif isinstance(filter_, IsNotNull):
+            combine(field.is_valid())
+        else:
+            raise ProgrammingError(f"Invalid filter: {filter_}")
+
+    return expression
+
+
+class ParquetFile(Adapter):
+
+    """
+    An adapter for Parquet and Arrow IPC (Feather) files.
+
+    The format is determined from the extension of the file: ``.parquet`` for
+    Parquet, and ``.arrow``, ``.feather``, or ``.ipc`` for the Arrow IPC file
+    format (Feather V2). Columns with nested types are not supported.
+
+    Data is read in batches, with only the requested columns and the columns needed
+    for filtering. Filters are applied to each batch with Arrow, and row groups in
+    Parquet files are skipped when their statistics show that they have no matching
+    rows. Row IDs are the position of each row in the file.
+
+    The adapter is read-only.
+    """
+
+    # the adapter is not safe, since it could be used to read files from
+    # the filesystem
+    safe = False
+
+    supports_limit = True
+    supports_offset = True
+    supports_requested_columns = True
+
+    @staticmethod
+    def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
+        path = Path(uri)
+        return path.suffix in PARQUET_SUFFIXES | IPC_SUFFIXES and path.exists()
+
+    @staticmethod
+    def parse_uri(uri: str) -> Tuple[str]:
+        return (uri,)
+
+    def __init__(self, path: str):
+        super().__init__()
+
+        self.path = Path(path)
+        self.parquet_file: Optional[pq.ParquetFile] = None
+
+        _logger.info("Opening file %s to load metadata", self.path)
+        try:
+            if self.path.suffix in PARQUET_SUFFIXES:
+                self.parquet_file = pq.ParquetFile(self.path, memory_map=True)
+                schema = self.parquet_file.schema_arrow
+                self.num_rows = self.parquet_file.metadata.num_rows
+            else:
+                with pa.memory_map(str(self.path)) as source:
+                    reader = pyarrow.ipc.open_file(source)
+                    schema = reader.schema
+                    self.num_rows = sum(
+                        reader.get_batch(i).num_rows
+                        for i in range(reader.num_record_batches)
+                    )
+        except pa.ArrowException as ex:
+            raise ProgrammingError(f"Unable to read file {self.path}: {ex}") from ex
+
+        self.columns: Dict[str, Field] = {}
+        for arrow_field in schema:
+            field = get_field(arrow_field.type)
+            if field is not None:
+                self.columns[arrow_field.name] = field
+
+        # position of each column in the row groups, to read statistics
+        self.column_positions: Dict[str, int] = {}
+        if self.parquet_file and self.parquet_file.metadata.num_row_groups:
+            row_group = self.parquet_file.metadata.row_group(0)
+            self.column_positions = {
+                row_group.column(i).path_in_schema: i
+                for i in range(row_group.num_columns)
+            }
+
+    def get_columns(self) -> Dict[str, Field]:
+        return self.columns
+
+    def get_cost(
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        order: List[Tuple[str, RequestedOrder]],
+    ) -> float:
+        # every row is read when there are no filters; filters are evaluated in
+        # batches, and might skip whole row groups
+        return float(self.num_rows / (1 + len(filtered_columns)))
+
+    def get_data(  # pylint: disable=too-many-arguments
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        requested_columns: Optional[Set[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Row]:
+        for batch in self.get_batches(
+            bounds,
+            order,
+            limit=limit,
+            offset=offset,
+            requested_columns=requested_columns,
+        ):
+            column_names = list(batch.keys())
+            for values in zip(*batch.values()):
+                yield dict(zip(column_names, values))
+
+    def get_batches(  # pylint: disable=too-many-arguments, too-many-locals
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        requested_columns: Optional[Set[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[Batch]:
+        column_names = [
+            column_name
+            for column_name in self.columns
+            if requested_columns is None or column_name in requested_columns
+        ]
+        read_columns = [
+            column_name
+            for column_name in self.columns
+            if column_name in column_names or column_name in bounds
+        ]
+        expression = get_expression(bounds)
+
+        # columns are not sorted, so ``order`` is always empty
+        skip = offset or 0
+        remaining = limit
+        for first_row, table in self._read(bounds, read_columns):
+            row_ids = pa.array(range(first_row, first_row + table.num_rows), pa.int64())
+            table = table.append_column("rowid", row_ids)
+            if expression is not None:
+                table = table.filter(expression)
+
+            if skip:
+                skipped = min(skip, table.num_rows)
+                table = table.slice(skipped)
+                skip -= skipped
+            if remaining is not None:
+                table = table.slice(0, remaining)
+                remaining -= table.num_rows
+
+            for record_batch in table.to_batches(max_chunksize=BATCH_SIZE):
+                batch: Batch = {"rowid": record_batch.column("rowid").to_pylist()}
+                for column_name in column_names:
+                    batch[column_name] = record_batch.column(column_name).to_pylist()
+                yield batch
+
+            if remaining is not None and remaining <= 0:
+                break
+
+    def _read(
+        self,
+        bounds: Dict[str, Filter],
+        column_names: List[str],
+    ) -> Iterator[Tuple[int, pa.Table]]:
+        """
+        Read the columns needed, yielding tables and the row ID of their first row.
+        """
+        if self.parquet_file:
+            yield from self._read_parquet(self.parquet_file, bounds, column_names)
+        else:
+            yield from self._read_ipc(column_names)
+
+    def _read_parquet(
+        self,
+        parquet_file: pq.ParquetFile,
+        bounds: Dict[str, Filter],
+        column_names: List[str],
+    ) -> Iterator[Tuple[int, pa.Table]]:
+        """
+        Read the row groups that might match the bounds.
+        """
+        metadata = parquet_file.metadata
+        first_row = 0
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            if all(
+                may_match(
+                    self._get_statistics(row_group, column_name),
+                    row_group.num_rows,
+                    filter_,
+                )
+                for column_name, filter_ in bounds.items()
+            ):
+                yield first_row, parquet_file.read_row_group(i, columns=column_names)
+            else:
+                _logger.debug("Skipping row group %d", i)
+            first_row += row_group.num_rows
+
+    def _get_statistics(
+        self,
+        row_group: pq.RowGroupMetaData,
+        column_name: str,
+    ) -> Optional[pq.Statistics]:
+        """
+        Return the statistics of a column in a row group, if present.
+        """
+        column = row_group.column(self.column_positions[column_name])
+        return column.statistics if column.is_stats_set else None
+
+    def _read_ipc(self, column_names: List[str]) -> Iterator[Tuple[int, pa.Table]]:
+        """
+        Read record batches from a memory-mapped Arrow IPC file.
+        """
+        with pa.memory_map(str(self.path)) as source:
+            reader = pyarrow.ipc.open_file(source)
+            first_row = 0
+            for i in range(reader.num_record_batches):
+                record_batch = reader.get_batch(i)
+                yield first_row, pa.Table.from_batches(
+                    [record_batch.select(column_names)],
+                )
+                first_row += record_batch.num_rows
+
+    def close(self) -> None:
+        if self.parquet_file:
+            self.parquet_file.close()
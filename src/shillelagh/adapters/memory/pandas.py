@@ -4,14 +4,15 @@ An adapter for in-memory Pandas dataframes.
 
 # pylint: disable=invalid-name
 
-import inspect
 import operator
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 
 import numpy as np
 import pandas as pd
 
-from shillelagh.adapters.base import Adapter
+from shillelagh.adapters.base import BATCH_SIZE, Adapter
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Boolean, DateTime, Field, Float, Integer, Order, String
 from shillelagh.filters import (
@@ -24,7 +25,7 @@ from shillelagh.filters import (
     Range,
 )
 from shillelagh.lib import SimpleCostModel
-from shillelagh.typing import RequestedOrder, Row
+from shillelagh.typing import Batch, RequestedOrder, Row
 
 # this is just a wild guess; used to estimate query cost
 AVERAGE_NUMBER_OF_ROWS = 1000
@@ -39,6 +40,13 @@ type_map: Dict[str, Tuple[Type[Field], List[Type[Filter]]]] = {
     "O": (String, [Range, Equal, NotEqual, IsNull, IsNotNull]),
 }
 
+# dtypes supported by ``nsmallest`` and ``nlargest``
+SELECTABLE_KINDS = {"i", "u", "f", "M"}
+
+# pandas has no public method for concatenating in place; when its private method
+# is available it's used to append a batch of rows in a single copy
+UPDATE_INPLACE = hasattr(pd.DataFrame, "_update_inplace")
+
 
 def get_field(dtype: np.dtype) -> Field:
     """
@@ -52,77 +60,209 @@ def get_field(dtype: np.dtype) -> Field:
     )
 
 
-def find_dataframe(uri: str) -> Optional[pd.DataFrame]:
+# dataframes registered explicitly, by namespace and name; the ``None`` namespace is
+# global, while connections use their own namespace
+_registry: Dict[Tuple[Optional[str], str], pd.DataFrame] = {}
+_registry_lock = threading.Lock()
+
+
+def register_dataframe(
+    name: str,
+    df: pd.DataFrame,
+    namespace: Optional[str] = None,
+) -> None:
     """
-    Go up the stack, find the Pandas dataframe.
+    Register a dataframe so it can be queried as a table called ``name``.
+
+    Registered dataframes are found without inspecting the stack, and can be queried
+    from any thread.
     """
-    for level in inspect.stack():
-        # search locals
-        context_locals = dict(inspect.getmembers(level[0]))["f_locals"]
-        if uri in context_locals and isinstance(context_locals[uri], pd.DataFrame):
-            return context_locals[uri]
+    with _registry_lock:
+        _registry[(namespace, name)] = df
 
-        # search globals
-        context_globals = dict(inspect.getmembers(level[0]))["f_globals"]
-        if uri in context_globals and isinstance(context_globals[uri], pd.DataFrame):
-            return context_globals[uri]
+
+def unregister_dataframe(name: str, namespace: Optional[str] = None) -> None:
+    """
+    Remove a dataframe from the registry.
+    """
+    with _registry_lock:
+        _registry.pop((namespace, name), None)
+
+
+def unregister_namespace(namespace: str) -> None:
+    """
+    Remove all the dataframes in a namespace from the registry.
+    """
+    with _registry_lock:
+        for key in [key for key in _registry if key[0] == namespace]:
+            del _registry[key]
+
+
+def find_dataframe(uri: str, namespace: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Find a Pandas dataframe.
+
+    Dataframes are looked up in the registry first, first in the namespace and then
+    globally. If not found, go up the stack looking for a variable called ``uri``.
+    """
+    # reads don't need the lock, since ``dict.get`` is atomic
+    for key in ((namespace, uri), (None, uri)):
+        df = _registry.get(key)
+        if df is not None:
+            return df
+
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        for context in (frame.f_locals, frame.f_globals):
+            if isinstance(context.get(uri), pd.DataFrame):
+                return context[uri]
+        frame = frame.f_back  # type: ignore
 
     return None
 
 
-def get_df_data(  # pylint: disable=too-many-arguments, too-many-branches
+def get_mask(
     df: pd.DataFrame,
-    columns: Dict[str, Field],
+    labels: Dict[str, Any],
     bounds: Dict[str, Filter],
-    order: List[Tuple[str, RequestedOrder]],
-    limit: Optional[int] = None,
-    offset: Optional[int] = None,
-) -> Iterator[Row]:
-    """
-    Apply the ``get_data`` method on a Pandas dataframe.
+) -> Optional[np.ndarray]:
     """
-    if df.empty:
-        return
+    Combine all the bounds into a single boolean mask.
 
-    # ensure column names are strings
-    df = df.rename(columns={k: str(k) for k in df.columns})
+    Returns ``None`` when there are no bounds. Comparisons are vectorized, and Pandas
+    will use ``numexpr`` for large dataframes if it's installed.
+    """
+    mask: Optional[np.ndarray] = None
 
-    column_names = list(columns.keys())
-    df = df[column_names]
+    def combine(condition: pd.Series) -> None:
+        nonlocal mask
+        values = condition.to_numpy(dtype=bool)
+        mask = values if mask is None else mask & values
 
     for column_name, filter_ in bounds.items():
         if isinstance(filter_, Impossible):
-            return
+            return np.zeros(len(df), dtype=bool)
+        if not isinstance(filter_, (Equal, NotEqual, Range, IsNull, IsNotNull)):
+            raise ProgrammingError(f"Invalid filter: {filter_}")
+
+        series = df[labels[column_name]]
         if isinstance(filter_, Equal):
-            df = df[df[column_name] == filter_.value]
+            combine(series == filter_.value)
         elif isinstance(filter_, NotEqual):
-            df = df[df[column_name] != filter_.value]
+            combine(series != filter_.value)
         elif isinstance(filter_, Range):
             if filter_.start is not None:
                 operator_ = operator.ge if filter_.include_start else operator.gt
-                df = df[operator_(df[column_name], filter_.start)]
+                combine(operator_(series, filter_.start))
             if filter_.end is not None:
                 operator_ = operator.le if filter_.include_end else operator.lt
-                df = df[operator_(df[column_name], filter_.end)]
+                combine(operator_(series, filter_.end))
         elif isinstance(filter_, IsNull):
-            df = df[~df[column_name].notnull()]
-        elif isinstance(filter_, IsNotNull):
-            df = df[df[column_name].notnull()]
+            combine(series.isnull())
         else:
-            raise ProgrammingError(f"Invalid filter: {filter_}")
+            combine(series.notnull())
 
-    if order:
-        by, requested_orders = list(zip(*order))
-        ascending = [
-            requested_order == Order.ASCENDING for requested_order in requested_orders
-        ]
-        df = df.sort_values(by=list(by), ascending=ascending)
+    return mask
+
+
+def sort_df(
+    df: pd.DataFrame,
+    labels: Dict[str, Any],
+    order: List[Tuple[str, RequestedOrder]],
+    limit: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Sort a dataframe, keeping only the first ``limit`` rows if specified.
+
+    When all columns are numeric, sorted in the same direction, and without nulls,
+    the top rows are selected first, so that only they need to be sorted.
+    """
+    by = [labels[column_name] for column_name, _ in order]
+    ascending = [requested_order == Order.ASCENDING for _, requested_order in order]
+
+    if (
+        limit is not None
+        and len(set(ascending)) == 1
+        and all(df[label].dtype.kind in SELECTABLE_KINDS for label in by)
+        and not df[by].isnull().to_numpy().any()
+    ):
+        # select by position, since the index might have duplicates, and restore
+        # the original order of the selected rows so that ties are stable
+        keys = df[by].reset_index(drop=True)
+        select = keys.nsmallest if ascending[0] else keys.nlargest
+        df = df.iloc[np.sort(select(limit, by).index.to_numpy())]
 
-    df = df[offset:]
-    df = df[:limit]
+    return df.sort_values(by=by, ascending=ascending, kind="stable").iloc[:limit]
 
-    for row in df.itertuples(name=None):
-        yield dict(zip(["rowid", *column_names], row))
+
+def get_df_batches(  # pylint: disable=too-many-arguments, too-many-locals
+    df: pd.DataFrame,
+    columns: Dict[str, Field],
+    bounds: Dict[str, Filter],
+    order: List[Tuple[str, RequestedOrder]],
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    requested_columns: Optional[Set[str]] = None,
+    size: Optional[int] = None,
+) -> Iterator[Batch]:
+    """
+    Filter, sort, and return a dataframe in columnar batches.
+    """
+    if df.empty:
+        return
+
+    # column names are always strings, but dataframe labels can be of any type
+    labels = {str(label): label for label in df.columns}
+
+    mask = get_mask(df, labels, bounds)
+    if mask is not None:
+        df = df[mask]
+
+    start = offset or 0
+    stop = None if limit is None else start + limit
+    if order:
+        df = sort_df(df, labels, order, stop)
+    if start or stop is not None:
+        df = df.iloc[start:stop]
+
+    column_names = [
+        column_name
+        for column_name in columns
+        if requested_columns is None or column_name in requested_columns
+    ]
+    size = size or BATCH_SIZE
+    for i in range(0, len(df), size):
+        chunk = df.iloc[i : i + size]
+        batch: Batch = {"rowid": chunk.index.tolist()}
+        for column_name in column_names:
+            batch[column_name] = chunk[labels[column_name]].tolist()
+        yield batch
+
+
+def get_df_data(  # pylint: disable=too-many-arguments
+    df: pd.DataFrame,
+    columns: Dict[str, Field],
+    bounds: Dict[str, Filter],
+    order: List[Tuple[str, RequestedOrder]],
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    requested_columns: Optional[Set[str]] = None,
+) -> Iterator[Row]:
+    """
+    Apply the ``get_data`` method on a Pandas dataframe.
+    """
+    for batch in get_df_batches(
+        df,
+        columns,
+        bounds,
+        order,
+        limit,
+        offset,
+        requested_columns,
+    ):
+        column_names = list(batch.keys())
+        for values in zip(*batch.values()):
+            yield dict(zip(column_names, values))
 
 
 def get_columns_from_df(df: pd.DataFrame) -> Dict[str, Field]:
@@ -137,34 +277,57 @@ def get_columns_from_df(df: pd.DataFrame) -> Dict[str, Field]:
     }
 
 
-class PandasMemory(Adapter):
+class PandasMemory(Adapter):  # pylint: disable=too-many-instance-attributes
 
     """
     An adapter for in-memory Pandas dataframes.
+
+    Dataframes can be registered with ``register_dataframe``, or passed to the
+    connection via the ``dataframes`` argument. As a fallback, variables in the
+    calling frames are searched.
     """
 
     safe = False
 
     supports_limit = True
     supports_offset = True
+    supports_requested_columns = True
+    cacheable = False
 
     @staticmethod
-    def supports(uri: str, fast: bool = True, **kwargs: Any) -> Optional[bool]:
-        return find_dataframe(uri) is not None
+    def supports(
+        uri: str,
+        fast: bool = True,
+        namespace: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Optional[bool]:
+        return find_dataframe(uri, namespace) is not None
 
     @staticmethod
     def parse_uri(uri: str) -> Tuple[str]:
         return (uri,)
 
-    def __init__(self, uri: str):
-        super().__init__()
-        df = find_dataframe(uri)
+    def __init__(self, uri: str, namespace: Optional[str] = None):
+        df = find_dataframe(uri, namespace)
         if df is None:
             raise ProgrammingError("Could not find dataframe")
+        super().__init__()
 
         self.df = df
         self.columns = get_columns_from_df(df)
 
+        # rows inserted and deleted, applied to the dataframe in bulk before it's
+        # read, and at the end of the transaction
+        self._pending_inserts: Dict[str, List[Any]] = {}
+        self._pending_index: List[int] = []
+        self._pending_deletes: Set[int] = set()
+        self._max_index: Optional[int] = None
+        self._clear_buffers()
+
+        # changes to the rows in the current transaction, and the original index
+        self._undo: Optional[List[Tuple[List[int], Optional[pd.DataFrame]]]] = None
+        self._index = df.index
+
     def get_columns(self) -> Dict[str, Field]:
         return self.columns
 
@@ -176,26 +339,156 @@ class PandasMemory(Adapter):
         order: List[Tuple[str, RequestedOrder]],
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        requested_columns: Optional[Set[str]] = None,
         **kwargs: Any,
     ) -> Iterator[Row]:
-        yield from get_df_data(self.df, self.columns, bounds, order, limit, offset)
+        self._flush()
+        yield from get_df_data(
+            self.df,
+            self.columns,
+            bounds,
+            order,
+            limit,
+            offset,
+            requested_columns,
+        )
+
+    def get_batches(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Batch]:
+        self._flush()
+        yield from get_df_batches(self.df, self.columns, bounds, order, **kwargs)
 
     def insert_data(self, row: Row) -> int:
+        """
+        Buffer a row, to be appended to the dataframe.
+        """
         row_id: Optional[int] = row.pop("rowid")
+        if self._max_index is None:
+            self._max_index = int(self.df.index.max()) if len(self.df) else -1
         if row_id is None:
-            row_id = max(self.df.index) + 1
+            row_id = self._max_index + 1
+        self._max_index = max(self._max_index, row_id)
 
-        self.df.loc[row_id] = row
+        for column_name, values in self._pending_inserts.items():
+            values.append(row.get(column_name))
+        self._pending_index.append(row_id)
 
         return row_id
 
     def delete_data(self, row_id: int) -> None:
-        self.df.drop([row_id], inplace=True)
+        """
+        Buffer the deletion of a row.
+        """
+        # inserted rows might be deleted
+        if self._pending_index:
+            self._flush()
+
+        self._pending_deletes.add(row_id)
 
     def update_data(self, row_id: int, row: Row) -> None:
+        self._flush()
+
         # the row_id might change on an update
         new_row_id = row.pop("rowid")
+        self._log_change([new_row_id], self.df.loc[[row_id]])
         if new_row_id != row_id:
             self.df.drop([row_id], inplace=True)
 
         self.df.loc[new_row_id] = row.values()
+
+    def _flush(self) -> None:
+        """
+        Apply buffered deletes and inserts to the dataframe, in place.
+        """
+        if self._pending_deletes:
+            row_ids = list(self._pending_deletes)
+            self._log_change([], self.df.loc[row_ids])
+            self.df.drop(row_ids, inplace=True)
+
+        if self._pending_index:
+            rows = pd.DataFrame(
+                dict(enumerate(self._pending_inserts.values())),
+                index=self._pending_index,
+            )
+            rows.columns = self.df.columns
+            self._log_change(self._pending_index, None)
+            self._append(rows)
+
+        self._clear_buffers()
+
+    def _clear_buffers(self) -> None:
+        """
+        Discard buffered changes.
+        """
+        self._pending_inserts = {
+            str(column_name): [] for column_name in self.df.columns
+        }
+        self._pending_index = []
+        self._pending_deletes = set()
+        self._max_index = None
+
+    def _append(self, rows: pd.DataFrame) -> None:
+        """
+        Append rows to the dataframe, in place.
+
+        The dataframe is owned by the user, so it can't be replaced.
+        """
+        if UPDATE_INPLACE:
+            # pylint: disable=protected-access
+            self.df._update_inplace(pd.concat([self.df, rows]))
+            return
+
+        for row_id, values in zip(rows.index, rows.itertuples(index=False)):
+            self.df.loc[row_id] = list(values)
+
+    def _log_change(self, added: List[int], removed: Optional[pd.DataFrame]) -> None:
+        """
+        Record the change to rows, so it can be undone if the transaction is rolled
+        back.
+        """
+        if self._undo is not None:
+            self._undo.append((added, None if removed is None else removed.copy()))
+
+    def begin(self) -> None:
+        # indexes are immutable, so the original order is preserved
+        self._index = self.df.index
+        self._undo = []
+
+    def sync(self) -> None:
+        self._flush()
+
+    def commit(self) -> None:
+        self._flush()
+        self._undo = None
+
+    def rollback(self) -> None:
+        """
+        Discard buffered changes, and undo the others, modifying the dataframe in
+        place.
+        """
+        self._clear_buffers()
+
+        if self._undo is None:
+            return
+
+        for added, removed in reversed(self._undo):
+            if added:
+                self.df.drop(added, inplace=True)
+            if removed is not None:
+                self._append(removed)
+        self._undo = None
+
+        # restored rows are added at the end, so the original order is restored
+        if not self.df.index.equals(self._index):
+            positions = {row_id: i for i, row_id in enumerate(self._index)}
+            self.df.sort_index(
+                inplace=True,
+                key=lambda index: index.map(positions),
+            )
+
+    def close(self) -> None:
+        self._flush()
@@ -0,0 +1,117 @@
+"""
+A buffer for the inner table of nested-loop joins.
+
+When a virtual table is the inner table of a join SQLite calls ``Filter`` on the
+same cursor once for each row of the outer table, usually with an equality
+constraint on the join column. For adapters backed by an API each call would
+result in a request, so the table is scanned once without the constraints, and the
+rows are stored in a buffer indexed by the constrained columns. All the calls are
+answered from the buffer, which lives only as long as the cursor, ie, a single
+statement.
+
+Tables are known to be joined when SQLite offers them constraints that depend on
+other tables, which is only visible through ``BestIndexObject``. Otherwise the
+buffer is built when the same plan is used a second time by a cursor.
+
+Only plans with equality constraints are buffered, and tables that are too big
+are streamed from the adapter as usual.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional, Tuple
+
+from shillelagh.backends.apsw.cache import get_batch_size
+from shillelagh.typing import Batch
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+
+
+class JoinBuffer:
+    """
+    Rows from a scan, indexed by the values of some columns.
+
+    Rows have the ``rowid`` followed by the values of all the columns, and
+    ``positions`` are the indexes of the constrained columns in each row.
+    """
+
+    def __init__(self, positions: List[int]):
+        self.positions = positions
+        self.rows: DefaultDict[Tuple[Any, ...], List[Tuple[Any, ...]]] = defaultdict(
+            list,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        batches: Iterator[Batch],
+        column_names: List[str],
+        positions: List[int],
+        max_size: Optional[int] = None,
+    ) -> Optional["JoinBuffer"]:
+        """
+        Build a buffer from a scan, returning ``None`` if the scan is too big.
+        """
+        max_size = DEFAULT_MAX_SIZE if max_size is None else max_size
+        buffer = cls(positions)
+        size = 0
+        for batch in batches:
+            size += get_batch_size(batch)
+            if size > max_size:
+                _logger.debug("Scan too big to be buffered")
+                return None
+
+            columns = [batch.get(column_name) for column_name in column_names]
+            num_rows = len(next(iter(batch.values()), []))
+            for i in range(num_rows):
+                row = tuple(None if values is None else values[i] for values in columns)
+                buffer.rows[tuple(row[position] for position in positions)].append(row)
+
+        return buffer
+
+    def get(self, values: List[Any]) -> Iterator[Tuple[Any, ...]]:
+        """
+        Return the rows where the constrained columns are equal to ``values``.
+
+            >>> buffer = JoinBuffer([1])
+            >>> buffer.rows[("a",)].append((0, "a", 10))
+            >>> list(buffer.get(["a"]))
+            [(0, 'a', 10)]
+            >>> list(buffer.get([None]))
+            []
+
+        """
+        # ``NULL`` is not equal to anything
+        if any(value is None for value in values):
+            return iter([])
+        return iter(self.rows.get(tuple(values), []))
+
+
+def get_positions(indexes: List[Tuple[int, int]], equal: int) -> Optional[List[int]]:
+    """
+    Return the positions of the constrained columns in a row, if they can be buffered.
+
+    Only plans where all the constraints are equalities can be buffered, since the
+    buffer is a hash index:
+
+        >>> get_positions([(0, 2), (2, 2)], 2)
+        [1, 3]
+        >>> get_positions([(0, 2), (1, 16)], 2) is None
+        True
+
+    """
+    if any(operator != equal for _, operator in indexes):
+        return None
+    return [column_index + 1 for column_index, _ in indexes]
+
+
+def get_full_scan(index: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the index of a scan without constraints, with the same order and columns.
+
+        >>> get_full_scan({"indexes": [[0, 2]], "orderbys_to_process": [[1, False]]})
+        {'indexes': [], 'orderbys_to_process': [[1, False]]}
+
+    """
+    return {**index, "indexes": []}
@@ -0,0 +1,170 @@
+"""
+A cache for the results of virtual table scans.
+
+Dashboards often issue the same queries in bursts, and each one would otherwise
+call the adapter again, resulting in the same network requests. When a cache is
+passed to the connection the batches returned by a scan are stored, keyed by the
+table and the scan parameters (bounds, order, limit, offset, and requested
+columns), and reused by identical scans until they expire.
+
+Entries are invalidated whenever the table is modified through the connection.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+from shillelagh.typing import Batch
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+CacheKey = Tuple[Hashable, Hashable]
+
+
+class CacheEntry(NamedTuple):
+    """
+    The batches returned by a scan.
+    """
+
+    batches: List[Batch]
+    size: int
+    expiration: float
+
+
+def get_batch_size(batch: Batch) -> int:
+    """
+    Estimate the size of a batch in memory, in bytes.
+    """
+    return sum(
+        sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+        for values in batch.values()
+    )
+
+
+class ScanCache:  # pylint: disable=too-many-instance-attributes
+    """
+    A cache for scans, with TTL and LRU eviction based on size.
+
+    Tables are identified by an arbitrary hashable key (the adapter class and its
+    arguments), and scans by another one. The counters ``hits``, ``misses``, and
+    ``evictions`` can be used to monitor the efficiency of the cache.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_size: int = DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """
+        The estimated size of all the cached scans, in bytes.
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expiration > time.monotonic()
+
+    def get(self, table: Hashable, scan: Hashable) -> Optional[List[Batch]]:
+        """
+        Return the batches of a cached scan, if present and not expired.
+        """
+        key = (table, scan)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expiration <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.batches
+
+    def record(
+        self,
+        table: Hashable,
+        scan: Hashable,
+        batches: Iterator[Batch],
+    ) -> Iterator[Batch]:
+        """
+        Yield batches from a scan, storing them once the scan is fully consumed.
+
+        Scans that are not consumed completely, or that are bigger than the cache,
+        are not stored.
+        """
+        stored: Optional[List[Batch]] = []
+        size = 0
+        for batch in batches:
+            if stored is not None:
+                size += get_batch_size(batch)
+                if size > self.max_size:
+                    _logger.debug("Scan too big to be cached")
+                    stored = None
+                else:
+                    stored.append(batch)
+            yield batch
+
+        if stored is not None:
+            self._add((table, scan), CacheEntry(stored, size, self._get_expiration()))
+
+    def invalidate(self, table: Hashable) -> None:
+        """
+        Remove all the cached scans of a table.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Remove all cached scans.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _get_expiration(self) -> float:
+        return time.monotonic() + self.ttl
+
+    def _add(self, key: CacheKey, entry: CacheEntry) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+
+            while self._size > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def __repr__(self) -> str:
+        return (
+            f"ScanCache(ttl={self.ttl}, max_size={self.max_size}, "
+            f"hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+        )
@@ -6,6 +6,7 @@ import datetime
 import itertools
 import logging
 import re
+import uuid
 from functools import partial, wraps
 from typing import (
     Any,
@@ -25,7 +26,13 @@ import apsw
 from shillelagh import functions
 from shillelagh.adapters.base import Adapter
 from shillelagh.adapters.registry import registry
-from shillelagh.backends.apsw.vt import VTModule, type_map
+from shillelagh.backends.apsw.cache import ScanCache
+from shillelagh.backends.apsw.vt import (
+    VTModule,
+    compile_row_converter,
+    get_sqlite_parsers,
+    type_map,
+)
 from shillelagh.exceptions import (  # nopycln: import; pylint: disable=redefined-builtin
     DatabaseError,
     DataError,
@@ -221,12 +228,34 @@ class Cursor:  # pylint: disable=too-many-instance-attributes
         if parameters:
             parameters = tuple(convert_binding(parameter) for parameter in parameters)
 
+        self._execute(self._cursor.execute, operation, parameters)
+
+        if uri := self._drop_table_uri(operation):
+            adapter, args, kwargs = find_adapter(
+                uri,
+                self._adapter_kwargs,
+                self._adapters,
+            )
+            instance = adapter(*args, **kwargs)
+            instance.drop_table()
+
+        return self
+
+    def _execute(
+        self,
+        method: Callable[[str, Any], "apsw.Cursor"],
+        operation: str,
+        parameters: Any,
+    ) -> None:
+        """
+        Run an APSW execute method, creating virtual tables as needed.
+        """
         # this is where the magic happens: instead of forcing users to register
         # their virtual tables explicitly, we do it for them when they first try
         # to access them and it fails because the table doesn't exist yet
         while True:
             try:
-                self._cursor.execute(operation, parameters)
+                method(operation, parameters)
                 self.description = self._get_description()
                 self._results = self._convert(self._cursor)
                 break
@@ -239,17 +268,6 @@ class Cursor:  # pylint: disable=too-many-instance-attributes
                 uri = message[len(NO_SUCH_TABLE) :]
                 self._create_table(uri)
 
-        if uri := self._drop_table_uri(operation):
-            adapter, args, kwargs = find_adapter(
-                uri,
-                self._adapter_kwargs,
-                self._adapters,
-            )
-            instance = adapter(*args, **kwargs)
-            instance.drop_table()
-
-        return self
-
     def _drop_table_uri(self, operation: str) -> Optional[str]:
         """
         Build a ``DROP TABLE`` regexp.
@@ -278,12 +296,24 @@ class Cursor:  # pylint: disable=too-many-instance-attributes
         if not self.description:
             return  # pragma: no cover
 
-        for row in cursor:
-            yield tuple(
-                # convert from SQLite types to native Python types
-                type_map[desc[1].type]().parse(col)
-                for col, desc in zip(row, self.description)
-            )
+        rows = iter(cursor)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
+
+        # the converter is compiled once per description, skipping columns that
+        # don't need any conversion
+        convert = compile_row_converter(
+            get_sqlite_parsers(tuple(desc[1].type for desc in self.description)),
+        )
+        if convert is None:
+            yield first_row
+            yield from rows
+            return
+
+        yield convert(first_row)
+        for row in rows:
+            yield convert(row)
 
     def _create_table(self, uri: str) -> None:
         """
@@ -336,13 +366,40 @@ class Cursor:  # pylint: disable=too-many-instance-attributes
         seq_of_parameters: Optional[List[Tuple[Any, ...]]] = None,
     ) -> "Cursor":
         """
-        Execute multiple statements.
+        Execute a statement once for each sequence of parameters.
 
-        Currently not supported.
+        The statement is prepared only once, and all executions run in a single
+        transaction, so that adapters can write the rows in batches. Without an
+        isolation level the transaction is committed at the end.
         """
-        raise NotSupportedError(
-            "``executemany`` is not supported, use ``execute`` instead",
-        )
+        self.description = None
+        self._rowcount = -1
+
+        seq_of_parameters = [
+            tuple(convert_binding(parameter) for parameter in parameters)
+            for parameters in seq_of_parameters or []
+        ]
+
+        autocommit = not self.in_transaction and not self.isolation_level
+        if not self.in_transaction:
+            self._cursor.execute(f"BEGIN {self.isolation_level or ''}")
+            self.in_transaction = True
+
+        try:
+            self._execute(self._cursor.executemany, operation, seq_of_parameters)
+        except Exception:
+            if autocommit:
+                self._cursor.execute("ROLLBACK")
+                self.in_transaction = False
+            raise
+
+        if autocommit:
+            # results need to be read before the transaction is committed
+            self._results = iter(list(self._results))  # type: ignore
+            self._cursor.execute("COMMIT")
+            self.in_transaction = False
+
+        return self
 
     @check_result
     @check_closed
@@ -431,7 +488,7 @@ def apsw_version() -> str:
     return f"{functions.version()} (apsw {apsw.apswversion()})"
 
 
-class Connection:
+class Connection:  # pylint: disable=too-many-instance-attributes
 
     """Connection."""
 
@@ -443,26 +500,38 @@ class Connection:
         isolation_level: Optional[str] = None,
         apsw_connection_kwargs: Optional[Dict[str, Any]] = None,
         schema: str = DEFAULT_SCHEMA,
+        dataframes: Optional[Dict[str, Any]] = None,
+        scan_cache: Optional[ScanCache] = None,
+        statistics: bool = False,
     ):
         # create underlying APSW connection
         apsw_connection_kwargs = apsw_connection_kwargs or {}
         self._connection = apsw.Connection(path, **apsw_connection_kwargs)
         self.isolation_level = isolation_level
         self.schema = schema
+        self.scan_cache = scan_cache
 
         # register adapters
         for adapter in adapters:
             if best_index_object_available():
                 self._connection.createmodule(
                     adapter.__name__,
-                    VTModule(adapter),
+                    VTModule(adapter, scan_cache, statistics),
                     use_bestindex_object=adapter.supports_requested_columns,
                 )
             else:
-                self._connection.createmodule(adapter.__name__, VTModule(adapter))
+                self._connection.createmodule(
+                    adapter.__name__,
+                    VTModule(adapter, scan_cache, statistics),
+                )
         self._adapters = adapters
         self._adapter_kwargs = adapter_kwargs
 
+        # register dataframes in a namespace owned by the connection
+        self._namespace: Optional[str] = None
+        if dataframes:
+            self._register_dataframes(dataframes)
+
         # register functions
         available_functions = {
             "sleep": functions.sleep,
@@ -479,6 +548,25 @@ class Connection:
         self.closed = False
         self.cursors: List[Cursor] = []
 
+    def _register_dataframes(self, dataframes: Dict[str, Any]) -> None:
+        """
+        Register dataframes for the ``PandasMemory`` adapter.
+        """
+        # imported here since Pandas is an optional dependency
+        from shillelagh.adapters.memory.pandas import (  # pylint: disable=import-outside-toplevel
+            register_dataframe,
+        )
+
+        self._namespace = f"connection-{uuid.uuid4().hex}"
+        for name, df in dataframes.items():
+            register_dataframe(name, df, self._namespace)
+
+        kwargs = self._adapter_kwargs.get("pandasmemory", {})
+        self._adapter_kwargs = {
+            **self._adapter_kwargs,
+            "pandasmemory": {**kwargs, "namespace": self._namespace},
+        }
+
     @check_closed
     def close(self) -> None:
         """Close the connection now."""
@@ -487,6 +575,13 @@ class Connection:
             if not cursor.closed:
                 cursor.close()
 
+        if self._namespace:
+            from shillelagh.adapters.memory.pandas import (  # pylint: disable=import-outside-toplevel
+                unregister_namespace,
+            )
+
+            unregister_namespace(self._namespace)
+
     @check_closed
     def commit(self) -> None:
         """Commit any pending transaction to the database."""
@@ -545,9 +640,22 @@ def connect(  # pylint: disable=too-many-arguments
     isolation_level: Optional[str] = None,
     apsw_connection_kwargs: Optional[Dict[str, Any]] = None,
     schema: str = DEFAULT_SCHEMA,
+    dataframes: Optional[Dict[str, Any]] = None,
+    scan_cache: Optional[ScanCache] = None,
+    statistics: bool = False,
 ) -> Connection:
     """
     Constructor for creating a connection to the database.
+
+    Pandas dataframes passed in ``dataframes`` can be queried as tables, using the
+    dictionary keys as their names.
+
+    When a ``scan_cache`` is passed the results of table scans are reused by
+    identical queries until they expire. The cache can be shared by connections.
+
+    When ``statistics`` is true the backend records statistics while scanning tables,
+    and uses them to estimate the cost of queries on tables whose adapter doesn't
+    estimate it.
     """
     adapter_kwargs = adapter_kwargs or {}
     enabled_adapters = registry.load_all(adapters, safe)
@@ -565,4 +673,7 @@ def connect(  # pylint: disable=too-many-arguments
         isolation_level,
         apsw_connection_kwargs,
         schema,
+        dataframes,
+        scan_cache,
+        statistics,
     )
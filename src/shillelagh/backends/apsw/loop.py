@@ -0,0 +1,101 @@
+"""
+A bridge between asynchronous adapters and the synchronous virtual table.
+
+SQLite calls the virtual table methods synchronously, so adapters implementing
+``get_data_async`` are driven by an event loop running in a background thread,
+shared by all connections. Each scan is consumed by a task in the loop as soon as
+it's started, and its rows are passed to the calling thread through a bounded
+queue, so that scans from different tables can wait on the network concurrently.
+"""
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Generic, Iterator, Optional, Tuple, TypeVar
+
+# maximum number of items buffered by a stream before its task waits
+QUEUE_SIZE = 1000
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None  # pylint: disable=invalid-name
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the background event loop, starting it if needed.
+    """
+    global _loop  # pylint: disable=global-statement
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever,
+                name="shillelagh-loop",
+                daemon=True,
+            )
+            thread.start()
+        return _loop
+
+
+class AsyncStream(Generic[T]):
+    """
+    Consume an asynchronous iterator from synchronous code.
+
+    The iterator is consumed in the background loop as soon as the stream is
+    created. At most ``maxsize`` items are buffered; closing the stream cancels the
+    task and closes the iterator.
+    """
+
+    def __init__(self, iterator: AsyncIterator[T], maxsize: int = QUEUE_SIZE):
+        self._loop = get_loop()
+        self._queue: "queue.SimpleQueue[Tuple[bool, object]]" = queue.SimpleQueue()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._done = False
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._pump(iterator, maxsize),
+            self._loop,
+        )
+
+    async def _pump(self, iterator: AsyncIterator[T], maxsize: int) -> None:
+        """
+        Move items from the iterator to the queue, waiting for free slots.
+        """
+        # created in the loop, since older versions of Python bind it on creation
+        self._slots = asyncio.Semaphore(maxsize)
+        try:
+            async for item in iterator:
+                await self._slots.acquire()
+                self._queue.put((True, item))
+        except Exception as ex:  # pylint: disable=broad-except
+            self._queue.put((False, ex))
+        else:
+            self._queue.put((False, None))
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        if self._done:
+            raise StopIteration
+
+        is_item, value = self._queue.get()
+        if not is_item:
+            self._done = True
+            if value is not None:
+                raise value  # type: ignore
+            raise StopIteration
+
+        self._loop.call_soon_threadsafe(self._slots.release)  # type: ignore
+        return value  # type: ignore
+
+    def close(self) -> None:
+        """
+        Stop consuming the iterator.
+        """
+        self._done = True
+        self._future.cancel()
@@ -1,4 +1,4 @@
-# pylint: disable=c-extension-no-member, invalid-name
+# pylint: disable=c-extension-no-member, invalid-name, too-many-lines
 """
 A SQLite virtual table.
 
@@ -6,16 +6,21 @@ This module implements a SQLite virtual table that delegates data requests
 to adapters. The main goal is to make the interface easier to use, to
 simplify the work of writing new adapters.
 """
+import itertools
 import json
 import logging
 from collections import defaultdict
+from functools import lru_cache
 from typing import (
     Any,
+    Callable,
     DefaultDict,
     Dict,
+    Hashable,
     Iterator,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -24,7 +29,10 @@ from typing import (
 
 import apsw
 
-from shillelagh.adapters.base import Adapter
+from shillelagh.adapters.base import Adapter, rows_to_batches
+from shillelagh.backends.apsw.buffer import JoinBuffer, get_full_scan, get_positions
+from shillelagh.backends.apsw.cache import ScanCache
+from shillelagh.backends.apsw.loop import AsyncStream
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import (
     Blob,
@@ -35,7 +43,6 @@ from shillelagh.fields import (
     ISODate,
     ISOTime,
     Order,
-    RowID,
     String,
     StringDecimal,
     StringDuration,
@@ -43,7 +50,9 @@ from shillelagh.fields import (
 )
 from shillelagh.filters import Filter, Operator
 from shillelagh.lib import best_index_object_available, deserialize
+from shillelagh.statistics import TableStatistics, get_table_statistics
 from shillelagh.typing import (
+    Batch,
     Constraint,
     Index,
     OrderBy,
@@ -99,6 +108,12 @@ _add_sqlite_constraint("SQLITE_INDEX_CONSTRAINT_OFFSET", Operator.OFFSET)
 # limit and offset are special constraints without an associated column index
 LIMIT_OFFSET_INDEX = -1
 
+# in ``colUsed`` this bit represents all columns from 63 onwards
+COLUMNS_USED_OVERFLOW = 63
+
+# maximum number of inserted rows buffered before they're passed to the adapter
+INSERT_BATCH_SIZE = 1000
+
 # map for converting between Python native types (boolean, datetime, etc.)
 # and types understood by SQLite (integers, strings, etc.)
 type_map: Dict[str, Type[Field]] = {
@@ -121,6 +136,106 @@ type_map: Dict[str, Type[Field]] = {
 # a row with only SQLite-valid types
 SQLiteRow = Dict[str, SQLiteValidType]
 
+# a function converting a single value; ``None`` is used for the identity
+Converter = Optional[Callable[[Any], Any]]
+
+
+def get_converter(method: Callable[[Any], Any]) -> Converter:
+    """
+    Return a field method as a converter, or ``None`` if it's the identity.
+
+    Many fields (``Float``, ``String``, etc.) don't override ``parse`` and ``format``,
+    so there's no need to call them for every value.
+    """
+    if getattr(method, "__func__", None) in {Field.parse, Field.format}:
+        return None
+    return method
+
+
+def fuse_converters(first: Converter, second: Converter) -> Converter:
+    """
+    Combine two converters into a single one, applying ``first`` then ``second``.
+    """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return lambda value: second(first(value))  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def get_sqlite_formatters(column_types: Tuple[str, ...]) -> Tuple[Converter, ...]:
+    """
+    Return converters from native Python types to SQLite types.
+
+    The converters are cached based on the column signature.
+    """
+    return tuple(
+        get_converter(type_map[column_type]().format) for column_type in column_types
+    )
+
+
+@lru_cache(maxsize=None)
+def get_sqlite_parsers(column_types: Tuple[str, ...]) -> Tuple[Converter, ...]:
+    """
+    Return converters from SQLite types to native Python types.
+
+    The converters are cached based on the column signature.
+    """
+    return tuple(
+        get_converter(type_map[column_type]().parse) for column_type in column_types
+    )
+
+
+def compile_row_converter(
+    converters: Sequence[Converter],
+) -> Optional[Callable[[Tuple[Any, ...]], Tuple[Any, ...]]]:
+    """
+    Build a function that converts a tuple of values using one converter per position.
+
+    Returns ``None`` if all the converters are the identity, so that rows can be
+    passed through without any processing.
+    """
+    indexed_converters = [
+        (i, converter) for i, converter in enumerate(converters) if converter
+    ]
+    if not indexed_converters:
+        return None
+
+    def convert(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        values = list(row)
+        for i, converter in indexed_converters:
+            values[i] = converter(values[i])
+        return tuple(values)
+
+    return convert
+
+
+def get_batch_converters(
+    columns: Dict[str, Field],
+    from_storage: bool = False,
+) -> Dict[str, Converter]:
+    """
+    Return converters for each column in a batch.
+
+    When ``from_storage`` is true the batches are assumed to be in the adapter storage
+    format (ie, coming from ``get_data``), and the adapter field ``parse`` is fused with
+    the SQLite ``format``, so that each value is converted in a single step.
+    """
+    formatters = get_sqlite_formatters(
+        tuple(column_field.type for column_field in columns.values()),
+    )
+    converters = {
+        column_name: (
+            fuse_converters(get_converter(column_field.parse), formatter)
+            if from_storage
+            else formatter
+        )
+        for (column_name, column_field), formatter in zip(columns.items(), formatters)
+    }
+    converters["rowid"] = None
+    return converters
+
 
 def convert_rows_to_sqlite(
     columns: Dict[str, Field],
@@ -133,18 +248,59 @@ def convert_rows_to_sqlite(
     we need to cast them to strings or numbers. We use the original fields to handle
     the conversion (not the adapter fields).
     """
-    converters = {
-        column_name: type_map[column_field.type]().format
-        for column_name, column_field in columns.items()
-    }
-    converters["rowid"] = RowID().format
+    converters = get_batch_converters(columns)
     for row in rows:
         yield {
-            column_name: converters[column_name](value)
+            column_name: value
+            if converters[column_name] is None
+            else converters[column_name](value)  # type: ignore
             for column_name, value in row.items()
         }
 
 
+def convert_batches_to_sqlite(
+    columns: Dict[str, Field],
+    batches: Iterator[Batch],
+    from_storage: bool = False,
+) -> Iterator[Batch]:
+    """
+    Convert batches of values from native Python types to SQLite types.
+
+    This is the columnar equivalent of ``convert_rows_to_sqlite``: the converter
+    for each column is looked up once per batch, and applied to all its values.
+    Columns that need no conversion are passed through unmodified.
+    """
+    converters = get_batch_converters(columns, from_storage)
+    for batch in batches:
+        yield {
+            column_name: values
+            if converters[column_name] is None
+            else list(map(converters[column_name], values))  # type: ignore
+            for column_name, values in batch.items()
+        }
+
+
+def iterate_batches(
+    batches: Iterator[Batch],
+    column_names: List[str],
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Convert a stream of batches into a stream of tuples.
+
+    Columns missing from a batch are replaced with ``None``.
+    """
+    for batch in batches:
+        size = len(batch["rowid"])
+        yield from zip(
+            *(
+                batch[column_name]
+                if column_name in batch
+                else itertools.repeat(None, size)
+                for column_name in column_names
+            )
+        )
+
+
 def convert_rows_from_sqlite(
     columns: Dict[str, Field],
     rows: Iterator[SQLiteRow],
@@ -156,14 +312,16 @@ def convert_rows_from_sqlite(
     we need to cast them to strings or numbers. We use the original fields to handle
     the conversion (not the adapter fields).
     """
-    converters = {
-        column_name: type_map[column_field.type]().parse
-        for column_name, column_field in columns.items()
-    }
-    converters["rowid"] = RowID().parse
+    parsers = get_sqlite_parsers(
+        tuple(column_field.type for column_field in columns.values()),
+    )
+    converters: Dict[str, Converter] = dict(zip(columns.keys(), parsers))
+    converters["rowid"] = None
     for row in rows:
         yield {
-            column_name: converters[column_name](value)
+            column_name: value
+            if converters[column_name] is None
+            else converters[column_name](value)  # type: ignore
             for column_name, value in row.items()
         }
 
@@ -263,6 +421,36 @@ def get_bounds(
     return bounds
 
 
+def get_data_method(adapter: Adapter) -> Optional[str]:
+    """
+    Return the name of the method used to read rows in the storage format.
+
+    Adapters that implement ``get_batches`` or ``get_rows`` return native types,
+    and ``None`` is returned. Otherwise ``get_data_async`` is used if implemented,
+    falling back to ``get_data``.
+    """
+    adapter_class = type(adapter)
+    if (
+        adapter_class.get_batches is not Adapter.get_batches
+        or adapter_class.get_rows is not Adapter.get_rows
+    ):
+        return None
+    if adapter_class.get_data_async is not Adapter.get_data_async:
+        return "get_data_async"
+    return "get_data"
+
+
+def supports_bulk_insert(adapter: Adapter) -> bool:
+    """
+    Return true if the adapter can insert multiple rows at once.
+    """
+    adapter_class = type(adapter)
+    return (
+        adapter_class.insert_data_many is not Adapter.insert_data_many
+        or adapter_class.insert_rows is not Adapter.insert_rows
+    )
+
+
 class VTModule:  # pylint: disable=too-few-public-methods
 
     """
@@ -272,8 +460,15 @@ class VTModule:  # pylint: disable=too-few-public-methods
     the work needed to support new data sources.
     """
 
-    def __init__(self, adapter: Type[Adapter]):
+    def __init__(
+        self,
+        adapter: Type[Adapter],
+        cache: Optional[ScanCache] = None,
+        statistics: bool = False,
+    ):
         self.adapter = adapter
+        self.cache = cache if adapter.cacheable else None
+        self.statistics = statistics
 
     def Create(  # pylint: disable=unused-argument
         self,
@@ -292,14 +487,41 @@ class VTModule:  # pylint: disable=too-few-public-methods
             deserialized_args,
         )
         adapter = self.adapter(*deserialized_args)
-        table = VTTable(adapter)
+        table = VTTable(
+            adapter,
+            self.cache,
+            (self.adapter.__name__, args),
+            connection,
+            self.statistics,
+        )
         create_table = table.get_create_table(tablename)
         return create_table, table
 
     Connect = Create
 
 
-class VTTable:
+def get_orderbys_to_process(
+    orderbys: List[OrderBy],
+    column_types: List[Field],
+) -> Tuple[List[OrderBy], bool]:
+    """
+    Return the order bys the adapter needs to process, and if the order is consumed.
+
+    If the data is not returned in the requested order SQLite will have to sort it.
+    """
+    orderbys_to_process: List[OrderBy] = []
+    for column_index, descending in orderbys:
+        requested_order = Order.DESCENDING if descending else Order.ASCENDING
+        column_type = column_types[column_index]
+        if column_type.order == Order.ANY:
+            orderbys_to_process.append((column_index, descending))
+        elif column_type.order != requested_order:
+            return orderbys_to_process, False
+
+    return orderbys_to_process, True
+
+
+class VTTable:  # pylint: disable=too-many-instance-attributes
     """
     A SQLite virtual table.
 
@@ -315,8 +537,42 @@ class VTTable:
     on this number, as well as some of the Table routines such as UpdateChangeRow.
     """
 
-    def __init__(self, adapter: Adapter):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        adapter: Adapter,
+        cache: Optional[ScanCache] = None,
+        key: Hashable = None,
+        connection: Optional[apsw.Connection] = None,
+        statistics: bool = False,
+    ):
         self.adapter = adapter
+        self.cache = cache
+        self.key = key
+        self.connection = connection
+
+        # statistics are only collected when requested, and only for adapters without
+        # their own cost model; tables without a key (eg, in tests) don't share them
+        self.statistics: Optional[TableStatistics] = None
+        if statistics and type(adapter).get_cost is Adapter.get_cost:
+            self.statistics = (
+                TableStatistics() if key is None else get_table_statistics(key)
+            )
+
+        # index names of the plans considered by SQLite for the last statement
+        # prepared, or ``None`` for plans that need arguments; a new statement is
+        # being prepared when plans are built after the table was opened
+        self.plans: Set[Optional[str]] = set()
+        self.opened = False
+
+        # whether SQLite offered constraints that depend on other tables while
+        # preparing the last statement, ie, the table is joined to another one
+        self.joined = False
+
+        # rows inserted but not yet passed to the adapter
+        self.pending_inserts: List[Row] = []
+
+        # whether the adapter was notified of the current transaction
+        self.in_transaction = False
 
     def get_create_table(self, tablename: str) -> str:
         """
@@ -332,13 +588,25 @@ class VTTable:
         )
         return f'CREATE TABLE "{tablename}" ({formatted_columns})'
 
-    def _build_index(  # pylint: disable=too-many-locals
+    def _build_index(  # pylint: disable=too-many-locals, too-many-branches
         self,
         constraints: List[Tuple[int, SQLiteConstraint]],
         orderbys: List[OrderBy],
-    ) -> Tuple[List[Constraint], int, List[Index], List[OrderBy], bool, float]:
+        values: Optional[List[Any]] = None,
+    ) -> Tuple[
+        List[Constraint],
+        int,
+        List[Index],
+        List[OrderBy],
+        bool,
+        float,
+        Optional[float],
+    ]:
         """
         Helper function to build index.
+
+        The ``values`` of the constraints are used to estimate the number of rows
+        returned, when known.
         """
         columns = self.adapter.get_columns()
         column_names = list(columns.keys())
@@ -348,50 +616,76 @@ class VTTable:
         # the index as JSON in ``index_name``
         index_number = 42
 
+        orderbys_to_process, orderby_consumed = get_orderbys_to_process(
+            orderbys,
+            column_types,
+        )
+
+        # find which constraints can be handled by the adapter; SQLite offers LIMIT
+        # and OFFSET even when there are other constraints, but they can only be
+        # pushed down if the adapter returns exactly the rows requested, in the
+        # requested order; otherwise SQLite still has to filter or sort the rows
+        limit_offset: List[bool] = []
+        handled: List[Optional[Tuple[str, Operator]]] = []
+        pushdown_limit_offset = orderby_consumed
+        for column_index, sqlite_index_constraint in constraints:
+            operator = operator_map.get(sqlite_index_constraint)
+            is_limit_offset = (
+                operator is Operator.LIMIT and self.adapter.supports_limit
+            ) or (operator is Operator.OFFSET and self.adapter.supports_offset)
+            limit_offset.append(is_limit_offset)
+            handled.append(None)
+            if is_limit_offset or operator in {Operator.LIMIT, Operator.OFFSET}:
+                continue
+            if column_index < 0:
+                pushdown_limit_offset = False
+                continue
+
+            column_name = column_names[column_index]
+            column_type = column_types[column_index]
+            if any(operator in class_.operators for class_ in column_type.filters):
+                handled[-1] = (column_name, operator)
+                pushdown_limit_offset &= column_type.exact
+            else:
+                pushdown_limit_offset = False
+
         indexes: List[Index] = []
         constraints_used: List[Constraint] = []
         filter_index = 0
         filtered_columns: List[Tuple[str, Operator]] = []
-        for column_index, sqlite_index_constraint in constraints:
-            operator = operator_map.get(sqlite_index_constraint)
-
+        filtered_values: List[Any] = []
+        for (
+            (column_index, sqlite_index_constraint),
+            is_limit_offset,
+            filtered,
+            value,
+        ) in zip(constraints, limit_offset, handled, values or [None] * len(handled)):
             # LIMIT/OFFSET
-            if (operator is Operator.LIMIT and self.adapter.supports_limit) or (
-                operator is Operator.OFFSET and self.adapter.supports_offset
-            ):
-                constraints_used.append((filter_index, True))
-                filter_index += 1
-                indexes.append((LIMIT_OFFSET_INDEX, sqlite_index_constraint))
-            # column operator
-            elif column_index >= 0:
-                column_name = column_names[column_index]
-                column_type = column_types[column_index]
-                for class_ in column_type.filters:
-                    if operator in class_.operators:
-                        filtered_columns.append((column_name, operator))
-                        constraints_used.append((filter_index, column_type.exact))
-                        filter_index += 1
-                        indexes.append((column_index, sqlite_index_constraint))
-                        break
+            if is_limit_offset:
+                if pushdown_limit_offset:
+                    constraints_used.append((filter_index, True))
+                    filter_index += 1
+                    indexes.append((LIMIT_OFFSET_INDEX, sqlite_index_constraint))
                 else:
                     constraints_used.append(None)
+            # column operator
+            elif filtered:
+                filtered_columns.append(filtered)
+                filtered_values.append(value)
+                constraints_used.append(
+                    (filter_index, column_types[column_index].exact),
+                )
+                filter_index += 1
+                indexes.append((column_index, sqlite_index_constraint))
+            elif column_index >= 0:
+                constraints_used.append(None)
 
-        # estimate query cost
-        order = get_order(orderbys, column_names)
-        estimated_cost = self.adapter.get_cost(filtered_columns, order)
-
-        # is the data being returned in the requested order? if not, SQLite will have
-        # to sort it
-        orderby_consumed = True
-        orderbys_to_process: List[OrderBy] = []
-        for column_index, descending in orderbys:
-            requested_order = Order.DESCENDING if descending else Order.ASCENDING
-            column_type = column_types[column_index]
-            if column_type.order == Order.ANY:
-                orderbys_to_process.append((column_index, descending))
-            elif column_type.order != requested_order:
-                orderby_consumed = False
-                break
+        estimated_cost, estimated_rows = self._estimate_cost(
+            filtered_columns,
+            filtered_values,
+            get_order(orderbys, column_names),
+            orderbys_to_process,
+        )
 
         return (
             constraints_used,
@@ -400,8 +694,37 @@ class VTTable:
             orderbys_to_process,
             orderby_consumed,
             estimated_cost,
+            estimated_rows,
         )
 
+    def _estimate_cost(
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        values: List[Any],
+        order: List[Tuple[str, RequestedOrder]],
+        orderbys_to_process: List[OrderBy],
+    ) -> Tuple[float, Optional[float]]:
+        """
+        Estimate the cost of a plan and the number of rows it returns.
+
+        When statistics are collected, once the table has been scanned they are used
+        instead of the estimate from the adapter.
+        """
+        estimated_rows = (
+            None
+            if self.statistics is None
+            else self.statistics.estimate_rows(filtered_columns, values)
+        )
+        if self.statistics is None or estimated_rows is None:
+            return self.adapter.get_cost(filtered_columns, order), None
+
+        estimated_cost = self.statistics.estimate_cost(
+            filtered_columns,
+            orderbys_to_process,
+            estimated_rows,
+        )
+        return estimated_cost, estimated_rows
+
     def BestIndex(  # pylint: disable=too-many-locals
         self,
         constraints: List[Tuple[int, SQLiteConstraint]],
@@ -420,11 +743,13 @@ class VTTable:
             orderbys_to_process,
             orderby_consumed,
             estimated_cost,
+            _,
         ) = self._build_index(constraints, orderbys)
 
         index_name = json.dumps(
             {"indexes": indexes, "orderbys_to_process": orderbys_to_process},
         )
+        self._add_plan(None if indexes else index_name)
 
         return (
             constraints_used,
@@ -444,10 +769,23 @@ class VTTable:
         columns = self.adapter.get_columns()
         column_names = list(columns.keys())
 
+        # constraints that are not usable (eg, on columns of tables that come later in
+        # a join) can't be passed to the adapter
         index_info_dict = index_info_to_dict(index_info)
+        usable = [
+            i
+            for i, constraint in enumerate(index_info_dict["aConstraint"])
+            if constraint.get("usable", True)
+        ]
         constraints = [
             (constraint.get("iColumn", -1), constraint["op"])
             for constraint in index_info_dict["aConstraint"]
+            if constraint.get("usable", True)
+        ]
+        values = [
+            constraint.get("rhs")
+            for constraint in index_info_dict["aConstraint"]
+            if constraint.get("usable", True)
         ]
         orderbys = [
             (orderby["iColumn"], orderby["desc"])
@@ -460,9 +798,17 @@ class VTTable:
             orderbys_to_process,
             orderby_consumed,
             estimated_cost,
-        ) = self._build_index(constraints, orderbys)
-
-        requested_columns = sorted({column_names[i] for i in index_info.colUsed})
+            estimated_rows,
+        ) = self._build_index(constraints, orderbys, values)
+
+        # the last bit means that columns from 63 onwards are used; SQLite also sets
+        # all bits for ``UPDATE`` statements, regardless of the number of columns
+        used = set(index_info.colUsed)
+        if COLUMNS_USED_OVERFLOW in used:
+            used.update(range(COLUMNS_USED_OVERFLOW, len(column_names)))
+        requested_columns = sorted(
+            column_names[i] for i in used if i < len(column_names)
+        )
         index_name = json.dumps(
             {
                 "indexes": indexes,
@@ -470,8 +816,11 @@ class VTTable:
                 "requested_columns": requested_columns,
             },
         )
+        self._add_plan(None if indexes else index_name)
+        if len(usable) < len(index_info_dict["aConstraint"]):
+            self.joined = True
 
-        for i, constraint in enumerate(constraints_used):
+        for i, constraint in zip(usable, constraints_used):
             if isinstance(constraint, tuple):
                 index_info.set_aConstraintUsage_argvIndex(i, constraint[0] + 1)
                 index_info.set_aConstraintUsage_omit(i, constraint[1])
@@ -479,14 +828,61 @@ class VTTable:
         index_info.idxStr = index_name
         index_info.orderByConsumed = orderby_consumed
         index_info.estimatedCost = estimated_cost
+        if estimated_rows is not None:
+            index_info.estimatedRows = int(estimated_rows)
 
         return True
 
+    def _add_plan(self, index_name: Optional[str]) -> None:
+        """
+        Record a plan considered by SQLite, forgetting those of previous statements.
+        """
+        if self.opened:
+            self.plans.clear()
+            self.joined = False
+            self.opened = False
+        self.plans.add(index_name)
+
     def Open(self) -> "VTCursor":
         """
         Returns a cursor object.
+
+        SQLite opens the cursors of all the tables in a join before filtering any
+        of them. For asynchronous adapters, if the only plan considered for the
+        table needs no arguments the scan is started right away, so that it runs
+        concurrently with the scans of the other tables.
+        """
+        self.flush()
+        self.opened = True
+        cursor = VTCursor(
+            self.adapter,
+            self.cache,
+            self.key,
+            self.statistics,
+            self.joined,
+        )
+
+        if (
+            get_data_method(self.adapter) == "get_data_async"
+            and len(self.plans) == 1
+            and None not in self.plans
+        ):
+            index_name = cast(str, next(iter(self.plans)))
+            scan = (index_name, ())
+            if self.cache is None or (self.key, scan) not in self.cache:
+                cursor.prefetch(index_name)
+
+        return cursor
+
+    def _invalidate(self) -> None:
+        """
+        Remove cached scans of the table, after it has been modified, and collect its
+        statistics again.
         """
-        return VTCursor(self.adapter)
+        if self.cache is not None:
+            self.cache.invalidate(self.key)
+        if self.statistics is not None:
+            self.statistics.invalidate()
 
     def Disconnect(self) -> None:
         """
@@ -495,13 +891,81 @@ class VTTable:
         This method is called when a reference to a virtual table is no longer used,
         but VTTable.Destroy() will be called when the table is no longer used.
         """
+        self.flush()
+        self._invalidate()
         self.adapter.close()
 
     Destroy = Disconnect
 
+    def Begin(self) -> None:
+        """
+        Start a transaction.
+
+        SQLite calls this before the first change to the table in a transaction,
+        except when the table was created in the transaction, so it's also called
+        before changes if needed.
+        """
+        self.in_transaction = True
+        self.adapter.begin()
+
+    def Sync(self) -> None:
+        """
+        Prepare to commit the current transaction.
+
+        Buffered changes are written here, since errors raised by ``Commit`` are
+        ignored by SQLite, while errors raised here roll back the transaction.
+        """
+        self.flush()
+        self.adapter.sync()
+
+    def Commit(self) -> None:
+        """
+        Commit the current transaction.
+        """
+        self.flush()
+        self.in_transaction = False
+        self.adapter.commit()
+
+    def Rollback(self) -> None:
+        """
+        Roll back the current transaction.
+        """
+        self.pending_inserts = []
+        self.in_transaction = False
+        self._invalidate()
+        self.adapter.rollback()
+
+    def _begin(self) -> None:
+        """
+        Start a transaction, if SQLite hasn't done it.
+        """
+        if not self.in_transaction:
+            self.Begin()
+
+    def _autocommit(self) -> bool:
+        """
+        Return true if the statement is not part of an explicit transaction.
+        """
+        return self.connection is None or self.connection.getautocommit()
+
+    def flush(self) -> None:
+        """
+        Pass the buffered inserts to the adapter.
+        """
+        if self.pending_inserts:
+            rows, self.pending_inserts = self.pending_inserts, []
+            self.adapter.insert_rows(rows)
+
     def UpdateInsertRow(self, rowid: Optional[int], fields: Tuple[Any, ...]) -> int:
         """
         Insert a row with the specified rowid.
+
+        For adapters that support inserting multiple rows at once the rows are
+        buffered inside explicit transactions (including ``executemany``), and passed
+        to the adapter in batches. Their IDs are only known when they're inserted, so
+        if the ID is not specified 0 is returned; SQLite uses it only as the value of
+        ``last_insert_rowid()``. In autocommit mode rows are inserted immediately, and
+        the real ID is returned.
         """
         columns = self.adapter.get_columns()
 
@@ -509,12 +973,23 @@ class VTTable:
         row["rowid"] = rowid
         row = next(convert_rows_from_sqlite(columns, iter([row])))
 
-        return cast(int, self.adapter.insert_row(row))
+        self._begin()
+        self._invalidate()
+        if not supports_bulk_insert(self.adapter) or self._autocommit():
+            return cast(int, self.adapter.insert_row(row))
+
+        self.pending_inserts.append(row)
+        if len(self.pending_inserts) >= INSERT_BATCH_SIZE:
+            self.flush()
+        return 0 if rowid is None else rowid
 
     def UpdateDeleteRow(self, rowid: int) -> None:
         """
         Delete the row with the specified rowid.
         """
+        self._begin()
+        self.flush()
+        self._invalidate()
         self.adapter.delete_row(rowid)
 
     def UpdateChangeRow(
@@ -534,22 +1009,44 @@ class VTTable:
         row["rowid"] = newrowid
         row = next(convert_rows_from_sqlite(columns, iter([row])))
 
+        self._begin()
+        self.flush()
+        self._invalidate()
         self.adapter.update_row(rowid, row)
 
 
-class VTCursor:
+class VTCursor:  # pylint: disable=too-many-instance-attributes
     """
     An object for iterating over a table.
     """
 
-    def __init__(self, adapter: Adapter):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        adapter: Adapter,
+        cache: Optional[ScanCache] = None,
+        key: Hashable = None,
+        statistics: Optional[TableStatistics] = None,
+        joined: bool = False,
+    ):
         self.adapter = adapter
+        self.cache = cache
+        self.key = key
+        self.statistics = statistics
+        self.joined = joined
+
+        # scan from an asynchronous adapter, consumed in the background
+        self.stream: Optional[AsyncStream] = None
+        self.prefetched: Optional[Tuple[Hashable, Iterator[Batch]]] = None
+
+        # plans used by the cursor, and buffers of the plans used repeatedly
+        self.plans: Set[str] = set()
+        self.buffers: Dict[str, Optional[JoinBuffer]] = {}
 
         self.data: Iterator[Tuple[Any, ...]]
         self.current_row: Tuple[Any, ...]
         self.eof = False
 
-    def Filter(  # pylint: disable=too-many-locals
+    def Filter(
         self,
         indexnumber: int,  # pylint: disable=unused-argument
         indexname: str,
@@ -560,9 +1057,99 @@ class VTCursor:
 
         This method converts the ``indexname`` (containing which columns to filter
         and the order to sort the results) and ``constraintargs`` into a pair of
-        ``bounds`` and ``order``. These are then passed to the ``get_rows`` method of
-        the adapter, to filter and sort the data.
+        ``bounds`` and ``order``. These are then passed to the ``get_batches`` method
+        of the adapter, to filter and sort the data.
+        """
+        columns: Dict[str, Field] = self.adapter.get_columns()
+        column_names: List[str] = list(columns.keys())
+
+        # in a nested-loop join the inner table is filtered once for each row of the
+        # outer table, so the rows are read once and filtered from a buffer
+        rows = self._get_buffered_rows(indexname, constraintargs)
+        if rows is not None:
+            self._close_stream()
+            self.prefetched = None
+            self.data = rows
+            self.Next()
+            return
+
+        # the index name has the columns, order, and requested columns, and the
+        # arguments have the values of the bounds, limit, and offset
+        scan = (indexname, tuple(constraintargs))
+        if self.cache is not None:
+            cached = self.cache.get(self.key, scan)
+            if cached is not None:
+                self._close_stream()
+                self.prefetched = None
+                self.data = iterate_batches(iter(cached), ["rowid", *column_names])
+                self.Next()
+                return
+
+        if self.prefetched is not None and self.prefetched[0] == scan:
+            batches = self.prefetched[1]
+        else:
+            batches = self._get_batches(indexname, constraintargs)
+        self.prefetched = None
+
+        if self.cache is not None:
+            batches = self.cache.record(self.key, scan, batches)
+
+        # if a given column is not present, replace it with ``None``
+        self.data = iterate_batches(batches, ["rowid", *column_names])
+        self.Next()
+
+    def _get_buffered_rows(
+        self,
+        indexname: str,
+        constraintargs: List[Any],
+    ) -> Optional[Iterator[Tuple[Any, ...]]]:
+        """
+        Return rows from a buffer, when the plan is used repeatedly by the cursor.
+
+        When the table is joined to another one, a plan with constraints is used
+        once for each row of the other table, so the first time it's used the table
+        is scanned without the constraints, and the rows are stored in a buffer
+        that's used for all the calls. Otherwise the first scan is passed to the
+        adapter as usual, and the buffer is only built when the plan is used again.
+        """
+        if indexname not in self.plans:
+            self.plans.add(indexname)
+            if not self.joined or not json.loads(indexname)["indexes"]:
+                return None
+
+        if indexname not in self.buffers:
+            index = json.loads(indexname)
+            positions = get_positions(index["indexes"], apsw.SQLITE_INDEX_CONSTRAINT_EQ)
+            if positions is None:
+                self.buffers[indexname] = None
+            else:
+                column_names = list(self.adapter.get_columns().keys())
+                self.prefetched = None
+                self.buffers[indexname] = JoinBuffer.load(
+                    self._get_batches(json.dumps(get_full_scan(index)), []),
+                    ["rowid", *column_names],
+                    positions,
+                )
+
+        buffer = self.buffers[indexname]
+        return None if buffer is None else buffer.get(constraintargs)
+
+    def prefetch(self, indexname: str) -> None:
+        """
+        Start a scan that takes no arguments before ``Filter`` is called.
         """
+        self.prefetched = ((indexname, ()), self._get_batches(indexname, []))
+
+    def _get_batches(  # pylint: disable=too-many-locals
+        self,
+        indexname: str,
+        constraintargs: List[Any],
+    ) -> Iterator[Batch]:
+        """
+        Start a scan, returning batches of values converted to SQLite types.
+        """
+        self._close_stream()
+
         columns: Dict[str, Field] = self.adapter.get_columns()
         column_names: List[str] = list(columns.keys())
         index = json.loads(indexname)
@@ -586,14 +1173,51 @@ class VTCursor:
         if "requested_columns" in index:
             kwargs["requested_columns"] = set(index["requested_columns"])
 
-        rows = self.adapter.get_rows(bounds, order, **kwargs)
-        rows = convert_rows_to_sqlite(columns, rows)
-
-        # if a given column is not present, replace it with ``None``
-        self.data = (
-            tuple(row.get(name) for name in ["rowid", *column_names]) for row in rows
+        # adapters that only implement ``get_data`` have their data read directly,
+        # so that the adapter fields and the SQLite conversion are applied in a
+        # single step
+        method = get_data_method(self.adapter)
+        if method is None:
+            batches = convert_batches_to_sqlite(
+                columns,
+                self.adapter.get_batches(bounds, order, **kwargs),
+            )
+        else:
+            if method == "get_data_async":
+                self.stream = AsyncStream(
+                    self.adapter.get_data_async(bounds, order, **kwargs),
+                )
+                rows: Iterator[Row] = self.stream
+            else:
+                rows = self.adapter.get_data(bounds, order, **kwargs)
+            batches = convert_batches_to_sqlite(
+                columns,
+                rows_to_batches(rows, ["rowid", *column_names]),
+                from_storage=True,
+            )
+
+        filtered_columns = [
+            (column_name, operator)
+            for column_name, operations in all_bounds.items()
+            for operator, _ in operations
+        ]
+        if self.statistics is None:
+            return batches
+
+        return self.statistics.record(
+            filtered_columns,
+            batches,
+            limited=limit is not None or offset is not None,
+            column_names=index.get("requested_columns", column_names),
         )
-        self.Next()
+
+    def _close_stream(self) -> None:
+        """
+        Stop the current asynchronous scan, if any.
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
 
     def Eof(self) -> bool:
         """
@@ -627,3 +1251,5 @@ class VTCursor:
         """
         This is the destructor for the cursor.
         """
+        self._close_stream()
+        self.buffers.clear()
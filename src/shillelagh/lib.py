@@ -1,23 +1,38 @@
-"""Helper functions for Shillelagh."""
+"""Helper functions for Shillelagh."""  # pylint: disable=too-many-lines
 import base64
+import bisect
+import heapq
 import inspect
+import io
 import itertools
 import json
 import marshal
 import math
 import operator
+import pickle
+import random
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import timedelta
+from enum import Enum
 from typing import (
+    IO,
     Any,
     Callable,
+    Deque,
     Dict,
+    Iterable,
     Iterator,
     List,
+    NamedTuple,
     Optional,
     Set,
     Tuple,
     Type,
     TypeVar,
+    Union,
 )
 
 import apsw
@@ -42,6 +57,7 @@ from shillelagh.typing import RequestedOrder, Row
 
 DELETED = range(-1, 0)
 CACHE_EXPIRATION = timedelta(minutes=3)
+DEFAULT_SAMPLE_SIZE = 1000
 
 
 class RowIDManager:
@@ -88,6 +104,20 @@ class RowIDManager:
         3 three
         10 four
 
+    Internally row IDs are stored as ranges, in the order of the rows. Ranges of row
+    IDs that are not deleted are also kept sorted by row ID, so they can be found
+    with a binary search, and deleted rows are stored as runs of positions.
+
+    Changes can be undone by calling ``begin`` before them, and ``rollback`` after:
+
+        >>> manager.begin()
+        >>> manager.delete(0)
+        >>> manager.insert()
+        11
+        >>> manager.rollback()
+        >>> list(manager)
+        [0, 1, -1, 3, 10]
+
     """
 
     def __init__(self, ranges: List[range]):
@@ -95,25 +125,224 @@ class RowIDManager:
             # pylint: disable=broad-exception-raised
             raise Exception("Argument ``ranges`` cannot be empty")
 
-        self.ranges = ranges
+        # row IDs in the order of the rows, and the position of their first row
+        self._ranges: List[range] = []
+        self._offsets: List[int] = []
+        self._size = 0
+
+        # ranges of row IDs not deleted, sorted by row ID, and their first position
+        self._starts: List[int] = []
+        self._stops: List[int] = []
+        self._positions: List[int] = []
+
+        # positions of deleted rows, as the start and stop of each run
+        self._deleted: List[int] = []
+
+        # changes to the lists above since ``begin`` was called, as the list, the
+        # slice that was replaced, and the original items in it; and the size
+        self._undo: Optional[List[Tuple[List[Any], int, int, List[Any]]]] = None
+        self._undo_size = 0
+
+        for range_ in ranges:
+            self._append(range_)
+
+    def __iter__(self) -> Iterator[int]:
+        return itertools.chain.from_iterable(
+            run if isinstance(run, range) else itertools.repeat(-1, run)
+            for run in self.runs()
+        )
+
+    @property
+    def ranges(self) -> List[range]:
+        """
+        The row IDs in order, with ``DELETED`` for each deleted row.
+        """
+        ranges: List[range] = []
+        for run in self.runs():
+            if isinstance(run, range):
+                ranges.append(run)
+            else:
+                ranges.extend([DELETED] * run)
+        return ranges
+
+    def runs(self) -> Iterator[Union[range, int]]:
+        """
+        Return runs of rows, as ranges of row IDs or the number of deleted rows.
+
+            >>> manager = RowIDManager([range(0, 10)])
+            >>> manager.delete(3)
+            >>> manager.delete(4)
+            >>> list(manager.runs())
+            [range(0, 3), 2, range(5, 10)]
+
+        """
+        deleted = self._deleted
+        i = 0
+        num_deleted = 0
+        for offset, range_ in zip(self._offsets, self._ranges):
+            position, end = offset, offset + len(range_)
+            while position < end:
+                while i < len(deleted) and deleted[i + 1] <= position:
+                    i += 2
+                if i < len(deleted) and deleted[i] <= position:
+                    stop = min(deleted[i + 1], end)
+                    num_deleted += stop - position
+                else:
+                    stop = min(deleted[i], end) if i < len(deleted) else end
+                    if num_deleted:
+                        yield num_deleted
+                        num_deleted = 0
+                    yield range_[position - offset : stop - offset]
+                position = stop
+
+        if num_deleted:
+            yield num_deleted
+
+    def begin(self) -> None:
+        """
+        Start recording changes, so they can be rolled back.
+        """
+        self._undo = []
+        self._undo_size = self._size
+
+    def commit(self) -> None:
+        """
+        Stop recording changes.
+        """
+        self._undo = None
+
+    def rollback(self) -> None:
+        """
+        Undo the changes since ``begin`` was called.
+        """
+        if self._undo is None:
+            return
+        for items, start, stop, original in reversed(self._undo):
+            items[start:stop] = original
+        self._size = self._undo_size
+        self._undo = None
+
+    def _splice(self, items: List[Any], start: int, stop: int, new: List[Any]) -> None:
+        """
+        Replace ``items[start:stop]`` with ``new``, recording the change.
+        """
+        if self._undo is not None:
+            self._undo.append((items, start, start + len(new), items[start:stop]))
+        items[start:stop] = new
 
-    def __iter__(self):
-        yield from itertools.chain(*self.ranges)
+    def _append(self, range_: range) -> None:
+        """
+        Append rows to the end.
+        """
+        if not range_:
+            return
+
+        position = self._size
+        self._size += len(range_)
+
+        end = len(self._ranges)
+        if range_ == DELETED:
+            self._splice(self._ranges, end, end, [range_])
+            self._splice(self._offsets, end, end, [position])
+            self._mark_deleted(position)
+            return
+
+        last = self._ranges[-1] if self._ranges else DELETED
+        if last != DELETED and last.stop == range_.start:
+            self._splice(self._ranges, end - 1, end, [range(last.start, range_.stop)])
+        else:
+            self._splice(self._ranges, end, end, [range_])
+            self._splice(self._offsets, end, end, [position])
+
+        i = bisect.bisect_left(self._starts, range_.start)
+        if (
+            i > 0
+            and self._stops[i - 1] == range_.start
+            and self._get_position(i - 1, range_.start) == position
+        ):
+            self._splice(self._stops, i - 1, i, [range_.stop])
+        else:
+            self._splice(self._starts, i, i, [range_.start])
+            self._splice(self._stops, i, i, [range_.stop])
+            self._splice(self._positions, i, i, [position])
+
+    def _mark_deleted(self, position: int) -> None:
+        """
+        Add the position of a deleted row to the runs of deleted rows.
+        """
+        deleted = self._deleted
+        i = bisect.bisect_right(deleted, position)
+        after = i > 0 and deleted[i - 1] == position
+        before = i < len(deleted) and deleted[i] == position + 1
+        if after and before:
+            self._splice(deleted, i - 1, i + 1, [])
+        elif after:
+            self._splice(deleted, i - 1, i, [position + 1])
+        elif before:
+            self._splice(deleted, i, i + 1, [position])
+        else:
+            self._splice(deleted, i, i, [position, position + 1])
+
+    def _find(self, row_id: int) -> int:
+        """
+        Find the range with a given row ID, returning -1 if not present.
+        """
+        i = bisect.bisect_right(self._starts, row_id) - 1
+        if i >= 0 and row_id < self._stops[i]:
+            return i
+        return -1
+
+    def _get_position(self, i: int, row_id: int) -> int:
+        """
+        Return the position of a row ID in a given range.
+        """
+        return self._positions[i] + row_id - self._starts[i]
 
     def get_max_row_id(self) -> int:
         """
         Find the maximum row ID.
         """
-        return max((r.stop - 1) for r in self.ranges)
+        return self._stops[-1] - 1 if self._stops else -1
+
+    def get_position(self, row_id: int) -> int:
+        """
+        Find the position of the row with a given ID.
+
+            >>> manager = RowIDManager([range(0, 3), range(10, 12)])
+            >>> manager.get_position(11)
+            4
+
+        """
+        i = self._find(row_id)
+        if i == -1:
+            # pylint: disable=broad-exception-raised
+            raise Exception(f"Row ID {row_id} not found")
+        return self._get_position(i, row_id)
+
+    def get_row_id(self, position: int) -> int:
+        """
+        Find the ID of the row in a given position, or -1 if it was deleted.
+
+            >>> manager = RowIDManager([range(0, 3), range(10, 12)])
+            >>> manager.delete(1)
+            >>> manager.get_row_id(1)
+            -1
+            >>> manager.get_row_id(4)
+            11
+
+        """
+        if bisect.bisect_right(self._deleted, position) % 2:
+            return -1
+        i = bisect.bisect_right(self._offsets, position) - 1
+        return self._ranges[i][position - self._offsets[i]]
 
     def check_row_id(self, row_id: int) -> None:
         """
         Check if a provided row ID is not being used.
         """
-        for range_ in self.ranges:
-            if range_.start <= row_id < range_.stop:
-                # pylint: disable=broad-exception-raised
-                raise Exception(f"Row ID {row_id} already present")
+        if self._find(row_id) != -1:
+            # pylint: disable=broad-exception-raised
+            raise Exception(f"Row ID {row_id} already present")
 
     def insert(self, row_id: Optional[int] = None) -> int:
         """
@@ -125,34 +354,33 @@ class RowIDManager:
         else:
             self.check_row_id(row_id)
 
-        last = self.ranges[-1]
-        if last.stop == row_id:
-            self.ranges[-1] = range(last.start, row_id + 1)
-        else:
-            self.ranges.append(range(row_id, row_id + 1))
+        self._append(range(row_id, row_id + 1))
         return row_id
 
     def delete(self, row_id: int) -> None:
         """Mark a given row ID as deleted."""
-        for i, range_ in enumerate(self.ranges):
-            if range_.start <= row_id < range_.stop:
-                if range_.start == range_.stop - 1:
-                    self.ranges[i] = DELETED
-                elif row_id == range_.start:
-                    self.ranges[i] = range(range_.start + 1, range_.stop)
-                    self.ranges.insert(i, DELETED)
-                elif row_id == range_.stop - 1:
-                    self.ranges[i] = range(range_.start, range_.stop - 1)
-                    self.ranges.insert(i + 1, DELETED)
-                else:
-                    self.ranges[i] = range(range_.start, row_id)
-                    self.ranges.insert(i + 1, range(row_id + 1, range_.stop))
-                    self.ranges.insert(i + 1, DELETED)
-
-                return
-
-        # pylint: disable=broad-exception-raised
-        raise Exception(f"Row ID {row_id} not found")
+        i = self._find(row_id)
+        if i == -1:
+            # pylint: disable=broad-exception-raised
+            raise Exception(f"Row ID {row_id} not found")
+
+        self._mark_deleted(self._get_position(i, row_id))
+
+        start, stop = self._starts[i], self._stops[i]
+        if start == stop - 1:
+            self._splice(self._starts, i, i + 1, [])
+            self._splice(self._stops, i, i + 1, [])
+            self._splice(self._positions, i, i + 1, [])
+        elif row_id == start:
+            self._splice(self._starts, i, i + 1, [start + 1])
+            self._splice(self._positions, i, i + 1, [self._positions[i] + 1])
+        elif row_id == stop - 1:
+            self._splice(self._stops, i, i + 1, [stop - 1])
+        else:
+            position = self._get_position(i, row_id + 1)
+            self._splice(self._starts, i + 1, i + 1, [row_id + 1])
+            self._splice(self._stops, i, i + 1, [row_id, stop])
+            self._splice(self._positions, i + 1, i + 1, [position])
 
 
 def analyze(  # pylint: disable=too-many-branches
@@ -241,6 +469,290 @@ def update_order(
     return current_order
 
 
+# when merging types the one with the highest precedence wins, eg, a column with
+# integers in one chunk and floats in another is a float column
+TYPE_PRECEDENCE: List[Type[Field]] = [Boolean, Integer, Float, String]
+
+
+def get_type(value: Any) -> Optional[Type[Field]]:
+    """
+    Return the field type of a value, or ``None`` if the value is something weird.
+    """
+    if isinstance(value, (str, list, dict)):
+        return String
+    if isinstance(value, float):
+        return Float
+    # ``isintance(True, int) == True`` :(
+    if isinstance(value, int) and not isinstance(value, bool):
+        return Integer
+    if isinstance(value, bool):
+        return Boolean
+    return None
+
+
+def merge_types(
+    first: Dict[str, Type[Field]],
+    second: Dict[str, Type[Field]],
+) -> Dict[str, Type[Field]]:
+    """
+    Merge two dictionaries of column types, keeping the broadest type.
+    """
+    types = dict(first)
+    for column_name, type_ in second.items():
+        if column_name in types:
+            type_ = max(types[column_name], type_, key=TYPE_PRECEDENCE.index)
+        types[column_name] = type_
+    return types
+
+
+def is_ordered(previous: Any, current: Any, order: Order) -> bool:
+    """
+    Check if two consecutive values are consistent with a given order.
+
+    Values that can't be compared (including nulls) are never ordered.
+    """
+    try:
+        if order == Order.ASCENDING:
+            return bool(current >= previous)
+        return bool(current <= previous)
+    except TypeError:
+        return False
+
+
+class Summary:  # pylint: disable=too-few-public-methods
+    """
+    A mergeable summary of a stream of rows.
+
+    Summaries are computed for contiguous chunks of data, and can be merged in order
+    to produce the same number of rows, order, and types that ``analyze`` would
+    return for the whole stream. For each column it stores the first two and the
+    last value, and whether all consecutive values are ascending or descending.
+    """
+
+    def __init__(self) -> None:
+        self.num_rows = 0
+        self.types: Dict[str, Type[Field]] = {}
+        self.first_row: Row = {}
+        self.second_row: Row = {}
+        self.last_row: Row = {}
+        self.ascending: Dict[str, bool] = {}
+        self.descending: Dict[str, bool] = {}
+
+    def update(self, row: Row) -> None:
+        """
+        Update the summary with a new row.
+        """
+        if self.num_rows == 0:
+            self.first_row = row
+        elif self.num_rows == 1:
+            self.second_row = row
+        self._update_order(row)
+        for column_name, value in row.items():
+            type_ = get_type(value)
+            if type_ is not None:
+                self.types = merge_types(self.types, {column_name: type_})
+        self.last_row = row
+        self.num_rows += 1
+
+    def _update_order(self, row: Row) -> None:
+        if not self.num_rows:
+            self.ascending = {column_name: True for column_name in row}
+            self.descending = {column_name: True for column_name in row}
+            return
+
+        for column_name, value in row.items():
+            previous = self.last_row.get(column_name)
+            self.ascending[column_name] = self.ascending.get(
+                column_name,
+                True,
+            ) and is_ordered(previous, value, Order.ASCENDING)
+            self.descending[column_name] = self.descending.get(
+                column_name,
+                True,
+            ) and is_ordered(previous, value, Order.DESCENDING)
+
+    def merge(self, other: "Summary") -> "Summary":
+        """
+        Merge with the summary of the chunk of data immediately after this one.
+        """
+        if not other.num_rows:
+            return self
+        if not self.num_rows:
+            return other
+
+        summary = Summary()
+        summary.num_rows = self.num_rows + other.num_rows
+        summary.first_row = self.first_row
+        summary.second_row = self.second_row if self.num_rows > 1 else other.first_row
+        summary.last_row = other.last_row
+
+        summary.types = merge_types(self.types, other.types)
+
+        for column_name in {**self.ascending, **other.ascending}:
+            previous = self.last_row.get(column_name)
+            current = other.first_row.get(column_name)
+            summary.ascending[column_name] = (
+                self.ascending.get(column_name, True)
+                and other.ascending.get(column_name, True)
+                and is_ordered(previous, current, Order.ASCENDING)
+            )
+            summary.descending[column_name] = (
+                self.descending.get(column_name, True)
+                and other.descending.get(column_name, True)
+                and is_ordered(previous, current, Order.DESCENDING)
+            )
+
+        return summary
+
+    def get_types(self) -> Dict[str, Type[Field]]:
+        """
+        Return the type of each column, following the semantics of ``analyze``.
+
+        Weird values are ignored, unless they're the first value of the column.
+        """
+        types = dict(self.types)
+        for column_name, value in self.first_row.items():
+            if get_type(value) is None:
+                types[column_name] = String
+        return types
+
+    def get_order(self) -> Dict[str, Order]:
+        """
+        Return the order of each column, following the semantics of ``analyze``.
+
+        The direction is determined by the first two values, so a column is only
+        descending if those are strictly decreasing.
+        """
+        if self.num_rows < 2:
+            return {column_name: Order.NONE for column_name in self.last_row}
+
+        order: Dict[str, Order] = {}
+        for column_name, ascending in self.ascending.items():
+            if ascending:
+                order[column_name] = Order.ASCENDING
+            elif self.descending[column_name] and not is_ordered(
+                self.first_row.get(column_name),
+                self.second_row.get(column_name),
+                Order.ASCENDING,
+            ):
+                order[column_name] = Order.DESCENDING
+            else:
+                order[column_name] = Order.NONE
+        return order
+
+
+def summarize(data: Iterator[Row]) -> Summary:
+    """
+    Compute a mergeable ``Summary`` from a stream of rows.
+    """
+    summary = Summary()
+    for row in data:
+        summary.update(row)
+    return summary
+
+
+class Sampling(Enum):
+    """
+    Strategies for sampling rows when inferring types.
+    """
+
+    # the first rows
+    HEAD = "head"
+
+    # a uniform sample of all the rows; all the rows are read, but only the sample
+    # is analyzed
+    RESERVOIR = "reservoir"
+
+    # rows spread evenly across the data; requires random access, so it's
+    # implemented by adapters like ``CSVFile``, falling back to ``HEAD`` otherwise
+    STRATIFIED = "stratified"
+
+
+class Analysis(NamedTuple):
+    """
+    The result of analyzing a sample of rows.
+
+    When the sample has all the rows ``confident`` is true and the analysis is
+    exact. Otherwise ``num_rows`` is an estimate (a lower bound for ``HEAD``), and
+    no column has an order, since it can't be inferred from a sample.
+    """
+
+    num_rows: int
+    order: Dict[str, Order]
+    types: Dict[str, Type[Field]]
+    confident: bool
+
+
+def sample_rows(
+    data: Iterator[Row],
+    sample_size: int,
+    sampling: Sampling = Sampling.HEAD,
+) -> Tuple[List[Row], int]:
+    """
+    Return a sample of the rows, together with the number of rows read.
+
+    With ``HEAD`` at most ``sample_size + 1`` rows are read, so the caller can tell
+    if the data has more rows than the sample.
+    """
+    if sampling != Sampling.RESERVOIR:
+        rows = list(itertools.islice(data, sample_size + 1))
+        return rows[:sample_size], len(rows)
+
+    sample: List[Row] = []
+    i = -1
+    for i, row in enumerate(data):
+        if i < sample_size:
+            sample.append(row)
+        else:
+            j = random.randint(0, i)
+            if j < sample_size:
+                sample[j] = row
+    return sample, i + 1
+
+
+def analyze_sample(
+    data: Iterator[Row],
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    sampling: Sampling = Sampling.HEAD,
+) -> Analysis:
+    """
+    Compute number of rows, order, and types from a sample of a stream of rows.
+
+    The number of rows is the number of rows read, which is only a lower bound when
+    the head of the stream is sampled.
+    """
+    sample, num_rows = sample_rows(data, sample_size, sampling)
+    _, order, types = analyze(iter(sample))
+    confident = num_rows <= sample_size
+    if not confident:
+        order = {column_name: Order.NONE for column_name in order}
+    return Analysis(num_rows, order, types, confident)
+
+
+def widen_types(columns: Dict[str, Field], row: Row) -> None:
+    """
+    Widen the type of columns in place when a value doesn't fit.
+
+    This is used when types were inferred from a sample, and a row outside of the
+    sample has a broader type. The new type is used on subsequent queries.
+    """
+    for column_name, value in row.items():
+        field = columns.get(column_name)
+        type_ = get_type(value)
+        if (
+            field is None
+            or type_ is None
+            or type(field) not in TYPE_PRECEDENCE
+            or TYPE_PRECEDENCE.index(type_) <= TYPE_PRECEDENCE.index(type(field))
+        ):
+            continue
+        columns[column_name] = type_(
+            filters=field.filters,
+            order=field.order,
+            exact=field.exact,
+        )
+
+
 def escape_string(value: str) -> str:
     """Escape single quotes."""
     return value.replace("'", "''")
@@ -410,6 +922,124 @@ def is_not_null(column: Any, _: Any) -> bool:
     return column is not None
 
 
+# maximum number of rows sorted in memory; bigger inputs are sorted on disk
+SORT_BUFFER_SIZE = 100000
+
+# number of rows pickled together when spilling sorted runs to disk
+RUN_BLOCK_SIZE = 1000
+
+
+class SortKey:
+    """
+    A sort key for rows sorted in different directions, eg, ``ORDER BY a, b DESC``.
+    """
+
+    __slots__ = ("values", "reverse")
+
+    def __init__(self, values: Tuple[Any, ...], reverse: Tuple[bool, ...]):
+        self.values = values
+        self.reverse = reverse
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, SortKey) and self.values == other.values
+
+    def __lt__(self, other: "SortKey") -> bool:
+        for value, other_value, reverse in zip(
+            self.values,
+            other.values,
+            self.reverse,
+        ):
+            if value != other_value:
+                return other_value < value if reverse else value < other_value
+        return False
+
+
+def get_sort_key(
+    order: List[Tuple[str, RequestedOrder]],
+) -> Tuple[Callable[[Row], Any], bool]:
+    """
+    Return a composite sort key for a requested order, and if it should be reversed.
+
+    Nulls are sorted first, like in SQLite.
+    """
+    column_names = [column_name for column_name, _ in order]
+
+    def get_values(row: Row) -> Tuple[Any, ...]:
+        return tuple(
+            (row[column_name] is not None, row[column_name])
+            for column_name in column_names
+        )
+
+    directions = {requested_order for _, requested_order in order}
+    if len(directions) == 1:
+        return get_values, directions.pop() == Order.DESCENDING
+
+    reverse = tuple(requested_order == Order.DESCENDING for _, requested_order in order)
+    return lambda row: SortKey(get_values(row), reverse), False
+
+
+def write_run(rows: List[Row], stack: ExitStack) -> IO[bytes]:
+    """
+    Write a sorted run of rows to a temporary file.
+    """
+    fp = stack.enter_context(tempfile.TemporaryFile())
+    for i in range(0, len(rows), RUN_BLOCK_SIZE):
+        pickle.dump(rows[i : i + RUN_BLOCK_SIZE], fp, pickle.HIGHEST_PROTOCOL)
+    fp.seek(0)
+    return fp
+
+
+def read_run(fp: IO[bytes]) -> Iterator[Row]:
+    """
+    Stream the rows of a sorted run, one block at a time.
+    """
+    while True:
+        try:
+            block = pickle.load(fp)
+        except EOFError:
+            return
+        yield from block
+
+
+def sort_data(
+    data: Iterator[Row],
+    order: List[Tuple[str, RequestedOrder]],
+    limit: Optional[int] = None,
+    buffer_size: Optional[int] = None,
+) -> Iterator[Row]:
+    """
+    Sort a stream of rows, stable and in a single pass.
+
+    When only the first ``limit`` rows are needed they're selected with a bounded
+    heap. Otherwise rows are sorted in memory, unless there are more than
+    ``buffer_size`` of them, in which case sorted runs are written to disk and
+    merged.
+    """
+    key, reverse = get_sort_key(order)
+    buffer_size = buffer_size or SORT_BUFFER_SIZE
+
+    if limit is not None and limit <= buffer_size:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        yield from select(limit, data, key=key)
+        return
+
+    with ExitStack() as stack:
+        runs: List[IO[bytes]] = []
+        while True:
+            rows = list(itertools.islice(data, buffer_size))
+            rows.sort(key=key, reverse=reverse)
+            if not runs and len(rows) < buffer_size:
+                yield from rows[:limit]
+                return
+            if rows:
+                runs.append(write_run(rows, stack))
+            if len(rows) < buffer_size:
+                break
+
+        merged = heapq.merge(*map(read_run, runs), key=key, reverse=reverse)
+        yield from itertools.islice(merged, limit)
+
+
 def filter_data(  # pylint: disable=too-many-arguments
     data: Iterator[Row],
     bounds: Dict[str, Filter],
@@ -417,6 +1047,7 @@ def filter_data(  # pylint: disable=too-many-arguments
     limit: Optional[int] = None,
     offset: Optional[int] = None,
     requested_columns: Optional[Set[str]] = None,
+    buffer_size: Optional[int] = None,
 ) -> Iterator[Row]:
     """
     Apply filtering and sorting to a stream of rows.
@@ -424,6 +1055,8 @@ def filter_data(  # pylint: disable=too-many-arguments
     This is used mostly as an exercise. It's probably much more efficient to
     simply declare fields without any filtering/sorting and let the backend
     (SQLite, eg) handle it.
+
+    Sorting keeps at most ``buffer_size`` rows in memory; see ``sort_data``.
     """
     data = (
         {
@@ -473,13 +1106,9 @@ def filter_data(  # pylint: disable=too-many-arguments
             raise ProgrammingError(f"Invalid filter: {filter_}")
 
     if order:
-        # in order to sort we need to consume the iterator and load it into
-        # memory :(
-        rows = list(data)
-        for column_name, requested_order in order:
-            reverse = requested_order == Order.DESCENDING
-            rows.sort(key=operator.itemgetter(column_name), reverse=reverse)
-        data = iter(rows)
+        # only the first ``limit + offset`` rows are needed
+        top = None if limit is None else limit + (offset or 0)
+        data = sort_data(data, order, top, buffer_size)
 
     data = apply_limit_and_offset(data, limit, offset)
 
@@ -617,3 +1246,106 @@ def get_session(
     session.headers.update(request_headers)
 
     return session
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    A file-like object that reads bytes from an iterator of chunks.
+
+    This is used to parse HTTP responses incrementally, reading them with
+    ``response.iter_content``, so that parsers expecting a file can process rows as
+    they arrive.
+
+        >>> reader = ChunkReader(iter([b"hello, ", b"world"]))
+        >>> reader.read(3)
+        b'hel'
+        >>> reader.read()
+        b'lo, world'
+
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self._chunks = chunks
+        self._buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+P = TypeVar("P")
+
+
+def prefetch(
+    fetch: Callable[[P], T],
+    pages: Iterable[P],
+    workers: int = 1,
+    is_last: Optional[Callable[[T], bool]] = None,
+) -> Iterator[T]:
+    """
+    Fetch pages concurrently, yielding them in order.
+
+    The first page is fetched on its own, since it's often the only one. After that
+    up to ``workers`` pages are fetched ahead in a pool of threads while the current
+    page is being consumed. No more pages are requested once ``is_last`` returns true
+    for a page (eg, a short page), or when the iterator is closed, in which case
+    pending requests are cancelled. Errors are raised when the page that failed is
+    reached, so pages fetched speculatively after the last one are ignored.
+
+    With a single worker pages are fetched sequentially, in the current thread.
+    """
+    remaining = iter(pages)
+    for page in remaining:
+        result = fetch(page)
+        if is_last is not None and is_last(result):
+            yield result
+            return
+
+        # once a full page is returned the next ones are fetched concurrently
+        if workers > 1:
+            yield from _prefetch_remaining(fetch, remaining, workers, is_last, result)
+            return
+
+        yield result
+
+
+def _prefetch_remaining(
+    fetch: Callable[[P], T],
+    remaining: Iterator[P],
+    workers: int,
+    is_last: Optional[Callable[[T], bool]],
+    first: T,
+) -> Iterator[T]:
+    """
+    Yield a page, while fetching the remaining pages concurrently.
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending: Deque[Future] = deque(
+        executor.submit(fetch, page) for page in itertools.islice(remaining, workers)
+    )
+    try:
+        yield first
+        while pending:
+            result = pending.popleft().result()
+            if is_last is not None and is_last(result):
+                yield result
+                break
+            for page in itertools.islice(remaining, 1):
+                pending.append(executor.submit(fetch, page))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,446 @@
+"""
+Statistics about virtual tables, used to estimate the cost of queries.
+
+Adapters usually can't tell how many rows a table has, or how many of them match a
+filter, so their cost models rely on fixed guesses. When requested, for adapters
+without a cost model, the backend records what it observes while scanning tables:
+
+- for each combination of filtered columns and operators (the "shape" of the
+  bounds), the number of scans, rows returned, and time spent reading them;
+- for each column, the number of distinct values and of nulls, and the minimum and
+  maximum of numeric columns, collected during the first full scan, and again after
+  the table is modified.
+
+Once a table has been scanned the statistics are used to estimate the number of rows
+returned by each plan considered by SQLite, and its cost, instead of the fixed
+estimate. Statistics are shared by all the connections in the process, and
+identified by a hash of the adapter and its arguments, which can contain
+credentials. Only the statistics of the most recently used tables are kept.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from shillelagh.filters import Operator
+from shillelagh.typing import Batch
+
+# maximum number of distinct values tracked per column; columns with more values
+# are assumed to be unique
+MAX_DISTINCT_VALUES = 10000
+
+# maximum number of tables with statistics
+MAX_TABLES = 256
+
+# fraction of the rows matching each operator, when nothing is known about a column
+DEFAULT_SELECTIVITY = {
+    Operator.EQ: 0.1,
+    Operator.NE: 0.9,
+    Operator.GE: 1 / 3,
+    Operator.GT: 1 / 3,
+    Operator.LE: 1 / 3,
+    Operator.LT: 1 / 3,
+    Operator.IS_NULL: 0.1,
+    Operator.IS_NOT_NULL: 0.9,
+    Operator.LIKE: 0.25,
+}
+
+RANGE_OPERATORS = {Operator.GE, Operator.GT, Operator.LE, Operator.LT}
+
+Shape = Tuple[Tuple[str, Operator], ...]
+
+
+def get_shape(filtered_columns: List[Tuple[str, Operator]]) -> Shape:
+    """
+    Return a canonical representation of the columns and operators of a scan.
+
+        >>> get_shape([("b", Operator.LT), ("a", Operator.EQ), ("b", Operator.GT)])
+        (('a', <Operator.EQ: '=='>), ('b', <Operator.LT: '<'>), ('b', <Operator.GT: '>'>))
+
+    """
+    return tuple(
+        sorted(set(filtered_columns), key=lambda item: (item[0], item[1].value)),
+    )
+
+
+class ScanStatistics(NamedTuple):
+    """
+    Accumulated statistics of the scans with a given shape.
+    """
+
+    scans: int
+    rows: int
+    elapsed: float
+
+
+def is_number(value: Any) -> bool:
+    """
+    Return true if a value is a number.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ColumnStatistics:
+    """
+    Statistics about the values of a column.
+
+    Values are not stored: distinct values are counted from their hashes, which are
+    discarded once the scan is done, and the range is only kept for numbers.
+    """
+
+    def __init__(self) -> None:
+        # the number of distinct non-null values, or ``None`` if there are too many
+        self.num_distinct: Optional[int] = 0
+        self.nulls = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+        self._hashes: Optional[Set[int]] = set()
+        self._numeric = True
+
+    def update(self, values: Sequence[Any]) -> None:
+        """
+        Update the statistics with a batch of values.
+        """
+        non_null = [value for value in values if value is not None]
+        self.nulls += len(values) - len(non_null)
+        if not non_null:
+            return
+
+        if self._hashes is not None:
+            self._hashes.update(hash(value) for value in non_null)
+            if len(self._hashes) > MAX_DISTINCT_VALUES:
+                self._hashes = None
+                self.num_distinct = None
+            else:
+                self.num_distinct = len(self._hashes)
+
+        if not self._numeric:
+            return
+        if not all(is_number(value) for value in non_null):
+            # SQLite columns can have values of different types
+            self._numeric = False
+            self.min = self.max = None
+            return
+
+        low, high = min(non_null), max(non_null)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def finish(self) -> None:
+        """
+        Discard the hashes of the values, once the scan is done.
+        """
+        self._hashes = None
+
+
+def get_range_selectivity(
+    operator: Operator,
+    value: Any,
+    low: Any,
+    high: Any,
+) -> Optional[float]:
+    """
+    Estimate the fraction of the values in ``[low, high]`` matching a comparison.
+
+    Values are assumed to be uniformly distributed. Only numbers are supported:
+
+        >>> get_range_selectivity(Operator.GT, 25, 0, 100)
+        0.75
+        >>> get_range_selectivity(Operator.LE, 25, 0, 100)
+        0.25
+        >>> get_range_selectivity(Operator.LE, "c", "a", "z") is None
+        True
+
+    """
+    numbers = (int, float)
+    if not all(
+        isinstance(item, numbers) and not isinstance(item, bool)
+        for item in (value, low, high)
+    ):
+        return None
+
+    if high == low:
+        below = 0.0 if value < low else 1.0
+    else:
+        below = (value - low) / (high - low)
+    below = min(max(below, 0.0), 1.0)
+
+    return 1 - below if operator in {Operator.GE, Operator.GT} else below
+
+
+class TableStatistics:
+    """
+    Statistics about a virtual table.
+    """
+
+    def __init__(self) -> None:
+        self.num_rows: Optional[int] = None
+        self.columns: Dict[str, ColumnStatistics] = {}
+        self.scans: Dict[Shape, ScanStatistics] = {}
+
+        # whether the column statistics need to be collected again
+        self.stale = True
+
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """
+        Collect the column statistics again in the next full scan.
+        """
+        self.stale = True
+
+    def record(  # pylint: disable=too-many-locals
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        batches: Iterator[Batch],
+        limited: bool = False,
+        column_names: Optional[List[str]] = None,
+    ) -> Iterator[Batch]:
+        """
+        Yield batches from a scan, recording statistics once it's fully consumed.
+
+        Only the time spent reading batches is measured, not the time spent by SQLite
+        processing them. Scans with a limit or offset are not recorded, and only full
+        scans, without any filters, update the column statistics of ``column_names``.
+        Since that's expensive, columns are only analyzed if they weren't before, or
+        if the table was modified.
+        """
+        full_scan = not filtered_columns and not limited
+        stale = self.stale
+        columns = (
+            {
+                column_name: ColumnStatistics()
+                for column_name in column_names or []
+                if stale or column_name not in self.columns
+            }
+            if full_scan
+            else {}
+        )
+
+        rows = 0
+        elapsed = 0.0
+        start = time.perf_counter()
+        for batch in batches:
+            elapsed += time.perf_counter() - start
+            rows += len(next(iter(batch.values()), []))
+            for column_name, column in columns.items():
+                column.update(batch.get(column_name, []))
+            yield batch
+            start = time.perf_counter()
+        elapsed += time.perf_counter() - start
+
+        if limited:
+            return
+
+        shape = get_shape(filtered_columns)
+        with self._lock:
+            previous = self.scans.get(shape, ScanStatistics(0, 0, 0.0))
+            self.scans[shape] = ScanStatistics(
+                previous.scans + 1,
+                previous.rows + rows,
+                previous.elapsed + elapsed,
+            )
+            if full_scan:
+                self.num_rows = rows
+                for column in columns.values():
+                    column.finish()
+                if stale and column_names:
+                    # the statistics of the other columns are outdated
+                    self.columns = columns
+                    self.stale = False
+                else:
+                    self.columns.update(columns)
+
+    def get_selectivity(
+        self, column_name: str, operator: Operator, value: Any
+    ) -> float:
+        """
+        Estimate the fraction of rows matching a filter.
+
+        The value is ``None`` when it's not known, eg, in a join.
+        """
+        default = DEFAULT_SELECTIVITY.get(operator, 1.0)
+        column = self.columns.get(column_name)
+        if column is None or not self.num_rows:
+            return default
+
+        nulls = column.nulls / self.num_rows
+        num_distinct = column.num_distinct
+        distinct = (
+            1 / num_distinct
+            if num_distinct
+            else 1 / max(self.num_rows - column.nulls, 1)
+        )
+        if operator == Operator.EQ:
+            return distinct
+        if operator == Operator.NE:
+            return max(1 - distinct - nulls, 0.0)
+        if operator == Operator.IS_NULL:
+            return nulls
+        if operator == Operator.IS_NOT_NULL:
+            return 1 - nulls
+        selectivity = self._get_range_selectivity(column_name, operator, value)
+        return default if selectivity is None else selectivity
+
+    def _get_range_selectivity(
+        self,
+        column_name: str,
+        operator: Operator,
+        value: Any,
+    ) -> Optional[float]:
+        """
+        Estimate the fraction of rows matching a comparison from the column range.
+        """
+        column = self.columns.get(column_name)
+        if (
+            operator not in RANGE_OPERATORS
+            or value is None
+            or column is None
+            or column.min is None
+            or not self.num_rows
+        ):
+            return None
+
+        selectivity = get_range_selectivity(operator, value, column.min, column.max)
+        if selectivity is None:
+            return None
+        return selectivity * (1 - column.nulls / self.num_rows)
+
+    def estimate_rows(
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        values: Optional[List[Any]] = None,
+    ) -> Optional[float]:
+        """
+        Estimate the number of rows returned by a scan.
+
+        Scans with the same shape that were observed before are used, unless the
+        values of the filters are known. Otherwise the number of rows is estimated
+        from the column statistics. Returns ``None`` if the table was never scanned.
+        """
+        values = values or [None] * len(filtered_columns)
+        shape = get_shape(filtered_columns)
+        with self._lock:
+            scan = self.scans.get(shape)
+            if scan is not None and all(value is None for value in values):
+                return max(scan.rows / scan.scans, 1.0)
+
+            if self.num_rows is None:
+                return None
+
+            # the bounds of a range on the same column are not independent, so their
+            # selectivity is computed from the most selective lower and upper bounds
+            rows = float(self.num_rows)
+            ranges: Dict[str, Dict[bool, float]] = defaultdict(dict)
+            for (column_name, operator), value in zip(filtered_columns, values):
+                selectivity = self._get_range_selectivity(column_name, operator, value)
+                if selectivity is None:
+                    rows *= self.get_selectivity(column_name, operator, value)
+                else:
+                    sides = ranges[column_name]
+                    lower = operator in {Operator.GE, Operator.GT}
+                    sides[lower] = min(sides.get(lower, 1.0), selectivity)
+
+            for sides in ranges.values():
+                rows *= max(sum(sides.values()) - len(sides) + 1, 0.0)
+
+        return max(rows, 1.0)
+
+    def get_time_model(self) -> Tuple[float, float]:
+        """
+        Return the fixed time per scan and the time per row, in seconds.
+
+        These are estimated with a linear regression of the time spent reading the
+        data on the number of rows returned.
+        """
+        with self._lock:
+            scans = list(self.scans.values())
+
+        count = sum(scan.scans for scan in scans)
+        mean_rows = sum(scan.rows for scan in scans) / count
+        mean_elapsed = sum(scan.elapsed for scan in scans) / count
+        variance = sum(
+            scan.scans * (scan.rows / scan.scans - mean_rows) ** 2 for scan in scans
+        )
+        covariance = sum(
+            scan.scans
+            * (scan.rows / scan.scans - mean_rows)
+            * (scan.elapsed / scan.scans - mean_elapsed)
+            for scan in scans
+        )
+
+        per_row = covariance / variance if variance else 0.0
+        if per_row <= 0:
+            # not enough information, assume the time is proportional to the rows
+            return 0.0, mean_elapsed / max(mean_rows, 1.0)
+
+        return max(mean_elapsed - per_row * mean_rows, 0.0), per_row
+
+    def estimate_cost(
+        self,
+        filtered_columns: List[Tuple[str, Operator]],
+        order: List[Any],
+        rows: float,
+    ) -> float:
+        """
+        Estimate the cost of a scan returning a given number of rows.
+
+        The cost is the time needed to read the data, measured in the time it takes
+        to read a row, so that it's comparable to the number of rows read by SQLite.
+        Each scan has a fixed cost, which is high for adapters making network
+        requests, and sorting in the adapter has a cost of O(n log n).
+        """
+        fixed, per_row = self.get_time_model()
+
+        shape = get_shape(filtered_columns)
+        with self._lock:
+            scan = self.scans.get(shape)
+        elapsed = (
+            scan.elapsed / scan.scans if scan is not None else fixed + per_row * rows
+        )
+
+        cost = elapsed / per_row if per_row else rows
+        return cost + rows * math.log2(max(rows, 2)) * len(order)
+
+
+_statistics: "OrderedDict[bytes, TableStatistics]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_table_statistics(key: Hashable) -> TableStatistics:
+    """
+    Return the statistics of a table, identified by the adapter and its arguments.
+
+    Only a hash of the key is stored, since the arguments can contain credentials.
+    """
+    digest = hashlib.sha256(repr(key).encode()).digest()
+    with _lock:
+        if digest in _statistics:
+            _statistics.move_to_end(digest)
+        else:
+            _statistics[digest] = TableStatistics()
+            if len(_statistics) > MAX_TABLES:
+                _statistics.popitem(last=False)
+        return _statistics[digest]
+
+
+def clear_statistics() -> None:
+    """
+    Remove the statistics of all tables.
+    """
+    with _lock:
+        _statistics.clear()
@@ -1,5 +1,5 @@
 """Custom types for Shillelagh."""
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from typing_extensions import Literal
 
@@ -21,6 +21,10 @@ SQLiteConstraint = int
 # A row of data
 Row = Dict[str, Any]
 
+# A batch of rows in columnar format, mapping column names to a sequence of values;
+# the special ``rowid`` column must always be present
+Batch = Dict[str, Sequence[Any]]
+
 # An index is a tuple with a column index and an operator to filter it
 Index = Tuple[int, SQLiteConstraint]
 
@@ -2,7 +2,10 @@
 """
 Tests for the Datasette adapter.
 """
+import re
 from datetime import timedelta
+from functools import partial
+from typing import Any, Dict, List
 
 import pytest
 from pytest_mock import MockerFixture
@@ -176,6 +179,61 @@ def test_datasette_limit_offset(mocker: MockerFixture, requests_mock: Mocker) ->
     assert data == datasette_results
 
 
+def test_datasette_prefetch(mocker: MockerFixture) -> None:
+    """
+    Test that pages are prefetched only when the server returns full pages.
+    """
+    mocker.patch("shillelagh.adapters.api.datasette.DEFAULT_LIMIT", new=2)
+    mocker.patch.object(DatasetteAPI, "_set_columns")
+    adapter = DatasetteAPI("https://example.com", "db", "table")
+    adapter.columns = {"a": Integer()}
+
+    queries: List[str] = []
+
+    def run_query(max_returned_rows: int, num_rows: int, sql: str) -> Dict[str, Any]:
+        queries.append(sql)
+        limit, offset = map(int, re.findall(r"LIMIT (\d+) OFFSET (\d+)", sql)[0])
+        rows = [[i] for i in range(offset, min(offset + limit, num_rows))]
+        return {
+            "columns": ["a"],
+            "rows": rows[:max_returned_rows],
+            "truncated": len(rows) > max_returned_rows,
+        }
+
+    # a single page is fetched with a single request
+    mocker.patch.object(adapter, "_run_query", side_effect=partial(run_query, 10, 1))
+    assert [row["a"] for row in adapter.get_data({}, [])] == [0]
+    assert len(queries) == 1
+
+    # later pages are prefetched, with at most ``prefetch_workers`` requests in
+    # flight after the first page
+    queries.clear()
+    mocker.patch.object(adapter, "_run_query", side_effect=partial(run_query, 10, 7))
+    assert [row["a"] for row in adapter.get_data({}, [])] == list(range(7))
+    assert 4 <= len(queries) <= 7
+
+    queries.clear()
+    rows = adapter.get_data({}, [], limit=5, offset=1)
+    assert [row["a"] for row in rows] == [1, 2, 3, 4, 5]
+    assert queries == [
+        'SELECT * FROM "table" LIMIT 3 OFFSET 1',
+        'SELECT * FROM "table" LIMIT 3 OFFSET 3',
+        'SELECT * FROM "table" LIMIT 1 OFFSET 5',
+    ]
+
+    # servers that truncate pages are paginated sequentially
+    queries.clear()
+    mocker.patch.object(adapter, "_run_query", side_effect=partial(run_query, 2, 7))
+    mocker.patch("shillelagh.adapters.api.datasette.DEFAULT_LIMIT", new=3)
+    assert [row["a"] for row in adapter.get_data({}, [])] == list(range(7))
+    assert queries == [
+        'SELECT * FROM "table" LIMIT 4 OFFSET 0',
+        'SELECT * FROM "table" LIMIT 4 OFFSET 2',
+        'SELECT * FROM "table" LIMIT 4 OFFSET 4',
+        'SELECT * FROM "table" LIMIT 4 OFFSET 6',
+    ]
+
+
 def test_datasette_no_data(mocker: MockerFixture) -> None:
     """
     Test result with no rows.
@@ -2,20 +2,42 @@
 Test the generic JSON adapter.
 """
 
+import io
+import json
 import re
+from datetime import date, time
+from typing import Any, Dict, List
 
 import pytest
 from requests_mock.mocker import Mocker
 from yarl import URL
 
-from shillelagh.adapters.api.generic_json import GenericJSONAPI
+from shillelagh.adapters.api.generic_json import (
+    GenericJSONAPI,
+    format_query_value,
+    get_range_parameters,
+)
 from shillelagh.backends.apsw.db import connect
 from shillelagh.exceptions import ProgrammingError
+from shillelagh.fields import Order
+from shillelagh.filters import Equal, Impossible, NotEqual, Operator, Range
 from shillelagh.typing import Maybe
 
 baseurl = URL("https://api.stlouisfed.org/fred/series")
 
 
+class Body(io.BytesIO):
+    """
+    A response body that keeps track of how much was read before being closed.
+    """
+
+    position = 0
+
+    def close(self) -> None:
+        self.position = self.tell()
+        super().close()
+
+
 def test_generic_json(requests_mock: Mocker) -> None:
     """
     Test a simple query.
@@ -281,3 +303,399 @@ def test_single_row(requests_mock: Mocker) -> None:
     sql = f'SELECT * FROM "{url}"'
     rows = list(cursor.execute(sql))
     assert rows == [("Solve a Rubik's cube", "recreational", 1, 0, "", "4151544", 0.1)]
+
+
+def test_generic_json_sampled(requests_mock: Mocker) -> None:
+    """
+    Test inferring types from a sample of the rows.
+    """
+    # for datassette
+    requests_mock.get(re.compile(".*-/versions.json.*"), status_code=404)
+
+    url = "https://example.com/data.json"
+    requests_mock.head(url, headers={"content-type": "application/json"})
+    requests_mock.get(
+        url,
+        json=[{"a": 1, "b": 1}, {"a": 2, "b": "two"}, {"a": 3, "b": 3}],
+    )
+
+    adapter = GenericJSONAPI(url, "$[*]", cache_expiration=-1, sample_size=1)
+    assert adapter.confident is False
+    assert adapter.num_rows == 2
+    assert adapter.get_columns()["b"].type == "INTEGER"
+
+    # types are widened when the rows are read
+    assert list(adapter.get_data({}, [])) == [
+        {"a": 1, "b": 1, "rowid": 0},
+        {"a": 2, "b": "two", "rowid": 1},
+        {"a": 3, "b": 3, "rowid": 2},
+    ]
+    assert adapter.get_columns()["b"].type == "TEXT"
+
+    # the number of rows is used to estimate the cost
+    assert adapter.get_cost([], [("a", Order.ASCENDING)]) == 2
+    adapter.num_rows = 0
+    assert adapter.get_cost([], [("a", Order.ASCENDING)]) == 664
+
+    connection = connect(
+        ":memory:",
+        adapter_kwargs={"genericjsonapi": {"cache_expiration": -1, "sample_size": 1}},
+    )
+    cursor = connection.cursor()
+
+    sql = f'SELECT a FROM "{url}"'
+    assert list(cursor.execute(sql)) == [(1,), (2,), (3,)]
+
+    adapter = GenericJSONAPI(url, "$[*]", cache_expiration=-1, sample_size=10)
+    assert adapter.confident is True
+    assert adapter.get_columns()["b"].type == "TEXT"
+
+
+def test_generic_json_sampled_empty(requests_mock: Mocker) -> None:
+    """
+    Test sampling an empty response.
+    """
+    url = "https://example.com/data.json"
+    requests_mock.get(url, json=[])
+
+    adapter = GenericJSONAPI(url, "$[*]", cache_expiration=-1, sample_size=1)
+    assert adapter.confident is True
+    assert adapter.get_columns() == {}
+
+
+def test_generic_json_streaming(requests_mock: Mocker) -> None:
+    """
+    Test that responses are parsed incrementally, stopping at the limit.
+    """
+    # for datassette
+    requests_mock.get(re.compile(".*-/versions.json.*"), status_code=404)
+
+    payload = json.dumps(
+        {"data": {"rows": [{"a": i, "b": i / 2} for i in range(100000)]}},
+    ).encode()
+    bodies = []
+
+    def body(request, context):  # pylint: disable=unused-argument
+        bodies.append(Body(payload))
+        return bodies[-1]
+
+    url = "https://example.com/data.json"
+    requests_mock.head(url, headers={"content-type": "application/json"})
+    requests_mock.get(url, body=body)
+
+    adapter = GenericJSONAPI(url, "$.data.rows[*]", cache_expiration=-1)
+    assert adapter.num_rows == 100000
+    assert list(adapter.get_data({}, [], limit=2, offset=1)) == [
+        {"a": 1, "b": 0.5, "rowid": 1},
+        {"a": 2, "b": 1.0, "rowid": 2},
+    ]
+    assert 0 < bodies[-1].position < len(payload) / 10
+
+    connection = connect(
+        ":memory:",
+        adapter_kwargs={"genericjsonapi": {"cache_expiration": -1}},
+    )
+    cursor = connection.cursor()
+
+    sql = f'SELECT a, b FROM "{url}#$.data.rows[*]" LIMIT 3'
+    assert list(cursor.execute(sql)) == [(0, 0.0), (1, 0.5), (2, 1.0)]
+    assert 0 < bodies[-1].position < len(payload) / 10
+
+    # paths that can't be streamed are evaluated on the whole document
+    adapter = GenericJSONAPI(url, "$.data.rows[:2]", cache_expiration=-1)
+    assert list(adapter.get_data({}, [])) == [
+        {"a": 0, "b": 0.0, "rowid": 0},
+        {"a": 1, "b": 0.5, "rowid": 1},
+    ]
+
+
+DATA = [{"id": i, "active": i % 2 == 0} for i in range(10)]
+
+
+def get_query(request: Any) -> Dict[str, str]:
+    """
+    Return the query parameters of a request.
+    """
+    return dict(URL(request.url).query)
+
+
+def search(request, context):  # pylint: disable=unused-argument
+    """
+    An API that supports filtering, sorting, and limit/offset.
+    """
+    query = get_query(request)
+    rows = [
+        row
+        for row in DATA
+        if int(query.get("min_id", 0)) <= row["id"] < int(query.get("max_id", 10))
+        and query.get("active", str(row["active"]).lower())
+        == str(row["active"]).lower()
+    ]
+    if query.get("sort") == "-id":
+        rows = rows[::-1]
+    start = int(query.get("offset", 0))
+    end = start + int(query["limit"]) if "limit" in query else None
+    rows = rows[start:end]
+    if "fields" in query:
+        fields = query["fields"].split(",")
+        rows = [{k: v for k, v in row.items() if k in fields} for row in rows]
+    return {"results": rows}
+
+
+def test_pushdown(requests_mock: Mocker) -> None:
+    """
+    Test passing filters, sorting, limit, and offset as query parameters.
+    """
+    # for datassette
+    requests_mock.get(re.compile(".*-/versions.json.*"), status_code=404)
+
+    url = "https://example.com/search"
+    requests_mock.head(url, headers={"content-type": "application/json"})
+    requests_mock.get(url, json=search)
+
+    pushdown = {
+        "filters": {"id": {">=": "min_id", "<": "max_id"}, "active": {"==": "active"}},
+        "order": {"id": {"descending": {"sort": "-id"}}},
+        "limit": "limit",
+        "offset": "offset",
+        "columns": "fields",
+    }
+    adapter = GenericJSONAPI(
+        url,
+        "$.results[*]",
+        cache_expiration=-1,
+        pushdown=pushdown,
+    )
+    columns = adapter.get_columns()
+    assert columns["id"].filters == [Range]
+    assert columns["id"].order == Order.ANY
+    assert columns["active"].filters == [Equal]
+    assert columns["active"].order == Order.NONE
+    assert adapter.get_cost([("id", Operator.GE)], []) == 5
+
+    connection = connect(
+        ":memory:",
+        adapter_kwargs={
+            "genericjsonapi": {"cache_expiration": -1, "pushdown": pushdown},
+        },
+    )
+    cursor = connection.cursor()
+
+    sql = f"""
+        SELECT id FROM "{url}#$.results[*]"
+        WHERE id > 3 AND id < 8 AND active = 1
+        ORDER BY id DESC
+    """
+    assert list(cursor.execute(sql)) == [(6,), (4,)]
+    assert get_query(requests_mock.last_request) == {
+        "min_id": "3",
+        "max_id": "8",
+        "active": "true",
+        "sort": "-id",
+        "fields": "active,id",
+    }
+
+    sql = f'SELECT id FROM "{url}#$.results[*]" ORDER BY id DESC LIMIT 2 OFFSET 1'
+    assert list(cursor.execute(sql)) == [(8,), (7,)]
+    assert get_query(requests_mock.last_request) == {
+        "sort": "-id",
+        "fields": "id",
+        "limit": "2",
+        "offset": "1",
+    }
+
+    # the API can't sort in ascending order, so the data is sorted locally
+    assert list(adapter.get_data({}, [("id", Order.ASCENDING)], limit=2)) == [
+        {"id": 0, "active": True, "rowid": 0},
+        {"id": 1, "active": False, "rowid": 1},
+    ]
+    assert get_query(requests_mock.last_request) == {}
+    assert list(
+        adapter.get_data(
+            {},
+            [("active", Order.ASCENDING), ("id", Order.DESCENDING)],
+            limit=2,
+        ),
+    ) == [
+        {"id": 9, "active": False, "rowid": 9},
+        {"id": 7, "active": False, "rowid": 7},
+    ]
+
+    # the offset is applied locally when the API doesn't support it
+    del pushdown["offset"]
+    adapter = GenericJSONAPI(
+        url, "$.results[*]", cache_expiration=-1, pushdown=pushdown
+    )
+    assert list(adapter.get_data({}, [], limit=2, offset=3)) == [
+        {"id": 3, "active": False, "rowid": 3},
+        {"id": 4, "active": True, "rowid": 4},
+    ]
+    assert get_query(requests_mock.last_request) == {"limit": "5"}
+
+    assert list(adapter.get_data({"id": Impossible()}, [])) == []
+
+    pushdown["filters"]["active"]["!="] = "not_active"
+    adapter = GenericJSONAPI(
+        url, "$.results[*]", cache_expiration=-1, pushdown=pushdown
+    )
+    assert adapter.get_columns()["active"].filters == [Equal, NotEqual]
+    bounds = {"id": Range(start=7), "active": NotEqual(True)}
+    assert [row["id"] for row in adapter.get_data(bounds, [])] == [7, 8, 9]
+    assert get_query(requests_mock.last_request) == {
+        "min_id": "7",
+        "not_active": "true",
+    }
+
+
+@pytest.mark.parametrize(
+    "pagination,responses,expected",
+    [
+        (
+            {"type": "page", "param": "page", "size": 3, "size_param": "per_page"},
+            {
+                "?page=2&per_page=3": [3, 4, 5],
+                "?page=3&per_page=3": [6, 7, 8],
+                "?page=4&per_page=3": [9],
+            },
+            [4, 5, 6, 7, 8, 9],
+        ),
+        (
+            {"type": "offset", "param": "start", "size": 3},
+            {"?start=4": [4, 5, 6], "?start=7": [7, 8, 9], "?start=10": []},
+            [4, 5, 6, 7, 8, 9],
+        ),
+        (
+            {"type": "link"},
+            {"": [0, 1, 2], "?after=2": [3, 4, 5], "?after=5": [6, 7, 8]},
+            [4, 5, 6, 7, 8],
+        ),
+        (
+            {"type": "cursor", "param": "cursor", "path": "$.next"},
+            {"": [0, 1, 2], "?cursor=abc": [3, 4, 5], "?cursor=def": [6, 7, 8]},
+            [4, 5, 6, 7, 8],
+        ),
+    ],
+)
+def test_pushdown_pagination(
+    requests_mock: Mocker,
+    pagination: Dict[str, Any],
+    responses: Dict[str, List[int]],
+    expected: List[int],
+) -> None:
+    """
+    Test fetching the pages of paginated APIs.
+    """
+    url = "https://example.com/items"
+    cursors = {"": "abc", "?cursor=abc": "def", "?cursor=def": None}
+    for query, ids in responses.items():
+        headers = {}
+        if pagination["type"] == "link" and f"?after={ids[-1]}" in responses:
+            headers["Link"] = f'<{url}?after={ids[-1]}>; rel="next"'
+        requests_mock.get(
+            url + query,
+            complete_qs=True,
+            headers=headers,
+            json={"items": [{"id": id_} for id_ in ids], "next": cursors.get(query)},
+        )
+    requests_mock.get(
+        url + "?page=1&per_page=3",
+        complete_qs=True,
+        json={"items": [{"id": 0}, {"id": 1}, {"id": 2}]},
+    )
+    requests_mock.get(
+        url + "?start=0",
+        complete_qs=True,
+        json={"items": [{"id": 0}, {"id": 1}, {"id": 2}, {"id": 3}]},
+    )
+
+    adapter = GenericJSONAPI(
+        url,
+        "$.items[*]",
+        cache_expiration=-1,
+        pushdown={"pagination": pagination},
+    )
+
+    # the schema is inferred from the first page
+    assert requests_mock.call_count == 1
+    assert list(adapter.get_columns()) == ["id"]
+
+    requests_mock.reset_mock()
+    assert [row["id"] for row in adapter.get_data({}, [], offset=4)] == expected
+    rows = list(adapter.get_data({}, [], limit=2, offset=4))
+    assert rows == [{"id": 4, "rowid": 4}, {"id": 5, "rowid": 5}]
+
+
+def test_pushdown_pagination_widen_types(requests_mock: Mocker) -> None:
+    """
+    Test that types are widened when a later page has a broader type.
+    """
+    url = "https://example.com/items"
+    pages = {
+        "1": [{"id": 0, "value": 1}, {"id": 1, "value": 2}],
+        "2": [{"id": 2, "value": 2.5}],
+    }
+    for page, items in pages.items():
+        requests_mock.get(f"{url}?page={page}", complete_qs=True, json=items)
+
+    adapter = GenericJSONAPI(
+        url,
+        cache_expiration=-1,
+        pushdown={"pagination": {"type": "page", "param": "page", "size": 2}},
+    )
+    assert adapter.confident is False
+    assert adapter.get_columns()["value"].type == "INTEGER"
+
+    assert [row["value"] for row in adapter.get_data({}, [])] == [1, 2, 2.5]
+    assert adapter.get_columns()["value"].type == "REAL"
+
+    # a single page that isn't full has all the rows
+    adapter = GenericJSONAPI(
+        url,
+        cache_expiration=-1,
+        pushdown={"pagination": {"type": "page", "param": "page", "size": 3}},
+    )
+    assert adapter.confident is True
+
+
+def test_pushdown_invalid() -> None:
+    """
+    Test invalid pushdown configurations.
+    """
+    url = "https://example.com/items"
+
+    with pytest.raises(ProgrammingError) as excinfo:
+        GenericJSONAPI(url, pushdown={"filters": {"a": {"~": "a"}}})
+    assert str(excinfo.value) == "Invalid operator: ~"
+
+    with pytest.raises(ProgrammingError) as excinfo:
+        GenericJSONAPI(url, pushdown={"pagination": {"type": "token"}})
+    assert str(excinfo.value) == "Invalid pagination type: token"
+
+    with pytest.raises(ProgrammingError) as excinfo:
+        GenericJSONAPI(url, pushdown={"pagination": {"type": "page", "param": "p"}})
+    assert str(excinfo.value) == "Pagination of type page requires size"
+
+
+def test_format_query_value() -> None:
+    """
+    Test ``format_query_value``.
+    """
+    assert format_query_value(False) == "false"
+    assert format_query_value(date(2024, 1, 1)) == "2024-01-01"
+    assert format_query_value(time(12, 30)) == "12:30:00"
+    assert format_query_value(1.5) == "1.5"
+
+
+def test_get_range_parameters() -> None:
+    """
+    Test ``get_range_parameters``.
+    """
+    operators = {">=": "min", "<": "max"}
+    assert get_range_parameters(Range(1, 10, True, False), operators) == {
+        "min": "1",
+        "max": "10",
+    }
+
+    # an exclusive operator can't be used for an inclusive bound
+    assert get_range_parameters(Range(1, 10, False, True), operators) == {"min": "1"}
+    assert get_range_parameters(Range(None, 10, False, True), operators) == {}
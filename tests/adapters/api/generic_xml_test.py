@@ -2,6 +2,7 @@
 Test the generic XML adapter.
 """
 
+import io
 import re
 import xml.etree.ElementTree as ET
 
@@ -9,13 +10,30 @@ import pytest
 from requests_mock.mocker import Mocker
 from yarl import URL
 
-from shillelagh.adapters.api.generic_xml import element_to_dict
+from shillelagh.adapters.api.generic_xml import (
+    GenericXMLAPI,
+    element_to_dict,
+    get_path_matcher,
+    iter_elements,
+)
 from shillelagh.backends.apsw.db import connect
 from shillelagh.exceptions import ProgrammingError
 
 baseurl = URL("https://api.congress.gov/v3/bill/118")
 
 
+class Body(io.BytesIO):
+    """
+    A response body that keeps track of how much was read before being closed.
+    """
+
+    position = 0
+
+    def close(self) -> None:
+        self.position = self.tell()
+        super().close()
+
+
 def test_element_to_dict() -> None:
     """
     Test XML to dict conversion.
@@ -187,3 +205,128 @@ def test_generic_xml(requests_mock: Mocker) -> None:
     with pytest.raises(ProgrammingError) as excinfo:
         list(cursor.execute(sql))
     assert str(excinfo.value) == "Error: Something went wrong"
+
+
+def test_generic_xml_sampled(requests_mock: Mocker) -> None:
+    """
+    Test inferring types from a sample of the rows.
+    """
+    url = "https://example.com/data.xml#.//row"
+    requests_mock.get(
+        url,
+        text="""<?xml version="1.0" encoding="utf-8"?>
+<root>
+  <row><a>1</a></row>
+  <row><a>two</a></row>
+</root>""",
+    )
+
+    adapter = GenericXMLAPI(url, ".//row", cache_expiration=-1, sample_size=1)
+    assert adapter.confident is False
+    assert list(adapter.get_data({}, [])) == [
+        {"a": "1", "rowid": 0},
+        {"a": "two", "rowid": 1},
+    ]
+    assert adapter.get_columns()["a"].type == "TEXT"
+
+
+def test_iter_elements() -> None:
+    """
+    Test that parsing incrementally returns the same elements as ``findall``.
+    """
+    xmlstr = b"""<?xml version="1.0" encoding="utf-8"?>
+<root>
+  <meta><count>3</count></meta>
+  <rows>
+    <row><a>1</a></row>
+    <row><a>2</a><row><a>3</a></row></row>
+  </rows>
+  <row><a>4</a></row>
+</root>"""
+    root = ET.fromstring(xmlstr)
+
+    for path in ["*", "rows/row", "./rows/*", ".//row", ".//row/a", "*/*/a"]:
+        match = get_path_matcher(path)
+        assert match is not None
+        elements = [
+            ET.tostring(element) for element in iter_elements(io.BytesIO(xmlstr), match)
+        ]
+        assert elements == [ET.tostring(element) for element in root.findall(path)]
+
+    assert get_path_matcher("") is None
+    assert get_path_matcher(".") is None
+    assert get_path_matcher("row[a='1']") is None
+
+
+def test_generic_xml_streaming(requests_mock: Mocker) -> None:
+    """
+    Test that responses are parsed incrementally, stopping at the limit.
+    """
+    # for datassette
+    requests_mock.get(re.compile(".*-/versions.json.*"), status_code=404)
+
+    payload = (
+        b"<root><rows>"
+        + b"".join(b"<row><a>%d</a></row>" % i for i in range(100000))
+        + b"</rows></root>"
+    )
+    bodies = []
+
+    def body(request, context):  # pylint: disable=unused-argument
+        bodies.append(Body(payload))
+        return bodies[-1]
+
+    url = "https://example.com/data.xml"
+    requests_mock.head(url, headers={"content-type": "application/xml"})
+    requests_mock.get(url, body=body)
+
+    adapter = GenericXMLAPI(url, ".//row", cache_expiration=-1)
+    assert adapter.num_rows == 100000
+    assert list(adapter.get_data({}, [], limit=2, offset=1)) == [
+        {"a": "1", "rowid": 1},
+        {"a": "2", "rowid": 2},
+    ]
+    assert 0 < bodies[-1].position < len(payload) / 10
+
+    connection = connect(
+        ":memory:",
+        adapter_kwargs={"genericxmlapi": {"cache_expiration": -1}},
+    )
+    cursor = connection.cursor()
+
+    sql = f'SELECT a FROM "{url}#rows/row" LIMIT 3'
+    assert list(cursor.execute(sql)) == [("0",), ("1",), ("2",)]
+    assert 0 < bodies[-1].position < len(payload) / 10
+
+    # paths that can't be matched while parsing are evaluated on the whole document
+    adapter = GenericXMLAPI(url, "rows/row[a='2']", cache_expiration=-1)
+    assert list(adapter.get_data({}, [])) == [{"a": "2", "rowid": 0}]
+
+
+def test_generic_xml_cursor_pagination(requests_mock: Mocker) -> None:
+    """
+    Test cursor pagination, where the cursor is read with XPath.
+    """
+    url = "https://example.com/data.xml"
+    requests_mock.get(
+        url,
+        complete_qs=True,
+        text="<root><row><a>1</a></row><next>abc</next></root>",
+    )
+    requests_mock.get(
+        url + "?cursor=abc",
+        complete_qs=True,
+        text="<root><row><a>2</a></row></root>",
+    )
+
+    adapter = GenericXMLAPI(
+        url,
+        "row",
+        cache_expiration=-1,
+        sample_size=10,
+        pushdown={"pagination": {"type": "cursor", "param": "cursor", "path": "next"}},
+    )
+    assert list(adapter.get_data({}, [])) == [
+        {"a": "1", "rowid": 0},
+        {"a": "2", "rowid": 1},
+    ]
@@ -17,6 +17,7 @@ import requests_mock
 from pytest_mock import MockerFixture
 
 from shillelagh.adapters.api.gsheets.adapter import GSheetsAPI
+from shillelagh.adapters.api.gsheets.types import SyncMode
 from shillelagh.backends.apsw.db import connect
 from shillelagh.exceptions import (
     InterfaceError,
@@ -190,7 +191,7 @@ def test_credentials() -> None:
             mock.call("BEGIN IMMEDIATE"),
             mock.call('SELECT 1 FROM "https://docs.google.com/spreadsheets/d/1"', None),
             mock.call(
-                "CREATE VIRTUAL TABLE \"https://docs.google.com/spreadsheets/d/1\" USING GSheetsAPI('+ihodHRwczovL2RvY3MuZ29vZ2xlLmNvbS9zcHJlYWRzaGVldHMvZC8x', 'Tg==', 'Tg==', '+9oGc2VjcmV02gNYWFgw', '+hB1c2VyQGV4YW1wbGUuY29t', 'Tg==', 'Rg==')",
+                "CREATE VIRTUAL TABLE \"https://docs.google.com/spreadsheets/d/1\" USING GSheetsAPI('+ihodHRwczovL2RvY3MuZ29vZ2xlLmNvbS9zcHJlYWRzaGVldHMvZC8x', 'Tg==', 'Tg==', '+9oGc2VjcmV02gNYWFgw', '+hB1c2VyQGV4YW1wbGUuY29t', 'Tg==', 'Rg==', '6QoAAAA=')",
             ),
             mock.call('SELECT 1 FROM "https://docs.google.com/spreadsheets/d/1"', None),
         ],
@@ -223,7 +224,7 @@ def test_credentials() -> None:
             mock.call("BEGIN IMMEDIATE"),
             mock.call('SELECT 1 FROM "https://docs.google.com/spreadsheets/d/1"', None),
             mock.call(
-                "CREATE VIRTUAL TABLE \"https://docs.google.com/spreadsheets/d/1\" USING GSheetsAPI('+ihodHRwczovL2RvY3MuZ29vZ2xlLmNvbS9zcHJlYWRzaGVldHMvZC8x', 'Tg==', 'Tg==', 'Tg==', 'Tg==', 'Tg==', 'VA==')",
+                "CREATE VIRTUAL TABLE \"https://docs.google.com/spreadsheets/d/1\" USING GSheetsAPI('+ihodHRwczovL2RvY3MuZ29vZ2xlLmNvbS9zcHJlYWRzaGVldHMvZC8x', 'Tg==', 'Tg==', 'Tg==', 'Tg==', 'Tg==', 'VA==', '6QoAAAA=')",
             ),
             mock.call('SELECT 1 FROM "https://docs.google.com/spreadsheets/d/1"', None),
         ],
@@ -650,11 +651,11 @@ def test_get_session(mocker: MockerFixture) -> None:
     """
     mock_authorized_session = mock.MagicMock()
     mocker.patch(
-        "shillelagh.adapters.api.gsheets.adapter.AuthorizedSession",
+        "shillelagh.adapters.api.gsheets.session.AuthorizedSession",
         mock_authorized_session,
     )
     mock_session = mock.MagicMock()
-    mocker.patch("shillelagh.adapters.api.gsheets.adapter.Session", mock_session)
+    mocker.patch("shillelagh.adapters.api.gsheets.session.Session", mock_session)
     mocker.patch(
         "shillelagh.adapters.api.gsheets.adapter.get_credentials",
         return_value=None,
@@ -671,9 +672,9 @@ def test_get_session(mocker: MockerFixture) -> None:
     )
 
     gsheets_adapter = GSheetsAPI("https://docs.google.com/spreadsheets/d/1")
-    gsheets_adapter._get_session()
+    assert gsheets_adapter._get_session() is gsheets_adapter._get_session()
     mock_authorized_session.assert_not_called()
-    mock_session.assert_called()
+    mock_session.assert_called_once()
 
     mock_authorized_session.reset_mock()
     mock_session.reset_mock()
@@ -689,9 +690,19 @@ def test_get_session(mocker: MockerFixture) -> None:
     )
     assert gsheets_adapter.credentials == "SECRET"
     gsheets_adapter._get_session()
-    mock_authorized_session.assert_called()
+    mock_authorized_session.assert_called_with("SECRET")
     mock_session.assert_not_called()
 
+    # adapters with the same credentials share the session
+    mock_authorized_session.reset_mock()
+    other_adapter = GSheetsAPI(
+        "https://docs.google.com/spreadsheets/d/2",
+        service_account_info={"secret": "XXX"},
+        subject="user@example.com",
+    )
+    assert other_adapter._get_session() is gsheets_adapter._get_session()
+    mock_authorized_session.assert_not_called()
+
 
 def test_api_bugs(mocker: MockerFixture) -> None:
     """
@@ -1216,15 +1227,11 @@ def test_insert_data(
     )
 
     gsheets_adapter = GSheetsAPI("https://docs.google.com/spreadsheets/d/1/edit", "XXX")
+    call_count = simple_sheet_adapter.call_count
 
     row_id = gsheets_adapter.insert_row({"country": "UK", "cnt": "10", "rowid": None})
     assert row_id == 0
     assert gsheets_adapter._row_ids == {0: {"cnt": "10", "country": "UK"}}
-    assert simple_sheet_adapter.last_request.json() == {
-        "range": "Sheet1",
-        "majorDimension": "ROWS",
-        "values": [["UK", "10"]],
-    }
 
     row_id = gsheets_adapter.insert_row({"country": "PY", "cnt": 11, "rowid": 3})
     assert row_id == 3
@@ -1233,6 +1240,18 @@ def test_insert_data(
         3: {"cnt": "11", "country": "PY"},
     }
 
+    # rows are appended in a single request when the transaction is committed
+    assert simple_sheet_adapter.call_count == call_count
+    gsheets_adapter.commit()
+    assert simple_sheet_adapter.call_count == call_count + 1
+    assert simple_sheet_adapter.last_request.json() == {
+        "range": "Sheet1",
+        "majorDimension": "ROWS",
+        "values": [["UK", "10"], ["PY", "11"]],
+    }
+    gsheets_adapter.commit()
+    assert simple_sheet_adapter.call_count == call_count + 1
+
     simple_sheet_adapter.register_uri(
         "POST",
         (
@@ -1247,8 +1266,9 @@ def test_insert_data(
             },
         },
     )
+    gsheets_adapter.insert_row({"country": "PY", "cnt": "11", "rowid": 3})
     with pytest.raises(ProgrammingError) as excinfo:
-        gsheets_adapter.insert_row({"country": "PY", "cnt": "11", "rowid": 3})
+        gsheets_adapter.commit()
     assert (
         str(excinfo.value)
         == "Request range[WRONG] does not match value's range[Sheet1]"
@@ -1292,6 +1312,7 @@ def test_delete_data(
         3: {"cnt": "1", "country": "BR"},
         4: {"cnt": "12", "country": "PL"},
     }
+    gsheets_adapter.commit()
     assert simple_sheet_adapter.last_request.json() == {
         "requests": [
             {
@@ -1307,7 +1328,8 @@ def test_delete_data(
         ],
     }
     _logger.info.assert_called_with(
-        "POST %s",
+        "%s %s",
+        "POST",
         "https://sheets.googleapis.com/v4/spreadsheets/1:batchUpdate",
     )
 
@@ -1330,10 +1352,12 @@ def test_delete_data(
             },
         },
     )
+    gsheets_adapter.delete_row(3)
     with pytest.raises(ProgrammingError) as excinfo:
-        gsheets_adapter.delete_row(3)
+        gsheets_adapter.commit()
     assert str(excinfo.value) == "Requested entity was not found."
 
+    gsheets_adapter._row_ids[3] = {"cnt": "1", "country": "BR"}
     simple_sheet_adapter.register_uri(
         "GET",
         (
@@ -1372,22 +1396,9 @@ def test_update_data(
         return_value=session,
     )
     simple_sheet_adapter.register_uri(
-        "PUT",
-        (
-            "https://sheets.googleapis.com/v4/spreadsheets/1"
-            "/values/Sheet1!A6?valueInputOption=USER_ENTERED"
-        ),
-        json={
-            "spreadsheetId": "1",
-            "tableRange": "'Sheet1'!A6:B6",
-            "updates": {
-                "spreadsheetId": "1",
-                "updatedRange": "'Sheet1!A6:B6",
-                "updatedRows": 1,
-                "updatedColumns": 1,
-                "updatedCells": 1,
-            },
-        },
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
+        json={"spreadsheetId": "1", "totalUpdatedRows": 1},
     )
 
     gsheets_adapter = GSheetsAPI("https://docs.google.com/spreadsheets/d/1/edit", "XXX")
@@ -1403,10 +1414,16 @@ def test_update_data(
         3: {"cnt": "11", "country": "PY"},
         4: {"cnt": "12", "country": "PL"},
     }
+    gsheets_adapter.commit()
     assert simple_sheet_adapter.last_request.json() == {
-        "majorDimension": "ROWS",
-        "range": "Sheet1!A6",
-        "values": [["CR", "12"]],
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {
+                "majorDimension": "ROWS",
+                "range": "Sheet1!A6",
+                "values": [["CR", "12"]],
+            },
+        ],
     }
 
     simple_sheet_adapter.register_uri(
@@ -1444,12 +1461,10 @@ def test_update_data(
         gsheets_adapter.update_row(5, {"cnt": "13", "country": "PL"})
     assert str(excinfo.value) == "Invalid row to update: 5"
 
+    gsheets_adapter.commit()
     simple_sheet_adapter.register_uri(
-        "PUT",
-        (
-            "https://sheets.googleapis.com/v4/spreadsheets/1"
-            "/values/Sheet1!A7?valueInputOption=USER_ENTERED"
-        ),
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
         json={
             "error": {
                 "code": 404,
@@ -1458,8 +1473,9 @@ def test_update_data(
             },
         },
     )
+    gsheets_adapter.update_row(3, {"cnt": "13", "country": "PL", "rowid": 3})
     with pytest.raises(ProgrammingError) as excinfo:
-        gsheets_adapter.update_row(3, {"cnt": "13", "country": "PL"})
+        gsheets_adapter.commit()
     assert str(excinfo.value) == "Requested entity was not found."
 
     simple_sheet_adapter.register_uri(
@@ -1481,6 +1497,376 @@ def test_update_data(
     assert str(excinfo.value) == "Requested entity was not found."
 
 
+def test_batched_dml(  # pylint: disable=too-many-statements
+    mocker: MockerFixture,
+    simple_sheet_adapter: requests_mock.Adapter,
+) -> None:
+    """
+    Test that changes are buffered and pushed in batches.
+    """
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.get_credentials",
+        return_value="SECRET",
+    )
+
+    session = requests.Session()
+    session.mount("https://", simple_sheet_adapter)
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.GSheetsAPI._get_session",
+        return_value=session,
+    )
+    get_values = simple_sheet_adapter.register_uri(
+        "GET",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1?valueRenderOption=FORMATTED_VALUE"
+        ),
+        json={
+            "range": "'Sheet1'!A1:Z1001",
+            "majorDimension": "ROWS",
+            "values": [
+                ["country", "cnt"],
+                ["BR", "1"],
+                ["BR", "3"],
+                ["IN", "5"],
+                ["ZA", "6"],
+                ["CR", "10"],
+            ],
+        },
+    )
+    append = simple_sheet_adapter.register_uri(
+        "POST",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1:append?valueInputOption=USER_ENTERED"
+        ),
+        json={"spreadsheetId": "1"},
+    )
+    delete = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1:batchUpdate",
+        json={"spreadsheetId": "1", "replies": [{}]},
+    )
+    update = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
+        json={"spreadsheetId": "1", "totalUpdatedRows": 2},
+    )
+
+    gsheets_adapter = GSheetsAPI("https://docs.google.com/spreadsheets/d/1/edit", "XXX")
+    gsheets_adapter._row_ids = {
+        0: {"cnt": "1", "country": "BR"},
+        1: {"cnt": "3", "country": "BR"},
+        2: {"cnt": "5", "country": "IN"},
+        3: {"cnt": "6", "country": "ZA"},
+        4: {"cnt": "10", "country": "CR"},
+    }
+
+    # deleted rows are merged into ranges, deleted from the bottom up
+    gsheets_adapter.delete_row(1)
+    gsheets_adapter.delete_row(3)
+    gsheets_adapter.delete_row(0)
+    assert gsheets_adapter._values == [["country", "cnt"], ["IN", "5"], ["CR", "10"]]
+    assert delete.call_count == 0
+    gsheets_adapter.commit()
+    assert get_values.call_count == 1
+    assert delete.call_count == 1
+    assert delete.last_request.json() == {
+        "requests": [
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": 0,
+                        "dimension": "ROWS",
+                        "startIndex": 4,
+                        "endIndex": 5,
+                    },
+                },
+            },
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": 0,
+                        "dimension": "ROWS",
+                        "startIndex": 1,
+                        "endIndex": 3,
+                    },
+                },
+            },
+        ],
+    }
+
+    # updated rows are sent in a single request
+    gsheets_adapter._row_ids = {
+        2: {"cnt": "5", "country": "IN"},
+        4: {"cnt": "10", "country": "CR"},
+    }
+    gsheets_adapter.update_row(4, {"cnt": "11", "country": "CR", "rowid": 4})
+    gsheets_adapter.update_row(2, {"cnt": "7", "country": "IN", "rowid": 2})
+    gsheets_adapter.update_row(4, {"cnt": "12", "country": "CR", "rowid": 4})
+    assert update.call_count == 0
+
+    # changes of a different kind push the buffered ones first
+    gsheets_adapter.insert_row({"country": "UK", "cnt": 1, "rowid": None})
+    assert get_values.call_count == 2
+    assert update.call_count == 1
+    assert update.last_request.json() == {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {"range": "Sheet1!A4", "majorDimension": "ROWS", "values": [["IN", "7"]]},
+            {"range": "Sheet1!A6", "majorDimension": "ROWS", "values": [["CR", "12"]]},
+        ],
+    }
+    assert append.call_count == 0
+
+    # changes are pushed when the buffer is full
+    mocker.patch("shillelagh.adapters.api.gsheets.adapter.MAX_PENDING_CHANGES", 2)
+    gsheets_adapter.insert_row({"country": "UK", "cnt": 2, "rowid": None})
+    gsheets_adapter.insert_row({"country": "UK", "cnt": 3, "rowid": None})
+    assert append.call_count == 1
+    assert append.last_request.json() == {
+        "range": "Sheet1",
+        "majorDimension": "ROWS",
+        "values": [["UK", "1"], ["UK", "2"]],
+    }
+
+    # and before reading, so that changes can be read back
+    list(gsheets_adapter.get_data({}, []))
+    assert append.call_count == 2
+    assert append.last_request.json() == {
+        "range": "Sheet1",
+        "majorDimension": "ROWS",
+        "values": [["UK", "3"]],
+    }
+    assert simple_sheet_adapter.last_request.url == (
+        "https://docs.google.com/spreadsheets/d/1/gviz/tq?gid=0&tq=SELECT%20%2A"
+    )
+
+    # and when the adapter is closed
+    gsheets_adapter._row_ids = {0: {"cnt": "1", "country": "BR"}}
+    gsheets_adapter.delete_row(0)
+    assert delete.call_count == 1
+    gsheets_adapter.close()
+    assert delete.call_count == 2
+
+    gsheets_adapter._row_ids = {
+        0: {"cnt": "1", "country": "BR"},
+        1: {"cnt": "3", "country": "BR"},
+    }
+    gsheets_adapter.update_row(0, {"cnt": "2", "country": "BR", "rowid": 0})
+    gsheets_adapter.update_row(1, {"cnt": "4", "country": "BR", "rowid": 1})
+    assert update.call_count == 2
+    gsheets_adapter._row_ids = {
+        2: {"cnt": "5", "country": "IN"},
+        3: {"cnt": "6", "country": "ZA"},
+    }
+    gsheets_adapter.delete_row(2)
+    gsheets_adapter.delete_row(3)
+    assert delete.call_count == 3
+
+
+def test_rollback(
+    mocker: MockerFixture,
+    simple_sheet_adapter: requests_mock.Adapter,
+) -> None:
+    """
+    Test rolling back buffered changes.
+    """
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.get_credentials",
+        return_value="SECRET",
+    )
+    _logger = mocker.patch("shillelagh.adapters.api.gsheets.adapter._logger")
+
+    session = requests.Session()
+    session.mount("https://", simple_sheet_adapter)
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.GSheetsAPI._get_session",
+        return_value=session,
+    )
+    simple_sheet_adapter.register_uri(
+        "GET",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1?valueRenderOption=FORMATTED_VALUE"
+        ),
+        json={
+            "range": "'Sheet1'!A1:Z1001",
+            "majorDimension": "ROWS",
+            "values": [["country", "cnt"], ["BR", "1"], ["BR", "3"], ["IN", "5"]],
+        },
+    )
+    delete = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1:batchUpdate",
+        json={"spreadsheetId": "1", "replies": [{}]},
+    )
+    row_ids = {
+        0: {"cnt": "1", "country": "BR"},
+        1: {"cnt": "3", "country": "BR"},
+        2: {"cnt": "5", "country": "IN"},
+    }
+
+    gsheets_adapter = GSheetsAPI("https://docs.google.com/spreadsheets/d/1/edit", "XXX")
+    gsheets_adapter._row_ids = dict(row_ids)
+
+    # buffered changes are discarded, and the local copy is restored
+    gsheets_adapter.begin()
+    gsheets_adapter.delete_row(1)
+    assert gsheets_adapter._values == [["country", "cnt"], ["BR", "1"], ["IN", "5"]]
+    gsheets_adapter.rollback()
+    assert gsheets_adapter._values is None
+    assert gsheets_adapter._pending_deletes == []
+    assert gsheets_adapter._row_ids == row_ids
+    assert not gsheets_adapter.modified
+    gsheets_adapter.sync()
+    gsheets_adapter.commit()
+    assert delete.call_count == 0
+    _logger.warning.assert_not_called()
+
+    # changes already pushed can't be rolled back
+    mocker.patch("shillelagh.adapters.api.gsheets.adapter.MAX_PENDING_CHANGES", 1)
+    gsheets_adapter.begin()
+    gsheets_adapter.delete_row(1)
+    assert delete.call_count == 1
+    gsheets_adapter.rollback()
+    _logger.warning.assert_called_with(
+        "Some changes were already pushed to the sheet and can't be rolled back",
+    )
+    assert gsheets_adapter._values is None
+
+    # in other modes the local copy is restored
+    gsheets_adapter._sync_mode = SyncMode.UNIDIRECTIONAL
+    gsheets_adapter._row_ids = dict(row_ids)
+    gsheets_adapter._get_values()
+    gsheets_adapter.begin()
+    gsheets_adapter.delete_row(1)
+    assert delete.call_count == 2
+    gsheets_adapter.rollback()
+    assert gsheets_adapter._values == [
+        ["country", "cnt"],
+        ["BR", "1"],
+        ["BR", "3"],
+        ["IN", "5"],
+    ]
+
+    # nothing to restore outside of a transaction
+    _logger.warning.reset_mock()
+    gsheets_adapter.rollback()
+    _logger.warning.assert_not_called()
+
+
+def test_rollback_undo(
+    mocker: MockerFixture,
+    simple_sheet_adapter: requests_mock.Adapter,
+) -> None:
+    """
+    Test that changes to the local copy are undone, without copying it on ``begin``.
+    """
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.get_credentials",
+        return_value="SECRET",
+    )
+    session = requests.Session()
+    session.mount("https://", simple_sheet_adapter)
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.GSheetsAPI._get_session",
+        return_value=session,
+    )
+    simple_sheet_adapter.register_uri(
+        "GET",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1?valueRenderOption=FORMATTED_VALUE"
+        ),
+        json={
+            "range": "'Sheet1'!A1:Z1001",
+            "majorDimension": "ROWS",
+            "values": [["country", "cnt"], ["BR", "1"], ["BR", "3"], ["IN", "5"]],
+        },
+    )
+    row_ids = {
+        0: {"cnt": "1", "country": "BR"},
+        1: {"cnt": "3", "country": "BR"},
+        2: {"cnt": "5", "country": "IN"},
+    }
+
+    gsheets_adapter = GSheetsAPI(
+        "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
+        "XXX",
+    )
+    gsheets_adapter._row_ids = dict(row_ids)
+    values = gsheets_adapter._get_values()
+    changes = gsheets_adapter._changes
+
+    gsheets_adapter.begin()
+    gsheets_adapter.insert_data({"country": "ZA", "cnt": 6, "rowid": None})
+    gsheets_adapter.update_data(1, {"country": "BR", "cnt": 4, "rowid": 5})
+    gsheets_adapter.delete_data(0)
+    assert values == [["country", "cnt"], ["BR", 4], ["IN", "5"], ["ZA", 6]]
+    assert gsheets_adapter.modified
+    gsheets_adapter.rollback()
+
+    assert gsheets_adapter._values is values
+    assert values == [["country", "cnt"], ["BR", "1"], ["BR", "3"], ["IN", "5"]]
+    assert gsheets_adapter._changes is changes
+    assert changes.origins == [0, 1, 2, 3]
+    assert changes.updated == set()
+    assert gsheets_adapter._row_ids == row_ids
+    assert not gsheets_adapter.modified
+
+
+def test_execute_batched_dml(
+    mocker: MockerFixture,
+    simple_sheet_adapter: requests_mock.Adapter,
+) -> None:
+    """
+    Test that rows inserted in a statement are appended in a single request.
+    """
+    session = requests.Session()
+    session.mount("https://", simple_sheet_adapter)
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.GSheetsAPI._get_session",
+        return_value=session,
+    )
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.get_credentials",
+        return_value="SECRET",
+    )
+    append = simple_sheet_adapter.register_uri(
+        "POST",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1:append?valueInputOption=USER_ENTERED"
+        ),
+        json={"spreadsheetId": "1"},
+    )
+
+    connection = connect(
+        ":memory:",
+        ["gsheetsapi"],
+        adapter_kwargs={
+            "gsheetsapi": {
+                "service_account_info": {"secret": "XXX"},
+                "subject": "user@example.com",
+            },
+        },
+    )
+    cursor = connection.cursor()
+
+    sql = """
+        INSERT INTO "https://docs.google.com/spreadsheets/d/1/edit#gid=0" (country, cnt)
+        VALUES ('UK', 1), ('UK', 2), ('UK', 3)
+    """
+    cursor.execute(sql)
+    assert append.call_count == 1
+    assert append.last_request.json() == {
+        "range": "Sheet1",
+        "majorDimension": "ROWS",
+        "values": [["UK", "1"], ["UK", "2"], ["UK", "3"]],
+    }
+
+
 def test_drop_table(
     mocker: MockerFixture,
     simple_sheet_adapter: requests_mock.Adapter,
@@ -1532,7 +1918,7 @@ def test_drop_table(
     assert str(excinfo.value) == "Requested entity was not found."
 
 
-def test_batch_sync_mode(
+def test_batch_sync_mode(  # pylint: disable=too-many-statements
     mocker: MockerFixture,
     simple_sheet_adapter: requests_mock.Adapter,
 ) -> None:
@@ -1590,6 +1976,17 @@ def test_batch_sync_mode(
         },
     )
 
+    delete = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1:batchUpdate",
+        json={"spreadsheetId": "1", "replies": [{}]},
+    )
+    write = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
+        json={"spreadsheetId": "1", "totalUpdatedRows": 1},
+    )
+
     gsheets_adapter = GSheetsAPI(
         "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
         "XXX",
@@ -1661,28 +2058,40 @@ def test_batch_sync_mode(
     assert get_values.call_count == 1
 
     # test that changes haven't been pushed yet
-    assert update.call_count == 0
-    assert update.last_request is None
+    assert delete.call_count == 0
+    assert write.call_count == 0
 
     gsheets_adapter.close()
 
-    # test that changes have been pushed
-    assert update.call_count == 1
-    assert update.last_request is not None
-    assert update.last_request.json() == {
-        "range": "Sheet1",
-        "majorDimension": "ROWS",
-        "values": [
-            ["country", "cnt"],
-            ["BR", "1"],
-            ["BR", "3"],
-            ["IN", "5"],
-            ["ZA", "6"],
-            ["PY", "11"],
-            ["UK", "10"],
+    # test that only the changes have been pushed
+    assert update.call_count == 0
+    assert delete.call_count == 1
+    assert delete.last_request.json() == {
+        "requests": [
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": 0,
+                        "dimension": "ROWS",
+                        "startIndex": 5,
+                        "endIndex": 6,
+                    },
+                },
+            },
+        ],
+    }
+    assert write.call_count == 1
+    assert write.last_request.json() == {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {"range": "Sheet1!A7", "majorDimension": "ROWS", "values": [["UK", "10"]]},
         ],
     }
 
+    # closing again is a no-op
+    gsheets_adapter.close()
+    assert write.call_count == 1
+
     gsheets_adapter = GSheetsAPI(
         "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
         "XXX",
@@ -1787,6 +2196,9 @@ def test_batch_sync_mode_padding(
         },
     )
 
+    # force the whole sheet to be rewritten
+    mocker.patch("shillelagh.adapters.api.gsheets.adapter.FULL_SYNC_THRESHOLD", 0)
+
     gsheets_adapter = GSheetsAPI(
         "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
         "XXX",
@@ -1821,6 +2233,119 @@ def test_batch_sync_mode_padding(
     }
 
 
+def test_batch_sync_mode_incremental(
+    mocker: MockerFixture,
+    simple_sheet_adapter: requests_mock.Adapter,
+) -> None:
+    """
+    Test that BATCH mode pushes only the rows that changed.
+    """
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.get_credentials",
+        return_value="SECRET",
+    )
+
+    session = requests.Session()
+    session.mount("https://", simple_sheet_adapter)
+    mocker.patch(
+        "shillelagh.adapters.api.gsheets.adapter.GSheetsAPI._get_session",
+        return_value=session,
+    )
+    values = [["country", "cnt", "notes"]] + [[f"C{i}", str(i)] for i in range(1000)]
+    simple_sheet_adapter.register_uri(
+        "GET",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1?valueRenderOption=FORMATTED_VALUE"
+        ),
+        json={"range": "'Sheet1'!A1:Z1001", "majorDimension": "ROWS", "values": values},
+    )
+    rewrite = simple_sheet_adapter.register_uri(
+        "PUT",
+        (
+            "https://sheets.googleapis.com/v4/spreadsheets/1"
+            "/values/Sheet1?valueInputOption=USER_ENTERED"
+        ),
+        json={"spreadsheetId": "1"},
+    )
+    delete = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1:batchUpdate",
+        json={"spreadsheetId": "1", "replies": [{}]},
+    )
+    write = simple_sheet_adapter.register_uri(
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
+        json={"spreadsheetId": "1", "totalUpdatedRows": 1},
+    )
+
+    gsheets_adapter = GSheetsAPI(
+        "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
+        "XXX",
+    )
+    gsheets_adapter._row_ids = {
+        i: {"country": f"C{i}", "cnt": str(i)} for i in range(1000)
+    }
+
+    # rows are padded to the original width, to clear underlying cells
+    gsheets_adapter.update_row(9, {"country": "C9", "cnt": "-9", "rowid": 9})
+    gsheets_adapter.update_row(10, {"country": "C10", "cnt": "-10", "rowid": 10})
+    gsheets_adapter.delete_row(100)
+    gsheets_adapter.delete_row(101)
+    gsheets_adapter.delete_row(500)
+    gsheets_adapter.insert_row({"country": "XX", "cnt": "0", "rowid": None})
+    gsheets_adapter.close()
+
+    assert rewrite.call_count == 0
+    assert [
+        request["deleteDimension"]["range"]["startIndex"]
+        for request in delete.last_request.json()["requests"]
+    ] == [501, 101]
+    assert write.last_request.json() == {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {
+                "range": "Sheet1!A11",
+                "majorDimension": "ROWS",
+                "values": [["C9", "-9", ""], ["C10", "-10", ""]],
+            },
+            {
+                "range": "Sheet1!A999",
+                "majorDimension": "ROWS",
+                "values": [["XX", "0", ""]],
+            },
+        ],
+    }
+
+    # uploads are proportional to the changes, not to the size of the sheet
+    uploaded = len(delete.last_request.body) + len(write.last_request.body)
+    assert uploaded < len(json.dumps(values)) / 20
+
+    gsheets_adapter.delete_row(0)
+    gsheets_adapter.close()
+    assert delete.call_count == 2
+    assert write.call_count == 1
+
+    gsheets_adapter.insert_row({"country": "YY", "cnt": "0", "rowid": None})
+    gsheets_adapter.close()
+    assert delete.call_count == 2
+    assert write.call_count == 2
+
+    # when most rows change the whole sheet is rewritten
+    gsheets_adapter = GSheetsAPI(
+        "https://docs.google.com/spreadsheets/d/1/edit?sync_mode=BATCH",
+        "XXX",
+    )
+    gsheets_adapter._row_ids = {
+        i: {"country": f"C{i}", "cnt": str(i)} for i in range(1000)
+    }
+    for i in range(600):
+        gsheets_adapter.update_row(i, {"country": f"C{i}", "cnt": "0", "rowid": i})
+    gsheets_adapter.close()
+    assert rewrite.call_count == 1
+    assert len(rewrite.last_request.json()["values"]) == 1001
+
+
 def test_execute_batch(
     mocker: MockerFixture,
     simple_sheet_adapter: requests_mock.Adapter,
@@ -1953,22 +2478,9 @@ def test_unidirectional_sync_mode(
         },
     )
     update = simple_sheet_adapter.register_uri(
-        "PUT",
-        (
-            "https://sheets.googleapis.com/v4/spreadsheets/1"
-            "/values/Sheet1!A6?valueInputOption=USER_ENTERED"
-        ),
-        json={
-            "spreadsheetId": "1",
-            "tableRange": "'Sheet1'!A1:F10",
-            "updates": {
-                "spreadsheetId": "1",
-                "updatedRange": "'Sheet1!A11",
-                "updatedRows": 1,
-                "updatedColumns": 1,
-                "updatedCells": 1,
-            },
-        },
+        "POST",
+        "https://sheets.googleapis.com/v4/spreadsheets/1/values:batchUpdate",
+        json={"spreadsheetId": "1", "totalUpdatedRows": 1},
     )
     get_values = simple_sheet_adapter.register_uri(
         "GET",
@@ -2038,6 +2550,8 @@ def test_unidirectional_sync_mode(
         ["UK", "10"],
     ]
 
+    gsheets_adapter.commit()
+
     # test that get_values was called only once
     assert get_values.call_count == 1
 
@@ -2317,11 +2831,11 @@ def test_get_cost(mocker: MockerFixture) -> None:
     """
     mock_authorized_session = mock.MagicMock()
     mocker.patch(
-        "shillelagh.adapters.api.gsheets.adapter.AuthorizedSession",
+        "shillelagh.adapters.api.gsheets.session.AuthorizedSession",
         mock_authorized_session,
     )
     mock_session = mock.MagicMock()
-    mocker.patch("shillelagh.adapters.api.gsheets.adapter.Session", mock_session)
+    mocker.patch("shillelagh.adapters.api.gsheets.session.Session", mock_session)
     mocker.patch(
         "shillelagh.adapters.api.gsheets.adapter.get_credentials",
         return_value=None,
@@ -0,0 +1,18 @@
+"""
+Fixtures for the Google Sheets adapter.
+"""
+from typing import Iterator
+
+import pytest
+
+from shillelagh.adapters.api.gsheets.session import clear_sessions
+
+
+@pytest.fixture(autouse=True)
+def pooled_sessions() -> Iterator[None]:
+    """
+    Prevent sessions from being shared between tests.
+    """
+    clear_sessions()
+    yield
+    clear_sessions()
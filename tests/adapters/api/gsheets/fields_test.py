@@ -1,4 +1,4 @@
-# pylint: disable=invalid-name
+# pylint: disable=invalid-name, protected-access
 """
 Tests for shillelagh.adapters.api.gsheets.fields.
 """
@@ -56,6 +56,23 @@ def test_GSheetsDateTime() -> None:
         == "12/31/2020 12:34:56"
     )
 
+    # the tokenized pattern is stored in the field
+    field = GSheetsDateTime(pattern="M/d/yyyy H:mm:ss")
+    field.parse("12/31/2020 12:34:56")
+    pattern = field._date_time_pattern
+    field.parse("1/1/2021 0:00:00")
+    assert field._date_time_pattern is pattern
+    field.pattern = "yyyy-mm-dd hh:mm:ss"
+    assert field.parse("2020-12-31 12:34:56") == datetime.datetime(
+        2020,
+        12,
+        31,
+        12,
+        34,
+        56,
+    )
+    assert field._date_time_pattern is not pattern
+
     assert GSheetsDateTime().quote(None) == "null"
     assert GSheetsDateTime().quote("") == "null"
     assert (
@@ -17,11 +17,15 @@ from shillelagh.adapters.api.gsheets.fields import (
     GSheetsTime,
 )
 from shillelagh.adapters.api.gsheets.lib import (
+    ChangeTracker,
     format_error_message,
     gen_letters,
     get_credentials,
+    get_delete_ranges,
     get_field,
     get_index_from_letters,
+    get_original_index,
+    get_row_ranges,
     get_sync_mode,
     get_url,
     get_value_from_cell,
@@ -275,6 +279,58 @@ def test_get_values_from_row() -> None:
     assert get_values_from_row(row, column_map) == 25 * [""] + ["BR", "", 10]  # type: ignore
 
 
+def test_get_original_index() -> None:
+    """
+    Test ``get_original_index``.
+    """
+    assert get_original_index(2, []) == 2
+    assert get_original_index(2, [5]) == 2
+    assert get_original_index(2, [0, 3]) == 4
+    assert get_original_index(0, [0, 1, 2]) == 3
+
+
+def test_get_delete_ranges() -> None:
+    """
+    Test ``get_delete_ranges``.
+    """
+    assert get_delete_ranges([]) == []
+    assert get_delete_ranges([4]) == [(4, 5)]
+    assert get_delete_ranges([1, 2, 3, 7, 5, 6]) == [(5, 8), (1, 4)]
+    assert get_delete_ranges([9, 1, 5]) == [(9, 10), (5, 6), (1, 2)]
+
+
+def test_get_row_ranges() -> None:
+    """
+    Test ``get_row_ranges``.
+    """
+    assert get_row_ranges([]) == []
+    assert get_row_ranges([1, 2, 3, 5, 6, 9]) == [(1, 4), (5, 7), (9, 10)]
+
+
+def test_change_tracker() -> None:
+    """
+    Test ``ChangeTracker``.
+    """
+    values = [["a", "b"], ["c"], ["d", "e", "f"], ["g"]]
+    tracker = ChangeTracker(values)
+    assert tracker.number_of_columns == 3
+    assert tracker.get_deleted_rows(4) == []
+    assert tracker.get_changed_rows() == []
+
+    tracker.update(1)
+    tracker.append()
+    tracker.update(4)  # appended rows are already tracked
+    tracker.delete(2)
+    tracker.append()
+    tracker.delete(0)
+    assert tracker.origins == [1, 3, None, None]
+    assert tracker.updated == {1}
+    assert tracker.get_deleted_rows(4) == [0, 2]
+    assert tracker.get_changed_rows() == [0, 2, 3]
+
+    assert ChangeTracker([]).number_of_columns == 0
+
+
 def test_get_credentials(mocker: MockerFixture):
     """
     Test ``get_credentials``.
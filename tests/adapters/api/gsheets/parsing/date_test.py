@@ -32,6 +32,7 @@ from shillelagh.adapters.api.gsheets.parsing.date import (
     S,
     SPlusDuration,
     format_date_time_pattern,
+    get_date_time_pattern,
     infer_column_type,
     parse_date_time_pattern,
     tokenize,
@@ -676,6 +677,36 @@ def test_parse_date_time_pattern() -> None:
     assert str(excinfo.value) == "Unsupported format"
 
 
+def test_date_time_pattern() -> None:
+    """
+    Test that patterns are tokenized once, and the fast path for default patterns.
+    """
+    pattern = get_date_time_pattern("m/d/yyyy h:mm:ss")
+    assert get_date_time_pattern("m/d/yyyy h:mm:ss") is pattern
+    assert repr(pattern) == "DateTimePattern('m/d/yyyy h:mm:ss')"
+    assert pattern.regex is not None
+    assert get_date_time_pattern("yyyy-mm-dd").regex is None
+
+    # the fast path should be equivalent to the tokens
+    values = ["9/1/2018 0:00:00", "12/31/2020 23:59:59", "01/02/2003 04:05:06"]
+    for value in values:
+        pattern.regex = None
+        expected = pattern.parse(value, datetime)
+        pattern.regex = get_date_time_pattern.__wrapped__(pattern.pattern).regex
+        assert pattern.parse(value, datetime) == expected
+
+    # invalid values fall back to the tokens, raising the same errors
+    with pytest.raises(Exception) as excinfo:
+        pattern.parse("13/45/2018 0:00:00", datetime)
+    assert str(excinfo.value) == "5/2018 0:00:00"
+    with pytest.raises(Exception) as excinfo:
+        get_date_time_pattern("m/d/yyyy").parse("1/2/2003", time)
+    assert str(excinfo.value) == "Unsupported format"
+
+    assert get_date_time_pattern("m/d/yyyy").parse("1/2/2003", date) == date(2003, 1, 2)
+    assert pattern.format(datetime(2003, 1, 2, 4, 5, 6)) == "1/2/2003 4:05:06"
+
+
 def test_format_date_time_pattern() -> None:
     """
     Test the format_date_time_pattern function.
@@ -21,6 +21,7 @@ from shillelagh.adapters.api.gsheets.parsing.number import (
     fix_periods,
     format_number_pattern,
     get_fraction,
+    get_tokens,
     has_condition,
     parse_number_pattern,
 )
@@ -319,6 +320,20 @@ def test_condition_matches() -> None:
     assert condition_matches(527, "0000") is True
 
 
+def test_get_tokens() -> None:
+    """
+    Test that format patterns are tokenized once.
+    """
+    assert get_tokens("#,##0.00") is get_tokens("#,##0.00")
+    assert get_tokens("0.0.0") == [
+        DIGITS("0"),
+        PERIOD("."),
+        DIGITS("0"),
+        LITERAL("."),
+        DIGITS("0"),
+    ]
+
+
 def test_parse_number_pattern() -> None:
     """
     Test ``parse_number_pattern``.
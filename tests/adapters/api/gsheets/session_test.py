@@ -0,0 +1,183 @@
+"""
+Tests for shillelagh.adapters.api.gsheets.session.
+"""
+# pylint: disable=redefined-outer-name
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, List
+from unittest import mock
+
+import pytest
+from pytest_mock import MockerFixture
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from shillelagh.adapters.api.gsheets.session import (
+    clear_sessions,
+    create_session,
+    get_pooled_session,
+    get_session_key,
+    refresh_credentials,
+)
+
+
+class CountingServer(ThreadingHTTPServer):
+    """
+    An HTTP server that counts TCP connections.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.connections: List[Any] = []
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self.connections.append(client_address)
+        super().process_request(request, client_address)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Respond with an empty JSON object, keeping the connection alive.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handle a GET request.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def counting_server() -> Iterator[CountingServer]:
+    """
+    Run a local HTTP server.
+    """
+    server = CountingServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections(counting_server: CountingServer) -> None:
+    """
+    Test that requests with a pooled session reuse the connection.
+    """
+    server = counting_server
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    # previously each request used a new session
+    for _ in range(3):
+        Session().get(url).raise_for_status()
+    assert len(server.connections) == 3
+
+    server.connections.clear()
+    key = get_session_key()
+    for _ in range(3):
+        get_pooled_session(key, None).get(url).raise_for_status()
+    assert len(server.connections) == 1
+
+
+def test_get_session_key() -> None:
+    """
+    Test ``get_session_key``.
+    """
+    assert get_session_key(service_account_info={"a": 1, "b": 2}) == get_session_key(
+        service_account_info={"b": 2, "a": 1},
+    )
+    assert get_session_key(access_token="XXX") != get_session_key(access_token="YYY")
+    assert get_session_key(pool_size=1) != get_session_key(pool_size=2)
+
+    # credentials are not part of the key
+    assert "XXX" not in get_session_key(access_token="XXX")
+    assert "secret" not in get_session_key(service_account_info={"key": "secret"})
+
+
+def test_create_session(mocker: MockerFixture) -> None:
+    """
+    Test ``create_session``.
+    """
+    session = create_session(None, 4)
+    adapter = session.get_adapter("https://sheets.googleapis.com/")
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 4  # pylint: disable=protected-access
+
+    AuthorizedSession = mocker.patch(  # pylint: disable=invalid-name
+        "shillelagh.adapters.api.gsheets.session.AuthorizedSession",
+    )
+    credentials = mock.MagicMock()
+    session = create_session(credentials, 4)
+    AuthorizedSession.assert_called_with(credentials)
+    assert session is AuthorizedSession.return_value
+    assert AuthorizedSession.return_value.mount.call_count == 2
+
+
+def test_refresh_credentials(mocker: MockerFixture) -> None:
+    """
+    Test ``refresh_credentials``.
+    """
+    mocker.patch("shillelagh.adapters.api.gsheets.session.Request")
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    credentials = mock.MagicMock()
+    credentials.expiry = now + datetime.timedelta(hours=1)
+    refresh_credentials(credentials)
+    credentials.refresh.assert_not_called()
+
+    credentials.expiry = now + datetime.timedelta(minutes=1)
+    refresh_credentials(credentials)
+    credentials.refresh.assert_called()
+
+    credentials = mock.MagicMock()
+    credentials.expiry = None
+    refresh_credentials(credentials)
+    credentials.refresh.assert_not_called()
+
+    refresh_credentials(None)
+
+
+def test_get_pooled_session(mocker: MockerFixture) -> None:
+    """
+    Test ``get_pooled_session``.
+    """
+    refresh_credentials = mocker.patch(
+        "shillelagh.adapters.api.gsheets.session.refresh_credentials",
+    )
+
+    session = get_pooled_session(get_session_key(access_token="XXX"), None)
+    assert get_pooled_session(get_session_key(access_token="XXX"), None) is session
+    assert get_pooled_session(get_session_key(access_token="YYY"), None) is not session
+    assert refresh_credentials.call_count == 3
+
+    close = mocker.spy(session, "close")
+    clear_sessions()
+    close.assert_called()
+    assert get_pooled_session(get_session_key(access_token="XXX"), None) is not session
+
+
+def test_get_pooled_session_lru(mocker: MockerFixture) -> None:
+    """
+    Test that only the most recently used sessions are kept.
+    """
+    mocker.patch("shillelagh.adapters.api.gsheets.session.refresh_credentials")
+    mocker.patch("shillelagh.adapters.api.gsheets.session.MAX_SESSIONS", new=2)
+
+    xxx = get_pooled_session(get_session_key(access_token="XXX"), None)
+    yyy = get_pooled_session(get_session_key(access_token="YYY"), None)
+    assert get_pooled_session(get_session_key(access_token="XXX"), None) is xxx
+
+    # the least recently used session is removed
+    get_pooled_session(get_session_key(access_token="ZZZ"), None)
+    assert get_pooled_session(get_session_key(access_token="XXX"), None) is xxx
+    assert get_pooled_session(get_session_key(access_token="YYY"), None) is not yyy
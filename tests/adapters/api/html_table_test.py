@@ -5,6 +5,7 @@ import pandas as pd
 import pytest
 from pytest_mock import MockerFixture
 
+from shillelagh.adapters.api.html_table import HTMLTableAPI
 from shillelagh.backends.apsw.db import connect
 from shillelagh.exceptions import ProgrammingError
 
@@ -83,3 +84,23 @@ def test_html_table_fragment(mocker: MockerFixture) -> None:
         (12, 13.3, "Platinum_St"),
         (13, 12.1, "Kodiak_Trail"),
     ]
+
+
+def test_html_table_get_data(mocker: MockerFixture) -> None:
+    """
+    Test reading rows directly from the adapter.
+    """
+    df = pd.DataFrame(  # pylint: disable=invalid-name
+        [
+            {"index": 10, "temperature": 15.2, "site": "Diamond_St"},
+            {"index": 11, "temperature": 13.1, "site": "Blacktail_Loop"},
+        ],
+    )
+    mock_pd = mocker.patch("shillelagh.adapters.api.html_table.pd")
+    mock_pd.read_html.return_value = [df]
+
+    adapter = HTMLTableAPI("https://example.org/")
+    assert list(adapter.get_data({}, [], requested_columns={"site"})) == [
+        {"rowid": 0, "site": "Diamond_St"},
+        {"rowid": 1, "site": "Blacktail_Loop"},
+    ]
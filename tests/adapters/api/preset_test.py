@@ -282,6 +282,36 @@ def test_preset_workspace_error(requests_mock: Mocker) -> None:
     )
 
 
+def test_preset_workspace_prefetch(requests_mock: Mocker) -> None:
+    """
+    Test fetching pages concurrently, until an empty page.
+    """
+    requests_mock.post(
+        "https://api.app.preset.io/v1/auth/",
+        json={"payload": {"access_token": "SECRET"}},
+    )
+    for page in range(3):
+        requests_mock.get(
+            "https://abcdef01.us1a.app.preset.io/api/v1/chart/"
+            f"?q=(page:{page},page_size:100)",
+            json={
+                "result": [
+                    {"id": page * 100 + i} for i in range(100 if page < 2 else 0)
+                ],
+            },
+        )
+
+    adapter = PresetWorkspaceAPI(
+        "https://abcdef01.us1a.app.preset.io/api/v1/chart/",
+        access_token="XXX",
+        access_secret="YYY",
+        cache_expiration=-1,
+    )
+    rows = list(adapter.get_data({}, []))
+    assert [row["id"] for row in rows] == list(range(200))
+    assert [row["rowid"] for row in rows[99:101]] == [99, 0]
+
+
 def test_preset_workspace_no_urls(mocker: MockerFixture, requests_mock: Mocker) -> None:
     """
     Test when no URLs are returned.
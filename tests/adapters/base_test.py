@@ -1,10 +1,12 @@
 """
 Test for shillelagh.adapter.base.
 """
+import asyncio
 from datetime import datetime
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import pytest
+from pytest_mock import MockerFixture
 
 from shillelagh.adapters.base import Adapter
 from shillelagh.adapters.registry import AdapterLoader
@@ -106,6 +108,20 @@ def test_adapter_get_data() -> None:
     ]
 
 
+def test_adapter_get_data_async() -> None:
+    """
+    Test the default ``get_data_async``.
+    """
+    adapter = FakeAdapter()
+
+    async def collect() -> List[Row]:
+        return [row async for row in adapter.get_data_async({}, [], limit=1)]
+
+    assert asyncio.run(collect()) == [
+        {"rowid": 0, "name": "Alice", "age": 20, "pets": 0},
+    ]
+
+
 def test_adapter_get_rows() -> None:
     """
     Test ``get_rows``.
@@ -129,6 +145,62 @@ def test_adapter_get_rows() -> None:
     ]
 
 
+def test_adapter_get_batches(mocker: MockerFixture) -> None:
+    """
+    Test ``get_batches``.
+    """
+    mocker.patch("shillelagh.adapters.base.BATCH_SIZE", new=2)
+    adapter = FakeAdapter()
+    adapter.insert_row({"rowid": None, "name": "Charlie", "age": 6, "pets": 1})
+
+    batches = adapter.get_batches({}, [])
+    assert list(batches) == [
+        {
+            "rowid": [0, 1],
+            "age": [20.0, 23.0],
+            "name": ["Alice", "Bob"],
+            "pets": [0, 3],
+        },
+        {"rowid": [2], "age": [6.0], "name": ["Charlie"], "pets": [1]},
+    ]
+
+    batches = adapter.get_batches({}, [], requested_columns={"name"})
+    assert list(batches) == [
+        {
+            "rowid": [None, None],
+            "age": [None, None],
+            "name": ["Alice", "Bob"],
+            "pets": [None, None],
+        },
+        {"rowid": [None], "age": [None], "name": ["Charlie"], "pets": [None]},
+    ]
+
+    batches = adapter.get_batches({"name": Equal("Dani")}, [])
+    assert not list(batches)
+
+
+def test_adapter_insert_rows() -> None:
+    """
+    Test inserting multiple rows.
+    """
+    adapter = FakeAdapter()
+
+    row_ids = adapter.insert_rows(
+        [
+            {"rowid": None, "name": "Charlie", "age": 6, "pets": 1},
+            {"rowid": 4, "name": "Dani", "age": 40, "pets": 2},
+        ],
+    )
+    assert row_ids == [2, 4]
+    data = adapter.get_data({}, [])
+    assert list(data) == [
+        {"rowid": 0, "name": "Alice", "age": 20, "pets": 0},
+        {"rowid": 1, "name": "Bob", "age": 23, "pets": 3},
+        {"rowid": 2, "name": "Charlie", "age": 6, "pets": 1},
+        {"rowid": 4, "name": "Dani", "age": 40, "pets": 2},
+    ]
+
+
 def test_adapter_manipulate_rows() -> None:
     """
     Test ``DML``.
@@ -2,16 +2,21 @@
 """
 Tests for shillelagh.adapters.file.csvfile.
 """
+import inspect
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import apsw
 import pytest
+import requests
 from freezegun import freeze_time
 from pyfakefs.fake_filesystem import FakeFilesystem
+from pytest_mock import MockerFixture
 from requests_mock.mocker import Mocker
 
 from shillelagh.adapters.file.csvfile import CSVFile, RowTracker
+from shillelagh.adapters.file.csvindex import CSVIndex
 from shillelagh.backends.apsw.db import connect
 from shillelagh.backends.apsw.vt import VTModule
 from shillelagh.exceptions import ProgrammingError
@@ -92,6 +97,206 @@ def test_csvfile_get_cost(fs: FakeFilesystem) -> None:
     )
 
 
+def test_csvfile_get_cost_index(fs: FakeFilesystem) -> None:
+    """
+    Test cost estimation with an index.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    adapter = CSVFile("test.csv", index_columns=["index"])
+    assert adapter.get_cost([], []) == 0
+    assert adapter.get_cost([("index", Operator.EQ)], []) == 10
+    assert adapter.get_cost([("index", Operator.GT), ("site", Operator.EQ)], []) == 10
+    assert adapter.get_cost([("index", Operator.NE)], []) == 1000
+    assert adapter.get_cost([("site", Operator.EQ)], []) == 1000
+
+
+def test_csvfile_index(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test the whole workflow with an index.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+    build = mocker.spy(CSVIndex, "build")
+
+    connection = apsw.Connection(":memory:")
+    cursor = connection.cursor()
+    connection.createmodule("csvfile", VTModule(CSVFile))
+    cursor.execute(
+        f"""CREATE VIRTUAL TABLE test USING csvfile(
+            '{serialize('test.csv')}',
+            '{serialize(['index', 'site'])}'
+        )""",
+    )
+    assert Path("test.csv.idx").exists()
+
+    sql = 'SELECT * FROM test WHERE "index" > 11'
+    data = list(cursor.execute(sql))
+    assert data == [(12.0, 13.3, "Platinum_St"), (13.0, 12.1, "Kodiak_Trail")]
+
+    sql = """INSERT INTO test ("index", temperature, site) VALUES (14, 10.1, 'New_Site')"""
+    cursor.execute(sql)
+    assert CSVIndex(Path("test.csv"), ["index", "temperature", "site"], []).load()
+    sql = 'SELECT * FROM test WHERE "index" > 11'
+    data = list(cursor.execute(sql))
+    assert data == [
+        (12.0, 13.3, "Platinum_St"),
+        (13.0, 12.1, "Kodiak_Trail"),
+        (14.0, 10.1, "New_Site"),
+    ]
+
+    sql = "DELETE FROM test WHERE site = 'Kodiak_Trail'"
+    cursor.execute(sql)
+    sql = 'SELECT * FROM test WHERE "index" > 11'
+    data = list(cursor.execute(sql))
+    assert data == [
+        (12.0, 13.3, "Platinum_St"),
+        (14.0, 10.1, "New_Site"),
+    ]
+
+    # the index is updated in place
+    build.assert_called_once()
+
+    sql = 'SELECT * FROM test WHERE temperature > 13 ORDER BY "index" DESC'
+    data = list(cursor.execute(sql))
+    assert data == [
+        (12.0, 13.3, "Platinum_St"),
+        (11.0, 13.1, "Blacktail_Loop"),
+        (10.0, 15.2, "Diamond_St"),
+    ]
+
+    connection.close()
+
+    # the index is rebuilt after garbage collection
+    adapter = CSVFile("test.csv", index_columns=["index", "site"])
+    assert adapter.index is not None
+    assert adapter.index.is_valid()
+    assert adapter.index.keys["index"] == [10.0, 11.0, 12.0, 14.0]
+
+
+def test_csvfile_insert_many(fs: FakeFilesystem) -> None:
+    """
+    Test inserting multiple rows at once, with an index.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    connection = apsw.Connection(":memory:")
+    cursor = connection.cursor()
+    connection.createmodule("csvfile", VTModule(CSVFile))
+    cursor.execute(
+        f"""CREATE VIRTUAL TABLE test USING csvfile(
+            '{serialize('test.csv')}',
+            '{serialize(['index', 'site'])}'
+        )""",
+    )
+
+    # rows are only buffered inside transactions
+    cursor.execute("BEGIN")
+    cursor.executemany(
+        'INSERT INTO test ("index", temperature, site) VALUES (?, ?, ?)',
+        [(14, 10.1, "New_Site"), (15, 9.8, "Newer_Site")],
+    )
+    assert list(cursor.execute("SELECT last_insert_rowid()")) == [(0,)]
+    cursor.execute("COMMIT")
+    sql = "SELECT * FROM test WHERE site = 'Newer_Site'"
+    data = list(cursor.execute(sql))
+    assert data == [(15.0, 9.8, "Newer_Site")]
+
+    # outside of a transaction rows are inserted immediately, with their real IDs
+    cursor.execute(
+        'INSERT INTO test ("index", temperature, site) VALUES (16, 9.5, "Site")',
+    )
+    assert list(cursor.execute("SELECT last_insert_rowid()")) == [(7,)]
+
+    connection.close()
+
+    adapter = CSVFile("test.csv", index_columns=["index", "site"])
+    assert adapter.index is not None
+    assert adapter.index.keys["index"] == [
+        10.0,
+        11.0,
+        12.0,
+        13.0,
+        14.0,
+        15.0,
+        16.0,
+    ]
+
+
+def test_csvfile_rollback(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test rolling back changes to the file.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    connection = connect(
+        ":memory:",
+        ["csvfile"],
+        adapter_kwargs={"csvfile": {"index_columns": ["site"]}},
+        isolation_level="IMMEDIATE",
+    )
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """INSERT INTO "test.csv" ("index", temperature, site) VALUES (9, 10.1, 'A')""",
+    )
+    cursor.execute("""DELETE FROM "test.csv" WHERE site = 'Diamond_St'""")
+    assert cursor.execute('SELECT COUNT(*) FROM "test.csv"').fetchall() == [(4,)]
+    connection.rollback()
+
+    with open("test.csv", encoding="utf-8") as fp:
+        assert fp.read() == CONTENTS
+    cursor.execute("""SELECT "index" FROM "test.csv" WHERE site = 'Diamond_St'""")
+    assert cursor.fetchall() == [(10.0,)]
+    cursor.execute("""SELECT "index" FROM "test.csv" WHERE site = 'A'""")
+    assert cursor.fetchall() == []
+
+    # committed changes are kept
+    cursor.execute("""DELETE FROM "test.csv" WHERE site = 'Diamond_St'""")
+    connection.commit()
+    connection.rollback()
+    assert cursor.execute('SELECT COUNT(*) FROM "test.csv"').fetchall() == [(3,)]
+    connection.close()
+
+    # without an index
+    adapter = CSVFile("test.csv")
+    with open("test.csv", encoding="utf-8") as fp:
+        contents = fp.read()
+    adapter.begin()
+    adapter.insert_data({"index": 9, "temperature": 10.1, "site": "A", "rowid": None})
+    adapter.rollback()
+    with open("test.csv", encoding="utf-8") as fp:
+        assert fp.read() == contents
+
+    # nothing to roll back
+    mocker.patch.object(adapter, "index")
+    adapter.begin()
+    adapter.rollback()
+    adapter.index.build.assert_not_called()
+
+    # remote files are read-only, so there's nothing to roll back
+    adapter.local = False
+    adapter.begin()
+    adapter.num_rows += 1
+    adapter.rollback()
+    assert adapter.num_rows == 5
+
+
+def test_csvfile_index_stale(fs: FakeFilesystem) -> None:
+    """
+    Test that the index is rebuilt when the file is modified externally.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    adapter = CSVFile("test.csv", index_columns=["index"])
+    with open("test.csv", "a", encoding="utf-8") as fp:
+        fp.write('14.0,10.1,"New_Site"\n')
+    adapter.row_id_manager.insert()
+
+    assert list(adapter.get_data({"index": Equal(14)}, [])) == [
+        {"rowid": 4, "index": 14.0, "temperature": 10.1, "site": "New_Site"},
+    ]
+
+
 def test_csvfile_different_types(fs: FakeFilesystem) -> None:
     """
     Test type coercion when a column has different types.
@@ -235,6 +440,101 @@ def test_csvfile_get_data_impossible_filter(fs: FakeFilesystem) -> None:
     assert list(adapter.get_data({"index": Impossible()}, [])) == []
 
 
+def test_csvfile_parallel(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test scanning the file in parallel.
+    """
+    mocker.patch(
+        "shillelagh.adapters.file.csvparallel.ProcessPoolExecutor",
+        new=ThreadPoolExecutor,
+    )
+    mocker.patch("shillelagh.adapters.file.csvparallel.CHUNK_SIZE", new=30)
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    adapter = CSVFile("test.csv", workers=2)
+    assert adapter.num_rows == 4
+    assert adapter.last_row == {
+        "index": 13.0,
+        "temperature": 12.1,
+        "site": "Kodiak_Trail",
+    }
+    assert adapter.get_columns() == CSVFile("test.csv").get_columns()
+
+    adapter.delete_data(1)
+    adapter.insert_data({"rowid": None, "index": 14, "temperature": 11.1, "site": "A"})
+    assert list(adapter.get_data({"index": Range(11, None, False, False)}, [])) == [
+        {"rowid": 2, "index": 12.0, "temperature": 13.3, "site": "Platinum_St"},
+        {"rowid": 3, "index": 13.0, "temperature": 12.1, "site": "Kodiak_Trail"},
+        {"rowid": 4, "index": 14.0, "temperature": 11.1, "site": "A"},
+    ]
+    assert list(adapter.get_data({}, [("temperature", Order.ASCENDING)], limit=2),) == [
+        {"rowid": 4, "index": 14.0, "temperature": 11.1, "site": "A"},
+        {"rowid": 3, "index": 13.0, "temperature": 12.1, "site": "Kodiak_Trail"},
+    ]
+
+    # the file is unmapped once the limit is reached
+    scan_chunks = mocker.spy(adapter, "_scan_chunks")
+    rows = adapter.get_data({}, [], limit=1)
+    assert next(rows)["rowid"] == 0
+    assert inspect.getgeneratorstate(scan_chunks.spy_return) == inspect.GEN_SUSPENDED
+    assert list(rows) == []
+    assert inspect.getgeneratorstate(scan_chunks.spy_return) == inspect.GEN_CLOSED
+
+
+def test_csvfile_sampled(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test inferring types from a sample of the rows.
+    """
+    contents = """"a","b"
+1,2
+2,1
+3,0
+4,"four"
+"""
+    fs.create_file("test.csv", contents=contents)
+
+    adapter = CSVFile("test.csv", sample_size=2)
+    assert adapter.confident is False
+    assert adapter.num_rows == 4
+    assert adapter.last_row is None
+    assert adapter.get_columns() == {
+        "a": Float(
+            filters=[Range, Equal, NotEqual, IsNull, IsNotNull],
+            order=Order.NONE,
+            exact=True,
+        ),
+        "b": Float(
+            filters=[Range, Equal, NotEqual, IsNull, IsNotNull],
+            order=Order.NONE,
+            exact=True,
+        ),
+    }
+
+    # types are widened when the rows are read
+    assert list(adapter.get_data({}, [])) == [
+        {"rowid": 0, "a": 1.0, "b": 2.0},
+        {"rowid": 1, "a": 2.0, "b": 1.0},
+        {"rowid": 2, "a": 3.0, "b": 0.0},
+        {"rowid": 3, "a": 4.0, "b": "four"},
+    ]
+    assert isinstance(adapter.get_columns()["a"], Float)
+    assert isinstance(adapter.get_columns()["b"], String)
+
+    # stratified samples read rows across the file
+    adapter = CSVFile("test.csv", sample_size=2, sampling="stratified")
+    assert isinstance(adapter.get_columns()["b"], String)
+
+    mocker.patch("shillelagh.lib.random.randint", side_effect=[0, 1])
+    adapter = CSVFile("test.csv", sample_size=2, sampling="reservoir")
+    assert isinstance(adapter.get_columns()["b"], String)
+
+    # small files are fully analyzed
+    adapter = CSVFile("test.csv", sample_size=10)
+    assert adapter.confident is True
+    assert adapter.get_columns()["a"].order == Order.ASCENDING
+    assert adapter.last_row == {"a": 4.0, "b": "four"}
+
+
 def test_csvfile(fs: FakeFilesystem) -> None:
     """
     Test the whole workflow.
@@ -340,6 +640,25 @@ def test_drop_table(fs: FakeFilesystem) -> None:
     assert not Path("test.csv").exists()
 
 
+def test_drop_table_with_index(fs: FakeFilesystem) -> None:
+    """
+    Test that dropping the table also removes the index.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    connection = connect(
+        ":memory:",
+        ["csvfile"],
+        adapter_kwargs={"csvfile": {"index_columns": ["index"]}},
+    )
+    cursor = connection.cursor()
+
+    sql = 'DROP TABLE "test.csv"'
+    cursor.execute(sql)
+    assert not Path("test.csv").exists()
+    assert not Path("test.csv.idx").exists()
+
+
 def test_row_tracker() -> None:
     """
     Test the RowTracker.
@@ -396,6 +715,24 @@ def test_cleanup(fs: FakeFilesystem, requests_mock: Mocker) -> None:
     assert not adapter.path.exists()
 
 
+def test_remote_file_streamed(
+    fs: FakeFilesystem,
+    mocker: MockerFixture,
+    requests_mock: Mocker,
+) -> None:
+    """
+    Test that remote files are downloaded in blocks.
+    """
+    mocker.patch("shillelagh.adapters.file.csvfile.DOWNLOAD_CHUNK_SIZE", new=10)
+    requests_mock.get("https://example.com/test.csv", text=CONTENTS)
+    iter_content = mocker.spy(requests.Response, "iter_content")
+
+    adapter = CSVFile("https://example.com/test.csv")
+    iter_content.assert_called_with(mocker.ANY, 10)
+    assert adapter.path.read_text(encoding="utf-8") == CONTENTS
+    assert adapter.num_rows == 4
+
+
 def test_cleanup_file_deleted(fs: FakeFilesystem, requests_mock: Mocker) -> None:
     """
     Test that no exception is raised if local file is deleted.
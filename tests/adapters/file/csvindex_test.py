@@ -0,0 +1,231 @@
+"""
+Tests for shillelagh.adapters.file.csvindex.
+"""
+import json
+from pathlib import Path
+
+from pyfakefs.fake_filesystem import FakeFilesystem
+from pytest_mock import MockerFixture
+
+from shillelagh.adapters.file.csvindex import CSVIndex, merge_stats, overlaps
+from shillelagh.filters import Equal, Impossible, NotEqual, Range
+
+CONTENTS = """"index","temperature","site"
+10,15.2,"Diamond_St"
+11,13.1,"Blacktail_Loop"
+12,13.3,"Platinum_St"
+13,12.1,"Kodiak
+Trail"
+"""
+
+
+def test_merge_stats() -> None:
+    """
+    Test ``merge_stats``.
+    """
+    assert merge_stats((1, 2), 3) == (1, 3)
+    assert merge_stats((1, 2), 0) == (0, 2)
+    assert merge_stats((1, 2), "a") is None
+    assert merge_stats(None, 1) is None
+
+
+def test_overlaps() -> None:
+    """
+    Test ``overlaps``.
+    """
+    assert overlaps(None, Equal(1))
+    assert overlaps((1, 3), Equal(2))
+    assert not overlaps((1, 3), Equal(4))
+    assert overlaps((1, 3), Equal("a"))  # can't compare
+    assert overlaps((1, 3), Range(3, None, True, False))
+    assert not overlaps((1, 3), Range(3, None, False, False))
+    assert not overlaps((1, 3), Range(4, None, True, False))
+    assert overlaps((1, 3), Range(None, 1, False, True))
+    assert not overlaps((1, 3), Range(None, 1, False, False))
+    assert not overlaps((1, 3), Range(None, 0, False, True))
+    assert overlaps((1, 3), NotEqual(2))
+
+
+def test_csvindex(fs: FakeFilesystem) -> None:
+    """
+    Test building and querying the index.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    index = CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["index"])
+    assert index.num_rows == 4
+    assert index.index_columns == ["index"]
+    assert index.keys == {"index": [10.0, 11.0, 12.0, 13.0]}
+    assert index.blocks == [
+        {
+            "index": (10.0, 13.0),
+            "temperature": (12.1, 15.2),
+            "site": ("Blacktail_Loop", "Platinum_St"),
+        },
+    ]
+    assert Path("test.csv.idx").exists()
+
+    assert index.get_ranges({"index": Equal(11)}) == [range(1, 2)]
+    assert index.get_ranges({"index": Range(11, 13, False, True)}) == [range(2, 4)]
+    assert index.get_ranges({"index": Range(11, 13, True, False)}) == [range(1, 3)]
+    assert index.get_ranges({"index": Range(None, None, False, False)}) == [
+        range(0, 4),
+    ]
+    assert index.get_ranges(
+        {"index": Range(11, None, True, False), "temperature": Equal(13.3)},
+    ) == [range(1, 4)]
+    assert index.get_ranges({"index": Equal(11), "temperature": Equal(13.3)}) == [
+        range(1, 2),
+    ]
+    assert index.get_ranges({"index": NotEqual(11)}) == [range(0, 4)]
+    assert index.get_ranges({"index": Equal("a")}) == [range(0, 4)]
+    assert index.get_ranges({"index": Equal(11), "site": Impossible()}) == []
+
+    # block statistics
+    assert index.get_ranges({"temperature": Equal(30)}) == []
+    assert index.get_ranges({"temperature": Equal(13.3)}) == [range(0, 4)]
+
+    assert list(index.read([range(1, 2), range(3, 4)])) == [
+        (1, [11.0, 13.1, "Blacktail_Loop"]),
+        (3, [13.0, 12.1, "Kodiak\nTrail"]),
+    ]
+
+
+def test_csvindex_load(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test loading the index from disk.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+    CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["index"])
+
+    build = mocker.spy(CSVIndex, "build")
+    index = CSVIndex.open(
+        Path("test.csv"),
+        ["index", "temperature", "site"],
+        ["index"],
+    )
+    build.assert_not_called()
+    assert index.keys == {"index": [10.0, 11.0, 12.0, 13.0]}
+    assert index.blocks[0]["index"] == (10.0, 13.0)
+    assert index.is_valid()
+
+    # a different set of indexed columns
+    index = CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["site"])
+    build.assert_called()
+    assert index.keys == {
+        "site": ["Blacktail_Loop", "Diamond_St", "Kodiak\nTrail", "Platinum_St"],
+    }
+
+    # invalid file
+    build.reset_mock()
+    with open("test.csv.idx", "w", encoding="utf-8") as fp:
+        fp.write("invalid")
+    CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["site"])
+    build.assert_called()
+
+    # stale index
+    build.reset_mock()
+    with open("test.csv", "a", encoding="utf-8") as fp:
+        fp.write('14,10.1,"New_Site"\n')
+    index = CSVIndex.open(
+        Path("test.csv"),
+        ["index", "temperature", "site"],
+        ["site"],
+    )
+    build.assert_called()
+    assert index.num_rows == 5
+
+    # different version
+    build.reset_mock()
+    with open("test.csv.idx", encoding="utf-8") as fp:
+        payload = json.load(fp)
+    payload["version"] = 0
+    with open("test.csv.idx", "w", encoding="utf-8") as fp:
+        json.dump(payload, fp)
+    CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["site"])
+    build.assert_called()
+
+
+def test_csvindex_mixed_types(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test that columns with mixed types are not indexed.
+    """
+    mocker.patch("shillelagh.adapters.file.csvindex.BLOCK_SIZE", new=2)
+    fs.create_file(
+        "test.csv",
+        contents=""""a","b"
+1,"one"
+"two",2
+3,"three"
+""",
+    )
+
+    index = CSVIndex.open(Path("test.csv"), ["a", "b"], ["a", "b"])
+    assert index.index_columns == []
+    assert index.blocks == [{"a": None, "b": None}, {"a": (3, 3), "b": ("three",) * 2}]
+    assert index.get_ranges({"a": Equal(3)}) == [range(0, 3)]
+    assert index.get_ranges({"a": Equal(4)}) == [range(0, 2)]
+    assert list(index.read([range(0, 3)])) == [
+        (0, [1.0, "one"]),
+        (1, ["two", 2.0]),
+        (2, [3.0, "three"]),
+    ]
+
+
+def test_csvindex_dml(fs: FakeFilesystem) -> None:
+    """
+    Test updating the index after rows are inserted and deleted.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+    index = CSVIndex.open(Path("test.csv"), ["index", "temperature", "site"], ["index"])
+
+    offset = Path("test.csv").stat().st_size
+    with open("test.csv", "a", encoding="utf-8") as fp:
+        fp.write('11.5,10.1,"New_Site"\n')
+    index.add_row(offset, {"index": 11.5, "temperature": 10.1, "site": "New_Site"})
+    assert not index.is_valid()
+    index.sync()
+    assert index.is_valid()
+
+    # the sidecar file is up to date
+    loaded = CSVIndex(Path("test.csv"), ["index", "temperature", "site"], ["index"])
+    assert loaded.load()
+    assert loaded.offsets == index.offsets
+    assert index.keys == {"index": [10.0, 11.0, 11.5, 12.0, 13.0]}
+    assert index.positions == {"index": [0, 1, 4, 2, 3]}
+    assert index.blocks[0]["temperature"] == (10.1, 15.2)
+    assert list(index.read(index.get_ranges({"index": Equal(11.5)}))) == [
+        (4, [11.5, 10.1, "New_Site"]),
+    ]
+
+    index.remove_row(1)
+    assert index.keys == {"index": [10.0, 11.5, 12.0, 13.0]}
+    assert index.positions == {"index": [0, 4, 2, 3]}
+
+    # rows with the same key
+    offset = Path("test.csv").stat().st_size
+    with open("test.csv", "a", encoding="utf-8") as fp:
+        fp.write('10,10.1,"New_Site"\n')
+    index.add_row(offset, {"index": 10.0, "temperature": 10.1, "site": "New_Site"})
+    index.sync()
+    assert index.positions == {"index": [0, 5, 4, 2, 3]}
+    index.remove_row(0)
+    assert index.keys == {"index": [10.0, 11.5, 12.0, 13.0]}
+    assert index.positions == {"index": [5, 4, 2, 3]}
+
+    # value that can't be compared with the existing ones
+    offset = Path("test.csv").stat().st_size
+    with open("test.csv", "a", encoding="utf-8") as fp:
+        fp.write('"invalid",10.1,"New_Site"\n')
+    index.add_row(offset, {"index": "invalid", "temperature": 10.1, "site": "New_Site"})
+    index.sync()
+    assert index.index_columns == []
+    assert index.keys == {}
+    assert index.num_rows == 7
+
+    # nothing to update without column indexes
+    index.remove_row(6)
+
+    index.delete()
+    assert not Path("test.csv.idx").exists()
+    index.delete()
@@ -0,0 +1,302 @@
+"""
+Tests for shillelagh.adapters.file.csvparallel.
+"""
+import inspect
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List
+
+from pyfakefs.fake_filesystem import FakeFilesystem
+from pytest_mock import MockerFixture
+
+from shillelagh.adapters.file import csvparallel
+from shillelagh.adapters.file.csvparallel import (
+    Chunk,
+    count_records,
+    get_data_offset,
+    iter_chunks,
+    iter_lines,
+    iter_rows,
+    map_chunks,
+    open_mapped,
+    read_chunk,
+    release,
+    sample_records,
+    scan_chunk,
+    summarize_chunk,
+)
+from shillelagh.fields import Float, Order, String
+from shillelagh.filters import Range
+
+CONTENTS = b""""index","temperature","site"
+10,15.2,"Diamond_St"
+11,13.1,"Blacktail_Loop"
+12,13.3,"The ""Platinum""
+St"
+13,12.1,"Kodiak
+Trail"
+"""
+
+ROWS = [
+    [10.0, 15.2, "Diamond_St"],
+    [11.0, 13.1, "Blacktail_Loop"],
+    [12.0, 13.3, 'The "Platinum"\nSt'],
+    [13.0, 12.1, "Kodiak\nTrail"],
+]
+
+
+def test_iter_chunks() -> None:
+    """
+    Test splitting a buffer on record boundaries.
+    """
+    start = get_data_offset(CONTENTS)
+    assert start == 29
+
+    # every chunk must have full records, even when the target falls inside a
+    # quoted newline
+    for chunk_size in range(1, len(CONTENTS)):
+        chunks = list(iter_chunks(CONTENTS, start, chunk_size))
+        assert chunks[0][0] == start
+        assert chunks[-1][1] == len(CONTENTS)
+        rows = [row for chunk in chunks for row in read_chunk(CONTENTS, *chunk)]
+        assert rows == ROWS
+
+    assert list(iter_chunks(CONTENTS, start, 20)) == [
+        (29, 50),
+        (50, 75),
+        (75, 105),
+        (105, 128),
+    ]
+    assert list(iter_chunks(CONTENTS, start)) == [(29, 128)]
+
+    # no trailing newline
+    assert list(iter_chunks(b'"a"\n1\n2\n3', 4, 2)) == [(4, 8), (8, 9)]
+
+
+def test_iter_chunks_release(mocker: MockerFixture) -> None:
+    """
+    Test that the pages of a chunk are only released after it has been read.
+    """
+    release_ = mocker.patch("shillelagh.adapters.file.csvparallel.release")
+
+    chunks = iter_chunks(CONTENTS, 29, 20)
+    assert next(chunks) == (29, 50)
+    release_.assert_not_called()
+    assert next(chunks) == (50, 75)
+    release_.assert_called_once_with(CONTENTS, 29, 50)
+
+
+def test_open_mapped(tmp_path: Path) -> None:
+    """
+    Test memory-mapping a file.
+    """
+    path = tmp_path / "test.csv"
+    path.write_bytes(CONTENTS)
+    with open_mapped(path) as buffer:
+        assert isinstance(buffer, mmap.mmap)
+        assert list(iter_chunks(buffer, get_data_offset(buffer), 20)) == [
+            (29, 50),
+            (50, 75),
+            (75, 105),
+            (105, 128),
+        ]
+        assert list(read_chunk(buffer, 50, 128)) == ROWS[1:]
+    assert buffer.closed
+
+    # empty files can't be mapped
+    path.write_bytes(b"")
+    with open_mapped(path) as buffer:
+        assert buffer == b""
+
+
+def test_release(mocker: MockerFixture) -> None:
+    """
+    Test releasing pages of a mapping.
+    """
+    buffer = mocker.MagicMock(spec=mmap.mmap)
+    release(buffer, mmap.PAGESIZE + 10, mmap.PAGESIZE + 20)
+    buffer.madvise.assert_called_with(mmap.MADV_DONTNEED, mmap.PAGESIZE, 20)
+
+    buffer.madvise.reset_mock()
+    release(buffer, 10, 10)
+    buffer.madvise.assert_not_called()
+
+    release(CONTENTS, 0, 10)
+
+    # ``madvise`` is not available on Windows
+    # (the attribute is patched so that it's restored after it's deleted)
+    mocker.patch.object(mmap, "MADV_DONTNEED")
+    delattr(mmap, "MADV_DONTNEED")
+    release(buffer, 10, 20)
+    buffer.madvise.assert_not_called()
+
+
+def test_iter_rows(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test streaming rows from a file.
+    """
+    mocker.patch("shillelagh.adapters.file.csvparallel.BLOCK_SIZE", new=20)
+    fs.create_file("test.csv", contents=CONTENTS)
+
+    assert list(iter_rows(Path("test.csv"))) == [
+        ["index", "temperature", "site"],
+        *ROWS,
+    ]
+
+    fs.create_file("empty.csv", contents="")
+    assert not list(iter_rows(Path("empty.csv")))
+
+
+def test_iter_rows_close(tmp_path: Path, mocker: MockerFixture) -> None:
+    """
+    Test that the file is unmapped when the iterator is closed early.
+    """
+    path = tmp_path / "test.csv"
+    path.write_bytes(CONTENTS)
+    open_mapped_ = mocker.spy(csvparallel, "open_mapped")
+
+    rows = iter_rows(path)
+    assert next(rows) == ["index", "temperature", "site"]
+    context = open_mapped_.spy_return
+    assert inspect.getgeneratorstate(context.gen) == inspect.GEN_SUSPENDED
+
+    rows.close()
+    assert inspect.getgeneratorstate(context.gen) == inspect.GEN_CLOSED
+
+
+def test_count_records(mocker: MockerFixture) -> None:
+    """
+    Test counting records without parsing them.
+    """
+    assert count_records(CONTENTS, 29) == 4
+    assert count_records(CONTENTS[:-1], 29) == 4
+    assert count_records(CONTENTS, 128) == 0
+    assert count_records(b'"a"\n1\n\n2', 4) == 3
+
+    mocker.patch("shillelagh.adapters.file.csvparallel.CHUNK_SIZE", new=20)
+    assert count_records(CONTENTS, 29) == 4
+
+
+def test_iter_lines() -> None:
+    """
+    Test ``iter_lines``.
+    """
+    assert list(iter_lines(CONTENTS, 75, 128)) == [
+        '12,13.3,"The ""Platinum""\n',
+        'St"\n',
+        '13,12.1,"Kodiak\n',
+        'Trail"\n',
+    ]
+    assert list(iter_lines(b"a\nb", 0, 3)) == ["a\n", "b"]
+
+
+def test_sample_records() -> None:
+    """
+    Test stratified sampling of records.
+    """
+    assert sample_records(CONTENTS, 29, 2) == [ROWS[0], ROWS[3]]
+    assert sample_records(CONTENTS, 29, 1) == [ROWS[0]]
+    assert sample_records(CONTENTS, 29, 100) == ROWS
+
+
+def test_summarize_chunk(fs: FakeFilesystem) -> None:
+    """
+    Test ``summarize_chunk``.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+    path = Path("test.csv")
+    column_names = ["index", "temperature", "site"]
+
+    summary = summarize_chunk((29, 128), path, column_names)
+    assert summary.num_rows == 4
+    assert summary.get_types() == {
+        "index": Float,
+        "temperature": Float,
+        "site": String,
+    }
+    assert summary.get_order() == {
+        "index": Order.ASCENDING,
+        "temperature": Order.NONE,
+        "site": Order.NONE,
+    }
+
+
+def test_scan_chunk(fs: FakeFilesystem) -> None:
+    """
+    Test ``scan_chunk``.
+    """
+    fs.create_file("test.csv", contents=CONTENTS)
+    path = Path("test.csv")
+    column_names = ["index", "temperature", "site"]
+    rows = [
+        {"rowid": i, **dict(zip(column_names, row))} for i, row in enumerate(ROWS[1:])
+    ]
+
+    assert scan_chunk((50, 128), path, column_names, {}) == (3, rows)
+    assert scan_chunk(
+        (50, 128),
+        path,
+        column_names,
+        {"temperature": Range(13, None, False, False)},
+    ) == (3, rows[:2])
+
+
+def read_chunk_as_list(chunk: Chunk, path: Path) -> List[List[Any]]:
+    """
+    Helper function that can be pickled.
+    """
+    with open_mapped(path) as buffer:
+        return list(read_chunk(buffer, *chunk))
+
+
+def test_map_chunks(fs: FakeFilesystem, mocker: MockerFixture) -> None:
+    """
+    Test ``map_chunks``.
+    """
+    mocker.patch(
+        "shillelagh.adapters.file.csvparallel.ProcessPoolExecutor",
+        new=ThreadPoolExecutor,
+    )
+    fs.create_file("test.csv", contents=CONTENTS)
+    path = Path("test.csv")
+    chunks = list(iter_chunks(CONTENTS, 29, 20))
+
+    results = map_chunks(read_chunk_as_list, chunks, 2, path)
+    assert list(results) == [[row] for row in ROWS]
+
+    # sequential
+    results = map_chunks(read_chunk_as_list, chunks, 1, path)
+    assert len(list(results)) == 4
+
+    # a single chunk is processed in the current process
+    results = map_chunks(read_chunk_as_list, [(29, 128)], 2, path)
+    assert list(results) == [ROWS]
+
+    # closing early cancels pending chunks
+    results = map_chunks(read_chunk_as_list, chunks, 2, path)
+    assert next(results) == [ROWS[0]]
+    results.close()
+
+
+def test_map_chunks_processes(tmp_path: Path) -> None:
+    """
+    Test ``map_chunks`` with worker processes.
+    """
+    path = tmp_path / "test.csv"
+    path.write_bytes(CONTENTS)
+
+    results = map_chunks(
+        scan_chunk,
+        iter_chunks(CONTENTS, 29, 20),
+        2,
+        path,
+        ["index", "temperature", "site"],
+        {"index": Range(12, None, True, False)},
+    )
+    assert [(num_rows, len(rows)) for num_rows, rows in results] == [
+        (1, 0),
+        (1, 0),
+        (1, 1),
+        (1, 1),
+    ]
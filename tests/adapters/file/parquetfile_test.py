@@ -0,0 +1,372 @@
+"""
+Tests for shillelagh.adapters.file.parquetfile.
+"""
+from datetime import date, datetime, time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+import pytest
+from pytest_mock import MockerFixture
+
+from shillelagh.adapters.file.parquetfile import (
+    ParquetFile,
+    get_expression,
+    get_field,
+    may_match,
+)
+from shillelagh.adapters.registry import AdapterLoader
+from shillelagh.backends.apsw.db import connect
+from shillelagh.exceptions import ProgrammingError
+from shillelagh.fields import (
+    Blob,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    Order,
+    String,
+    Time,
+)
+from shillelagh.filters import (
+    Equal,
+    Impossible,
+    IsNotNull,
+    IsNull,
+    Like,
+    NotEqual,
+    Operator,
+    Range,
+)
+
+TABLE = pa.table(
+    {
+        "index": [10, 11, 12, 13, 14],
+        "temperature": [15.2, 13.1, 13.3, 12.1, None],
+        "site": ["Diamond_St", "Blacktail_Loop", "Platinum_St", "Kodiak_Trail", None],
+    },
+)
+
+
+def write_parquet(path: Path, table: pa.Table = TABLE) -> Path:
+    """
+    Write a Parquet file with row groups of 2 rows.
+    """
+    pq.write_table(table, path, row_group_size=2)
+    return path
+
+
+def write_ipc(path: Path, table: pa.Table = TABLE) -> Path:
+    """
+    Write an Arrow IPC file with record batches of 2 rows.
+    """
+    with pa.OSFile(str(path), "wb") as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=2)
+    return path
+
+
+def test_get_field() -> None:
+    """
+    Test ``get_field``.
+    """
+    filters = [Range, Equal, NotEqual, IsNull, IsNotNull]
+    assert get_field(pa.int8()) == Integer(
+        filters=filters,
+        order=Order.NONE,
+        exact=True,
+    )
+    assert isinstance(get_field(pa.bool_()), Boolean)
+    assert isinstance(get_field(pa.float32()), Float)
+    assert isinstance(get_field(pa.large_string()), String)
+    assert isinstance(get_field(pa.binary()), Blob)
+    assert isinstance(get_field(pa.timestamp("us")), DateTime)
+    assert isinstance(get_field(pa.date32()), Date)
+    assert isinstance(get_field(pa.time64("us")), Time)
+    assert isinstance(get_field(pa.dictionary(pa.int32(), pa.string())), String)
+    assert get_field(pa.list_(pa.int64())) is None
+
+
+def test_may_match() -> None:
+    """
+    Test ``may_match`` with row group statistics.
+    """
+    table = pa.table(
+        {
+            "a": [1, 2, 3],
+            "b": pa.array([None, None, None], pa.int64()),
+            "c": [datetime(2024, 1, 1), datetime(2024, 1, 2), None],
+        },
+    )
+    buffer = pa.BufferOutputStream()
+    pq.write_table(table, buffer)
+    metadata = pq.ParquetFile(pa.BufferReader(buffer.getvalue())).metadata
+    row_group = metadata.row_group(0)
+    a, b, c = (row_group.column(i).statistics for i in range(3))
+
+    assert not may_match(a, 3, Impossible())
+    assert may_match(None, 3, Equal(10))
+
+    assert not may_match(a, 3, IsNull())
+    assert may_match(b, 3, IsNull())
+    assert may_match(a, 3, IsNotNull())
+    assert not may_match(b, 3, IsNotNull())
+
+    # all nulls, so there's no min/max
+    assert may_match(b, 3, Equal(1))
+
+    assert may_match(a, 3, Equal(2))
+    assert not may_match(a, 3, Equal(4))
+    assert may_match(a, 3, NotEqual(2))
+
+    assert may_match(a, 3, Range(3, None, True, False))
+    assert not may_match(a, 3, Range(3, None, False, False))
+    assert not may_match(a, 3, Range(4, None, True, False))
+    assert may_match(a, 3, Range(None, 1, False, True))
+    assert not may_match(a, 3, Range(None, 1, False, False))
+    assert not may_match(a, 3, Range(None, 0, False, True))
+    assert may_match(a, 3, Range(0, 10, True, True))
+
+    # can't compare an integer to a string
+    assert may_match(a, 3, Equal("1"))
+
+    assert may_match(c, 3, Equal(datetime(2024, 1, 2)))
+    assert not may_match(c, 3, Equal(datetime(2024, 1, 3)))
+
+
+def test_get_expression() -> None:
+    """
+    Test ``get_expression``.
+    """
+    table = pa.table({"a": [1, 2, 3, None], "b": ["x", "y", None, "z"]})
+
+    def apply(bounds):
+        expression = get_expression(bounds)
+        return table.filter(expression).to_pydict()
+
+    assert get_expression({}) is None
+    assert apply({"a": Equal(2)}) == {"a": [2], "b": ["y"]}
+    assert apply({"a": NotEqual(2)}) == {"a": [1, 3], "b": ["x", None]}
+    assert apply({"a": Range(2, None, True, False)}) == {"a": [2, 3], "b": ["y", None]}
+    assert apply({"a": Range(2, None, False, False)}) == {"a": [3], "b": [None]}
+    assert apply({"a": Range(None, 2, False, True)}) == {"a": [1, 2], "b": ["x", "y"]}
+    assert apply({"a": Range(None, 2, False, False)}) == {"a": [1], "b": ["x"]}
+    assert apply({"a": IsNull()}) == {"a": [None], "b": ["z"]}
+    assert apply({"b": IsNotNull(), "a": IsNotNull()}) == {
+        "a": [1, 2],
+        "b": ["x", "y"],
+    }
+    assert apply({"a": Impossible()}) == {"a": [], "b": []}
+
+    with pytest.raises(ProgrammingError) as excinfo:
+        get_expression({"b": Like("%x%")})
+    assert str(excinfo.value) == "Invalid filter: LIKE %x%"
+
+
+def test_supports(tmp_path: Path) -> None:
+    """
+    Test ``supports``.
+    """
+    assert ParquetFile.supports(str(write_parquet(tmp_path / "test.parquet")))
+    assert ParquetFile.supports(str(write_ipc(tmp_path / "test.arrow")))
+    assert not ParquetFile.supports(str(tmp_path / "missing.parquet"))
+    assert not ParquetFile.supports(str(tmp_path / "test.csv"))
+    assert ParquetFile.parse_uri("test.parquet") == ("test.parquet",)
+
+
+def test_parquetfile(tmp_path: Path) -> None:
+    """
+    Test reading a Parquet file.
+    """
+    path = write_parquet(tmp_path / "test.parquet")
+    adapter = ParquetFile(str(path))
+
+    assert adapter.num_rows == 5
+    assert list(adapter.get_columns()) == ["index", "temperature", "site"]
+    assert adapter.get_cost([], []) == 5
+    assert adapter.get_cost([("index", Operator.EQ)], []) == 2.5
+
+    assert list(adapter.get_data({}, [])) == [
+        {"rowid": 0, "index": 10, "temperature": 15.2, "site": "Diamond_St"},
+        {"rowid": 1, "index": 11, "temperature": 13.1, "site": "Blacktail_Loop"},
+        {"rowid": 2, "index": 12, "temperature": 13.3, "site": "Platinum_St"},
+        {"rowid": 3, "index": 13, "temperature": 12.1, "site": "Kodiak_Trail"},
+        {"rowid": 4, "index": 14, "temperature": None, "site": None},
+    ]
+    assert list(
+        adapter.get_data({"temperature": Range(13, None, False, False)}, []),
+    ) == [
+        {"rowid": 0, "index": 10, "temperature": 15.2, "site": "Diamond_St"},
+        {"rowid": 1, "index": 11, "temperature": 13.1, "site": "Blacktail_Loop"},
+        {"rowid": 2, "index": 12, "temperature": 13.3, "site": "Platinum_St"},
+    ]
+    assert list(
+        adapter.get_data({}, [], limit=2, offset=1, requested_columns={"site"}),
+    ) == [
+        {"rowid": 1, "site": "Blacktail_Loop"},
+        {"rowid": 2, "site": "Platinum_St"},
+    ]
+
+    adapter.close()
+
+
+def test_parquetfile_pruning(tmp_path: Path, mocker: MockerFixture) -> None:
+    """
+    Test that only the row groups and columns needed are read.
+    """
+    path = write_parquet(tmp_path / "test.parquet")
+    adapter = ParquetFile(str(path))
+    read_row_group = mocker.spy(pq.ParquetFile, "read_row_group")
+
+    assert list(
+        adapter.get_batches({"index": Equal(12)}, [], requested_columns={"site"}),
+    ) == [{"rowid": [2], "site": ["Platinum_St"]}]
+    assert [call.args[1] for call in read_row_group.call_args_list] == [1]
+    assert read_row_group.call_args.kwargs == {"columns": ["index", "site"]}
+
+    # null counts are used for ``IS NULL``
+    read_row_group.reset_mock()
+    assert list(adapter.get_batches({"site": IsNull()}, [])) == [
+        {"rowid": [4], "index": [14], "temperature": [None], "site": [None]},
+    ]
+    assert [call.args[1] for call in read_row_group.call_args_list] == [2]
+
+    # reading stops when the limit is reached
+    read_row_group.reset_mock()
+    assert list(adapter.get_batches({}, [], limit=1, requested_columns=set())) == [
+        {"rowid": [0]},
+    ]
+    assert [call.args[1] for call in read_row_group.call_args_list] == [0]
+
+    # offset spanning row groups
+    assert list(adapter.get_batches({}, [], limit=0, offset=3)) == []
+    assert list(
+        adapter.get_batches({}, [], offset=3, requested_columns={"index"}),
+    ) == [{"rowid": [3], "index": [13]}, {"rowid": [4], "index": [14]}]
+
+
+def test_parquetfile_types(tmp_path: Path) -> None:
+    """
+    Test reading different types, including unsupported ones.
+    """
+    table = pa.table(
+        {
+            "flag": [True, False],
+            "day": [date(2024, 1, 1), date(2024, 1, 2)],
+            "moment": [time(12, 0), time(13, 0)],
+            "timestamp": [datetime(2024, 1, 1, 12), datetime(2024, 1, 2, 13)],
+            "category": pa.array(["a", "b"]).dictionary_encode(),
+            "data": [b"\x00", b"\x01"],
+            "values": [[1, 2], [3]],
+        },
+    )
+    path = write_parquet(tmp_path / "test.parquet", table)
+    adapter = ParquetFile(str(path))
+
+    assert list(adapter.get_columns()) == [
+        "flag",
+        "day",
+        "moment",
+        "timestamp",
+        "category",
+        "data",
+    ]
+    assert list(adapter.get_data({"category": Equal("b")}, [])) == [
+        {
+            "rowid": 1,
+            "flag": False,
+            "day": date(2024, 1, 2),
+            "moment": time(13, 0),
+            "timestamp": datetime(2024, 1, 2, 13),
+            "category": "b",
+            "data": b"\x01",
+        },
+    ]
+
+
+def test_parquetfile_no_statistics(tmp_path: Path) -> None:
+    """
+    Test that row groups are read when there are no statistics.
+    """
+    path = tmp_path / "test.parquet"
+    pq.write_table(TABLE, path, row_group_size=2, write_statistics=False)
+    adapter = ParquetFile(str(path))
+
+    assert list(
+        adapter.get_batches({"index": Equal(13)}, [], requested_columns={"site"}),
+    ) == [{"rowid": [3], "site": ["Kodiak_Trail"]}]
+
+
+def test_parquetfile_empty(tmp_path: Path) -> None:
+    """
+    Test a Parquet file without row groups.
+    """
+    path = tmp_path / "test.parquet"
+    pq.write_table(TABLE.slice(0, 0), path)
+    adapter = ParquetFile(str(path))
+
+    assert adapter.num_rows == 0
+    assert list(adapter.get_data({"index": Equal(10)}, [])) == []
+
+
+def test_ipcfile(tmp_path: Path, mocker: MockerFixture) -> None:
+    """
+    Test reading an Arrow IPC file.
+    """
+    path = write_ipc(tmp_path / "test.feather")
+    memory_map = mocker.spy(pa, "memory_map")
+    adapter = ParquetFile(str(path))
+
+    assert adapter.num_rows == 5
+    assert list(adapter.get_columns()) == ["index", "temperature", "site"]
+    assert list(
+        adapter.get_batches(
+            {"site": Range("K", None, True, False)},
+            [],
+            requested_columns={"index"},
+        ),
+    ) == [{"rowid": [2, 3], "index": [12, 13]}]
+    memory_map.assert_called_with(str(path))
+
+    adapter.close()
+
+
+def test_invalid_file(tmp_path: Path) -> None:
+    """
+    Test that invalid files raise an error.
+    """
+    path = tmp_path / "test.arrow"
+    path.write_bytes(b"invalid")
+
+    with pytest.raises(ProgrammingError) as excinfo:
+        ParquetFile(str(path))
+    assert str(excinfo.value).startswith(f"Unable to read file {path}: ")
+
+
+def test_parquetfile_sql(tmp_path: Path, registry: AdapterLoader) -> None:
+    """
+    Test querying a Parquet file with SQL.
+    """
+    registry.add("parquetfile", ParquetFile)
+    path = write_parquet(tmp_path / "test.parquet")
+
+    connection = connect(":memory:", ["parquetfile"])
+    cursor = connection.cursor()
+
+    sql = f"""
+        SELECT site FROM "{path}"
+        WHERE temperature > 13 AND "index" >= 11
+        ORDER BY temperature DESC
+    """
+    assert cursor.execute(sql).fetchall() == [("Platinum_St",), ("Blacktail_Loop",)]
+
+    sql = f'SELECT "index", site FROM "{path}" WHERE site IS NULL'
+    assert cursor.execute(sql).fetchall() == [(14, None)]
+
+    sql = f'SELECT COUNT(*) FROM "{path}"'
+    assert cursor.execute(sql).fetchall() == [(5,)]
+
+    sql = f'SELECT "index" FROM "{path}" LIMIT 2 OFFSET 1'
+    assert cursor.execute(sql).fetchall() == [(11,), (12,)]
@@ -1,15 +1,37 @@
 """
 Test the Pandas in-memory adapter.
 """
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
 import pandas as pd
 import pytest
 from pytest_mock import MockerFixture
 
-from shillelagh.adapters.memory.pandas import PandasMemory, find_dataframe
+from shillelagh.adapters.memory.pandas import (
+    PandasMemory,
+    find_dataframe,
+    get_columns_from_df,
+    get_df_batches,
+    register_dataframe,
+    sort_df,
+    unregister_dataframe,
+    unregister_namespace,
+)
 from shillelagh.backends.apsw.db import connect
 from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Order
-from shillelagh.filters import Equal, IsNotNull, IsNull, NotEqual, Operator
+from shillelagh.filters import (
+    Equal,
+    Impossible,
+    IsNotNull,
+    IsNull,
+    NotEqual,
+    Operator,
+    Range,
+)
+from shillelagh.typing import RequestedOrder
 
 
 def test_pandas() -> None:
@@ -214,6 +236,209 @@ def test_find_dataframe() -> None:
     assert str(excinfo.value) == "Could not find dataframe"
 
 
+def test_register_dataframe() -> None:
+    """
+    Test registering dataframes explicitly.
+    """
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    other = pd.DataFrame({"a": [4]})
+
+    register_dataframe("registered", df)
+    register_dataframe("registered", other, namespace="test")
+    try:
+        assert find_dataframe("registered") is df
+        assert find_dataframe("registered", "test") is other
+        assert find_dataframe("registered", "another") is df
+        assert PandasMemory.supports("registered") is True
+
+        connection = connect(":memory:")
+        cursor = connection.cursor()
+        cursor.execute("SELECT SUM(a) FROM registered")
+        assert cursor.fetchall() == [(6,)]
+    finally:
+        unregister_dataframe("registered")
+        unregister_namespace("test")
+
+    assert find_dataframe("registered") is None
+    assert find_dataframe("registered", "test") is None
+
+    # unregistering is idempotent
+    unregister_dataframe("registered")
+
+
+def test_register_dataframe_threads() -> None:
+    """
+    Test registering and finding dataframes from multiple threads.
+    """
+
+    def worker(i: int) -> bool:
+        df = pd.DataFrame({"a": [i]})
+        register_dataframe(f"df{i}", df, namespace=f"thread{i}")
+        found = find_dataframe(f"df{i}", f"thread{i}") is df
+        unregister_namespace(f"thread{i}")
+        return found
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(worker, range(100)))
+
+    assert find_dataframe("df0", "thread0") is None
+
+
+def test_connection_dataframes() -> None:
+    """
+    Test passing dataframes to the connection.
+    """
+    df = pd.DataFrame({"a": [1, 2, 3]})
+
+    connection = connect(":memory:", dataframes={"passed": df})
+    other = connect(":memory:")
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT SUM(a) FROM passed")
+    assert cursor.fetchall() == [(6,)]
+
+    cursor.execute("INSERT INTO passed (a) VALUES (4)")
+    assert df["a"].tolist() == [1, 2, 3, 4]
+
+    # other connections can't see the dataframe
+    with pytest.raises(ProgrammingError) as excinfo:
+        other.execute("SELECT * FROM passed")
+    assert str(excinfo.value) == "Unsupported table: passed"
+
+    connection.close()
+    assert find_dataframe("passed") is None
+
+    # existing adapter kwargs are kept
+    connection = connect(
+        ":memory:",
+        adapter_kwargs={"pandasmemory": {}},
+        dataframes={"passed": df},
+    )
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM passed")
+    assert cursor.fetchall() == [(4,)]
+    connection.close()
+
+
+def test_buffered_dml(mocker: MockerFixture) -> None:
+    """
+    Test that inserts and deletes are applied to the dataframe in bulk.
+    """
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    mocker.patch(
+        "shillelagh.adapters.memory.pandas.find_dataframe",
+        return_value=df,
+    )
+    adapter = PandasMemory("df")
+
+    assert adapter.insert_data({"a": 4, "b": "w", "rowid": None}) == 3
+    assert adapter.insert_data({"a": 5, "b": "v", "rowid": 10}) == 10
+    assert adapter.insert_data({"a": 6, "b": "u", "rowid": None}) == 11
+    assert len(df) == 3
+
+    # buffered rows are applied before reading
+    assert [row["a"] for row in adapter.get_data({}, [])] == [1, 2, 3, 4, 5, 6]
+    assert df.index.tolist() == [0, 1, 2, 3, 10, 11]
+    assert df.dtypes.tolist() == [np.dtype("int64"), np.dtype("O")]
+
+    adapter.delete_data(0)
+    adapter.delete_data(10)
+    assert len(df) == 6
+
+    # and before deleting inserted rows
+    adapter.insert_data({"a": 7, "b": "t", "rowid": None})
+    adapter.delete_data(12)
+    assert df["a"].tolist() == [2, 3, 4, 6, 7]
+
+    adapter.sync()
+    assert df["a"].tolist() == [2, 3, 4, 6]
+    adapter.close()
+
+    # empty dataframe
+    df = pd.DataFrame({"a": []})
+    mocker.patch(
+        "shillelagh.adapters.memory.pandas.find_dataframe",
+        return_value=df,
+    )
+    adapter = PandasMemory("df")
+    assert adapter.insert_data({"a": 1, "rowid": None}) == 0
+    adapter.commit()
+    assert df["a"].tolist() == [1]
+
+
+def test_rollback(mocker: MockerFixture) -> None:
+    """
+    Test rolling back changes to a dataframe.
+    """
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+
+    connection = connect(
+        ":memory:",
+        dataframes={"passed": df},
+        isolation_level="IMMEDIATE",
+    )
+    cursor = connection.cursor()
+
+    cursor.execute("INSERT INTO passed (a, b) VALUES (4, 'w')")
+    cursor.execute("DELETE FROM passed WHERE a = 1")
+    cursor.execute("UPDATE passed SET a = a * 10 WHERE b = 'y'")
+    cursor.execute("DELETE FROM passed WHERE a = 20")
+    assert cursor.execute("SELECT a FROM passed").fetchall() == [(3,), (4,)]
+    assert df["a"].tolist() == [3, 4]
+    connection.rollback()
+
+    # the dataframe is restored in place
+    assert df["a"].tolist() == [1, 2, 3]
+    assert df["b"].tolist() == ["x", "y", "z"]
+    assert df.index.tolist() == [0, 1, 2]
+
+    cursor.execute("UPDATE passed SET a = 0 WHERE b = 'x'")
+    connection.commit()
+    connection.rollback()
+    assert df["a"].tolist() == [0, 2, 3]
+
+    cursor.execute("INSERT INTO passed (a, b) VALUES (4, 'w')")
+    connection.rollback()
+    assert df["a"].tolist() == [0, 2, 3]
+    connection.close()
+
+    # nothing to roll back outside of a transaction
+    mocker.patch(
+        "shillelagh.adapters.memory.pandas.find_dataframe",
+        return_value=df,
+    )
+    adapter = PandasMemory("passed")
+    adapter.rollback()
+    assert df["a"].tolist() == [0, 2, 3]
+
+
+def test_append_public_api(mocker: MockerFixture) -> None:
+    """
+    Test appending rows when pandas has no method for concatenating in place.
+    """
+    mocker.patch("shillelagh.adapters.memory.pandas.UPDATE_INPLACE", False)
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+
+    connection = connect(
+        ":memory:",
+        dataframes={"passed": df},
+        isolation_level="IMMEDIATE",
+    )
+    cursor = connection.cursor()
+
+    cursor.execute("INSERT INTO passed (a, b) VALUES (4, 'w'), (5, 'v')")
+    cursor.execute("DELETE FROM passed WHERE a = 1")
+    assert cursor.execute("SELECT a FROM passed").fetchall() == [(2,), (3,), (4,), (5,)]
+    assert df["a"].tolist() == [2, 3, 4, 5]
+    assert df["b"].tolist() == ["y", "z", "w", "v"]
+    connection.rollback()
+
+    assert df["a"].tolist() == [1, 2, 3]
+    assert df["b"].tolist() == ["x", "y", "z"]
+    assert df.index.tolist() == [0, 1, 2]
+    connection.close()
+
+
 def test_get_cost(mocker: MockerFixture) -> None:
     """
     Test cost estimation.
@@ -294,3 +519,99 @@ def test_empty_dataframe() -> None:
     sql = "SELECT * FROM emptydf"
     cursor.execute(sql)
     assert cursor.fetchall() == []
+
+
+def test_pandas_limit_offset() -> None:
+    """
+    Test ``ORDER BY`` with ``LIMIT`` and ``OFFSET`` in SQL.
+    """
+    mydf = pd.DataFrame(  # noqa: F841  pylint: disable=unused-variable
+        [
+            {"index": 10, "temperature": 15.2, "site": "Diamond_St"},
+            {"index": 11, "temperature": 13.1, "site": "Blacktail_Loop"},
+            {"index": 12, "temperature": 13.3, "site": "Platinum_St"},
+            {"index": 13, "temperature": 12.1, "site": "Kodiak_Trail"},
+        ],
+    )
+
+    connection = connect(":memory:")
+    cursor = connection.cursor()
+
+    sql = "SELECT site FROM mydf ORDER BY temperature DESC LIMIT 2 OFFSET 1"
+    cursor.execute(sql)
+    assert cursor.fetchall() == [("Platinum_St",), ("Blacktail_Loop",)]
+
+    sql = "SELECT site FROM mydf ORDER BY site LIMIT 2"
+    cursor.execute(sql)
+    assert cursor.fetchall() == [("Blacktail_Loop",), ("Diamond_St",)]
+
+
+@pytest.mark.parametrize(
+    "order",
+    [
+        [("a", Order.ASCENDING)],
+        [("a", Order.DESCENDING)],
+        [("a", Order.ASCENDING), ("b", Order.ASCENDING)],
+        [("b", Order.DESCENDING), ("a", Order.DESCENDING)],
+        [("a", Order.ASCENDING), ("b", Order.DESCENDING)],
+        [("c", Order.ASCENDING)],
+        [("d", Order.DESCENDING)],
+    ],
+)
+def test_sort_df(order: List[Tuple[str, RequestedOrder]]) -> None:
+    """
+    Test that selecting the top rows is the same as sorting.
+    """
+    generator = np.random.default_rng(42)
+    df = pd.DataFrame(
+        {
+            "a": generator.integers(0, 5, 100),
+            "b": generator.random(100).round(1),
+            "c": generator.choice(["x", "y", "z"], 100),
+            "d": pd.to_datetime(generator.integers(0, 5, 100), unit="D"),
+        },
+    )
+    df.loc[3, "b"] = np.nan
+    labels = {label: label for label in df.columns}
+
+    for limit in [None, 1, 10, 200]:
+        expected = sort_df(df, labels, order)
+        result = sort_df(df, labels, order, limit)
+        assert result.index.tolist() == expected.index.tolist()[:limit]
+
+
+def test_get_df_batches() -> None:
+    """
+    Test ``get_df_batches``.
+    """
+    df = pd.DataFrame(
+        {
+            0: [1, 2, 3, 4, 5],
+            1: ["a", "b", "c", "d", "e"],
+            2: pd.to_datetime(["2023-01-01"] * 5),
+        },
+    )
+    columns = get_columns_from_df(df)
+
+    batches = list(
+        get_df_batches(
+            df,
+            columns,
+            {"0": Range(1, 4, False, True)},
+            [("0", Order.DESCENDING)],
+            limit=2,
+            offset=1,
+            requested_columns={"1"},
+        ),
+    )
+    assert batches == [{"rowid": [2, 1], "1": ["c", "b"]}]
+    assert all(isinstance(value, int) for value in batches[0]["rowid"])
+
+    batches = list(get_df_batches(df, columns, {}, [], size=2))
+    assert [batch["rowid"] for batch in batches] == [[0, 1], [2, 3], [4]]
+    assert batches[0]["0"] == [1, 2]
+    assert isinstance(batches[0]["0"][0], int)
+    assert batches[0]["2"][0] == pd.Timestamp("2023-01-01")
+
+    assert not list(get_df_batches(df, columns, {"0": Impossible()}, []))
+    assert not list(get_df_batches(df, columns, {"0": Equal(10)}, []))
@@ -0,0 +1,41 @@
+"""
+Tests for shillelagh.backends.apsw.buffer.
+"""
+from shillelagh.backends.apsw.buffer import JoinBuffer
+
+BATCHES = [
+    {"rowid": [0, 1], "name": ["Alice", "Bob"], "age": [20, 23]},
+    {"rowid": [2], "name": ["Alice"]},
+]
+
+
+def test_join_buffer() -> None:
+    """
+    Test building a buffer from batches.
+    """
+    buffer = JoinBuffer.load(iter(BATCHES), ["rowid", "name", "age"], [1])
+    assert buffer is not None
+    assert list(buffer.get(["Alice"])) == [(0, "Alice", 20), (2, "Alice", None)]
+    assert list(buffer.get(["Bob"])) == [(1, "Bob", 23)]
+    assert list(buffer.get(["Charlie"])) == []
+
+    buffer = JoinBuffer.load(iter(BATCHES), ["rowid", "name", "age"], [])
+    assert buffer is not None
+    assert len(list(buffer.get([]))) == 3
+
+
+def test_join_buffer_null() -> None:
+    """
+    Test that ``NULL`` doesn't match any rows, not even those with ``NULL``.
+    """
+    buffer = JoinBuffer.load(iter(BATCHES), ["rowid", "name", "age"], [2])
+    assert buffer is not None
+    assert list(buffer.get([20])) == [(0, "Alice", 20)]
+    assert list(buffer.get([None])) == []
+
+
+def test_join_buffer_too_big() -> None:
+    """
+    Test that scans bigger than the maximum size are not buffered.
+    """
+    assert JoinBuffer.load(iter(BATCHES), ["rowid", "name"], [1], max_size=10) is None
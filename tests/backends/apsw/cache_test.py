@@ -0,0 +1,112 @@
+"""
+Tests for shillelagh.backends.apsw.cache.
+"""
+from typing import Iterator
+
+from pytest_mock import MockerFixture
+
+from shillelagh.backends.apsw.cache import ScanCache, get_batch_size
+from shillelagh.typing import Batch
+
+BATCHES = [
+    {"rowid": [0, 1], "name": ["Alice", "Bob"]},
+    {"rowid": [2], "name": ["Charlie"]},
+]
+
+
+def test_get_batch_size() -> None:
+    """
+    Test ``get_batch_size``.
+    """
+    assert get_batch_size(BATCHES[0]) > get_batch_size(BATCHES[1]) > 0
+    assert get_batch_size({}) == 0
+
+
+def test_scan_cache(mocker: MockerFixture) -> None:
+    """
+    Test storing and retrieving scans.
+    """
+    monotonic = mocker.patch("shillelagh.backends.apsw.cache.time.monotonic")
+    monotonic.return_value = 0
+    cache = ScanCache(ttl=10)
+    assert repr(cache) == (
+        "ScanCache(ttl=10, max_size=67108864, hits=0, misses=0, evictions=0)"
+    )
+
+    assert cache.get("table", "scan") is None
+    assert cache.misses == 1
+
+    assert list(cache.record("table", "scan", iter(BATCHES))) == BATCHES
+    assert len(cache) == 1
+    assert cache.size == sum(get_batch_size(batch) for batch in BATCHES)
+    assert cache.get("table", "scan") == BATCHES
+    assert cache.get("table", "other") is None
+    assert cache.get("other", "scan") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # recording the same scan again replaces it
+    assert list(cache.record("table", "scan", iter(BATCHES[:1]))) == BATCHES[:1]
+    assert len(cache) == 1
+    assert cache.size == get_batch_size(BATCHES[0])
+
+    # entries expire after the TTL
+    monotonic.return_value = 10
+    assert cache.get("table", "scan") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_scan_cache_partial() -> None:
+    """
+    Test that scans not fully consumed are not stored.
+    """
+    cache = ScanCache()
+    batches = cache.record("table", "scan", iter(BATCHES))
+    assert next(batches) == BATCHES[0]
+    batches.close()
+    assert len(cache) == 0
+
+
+def test_scan_cache_eviction() -> None:
+    """
+    Test that the least recently used scans are evicted.
+    """
+    size = get_batch_size(BATCHES[0])
+    cache = ScanCache(max_size=2 * size)
+
+    def scan(table: str) -> Iterator[Batch]:
+        return cache.record(table, "scan", iter(BATCHES[:1]))
+
+    list(scan("a"))
+    list(scan("b"))
+    assert cache.get("a", "scan") == BATCHES[:1]
+    list(scan("c"))
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get("b", "scan") is None
+    assert cache.get("a", "scan") == BATCHES[:1]
+    assert cache.get("c", "scan") == BATCHES[:1]
+
+    # scans bigger than the cache are passed through but not stored
+    assert list(cache.record("d", "scan", iter(BATCHES * 2))) == BATCHES * 2
+    assert cache.get("d", "scan") is None
+    assert cache.size == 2 * size
+
+
+def test_scan_cache_invalidate() -> None:
+    """
+    Test invalidating the scans of a table, and clearing the cache.
+    """
+    cache = ScanCache()
+    list(cache.record("a", "scan1", iter(BATCHES)))
+    list(cache.record("a", "scan2", iter(BATCHES)))
+    list(cache.record("b", "scan1", iter(BATCHES)))
+
+    cache.invalidate("a")
+    assert len(cache) == 1
+    assert cache.get("b", "scan1") == BATCHES
+    assert cache.size == sum(get_batch_size(batch) for batch in BATCHES)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -11,8 +11,9 @@ import pytest
 from pytest_mock import MockerFixture
 
 from shillelagh.adapters.registry import AdapterLoader, UnsafeAdaptersError
+from shillelagh.backends.apsw.cache import ScanCache
 from shillelagh.backends.apsw.db import Connection, connect, convert_binding
-from shillelagh.exceptions import NotSupportedError, ProgrammingError
+from shillelagh.exceptions import ProgrammingError
 from shillelagh.fields import Float, String, StringInteger
 
 from ...fakes import FakeAdapter
@@ -75,6 +76,40 @@ def test_connect_schema_prefix(registry: AdapterLoader) -> None:
     assert cursor.rowcount == 2
 
 
+def test_connect_scan_cache(mocker: MockerFixture, registry: AdapterLoader) -> None:
+    """
+    Test sharing a scan cache between connections.
+    """
+    registry.add("dummy", FakeAdapter)
+    get_data = mocker.spy(FakeAdapter, "get_data")
+    scan_cache = ScanCache()
+
+    connection = connect(":memory:", ["dummy"], scan_cache=scan_cache)
+    assert connection.scan_cache is scan_cache
+    cursor = connection.cursor()
+    cursor.execute('SELECT * FROM "dummy://" WHERE age > 21')
+    assert cursor.fetchall() == [(23.0, "Bob", 3)]
+    cursor.execute('SELECT * FROM "dummy://" WHERE age > 21')
+    assert cursor.fetchall() == [(23.0, "Bob", 3)]
+    cursor.execute('SELECT * FROM "dummy://" WHERE age > 22')
+    assert cursor.fetchall() == [(23.0, "Bob", 3)]
+    assert get_data.call_count == 2
+
+    # a different connection can reuse the scans
+    cursor = connect(":memory:", ["dummy"], scan_cache=scan_cache).cursor()
+    cursor.execute('SELECT * FROM "dummy://" WHERE age > 21')
+    assert cursor.fetchall() == [(23.0, "Bob", 3)]
+    assert get_data.call_count == 2
+    assert (scan_cache.hits, scan_cache.misses) == (2, 2)
+
+    # modifying the table invalidates the cache
+    cursor.execute(
+        """INSERT INTO "dummy://" (age, name, pets) VALUES (40, 'Dani', 2)""",
+    )
+    cursor.execute('SELECT * FROM "dummy://" WHERE age > 21')
+    assert cursor.fetchall() == [(23.0, "Bob", 3), (40.0, "Dani", 2)]
+
+
 def test_connect_adapter_kwargs(mocker: MockerFixture, registry: AdapterLoader) -> None:
     """
     Test that ``adapter_kwargs`` are passed to the adapter.
@@ -95,6 +130,9 @@ def test_connect_adapter_kwargs(mocker: MockerFixture, registry: AdapterLoader)
         "IMMEDIATE",
         None,
         "main",
+        None,
+        None,
+        False,
     )
 
 
@@ -140,6 +178,9 @@ def test_connect_safe(mocker: MockerFixture, registry: AdapterLoader) -> None:
         None,
         None,
         "main",
+        None,
+        None,
+        False,
     )
 
     connect(":memory:", ["two"])
@@ -150,6 +191,9 @@ def test_connect_safe(mocker: MockerFixture, registry: AdapterLoader) -> None:
         None,
         None,
         "main",
+        None,
+        None,
+        False,
     )
 
     # in safe mode we need to specify adapters
@@ -161,6 +205,9 @@ def test_connect_safe(mocker: MockerFixture, registry: AdapterLoader) -> None:
         None,
         None,
         "main",
+        None,
+        None,
+        False,
     )
 
     # in safe mode only safe adapters are returned
@@ -172,6 +219,9 @@ def test_connect_safe(mocker: MockerFixture, registry: AdapterLoader) -> None:
         None,
         None,
         "main",
+        None,
+        None,
+        False,
     )
 
     # prevent repeated names, in case anyone registers a malicious adapter
@@ -282,9 +332,46 @@ def test_description(registry: AdapterLoader) -> None:
     assert cursor.description is not None
 
 
-def test_execute_many(registry: AdapterLoader) -> None:
+def test_execute_many(mocker: MockerFixture, registry: AdapterLoader) -> None:
     """
-    Test ``execute_many``.
+    Test ``executemany``.
+    """
+    registry.add("dummy", FakeAdapter)
+    commit = mocker.spy(FakeAdapter, "commit")
+
+    connection = connect(":memory:", ["dummy"])
+    cursor = connection.cursor()
+
+    items: List[Tuple[Any, ...]] = [(6, "Billy", 1), (7, "Timmy", 2)]
+    cursor.executemany(
+        """INSERT INTO "dummy://" (age, name, pets) VALUES (?, ?, ?)""",
+        items,
+    )
+    assert not cursor.in_transaction
+    commit.assert_called_once()
+
+    cursor.execute('SELECT name FROM "dummy://"')
+    assert cursor.fetchall() == [("Alice",), ("Bob",), ("Billy",), ("Timmy",)]
+
+    # queries return the rows for all the parameters
+    cursor.executemany(
+        'SELECT name FROM "dummy://" WHERE pets = ?',
+        [(1,), (2,)],
+    )
+    assert cursor.fetchall() == [("Billy",), ("Timmy",)]
+
+    cursor.executemany('SELECT name FROM "dummy://" WHERE pets = ?')
+    assert cursor.fetchall() == []
+
+    # the transaction is rolled back on errors
+    with pytest.raises(ProgrammingError):
+        cursor.executemany('SELECT * FROM "dummy://" WHERE invalid = ?', [(1,)])
+    assert not cursor.in_transaction
+
+
+def test_execute_many_transaction(registry: AdapterLoader) -> None:
+    """
+    Test ``executemany`` with an isolation level.
     """
     registry.add("dummy", FakeAdapter)
 
@@ -292,15 +379,18 @@ def test_execute_many(registry: AdapterLoader) -> None:
     cursor = connection.cursor()
 
     items: List[Tuple[Any, ...]] = [(6, "Billy", 1), (7, "Timmy", 2)]
-    with pytest.raises(NotSupportedError) as excinfo:
-        cursor.executemany(
-            """INSERT INTO "dummy://" (age, name, pets) VALUES (?, ?, ?)""",
-            items,
-        )
-    assert (
-        str(excinfo.value)
-        == "``executemany`` is not supported, use ``execute`` instead"
+    cursor.executemany(
+        """INSERT INTO "dummy://" (age, name, pets) VALUES (?, ?, ?)""",
+        items,
     )
+    assert cursor.in_transaction
+
+    with pytest.raises(ProgrammingError):
+        cursor.executemany('SELECT * FROM "dummy://" WHERE invalid = ?', [(1,)])
+    assert cursor.in_transaction
+
+    connection.commit()
+    assert not cursor.in_transaction
 
 
 def test_setsize() -> None:
@@ -0,0 +1,114 @@
+"""
+Tests for shillelagh.backends.apsw.loop.
+"""
+import asyncio
+import threading
+from typing import AsyncIterator, List
+
+import pytest
+
+from shillelagh.backends.apsw.loop import AsyncStream, get_loop
+from shillelagh.exceptions import ProgrammingError
+
+
+def test_get_loop() -> None:
+    """
+    Test that a single loop runs in a background thread.
+    """
+    loop = get_loop()
+    assert get_loop() is loop
+    assert loop.is_running()
+
+    future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0, "done"), loop)
+    assert future.result(timeout=1) == "done"
+
+
+def test_async_stream() -> None:
+    """
+    Test consuming an asynchronous iterator.
+    """
+    produced: List[int] = []
+    consumer = threading.get_ident()
+
+    async def numbers() -> AsyncIterator[int]:
+        assert threading.get_ident() != consumer
+        for i in range(10):
+            await asyncio.sleep(0)
+            produced.append(i)
+            yield i
+
+    stream = AsyncStream(numbers(), maxsize=2)
+    assert iter(stream) is stream
+    assert next(stream) == 0
+
+    # the producer stops when the queue is full
+    future = asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), get_loop())
+    future.result(timeout=1)
+    assert len(produced) <= 4
+
+    assert list(stream) == list(range(1, 10))
+    assert not list(stream)
+
+
+def test_async_stream_error() -> None:
+    """
+    Test that errors are raised in the consumer.
+    """
+
+    async def numbers() -> AsyncIterator[int]:
+        yield 1
+        raise ProgrammingError("Error")
+
+    stream = AsyncStream(numbers())
+    assert next(stream) == 1
+    with pytest.raises(ProgrammingError) as excinfo:
+        next(stream)
+    assert str(excinfo.value) == "Error"
+    assert not list(stream)
+
+
+def test_async_stream_close() -> None:
+    """
+    Test that closing the stream cancels the producer.
+    """
+    closed = threading.Event()
+
+    async def numbers() -> AsyncIterator[int]:
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    stream = AsyncStream(numbers(), maxsize=1)
+    assert next(stream) == 0
+    stream.close()
+    assert closed.wait(1)
+    assert not list(stream)
+
+
+def test_async_stream_iterator() -> None:
+    """
+    Test consuming an asynchronous iterator without ``aclose``.
+    """
+
+    class Numbers:
+        """
+        An asynchronous iterator.
+        """
+
+        def __init__(self) -> None:
+            self.i = 0
+
+        def __aiter__(self) -> "Numbers":
+            return self
+
+        async def __anext__(self) -> int:
+            if self.i == 3:
+                raise StopAsyncIteration
+            self.i += 1
+            return self.i
+
+    assert list(AsyncStream(Numbers())) == [1, 2, 3]
@@ -1,28 +1,49 @@
-# pylint: disable=c-extension-no-member
+# pylint: disable=c-extension-no-member, too-many-lines
 """
 Tests for shillelagh.backends.apsw.vt.
 """
+import asyncio
 import datetime
 import json
-from typing import Any, Dict, Iterable
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple
 
 import apsw
 import pytest
 from pytest_mock import MockerFixture
 
+from shillelagh.adapters.registry import AdapterLoader
+from shillelagh.backends.apsw.cache import ScanCache
+from shillelagh.backends.apsw.db import connect
 from shillelagh.backends.apsw.vt import (
     VTModule,
     VTTable,
     _add_sqlite_constraint,
+    compile_row_converter,
+    convert_batches_to_sqlite,
     convert_rows_from_sqlite,
     convert_rows_to_sqlite,
+    fuse_converters,
     get_all_bounds,
+    get_batch_converters,
+    get_converter,
     get_limit_offset,
+    get_sqlite_formatters,
+    iterate_batches,
     type_map,
 )
 from shillelagh.exceptions import ProgrammingError
-from shillelagh.fields import Field, Float, Integer, Order, String
-from shillelagh.filters import Equal, Operator
+from shillelagh.fields import (
+    Field,
+    Float,
+    Integer,
+    ISODateTime,
+    Order,
+    String,
+    StringInteger,
+)
+from shillelagh.filters import Equal, Filter, Operator, Range
+from shillelagh.lib import NetworkAPICostModel
+from shillelagh.typing import Batch, RequestedOrder, Row
 
 from ...fakes import FakeAdapter
 
@@ -60,6 +81,49 @@ class FakeAdapterStaticSort(FakeAdapter):
     pets = Integer()
 
 
+class FakeAdapterWithBatches(FakeAdapter):
+
+    """
+    An adapter that returns data in columnar batches.
+    """
+
+    def get_batches(
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> Iterator[Batch]:
+        yield {"rowid": [0, 1], "age": [20.0, 23.0], "name": ["Alice", "Bob"]}
+        yield {"rowid": [2], "age": [6.0], "name": ["Charlie"]}
+
+
+class FakeAdapterBulkInsert(FakeAdapter):
+
+    """
+    An adapter that inserts multiple rows at once.
+    """
+
+    def insert_data_many(self, rows: List[Row]) -> List[int]:
+        return [self.insert_data(row) for row in rows]
+
+
+class FakeAsyncAdapter(FakeAdapter):
+
+    """
+    An adapter that returns data asynchronously.
+    """
+
+    async def get_data_async(  # type: ignore
+        self,
+        bounds: Dict[str, Filter],
+        order: List[Tuple[str, RequestedOrder]],
+        **kwargs: Any,
+    ) -> AsyncIterator[Row]:
+        for row in self.get_data(bounds, order, **kwargs):
+            await asyncio.sleep(0)
+            yield row
+
+
 class FakeAdapterNoColumns(FakeAdapter):
 
     """
@@ -82,6 +146,48 @@ def test_vt_module() -> None:
     )
 
 
+def test_vt_module_cache(mocker: MockerFixture) -> None:
+    """
+    Test that scans are cached, and invalidated when the table is modified.
+    """
+    cache = ScanCache()
+    vt_module = VTModule(FakeAdapter, cache)
+    _, table = vt_module.Create(None, "", "", "table")
+    get_data = mocker.spy(table.adapter, "get_data")
+    indexname = json.dumps({"indexes": [], "orderbys_to_process": []})
+
+    def scan() -> List[Tuple[Any, ...]]:
+        cursor = table.Open()
+        cursor.Filter(42, indexname, [])
+        rows = []
+        while not cursor.Eof():
+            rows.append(cursor.current_row)
+            cursor.Next()
+        return rows
+
+    assert scan() == [(0, 20, "Alice", "0"), (1, 23, "Bob", "3")]
+    assert scan() == [(0, 20, "Alice", "0"), (1, 23, "Bob", "3")]
+    assert get_data.call_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    table.UpdateDeleteRow(0)
+    assert scan() == [(1, 23, "Bob", "3")]
+    assert get_data.call_count == 2
+
+    table.UpdateInsertRow(None, (6, "Charlie", 1))
+    assert len(scan()) == 2
+    table.UpdateChangeRow(1, 1, (24, "Bob", 4))
+    assert (1, 24, "Bob", "4") in scan()
+    assert get_data.call_count == 4
+
+    table.Disconnect()
+    assert len(cache) == 0
+
+    # adapters can opt out of the cache
+    mocker.patch.object(FakeAdapter, "cacheable", new=False)
+    assert VTModule(FakeAdapter, cache).cache is None
+
+
 def test_virtual_best_index() -> None:
     """
     Test ``BestIndex``.
@@ -101,11 +207,11 @@ def test_virtual_best_index() -> None:
         [(1, False)],  # ORDER BY name ASC
     )
     assert result == (
-        [(0, True), None, (1, True), (2, True)],
+        [(0, True), None, (1, True), None],
         42,
         json.dumps(
             {
-                "indexes": [[1, 2], [0, 8], [-1, 73]],
+                "indexes": [[1, 2], [0, 8]],
                 "orderbys_to_process": [[1, False]],
             },
         ),
@@ -143,20 +249,18 @@ def test_virtual_best_index_object(mocker: MockerFixture) -> None:
         [
             mocker.call(0, 1),
             mocker.call(2, 2),
-            mocker.call(3, 3),
         ],
     )
     index_info.set_aConstraintUsage_omit.assert_has_calls(
         [
             mocker.call(0, True),
             mocker.call(2, True),
-            mocker.call(3, True),
         ],
     )
     assert index_info.idxNum == 42
     assert index_info.idxStr == json.dumps(
         {
-            "indexes": [[1, 2], [0, 8], [-1, 73]],
+            "indexes": [[1, 2], [0, 8]],
             "orderbys_to_process": [[1, False]],
             "requested_columns": ["age", "pets"],
         },
@@ -165,6 +269,90 @@ def test_virtual_best_index_object(mocker: MockerFixture) -> None:
     assert index_info.estimatedCost == 666
 
 
+def test_virtual_best_index_object_statistics(mocker: MockerFixture) -> None:
+    """
+    Test ``BestIndexObject`` with unusable constraints and table statistics.
+    """
+    index_info = mocker.MagicMock()
+    index_info.colUsed = {0, 1}
+    index_info.estimatedRows = 25
+    index_info_to_dict = mocker.patch("shillelagh.backends.apsw.vt.index_info_to_dict")
+    index_info_to_dict.return_value = {
+        "aConstraint": [
+            {"iColumn": 1, "op": apsw.SQLITE_INDEX_CONSTRAINT_EQ, "usable": False},
+            {
+                "iColumn": 0,
+                "op": apsw.SQLITE_INDEX_CONSTRAINT_GE,
+                "usable": True,
+                "rhs": 21,
+            },
+        ],
+        "aOrderBy": [],
+    }
+
+    table = VTTable(FakeAdapter(), statistics=True)
+    table.BestIndexObject(index_info)
+
+    index_info.set_aConstraintUsage_argvIndex.assert_called_once_with(1, 1)
+    assert index_info.idxStr == json.dumps(
+        {
+            "indexes": [[0, 32]],
+            "orderbys_to_process": [],
+            "requested_columns": ["age", "name"],
+        },
+    )
+    assert index_info.estimatedCost == 666
+    assert index_info.estimatedRows == 25
+
+    # after a full scan the statistics are used
+    cursor = table.Open()
+    cursor.Filter(42, json.dumps({"indexes": [], "orderbys_to_process": []}), [])
+    while not cursor.Eof():
+        cursor.Next()
+    assert table.statistics.num_rows == 2
+
+    table.BestIndexObject(index_info)
+    assert index_info.estimatedRows == 1
+    assert index_info.estimatedCost == pytest.approx(2 * 2 / 3)
+
+
+def test_statistics_opt_in() -> None:
+    """
+    Test that statistics are only collected when requested, for adapters without a
+    cost model.
+    """
+    table = VTTable(FakeAdapter())
+    assert table.statistics is None
+    cursor = table.Open()
+    cursor.Filter(42, json.dumps({"indexes": [], "orderbys_to_process": []}), [])
+    assert cursor.statistics is None
+    table.UpdateDeleteRow(0)
+    assert table.BestIndex([], [])[4] == 666
+
+    table = VTTable(FakeAdapterManyRows(), statistics=True)
+    assert table.statistics is None
+
+
+def test_virtual_best_index_object_all_columns(mocker: MockerFixture) -> None:
+    """
+    Test ``BestIndexObject`` when SQLite marks all columns as used.
+
+    This happens on ``UPDATE``, where all the bits of ``colUsed`` are set.
+    """
+    index_info = mocker.MagicMock()
+    index_info.colUsed = set(range(64))
+    index_info_to_dict = mocker.patch("shillelagh.backends.apsw.vt.index_info_to_dict")
+    index_info_to_dict.return_value = {"aConstraint": [], "aOrderBy": []}
+
+    table = VTTable(FakeAdapter())
+    table.BestIndexObject(index_info)
+    assert json.loads(index_info.idxStr)["requested_columns"] == [
+        "age",
+        "name",
+        "pets",
+    ]
+
+
 def test_virtual_best_index_static_order_not_consumed() -> None:
     """
     Test ``BestIndex`` when the adapter cannot consume the order.
@@ -209,6 +397,82 @@ def test_virtual_best_index_static_order_not_consumed_descending() -> None:
     )
 
 
+def test_virtual_best_index_limit_offset() -> None:
+    """
+    Test that ``LIMIT`` and ``OFFSET`` are only used when all constraints are.
+
+    SQLite offers them even when it still has to filter or sort the rows returned by
+    the adapter, in which case they can't be pushed down.
+    """
+    table = VTTable(FakeAdapter())
+    result = table.BestIndex(
+        [
+            (1, apsw.SQLITE_INDEX_CONSTRAINT_EQ),  # name =
+            (-1, 73),  # LIMIT
+            (-1, 74),  # OFFSET
+        ],
+        [(0, False)],  # ORDER BY age ASC
+    )
+    assert result == (
+        [(0, True), (1, True), (2, True)],
+        42,
+        json.dumps(
+            {
+                "indexes": [[1, 2], [-1, 73], [-1, 74]],
+                "orderbys_to_process": [[0, False]],
+            },
+        ),
+        True,
+        666,
+    )
+
+    # inexact filter
+    table = VTTable(FakeAdapterStaticSort())
+    result = table.BestIndex(
+        [
+            (1, apsw.SQLITE_INDEX_CONSTRAINT_EQ),  # name =
+            (-1, 73),  # LIMIT
+        ],
+        [],
+    )
+    assert result[0] == [(0, False), None]
+
+    # order not consumed
+    result = table.BestIndex([(-1, 73)], [(0, False)])
+    assert result[0] == [None]
+    assert result[3] is False
+
+    # rowid constraint
+    table = VTTable(FakeAdapter())
+    result = table.BestIndex(
+        [(-1, apsw.SQLITE_INDEX_CONSTRAINT_EQ), (-1, 73)],
+        [],
+    )
+    assert result[0] == [None]
+
+
+def test_limit_with_unhandled_constraints(registry: AdapterLoader) -> None:
+    """
+    Test a query with ``LIMIT`` and a constraint the adapter doesn't handle.
+    """
+
+    class FakeAdapterNoExactFilters(FakeAdapter):
+        """
+        An adapter with an inexact filter.
+        """
+
+        age = Float(filters=[Range], order=Order.ANY, exact=False)
+
+    registry.add("dummy", FakeAdapterNoExactFilters)
+    connection = connect(":memory:", ["dummy"], isolation_level="IMMEDIATE")
+    cursor = connection.cursor()
+
+    sql = 'SELECT name FROM "dummy://" WHERE age > 21 LIMIT 1'
+    assert cursor.execute(sql).fetchall() == [("Bob",)]
+    sql = 'SELECT name FROM "dummy://" WHERE pets > 0 LIMIT 1'
+    assert cursor.execute(sql).fetchall() == [("Bob",)]
+
+
 def test_virtual_best_index_operator_not_supported() -> None:
     """
     Test ``BestIndex`` with an unsupported operator.
@@ -257,6 +521,17 @@ def test_virtual_disconnect() -> None:
     table.Disconnect()  # no-op
 
 
+def test_virtual_commit(mocker: MockerFixture) -> None:
+    """
+    Test ``Commit``.
+    """
+    adapter = FakeAdapter()
+    commit = mocker.patch.object(adapter, "commit")
+    table = VTTable(adapter)
+    table.Commit()
+    commit.assert_called_with()
+
+
 def test_update_insert_row() -> None:
     """
     Test ``UpdateInsertRow``.
@@ -282,14 +557,94 @@ def test_update_insert_row() -> None:
     ]
 
 
+def test_update_insert_row_bulk(mocker: MockerFixture) -> None:
+    """
+    Test that inserts are buffered for adapters that support bulk inserts.
+    """
+    mocker.patch("shillelagh.backends.apsw.vt.INSERT_BATCH_SIZE", new=2)
+    adapter = FakeAdapterBulkInsert()
+    insert_data_many = mocker.spy(adapter, "insert_data_many")
+    connection = mocker.MagicMock()
+    connection.getautocommit.return_value = False
+    table = VTTable(adapter, connection=connection)
+
+    assert table.UpdateInsertRow(None, (6, "Charlie", 1)) == 0
+    assert len(adapter.data) == 2
+    assert table.UpdateInsertRow(4, (40, "Dani", 2)) == 4
+    assert [row["rowid"] for row in adapter.data] == [0, 1, 2, 4]
+    insert_data_many.assert_called_once()
+
+    # buffered rows are passed to the adapter before reading or modifying the table
+    for method, args in [
+        (table.Open, ()),
+        (table.UpdateDeleteRow, (0,)),
+        (table.UpdateChangeRow, (1, 1, (24, "Bob", 4))),
+        (table.Commit, ()),
+        (table.Disconnect, ()),
+    ]:
+        table.UpdateInsertRow(None, (6, "Charlie", 1))
+        assert table.pending_inserts
+        method(*args)
+        assert not table.pending_inserts
+
+    assert insert_data_many.call_count == 6
+
+    # in autocommit mode rows are inserted immediately, returning the real ID
+    connection.getautocommit.return_value = True
+    assert table.UpdateInsertRow(None, (6, "Charlie", 1)) == 10
+    assert not table.pending_inserts
+
+
+def test_transaction(mocker: MockerFixture) -> None:
+    """
+    Test that transaction methods are passed to the adapter.
+    """
+    adapter = FakeAdapterBulkInsert()
+    hooks = {
+        name: mocker.spy(adapter, name)
+        for name in ["begin", "sync", "commit", "rollback"]
+    }
+    insert_data_many = mocker.spy(adapter, "insert_data_many")
+    connection = mocker.MagicMock()
+    connection.getautocommit.return_value = False
+    table = VTTable(adapter, connection=connection)
+
+    table.Begin()
+    hooks["begin"].assert_called_once()
+    table.UpdateInsertRow(None, (6, "Charlie", 1))
+    table.Sync()
+    insert_data_many.assert_called_once()
+    hooks["sync"].assert_called_once()
+    table.Commit()
+    hooks["commit"].assert_called_once()
+
+    # buffered inserts are discarded on rollback
+    table.Begin()
+    table.UpdateInsertRow(None, (6, "Charlie", 1))
+    table.Rollback()
+    assert not table.pending_inserts
+    hooks["rollback"].assert_called_once()
+    table.Commit()
+    insert_data_many.assert_called_once()
+
+    # SQLite doesn't call ``Begin`` for tables created in the transaction
+    table.UpdateDeleteRow(0)
+    assert hooks["begin"].call_count == 3
+    table.UpdateChangeRow(1, 1, (24, "Bob", 4))
+    assert hooks["begin"].call_count == 3
+
+
 def test_update_delete_row() -> None:
     """
     Test ``UpdateDeleteRow``.
     """
     adapter = FakeAdapter()
-    table = VTTable(adapter)
+    table = VTTable(adapter, statistics=True)
+    assert table.statistics is not None
+    table.statistics.stale = False
 
     table.UpdateDeleteRow(0)
+    assert table.statistics.stale
     assert list(adapter.get_data({}, [])) == [
         {"age": 23, "name": "Bob", "pets": 3, "rowid": 1},
     ]
@@ -335,6 +690,25 @@ def test_cursor() -> None:
     cursor.Close()
 
 
+def test_cursor_with_batches() -> None:
+    """
+    Test the cursor with an adapter that implements ``get_batches``.
+    """
+    table = VTTable(FakeAdapterWithBatches())
+    cursor = table.Open()
+    cursor.Filter(42, json.dumps({"indexes": [], "orderbys_to_process": []}), [])
+
+    rows = []
+    while not cursor.Eof():
+        rows.append(cursor.current_row)
+        cursor.Next()
+    assert rows == [
+        (0, 20.0, "Alice", None),
+        (1, 23.0, "Bob", None),
+        (2, 6.0, "Charlie", None),
+    ]
+
+
 def test_cursor_with_constraints() -> None:
     """
     Test filtering a cursor.
@@ -495,6 +869,48 @@ def test_convert_rows_to_sqlite() -> None:
     ]
 
 
+def test_convert_batches_to_sqlite() -> None:
+    """
+    Test that batches get converted to types supported by SQLite.
+    """
+    batches: Iterable[Batch] = [
+        {
+            "rowid": [0, 1],
+            "INTEGER": [1, None],
+            "TIMESTAMP": [
+                datetime.datetime(2021, 1, 1, 0, 0, tzinfo=datetime.timezone.utc),
+                None,
+            ],
+            "BOOLEAN": [False, True],
+        },
+    ]
+    columns = {k: v() for k, v in type_map.items()}
+    assert list(convert_batches_to_sqlite(columns, iter(batches))) == [
+        {
+            "rowid": [0, 1],
+            "INTEGER": ["1", None],
+            "TIMESTAMP": ["2021-01-01T00:00:00+00:00", None],
+            "BOOLEAN": [0, 1],
+        },
+    ]
+
+
+def test_iterate_batches() -> None:
+    """
+    Test converting batches into tuples.
+    """
+    batches: Iterable[Batch] = [
+        {"rowid": [0, 1], "a": [10, 20]},
+        {"rowid": [], "a": []},
+        {"rowid": [2], "a": [30], "b": ["c"]},
+    ]
+    assert list(iterate_batches(iter(batches), ["rowid", "a", "b"])) == [
+        (0, 10, None),
+        (1, 20, None),
+        (2, 30, "c"),
+    ]
+
+
 def test_convert_rows_from_sqlite() -> None:
     """
     Test that rows get converted from the types supported by SQLite.
@@ -607,3 +1023,270 @@ def test_get_limit_offset() -> None:
     limit, offset = get_limit_offset([(-1, 2)], [10])
     assert limit is None
     assert offset is None
+
+
+def test_get_converter() -> None:
+    """
+    Test ``get_converter``.
+    """
+    assert get_converter(Float().parse) is None
+    assert get_converter(String().format) is None
+
+    # pylint: disable=comparison-with-callable
+    field = StringInteger()
+    assert get_converter(field.parse) == field.parse
+    assert get_converter(field.format) == field.format
+
+
+def test_fuse_converters() -> None:
+    """
+    Test ``fuse_converters``.
+    """
+    assert fuse_converters(None, None) is None
+    assert fuse_converters(str, None) is str
+    assert fuse_converters(None, str) is str
+
+    converter = fuse_converters(int, str)
+    assert converter is not None
+    assert converter(1.5) == "1"
+
+
+def test_get_sqlite_formatters() -> None:
+    """
+    Test that SQLite formatters are cached by column signature.
+    """
+    formatters = get_sqlite_formatters(("REAL", "TEXT", "INTEGER"))
+    assert formatters[:2] == (None, None)
+    assert formatters[2] is not None
+    assert get_sqlite_formatters(("REAL", "TEXT", "INTEGER")) is formatters
+
+
+def test_get_batch_converters() -> None:
+    """
+    Test ``get_batch_converters``.
+    """
+    columns: Dict[str, Field] = {
+        "a": Float(),
+        "b": ISODateTime(),
+        "c": StringInteger(),
+    }
+
+    converters = get_batch_converters(columns)
+    assert converters["rowid"] is None
+    assert converters["a"] is None
+    assert converters["b"](  # type: ignore
+        datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc),
+    ) == ("2021-01-01T00:00:00+00:00")
+
+    # adapter field and SQLite conversion are fused
+    converters = get_batch_converters(columns, from_storage=True)
+    assert converters["a"] is None
+    assert converters["b"]("2021-01-01T00:00:00Z") == (  # type: ignore
+        "2021-01-01T00:00:00+00:00"
+    )
+    assert converters["c"]("1") == "1"  # type: ignore
+
+
+def test_compile_row_converter() -> None:
+    """
+    Test ``compile_row_converter``.
+    """
+    assert compile_row_converter([None, None]) is None
+
+    convert = compile_row_converter([None, int, str])
+    assert convert is not None
+    assert convert((1, "2", 3)) == (1, 2, "3")
+
+
+def test_cursor_async(mocker: MockerFixture) -> None:
+    """
+    Test the cursor with an adapter that implements ``get_data_async``.
+    """
+    adapter = FakeAsyncAdapter()
+    get_data_async = mocker.spy(adapter, "get_data_async")
+    table = VTTable(adapter)
+    unconstrained = json.dumps({"indexes": [], "orderbys_to_process": []})
+    constrained = json.dumps({"indexes": [[1, 2]], "orderbys_to_process": []})
+
+    # the only plan has no arguments, so the scan starts when the cursor is opened
+    assert table.BestIndex([], [])[2] == unconstrained
+    cursor = table.Open()
+    assert get_data_async.call_count == 1
+    assert cursor.stream is not None
+
+    cursor.Filter(42, unconstrained, [])
+    assert get_data_async.call_count == 1
+    assert cursor.current_row == (0, 20.0, "Alice", "0")
+
+    # a different scan replaces the stream
+    stream = cursor.stream
+    close = mocker.spy(stream, "close")
+    cursor.Filter(42, constrained, ["Bob"])
+    assert get_data_async.call_count == 2
+    close.assert_called()
+    assert cursor.current_row == (1, 23.0, "Bob", "3")
+    cursor.Close()
+    assert cursor.stream is None
+
+    # a prefetched scan that doesn't match is discarded
+    cursor = table.Open()
+    cursor.Filter(42, constrained, ["Alice"])
+    assert get_data_async.call_count == 4
+    assert cursor.current_row == (0, 20.0, "Alice", "0")
+
+    # no scan is started when the plan needs arguments
+    table.BestIndex([(1, apsw.SQLITE_INDEX_CONSTRAINT_EQ)], [])
+    table.Open()
+    assert get_data_async.call_count == 4
+
+    # plans are reset for each statement
+    assert table.BestIndex([], [])[2] == unconstrained
+    assert table.plans == {unconstrained}
+    table.Open()
+    assert get_data_async.call_count == 5
+
+
+def test_cursor_async_cache(mocker: MockerFixture) -> None:
+    """
+    Test that scans are not started early when they're cached.
+    """
+    cache = ScanCache()
+    vt_module = VTModule(FakeAsyncAdapter, cache)
+    _, table = vt_module.Create(None, "", "", "table")
+    get_data_async = mocker.spy(table.adapter, "get_data_async")
+    index_name = table.BestIndex([], [])[2]
+
+    cursor = table.Open()
+    cursor.Filter(42, index_name, [])
+    while not cursor.Eof():
+        cursor.Next()
+    assert get_data_async.call_count == 1
+
+    cursor = table.Open()
+    assert cursor.stream is None
+    cursor.Filter(42, index_name, [])
+    assert cursor.current_row == (0, 20.0, "Alice", "0")
+    assert get_data_async.call_count == 1
+
+
+def test_join_async(registry: AdapterLoader) -> None:
+    """
+    Test a join between tables from an asynchronous adapter.
+    """
+    registry.add("dummy", FakeAsyncAdapter)
+    connection = connect(":memory:", ["dummy"])
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        SELECT a.name, b.name
+        FROM "dummy://a" AS a
+        JOIN "dummy://b" AS b ON a.pets < b.pets
+        """,
+    )
+    assert cursor.fetchall() == [("Alice", "Bob")]
+
+
+def test_join_statistics(registry: AdapterLoader) -> None:
+    """
+    Test that statistics are collected and shared by tables with the same URI.
+    """
+    registry.add("dummy", FakeAdapter)
+    connection = connect(":memory:", ["dummy"], statistics=True)
+    cursor = connection.cursor()
+    sql = """
+        SELECT a.name, b.age
+        FROM "dummy://a" AS a
+        JOIN "dummy://b" AS b ON a.name = b.name
+        ORDER BY a.name
+    """
+    assert cursor.execute(sql).fetchall() == [("Alice", 20.0), ("Bob", 23.0)]
+    assert cursor.execute(sql).fetchall() == [("Alice", 20.0), ("Bob", 23.0)]
+
+
+class FakeAdapterManyRows(FakeAdapter):
+
+    """
+    An adapter with more rows, so that joins filter the inner table several times.
+    """
+
+    get_cost = NetworkAPICostModel(1000)
+
+    def __init__(self):
+        super().__init__()
+
+        self.data = [
+            {"rowid": i, "name": name, "age": 20 + i, "pets": i % 2}
+            for i, name in enumerate(["Alice", "Bob", "Charlie", "Dana", "Alice"])
+        ]
+
+
+def test_join_buffer(mocker: MockerFixture, registry: AdapterLoader) -> None:
+    """
+    Test that the inner table of a join is read once, and filtered from a buffer.
+    """
+    registry.add("dummy", FakeAdapterManyRows)
+    get_data = mocker.spy(FakeAdapterManyRows, "get_data")
+    connection = connect(":memory:", ["dummy"])
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT a.age, b.age
+        FROM "dummy://a" AS a
+        JOIN "dummy://b" AS b ON a.name = b.name
+        ORDER BY a.age, b.age
+        """,
+    )
+    assert cursor.fetchall() == [
+        (20.0, 20.0),
+        (20.0, 24.0),
+        (21.0, 21.0),
+        (22.0, 22.0),
+        (23.0, 23.0),
+        (24.0, 20.0),
+        (24.0, 24.0),
+    ]
+
+    # the outer scan, and a single full scan of the inner table
+    assert [list(call.args[1]) for call in get_data.call_args_list] == [[], []]
+
+    # tables that are not joined are only buffered when a plan is used again
+    get_data.reset_mock()
+    cursor.execute('SELECT age FROM "dummy://a" WHERE name = ?', ("Bob",))
+    assert cursor.fetchall() == [(21.0,)]
+    assert [list(call.args[1]) for call in get_data.call_args_list] == [["name"]]
+
+    # plans with other operators are not buffered
+    get_data.reset_mock()
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM "dummy://a" AS a
+        JOIN "dummy://b" AS b ON a.age < b.age
+        """,
+    )
+    assert cursor.fetchall() == [(10,)]
+    assert get_data.call_count == 6
+
+
+def test_join_buffer_too_big(mocker: MockerFixture, registry: AdapterLoader) -> None:
+    """
+    Test that inner tables that are too big are read from the adapter.
+    """
+    mocker.patch("shillelagh.backends.apsw.buffer.DEFAULT_MAX_SIZE", new=10)
+    registry.add("dummy", FakeAdapterManyRows)
+    get_data = mocker.spy(FakeAdapterManyRows, "get_data")
+    connection = connect(":memory:", ["dummy"])
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM "dummy://a" AS a
+        JOIN "dummy://b" AS b ON a.name = b.name
+        """,
+    )
+    assert cursor.fetchall() == [(7,)]
+
+    # the full scan is tried only once
+    assert get_data.call_count == 7
@@ -10,6 +10,7 @@ import pytest
 from pytest_mock import MockerFixture
 
 from shillelagh.adapters.registry import AdapterLoader
+from shillelagh.statistics import clear_statistics
 
 _logger = logging.getLogger(__name__)
 
@@ -41,3 +42,13 @@ def registry(mocker: MockerFixture) -> Iterator[AdapterLoader]:
     mocker.patch("shillelagh.adapters.registry.registry", new=custom_registry)
     mocker.patch("shillelagh.backends.apsw.db.registry", new=custom_registry)
     yield custom_registry
+
+
+@pytest.fixture(autouse=True)
+def statistics() -> Iterator[None]:
+    """
+    Clear the table statistics after each test, so that query plans don't depend
+    on the tests that ran before.
+    """
+    yield
+    clear_statistics()
@@ -1,13 +1,27 @@
 """
 Tests for shillelagh.lib.
 """
+import io
+import itertools
+import random
+import tempfile
+import threading
+import time
 from typing import Any, Dict, Iterator, List, Tuple
 
 import pytest
 from pytest_mock import MockerFixture
 
 from shillelagh.exceptions import ImpossibleFilterError, ProgrammingError
-from shillelagh.fields import Boolean, Field, Float, Integer, Order, String
+from shillelagh.fields import (
+    Boolean,
+    Field,
+    Float,
+    Integer,
+    Order,
+    String,
+    StringDateTime,
+)
 from shillelagh.filters import (
     Equal,
     Filter,
@@ -20,8 +34,14 @@ from shillelagh.filters import (
 )
 from shillelagh.lib import (
     DELETED,
+    Analysis,
+    ChunkReader,
     RowIDManager,
+    Sampling,
+    SortKey,
+    Summary,
     analyze,
+    analyze_sample,
     apply_limit_and_offset,
     build_sql,
     combine_args_kwargs,
@@ -30,14 +50,21 @@ from shillelagh.lib import (
     escape_string,
     filter_data,
     find_adapter,
+    get_type,
     is_not_null,
     is_null,
+    merge_types,
+    prefetch,
+    sample_rows,
     serialize,
+    sort_data,
+    summarize,
     unescape_identifier,
     unescape_string,
     update_order,
+    widen_types,
 )
-from shillelagh.typing import RequestedOrder
+from shillelagh.typing import RequestedOrder, Row
 
 
 def test_row_id_manager_empty_range() -> None:
@@ -49,6 +76,15 @@ def test_row_id_manager_empty_range() -> None:
 
     assert str(excinfo.value) == "Argument ``ranges`` cannot be empty"
 
+    # empty ranges are ignored
+    manager = RowIDManager([range(0, 0)])
+    assert [manager.insert() for _ in range(3)] == [0, 1, 2]
+    assert list(manager) == [0, 1, 2]
+
+    manager = RowIDManager([range(0, 2), range(2, 2), range(5, 6)])
+    assert manager.ranges == [range(0, 2), range(5, 6)]
+    assert manager.insert() == 6
+
 
 def test_row_id_manager() -> None:
     """
@@ -106,6 +142,121 @@ def test_row_id_manager() -> None:
     ]
 
 
+def test_row_id_manager_runs() -> None:
+    """
+    Test that deleted rows are stored as runs.
+    """
+    manager = RowIDManager([range(0, 3), DELETED, range(3, 6)])
+    assert list(manager) == [0, 1, 2, -1, 3, 4, 5]
+    assert manager.get_position(3) == 4
+
+    manager.delete(2)
+    manager.delete(4)
+    manager.delete(3)
+    assert list(manager.runs()) == [range(0, 2), 4, range(5, 6)]
+    assert manager.ranges == [
+        range(0, 2),
+        DELETED,
+        DELETED,
+        DELETED,
+        DELETED,
+        range(5, 6),
+    ]
+    assert [manager.get_row_id(position) for position in range(7)] == [
+        0,
+        1,
+        -1,
+        -1,
+        -1,
+        -1,
+        5,
+    ]
+
+    with pytest.raises(Exception) as excinfo:
+        manager.get_position(3)
+    assert str(excinfo.value) == "Row ID 3 not found"
+
+    # deleted row IDs can be reused
+    assert manager.insert(3) == 3
+    assert manager.get_position(3) == 7
+    manager.delete(5)
+    assert manager.insert() == 4
+
+
+def test_row_id_manager_random() -> None:
+    """
+    Test ``RowIDManager`` against a list of row IDs.
+    """
+    rng = random.Random(42)
+    manager = RowIDManager([range(0, 100)])
+    row_ids = list(range(0, 100))
+
+    for _ in range(1000):
+        alive = [row_id for row_id in row_ids if row_id != -1]
+        if alive and rng.random() < 0.6:
+            row_id = rng.choice(alive)
+            manager.delete(row_id)
+            row_ids[row_ids.index(row_id)] = -1
+        elif rng.random() < 0.5:
+            row_ids.append(manager.insert())
+        else:
+            row_id = rng.choice(sorted(set(range(200)) - set(alive)))
+            row_ids.append(manager.insert(row_id))
+
+        assert list(manager) == row_ids
+        assert manager.get_max_row_id() == max(row_ids)
+        for position, row_id in enumerate(row_ids):
+            assert manager.get_row_id(position) == row_id
+            if row_id != -1:
+                assert manager.get_position(row_id) == position
+
+
+def test_row_id_manager_rollback() -> None:
+    """
+    Test rolling back changes to a ``RowIDManager``.
+    """
+    rng = random.Random(42)
+    manager = RowIDManager([range(0, 50), DELETED, range(60, 100)])
+    manager.rollback()
+
+    for _ in range(20):
+        state = (
+            list(manager),
+            manager.ranges,
+            list(manager.runs()),
+            manager.get_max_row_id(),
+        )
+        manager.begin()
+        for _ in range(rng.randint(1, 10)):
+            alive = [row_id for row_id in manager if row_id != -1]
+            if rng.random() < 0.5:
+                manager.delete(rng.choice(alive))
+            else:
+                manager.insert()
+        if rng.random() < 0.5:
+            manager.rollback()
+            assert state == (
+                list(manager),
+                manager.ranges,
+                list(manager.runs()),
+                manager.get_max_row_id(),
+            )
+        else:
+            manager.commit()
+            manager.rollback()
+            assert state != (
+                list(manager),
+                manager.ranges,
+                list(manager.runs()),
+                manager.get_max_row_id(),
+            )
+
+        for position, row_id in enumerate(manager):
+            assert manager.get_row_id(position) == row_id
+            if row_id != -1:
+                assert manager.get_position(row_id) == position
+
+
 def test_analyze() -> None:
     """
     Test ``analyze``.
@@ -184,6 +335,144 @@ def test_update_order_none() -> None:
     assert order == Order.NONE
 
 
+def test_get_type() -> None:
+    """
+    Test ``get_type``.
+    """
+    assert get_type("a") == String
+    assert get_type([1]) == String
+    assert get_type(1.0) == Float
+    assert get_type(1) == Integer
+    assert get_type(True) == Boolean
+    assert get_type(None) is None
+
+
+def test_merge_types() -> None:
+    """
+    Test ``merge_types``.
+    """
+    assert merge_types({"a": Integer, "b": String}, {"a": Float, "c": Boolean}) == {
+        "a": Float,
+        "b": String,
+        "c": Boolean,
+    }
+    assert merge_types({"a": String}, {"a": Boolean}) == {"a": String}
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [],
+        [1],
+        [None],
+        [1, 2, 2, 3],
+        [3, 2, 2, 1],
+        [2, 2, 1],
+        [1, 3, 2],
+        [1, 2.5, True],
+        [True, False],
+        [1, None, 2],
+        [None, 1, 2],
+        [1, 2, None],
+        [1, "a", 2],
+        [set(), 1],
+        [1, set()],
+    ],
+)
+def test_summary(values: List[Any]) -> None:
+    """
+    Test that merging the summaries of chunks is equivalent to ``analyze``.
+    """
+    rows = [{"a": value} for value in values]
+    expected = analyze(iter(rows))
+
+    for i in range(len(rows) + 1):
+        for j in range(i, len(rows) + 1):
+            summary = Summary()
+            for chunk in [rows[:i], rows[i:j], rows[j:]]:
+                summary = summary.merge(summarize(iter(chunk)))
+            assert (
+                summary.num_rows,
+                summary.get_order(),
+                summary.get_types(),
+            ) == expected
+
+
+def test_summary_missing_column() -> None:
+    """
+    Test merging summaries where a column is missing from one of the chunks.
+    """
+    first = summarize(iter([{"a": 1, "b": 2}, {"a": 2}]))
+    second = summarize(iter([{"a": 3}, {"a": 4, "b": 1}]))
+    summary = first.merge(second)
+    assert summary.num_rows == 4
+    assert summary.last_row == {"a": 4, "b": 1}
+    assert summary.get_order() == {"a": Order.ASCENDING, "b": Order.NONE}
+
+
+def test_sample_rows(mocker: MockerFixture) -> None:
+    """
+    Test ``sample_rows``.
+    """
+    rows = [{"a": i} for i in range(10)]
+
+    data = iter(rows)
+    assert sample_rows(data, 3) == (rows[:3], 4)
+    assert next(data) == {"a": 4}
+    assert sample_rows(iter(rows), 20) == (rows, 10)
+
+    randint = mocker.patch("shillelagh.lib.random.randint")
+    randint.side_effect = [0, 5, 1, 9, 2, 3, 4]
+    assert sample_rows(iter(rows), 3, Sampling.RESERVOIR) == (
+        [{"a": 3}, {"a": 5}, {"a": 7}],
+        10,
+    )
+    assert sample_rows(iter([]), 3, Sampling.RESERVOIR) == ([], 0)
+
+
+def test_analyze_sample() -> None:
+    """
+    Test ``analyze_sample``.
+    """
+    rows = [{"a": i, "b": "test"} for i in range(10)] + [{"a": 1.5, "b": "test"}]
+
+    assert analyze_sample(iter(rows), 20) == Analysis(
+        num_rows=11,
+        order={"a": Order.NONE, "b": Order.ASCENDING},
+        types={"a": Float, "b": String},
+        confident=True,
+    )
+    assert analyze_sample(iter(rows), 5) == Analysis(
+        num_rows=6,
+        order={"a": Order.NONE, "b": Order.NONE},
+        types={"a": Integer, "b": String},
+        confident=False,
+    )
+    analysis = analyze_sample(iter(rows), 5, Sampling.RESERVOIR)
+    assert analysis.num_rows == 11
+    assert not analysis.confident
+
+
+def test_widen_types() -> None:
+    """
+    Test ``widen_types``.
+    """
+    columns: Dict[str, Field] = {
+        "a": Integer(filters=[Equal], order=Order.ASCENDING, exact=True),
+        "b": String(),
+        "c": StringDateTime(),
+    }
+    widen_types(columns, {"rowid": 1, "a": 1, "b": 1.5, "c": "x", "d": 1})
+    assert columns["a"] == Integer(filters=[Equal], order=Order.ASCENDING, exact=True)
+    assert columns["b"] == String()
+
+    widen_types(columns, {"a": None})
+    assert columns["a"] == Integer(filters=[Equal], order=Order.ASCENDING, exact=True)
+
+    widen_types(columns, {"a": 1.5})
+    assert columns["a"] == Float(filters=[Equal], order=Order.ASCENDING, exact=True)
+
+
 def test_build_sql() -> None:
     """
     Test ``build_sql``.
@@ -420,6 +709,131 @@ def test_filter_data() -> None:
     assert str(excinfo.value) == "Invalid filter: [1, 2, 3]"
 
 
+def reference_sort(
+    rows: List[Row],
+    order: List[Tuple[str, RequestedOrder]],
+) -> List[Row]:
+    """
+    Sort rows one column at a time, from the last to the first.
+    """
+    rows = list(rows)
+    for column_name, requested_order in reversed(order):
+        rows.sort(
+            key=lambda row, name=column_name: (row[name] is not None, row[name]),
+            reverse=requested_order == Order.DESCENDING,
+        )
+    return rows
+
+
+@pytest.mark.parametrize(
+    "order",
+    [
+        [("a", Order.ASCENDING)],
+        [("a", Order.DESCENDING)],
+        [("a", Order.ASCENDING), ("b", Order.ASCENDING)],
+        [("a", Order.DESCENDING), ("b", Order.DESCENDING)],
+        [("a", Order.ASCENDING), ("b", Order.DESCENDING)],
+        [("b", Order.DESCENDING), ("a", Order.ASCENDING)],
+    ],
+)
+def test_sort_data(order: List[Tuple[str, RequestedOrder]]) -> None:
+    """
+    Test ``sort_data`` in memory, with a heap, and on disk.
+    """
+    generator = random.Random(42)
+    rows = [
+        {
+            "rowid": i,
+            "a": generator.choice([None, 1, 2, 3]),
+            "b": generator.choice(["x", "y", "z"]),
+        }
+        for i in range(100)
+    ]
+    expected = reference_sort(rows, order)
+
+    for buffer_size, limit in itertools.product([7, 100, 1000], [None, 0, 5, 50]):
+        result = list(sort_data(iter(rows), order, limit, buffer_size))
+        assert result == expected[:limit], (buffer_size, limit)
+
+
+def test_sort_data_spill(mocker: MockerFixture) -> None:
+    """
+    Test that rows are spilled to disk when they don't fit in memory.
+    """
+    mocker.patch("shillelagh.lib.RUN_BLOCK_SIZE", new=2)
+    mocker.patch("shillelagh.lib.SORT_BUFFER_SIZE", new=3)
+    temporary_file = mocker.spy(tempfile, "TemporaryFile")
+
+    rows = [{"a": i % 5} for i in range(10)]
+    assert list(sort_data(iter(rows), [("a", Order.ASCENDING)])) == sorted(
+        rows,
+        key=lambda row: row["a"],
+    )
+    assert temporary_file.call_count == 4
+
+    # exactly one buffer
+    temporary_file.reset_mock()
+    assert list(sort_data(iter(rows[:3]), [("a", Order.DESCENDING)])) == [
+        {"a": 2},
+        {"a": 1},
+        {"a": 0},
+    ]
+    assert temporary_file.call_count == 1
+
+    # small inputs are sorted in memory
+    temporary_file.reset_mock()
+    assert list(sort_data(iter(rows[:2]), [("a", Order.DESCENDING)])) == [
+        {"a": 1},
+        {"a": 0},
+    ]
+    temporary_file.assert_not_called()
+
+
+def test_sort_key() -> None:
+    """
+    Test ``SortKey``.
+    """
+    first = SortKey((1, "a"), (False, True))
+    second = SortKey((1, "b"), (False, True))
+    assert second < first
+    assert (first < second) is False
+    assert (first < SortKey((1, "a"), (False, True))) is False
+    assert first == SortKey((1, "a"), (False, True))
+    assert first != (1, "a")
+
+
+def test_filter_data_order() -> None:
+    """
+    Test sorting on multiple columns, with limit and offset.
+    """
+    data = [
+        {"a": 1, "b": 2},
+        {"a": 2, "b": 1},
+        {"a": 1, "b": 1},
+        {"a": None, "b": 3},
+    ]
+    order: List[Tuple[str, RequestedOrder]] = [
+        ("a", Order.ASCENDING),
+        ("b", Order.DESCENDING),
+    ]
+    assert list(filter_data(iter(data), {}, order)) == [
+        {"a": None, "b": 3},
+        {"a": 1, "b": 2},
+        {"a": 1, "b": 1},
+        {"a": 2, "b": 1},
+    ]
+    assert list(filter_data(iter(data), {}, order, limit=2, offset=1)) == [
+        {"a": 1, "b": 2},
+        {"a": 1, "b": 1},
+    ]
+    assert list(filter_data(iter(data), {}, order, buffer_size=1)) == [
+        {"a": None, "b": 3},
+        {"a": 1, "b": 2},
+        {"a": 1, "b": 1},
+        {"a": 2, "b": 1},
+    ]
+
+
 def test_find_adapter(mocker: MockerFixture) -> None:
     """
     Test ``find_adapter``.
@@ -478,3 +892,97 @@ def test_apply_limit_and_offset() -> None:
 
     rows = apply_limit_and_offset(iter(range(10)), offset=2)
     assert list(rows) == [2, 3, 4, 5, 6, 7, 8, 9]
+
+
+def test_prefetch() -> None:
+    """
+    Test ``prefetch``.
+    """
+    fetched: List[int] = []
+
+    def fetch(page: int) -> List[int]:
+        # later pages return first, but are still yielded in order
+        time.sleep(0.01 * (5 - page % 5))
+        fetched.append(page)
+        return [page] * (3 if page < 7 else 1)
+
+    def is_last(rows: List[int]) -> bool:
+        return len(rows) < 3
+
+    assert list(prefetch(fetch, range(5), 3)) == [[i] * 3 for i in range(5)]
+    assert list(prefetch(fetch, range(5), 1)) == [[i] * 3 for i in range(5)]
+
+    # stop on a short page, without requesting the pages after it
+    assert list(prefetch(fetch, itertools.count(), 1, is_last))[-1] == [7]
+    fetched.clear()
+    pages = list(prefetch(fetch, itertools.count(), 3, is_last))
+    assert pages == [[i] * 3 for i in range(7)] + [[7]]
+    assert max(fetched) <= 9
+
+    # the first page is fetched alone, since it might be the last one
+    requested: List[int] = []
+
+    def fetch_last(page: int) -> List[int]:
+        requested.append(page)
+        return [page]
+
+    assert list(prefetch(fetch_last, itertools.count(7), 3, is_last)) == [[7]]
+    assert requested == [7]
+
+
+def test_prefetch_close() -> None:
+    """
+    Test that closing the iterator stops prefetching.
+    """
+    started: List[int] = []
+    event = threading.Event()
+
+    def fetch(page: int) -> int:
+        started.append(page)
+        if page > 0:
+            event.wait(1)
+        return page
+
+    pages = prefetch(fetch, itertools.count(), 2)
+    assert next(pages) == 0
+    pages.close()
+    event.set()
+    assert len(started) <= 3
+
+
+def test_prefetch_error() -> None:
+    """
+    Test that errors are raised in order.
+    """
+
+    def fetch(page: int) -> int:
+        if page == 2:
+            raise ProgrammingError("Error")
+        return page
+
+    pages = prefetch(fetch, range(5), 3)
+    assert next(pages) == 0
+    assert next(pages) == 1
+    with pytest.raises(ProgrammingError) as excinfo:
+        next(pages)
+    assert str(excinfo.value) == "Error"
+
+    # errors after the last page are ignored
+    pages = prefetch(fetch, range(5), 3, lambda page: page == 1)
+    assert list(pages) == [0, 1]
+
+
+def test_chunk_reader() -> None:
+    """
+    Test ``ChunkReader``.
+    """
+    reader = ChunkReader(iter([b"a,b\n1,", b"", b"2\n", b"3,4\n"]))
+    assert reader.readable()
+    assert reader.readlines() == [b"a,b\n", b"1,2\n", b"3,4\n"]
+    assert reader.read() == b""
+
+    # parsers usually read in blocks
+    reader = ChunkReader(iter([b"hello", b"world"]))
+    buffered = io.BufferedReader(reader, buffer_size=3)
+    assert buffered.read(4) == b"hell"
+    assert buffered.read() == b"oworld"
@@ -0,0 +1,244 @@
+"""
+Tests for shillelagh.statistics.
+"""
+from collections import OrderedDict
+from typing import Iterator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from shillelagh.filters import Operator
+from shillelagh.statistics import (
+    ColumnStatistics,
+    ScanStatistics,
+    TableStatistics,
+    clear_statistics,
+    get_range_selectivity,
+    get_table_statistics,
+)
+from shillelagh.typing import Batch
+
+
+def get_batches() -> Iterator[Batch]:
+    """
+    Return batches with 100 rows.
+    """
+    for i in range(0, 100, 10):
+        yield {
+            "rowid": list(range(i, i + 10)),
+            "a": list(range(i, i + 10)),
+            "b": [None if j % 4 == 0 else j % 5 for j in range(i, i + 10)],
+        }
+
+
+def test_column_statistics(mocker: MockerFixture) -> None:
+    """
+    Test ``ColumnStatistics``.
+    """
+    column = ColumnStatistics()
+    column.update([3, None, 1, 3])
+    assert column.num_distinct == 2
+    assert column.nulls == 1
+    assert (column.min, column.max) == (1, 3)
+
+    column.update([None])
+    column.update([0, 2])
+    assert column.num_distinct == 4
+    assert (column.min, column.max) == (0, 3)
+
+    # values of different types, or that are not numbers, have no range
+    column.update(["a"])
+    assert (column.min, column.max) == (None, None)
+    column.update([20])
+    assert (column.min, column.max) == (None, None)
+
+    mocker.patch("shillelagh.statistics.MAX_DISTINCT_VALUES", new=5)
+    column.update([10, 11])
+    assert column.num_distinct is None
+    column.update([12])
+    assert column.num_distinct is None
+
+    # values are not kept after the scan
+    column = ColumnStatistics()
+    column.update(["secret"])
+    column.finish()
+    assert column.num_distinct == 1
+    assert "secret" not in vars(column).values()
+
+
+def test_get_range_selectivity() -> None:
+    """
+    Test ``get_range_selectivity``.
+    """
+    assert get_range_selectivity(Operator.GE, 150, 0, 100) == 0
+    assert get_range_selectivity(Operator.LT, -10, 0, 100) == 0
+    assert get_range_selectivity(Operator.LT, 5, 5, 5) == 1
+    assert get_range_selectivity(Operator.GT, 4, 5, 5) == 1
+    assert get_range_selectivity(Operator.GT, True, 0, 1) is None
+
+
+def test_record() -> None:
+    """
+    Test recording scans.
+    """
+    statistics = TableStatistics()
+    assert statistics.estimate_rows([]) is None
+
+    batches = statistics.record([], get_batches(), column_names=["a", "b"])
+    assert sum(len(batch["rowid"]) for batch in batches) == 100
+    assert statistics.num_rows == 100
+    assert statistics.columns["a"].num_distinct == 100
+    assert statistics.columns["b"].num_distinct == 5
+    assert statistics.columns["b"].nulls == 25
+    assert statistics.scans[()].scans == 1
+    assert statistics.scans[()].rows == 100
+
+    # scans with filters don't update the column statistics
+    batches = statistics.record([("a", Operator.GT)], get_batches(), column_names=["a"])
+    list(batches)
+    assert statistics.scans[(("a", Operator.GT),)].rows == 100
+    assert statistics.columns["a"].num_distinct == 100
+
+    # scans with a limit are not recorded, nor scans that are not fully consumed
+    list(statistics.record([("a", Operator.EQ)], get_batches(), limited=True))
+    next(statistics.record([("b", Operator.EQ)], get_batches()))
+    assert list(statistics.scans) == [(), (("a", Operator.GT),)]
+
+
+def test_record_columns(mocker: MockerFixture) -> None:
+    """
+    Test that columns are only analyzed again after the table is modified.
+    """
+    update = mocker.spy(ColumnStatistics, "update")
+    statistics = TableStatistics()
+
+    list(statistics.record([], get_batches(), column_names=["a"]))
+    assert update.call_count == 10
+    a = statistics.columns["a"]
+
+    list(statistics.record([], get_batches(), column_names=["a", "b"]))
+    assert update.call_count == 20
+    assert statistics.columns["a"] is a
+    assert statistics.columns["b"].num_distinct == 5
+    assert statistics.scans[()].scans == 2
+
+    # after a modification the columns not scanned are discarded
+    statistics.invalidate()
+    list(statistics.record([], get_batches(), column_names=["b"]))
+    assert update.call_count == 30
+    assert list(statistics.columns) == ["b"]
+    assert not statistics.stale
+
+
+def test_estimate_rows() -> None:
+    """
+    Test estimating the number of rows returned by a scan.
+    """
+    statistics = TableStatistics()
+    list(statistics.record([], get_batches(), column_names=["a", "b"]))
+
+    assert statistics.estimate_rows([]) == 100
+    assert statistics.estimate_rows([("a", Operator.EQ)]) == 1
+    assert statistics.estimate_rows([("b", Operator.EQ)]) == 20
+    assert statistics.estimate_rows([("b", Operator.NE)]) == pytest.approx(55)
+    assert statistics.estimate_rows([("b", Operator.IS_NULL)]) == 25
+    assert statistics.estimate_rows([("b", Operator.IS_NOT_NULL)]) == 75
+    assert statistics.estimate_rows([("a", Operator.GE)], [75]) == pytest.approx(
+        100 * 24 / 99,
+    )
+    assert statistics.estimate_rows([("a", Operator.LT)]) == pytest.approx(100 / 3)
+    assert statistics.estimate_rows([("c", Operator.LIKE)]) == 25
+    statistics.columns["c"] = ColumnStatistics()
+    statistics.columns["c"].update(["a", "z"])
+    assert statistics.estimate_rows([("c", Operator.GT)], ["m"]) == pytest.approx(
+        100 / 3,
+    )
+    assert statistics.estimate_rows([("a", Operator.GT)], ["m"]) == pytest.approx(
+        100 / 3,
+    )
+    assert statistics.estimate_rows(
+        [("a", Operator.GE), ("a", Operator.LT), ("a", Operator.GT)],
+        [10, 20, 5],
+    ) == pytest.approx(100 * 10 / 99)
+
+    # observed scans are used when the values are not known
+    statistics.scans[(("a", Operator.GE),)] = ScanStatistics(2, 10, 0.1)
+    assert statistics.estimate_rows([("a", Operator.GE)]) == 5
+    assert statistics.estimate_rows([("a", Operator.GE)], [50]) == pytest.approx(
+        100 * 49 / 99,
+    )
+
+    # columns with too many distinct values are assumed to be unique
+    statistics.columns["a"].num_distinct = None
+    assert statistics.estimate_rows([("a", Operator.EQ)]) == 1
+    statistics.columns["a"].min = None
+    assert statistics.estimate_rows([("a", Operator.GT)], [10]) == pytest.approx(
+        100 / 3,
+    )
+
+    # empty table
+    statistics = TableStatistics()
+    list(statistics.record([], iter([]), column_names=["a"]))
+    assert statistics.estimate_rows([("a", Operator.EQ)]) == 1
+
+
+def test_estimate_cost() -> None:
+    """
+    Test estimating the cost of a scan.
+    """
+    statistics = TableStatistics()
+    statistics.num_rows = 1000
+
+    # a fixed cost of 1 second per scan, and 1 ms per row
+    statistics.scans = {
+        (): ScanStatistics(1, 1000, 2.0),
+        (("a", Operator.EQ),): ScanStatistics(10, 100, 10.1),
+    }
+    assert statistics.get_time_model() == (pytest.approx(1.0), pytest.approx(0.001))
+    assert statistics.estimate_cost([], [], 1000) == pytest.approx(2000)
+    assert statistics.estimate_cost([("b", Operator.EQ)], [], 100) == pytest.approx(
+        1100,
+    )
+    assert statistics.estimate_cost(
+        [("b", Operator.EQ)],
+        [(0, False)],
+        100,
+    ) == pytest.approx(1100 + 100 * 6.643856)
+
+    # with a single shape the time is assumed to be proportional to the rows
+    statistics.scans = {(): ScanStatistics(2, 2000, 2.0)}
+    assert statistics.get_time_model() == (0.0, 0.001)
+    assert statistics.estimate_cost([("a", Operator.EQ)], [], 10) == pytest.approx(10)
+
+    statistics.scans = {(): ScanStatistics(1, 10, 0.0)}
+    assert statistics.estimate_cost([("a", Operator.EQ)], [], 10) == 10
+
+
+def test_get_table_statistics() -> None:
+    """
+    Test that statistics are shared by tables with the same key.
+    """
+    statistics = get_table_statistics(("FakeAdapter", ("a",)))
+    assert get_table_statistics(("FakeAdapter", ("a",))) is statistics
+    assert get_table_statistics(("FakeAdapter", ("b",))) is not statistics
+
+    clear_statistics()
+    assert get_table_statistics(("FakeAdapter", ("a",))) is not statistics
+
+
+def test_get_table_statistics_lru(mocker: MockerFixture) -> None:
+    """
+    Test that only the statistics of recently used tables are kept, by key hash.
+    """
+    mocker.patch("shillelagh.statistics.MAX_TABLES", new=2)
+    _statistics = mocker.patch("shillelagh.statistics._statistics", new=OrderedDict())
+
+    a = get_table_statistics(("FakeAdapter", ("token=secret",)))
+    b = get_table_statistics(("FakeAdapter", ("b",)))
+    assert get_table_statistics(("FakeAdapter", ("token=secret",))) is a
+    assert all(isinstance(key, bytes) and b"secret" not in key for key in _statistics)
+
+    get_table_statistics(("FakeAdapter", ("c",)))
+    assert len(_statistics) == 2
+    assert get_table_statistics(("FakeAdapter", ("token=secret",))) is a
+    assert get_table_statistics(("FakeAdapter", ("b",))) is not b